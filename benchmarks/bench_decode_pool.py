@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Decode Pool Benchmark
+多进程解码池扩展性测试
+
+多个直播间的推送帧分别在当前进程中解码和交给 1..N 个工作进程解码，
+测量消息吞吐量随工作进程数的变化，并检查每个直播间的消息顺序。
+
+推送帧用protobuf线格式编码（字符串和varint字段），解码函数是纯Python实现，
+与 betterproto 解码一样受GIL限制；不依赖生成的 protobuf 绑定。
+
+用法:
+    python benchmarks/bench_decode_pool.py [--rooms 32] [--frames 200] [--messages 20] [--workers 1 2 4]
+"""
+
+import os
+import sys
+import gzip
+import time
+import zlib
+import random
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.decode_pool import DecodePool
+
+
+def encode_varint(value):
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def encode_field(number, value):
+    if isinstance(value, int):
+        return encode_varint(number << 3) + encode_varint(value)
+    data = value.encode('utf-8') if isinstance(value, str) else value
+    return encode_varint((number << 3) | 2) + encode_varint(len(data)) + data
+
+
+def decode_fields(data):
+    """
+    纯Python解析protobuf线格式（只支持varint和长度前缀字段）
+    """
+    fields = {}
+    position = 0
+    size = len(data)
+    while position < size:
+        key = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            key |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        value = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        if key & 7 == 2:
+            fields[key >> 3] = data[position:position + value]
+            position += value
+        else:
+            fields[key >> 3] = value
+    return fields
+
+
+def build_frame(room, seq_start, count, rng):
+    """
+    生成一帧: gzip(Response{ repeated Message{ method, payload=ChatMessage, msgId } })
+    """
+    messages = []
+    for seq in range(seq_start, seq_start + count):
+        chat = (encode_field(1, f"用户{rng.randint(1, 100000)}") +
+                encode_field(2, rng.randint(1, 1 << 40)) +
+                encode_field(3, "主播好" * rng.randint(1, 8)) +
+                encode_field(4, seq) +
+                encode_field(5, room))
+        message = encode_field(1, "WebcastChatMessage") + encode_field(2, chat) + encode_field(3, seq)
+        messages.append(encode_field(1, message))
+    return gzip.compress(b''.join(messages) + encode_field(2, str(seq_start)), compresslevel=6)
+
+
+def decode_bench_frame(payload, receive_time):
+    """
+    解码函数: 解压后逐条解析消息
+    """
+    data = zlib.decompress(payload, 31)
+    events = []
+    position = 0
+    # 重复字段 messages 在前，逐条解析
+    while position < len(data):
+        tag = data[position]
+        if tag != 0x0A:
+            break
+        position += 1
+        length = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        message = decode_fields(data[position:position + length])
+        position += length
+        chat = decode_fields(message[2])
+        events.append({
+            'type': 1,
+            'method': message[1].decode('utf-8'),
+            'msg_id': message[3],
+            'user': chat[1].decode('utf-8'),
+            'user_id': chat[2],
+            'content': chat[3].decode('utf-8'),
+            'seq': chat[4],
+            'receive_time': receive_time
+        })
+    cursor = decode_fields(data[position:]).get(2, b'').decode('utf-8')
+    decode_time = time.time()
+    for event in events:
+        event['cursor'] = cursor
+        event['decode_time'] = decode_time
+    return events
+
+
+class OrderChecker:
+    def __init__(self, rooms, expected):
+        self.last_seq = {room: -1 for room in range(rooms)}
+        self.out_of_order = 0
+        self.events = 0
+        self.expected = expected
+        self.done = threading.Event()
+
+    def handler(self, room):
+        def on_events(events):
+            last = self.last_seq[room]
+            for event in events:
+                if event['seq'] <= last:
+                    self.out_of_order += 1
+                last = event['seq']
+            self.last_seq[room] = last
+            self.events += len(events)
+            if self.events >= self.expected:
+                self.done.set()
+        return on_events
+
+
+def run_inline(frames, expected):
+    checker = OrderChecker(len(frames), expected)
+    handlers = [checker.handler(room) for room in range(len(frames))]
+    start = time.perf_counter()
+    for index in range(len(frames[0])):
+        for room, room_frames in enumerate(frames):
+            handlers[room](decode_bench_frame(room_frames[index], time.time()))
+    return time.perf_counter() - start, checker
+
+
+def run_pool(frames, expected, workers):
+    pool = DecodePool(workers, decoder=decode_bench_frame)
+    pool.start()
+    checker = OrderChecker(len(frames), expected)
+    for room in range(len(frames)):
+        pool.register_room(room, checker.handler(room))
+
+    # 预热: 等待工作进程启动完成
+    warmup = build_frame(0, 0, 1, random.Random(0))
+    for index in range(workers):
+        room = next(f"warmup-{key}" for key in range(10000) if pool.worker_for(f"warmup-{key}") == index)
+        pool.register_room(room, lambda events: None)
+        pool.submit(room, warmup)
+    while pool.frames_decoded < workers:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    for index in range(len(frames[0])):
+        for room, room_frames in enumerate(frames):
+            pool.submit(room, room_frames[index])
+    checker.done.wait(300)
+    elapsed = time.perf_counter() - start
+    stats = pool.stats()
+    pool.stop()
+    return elapsed, checker, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程解码池扩展性测试")
+    parser.add_argument('--rooms', type=int, default=32, help="直播间数量")
+    parser.add_argument('--frames', type=int, default=200, help="每个直播间的帧数")
+    parser.add_argument('--messages', type=int, default=20, help="每帧的消息数")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}), help="工作进程数")
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    frames = [
+        [build_frame(room, index * args.messages, args.messages, rng) for index in range(args.frames)]
+        for room in range(args.rooms)
+    ]
+    expected = args.rooms * args.frames * args.messages
+    print(f"CPU核数: {os.cpu_count()}, 直播间: {args.rooms}, 帧: {args.rooms * args.frames}, 消息: {expected}")
+
+    elapsed, checker = run_inline(frames, expected)
+    baseline = expected / elapsed
+    print(f"当前进程解码: {baseline:,.0f} 条/秒, 乱序 {checker.out_of_order}")
+
+    for workers in args.workers:
+        elapsed, checker, stats = run_pool(frames, expected, workers)
+        rate = checker.events / elapsed
+        print(f"{workers:2d} 个工作进程: {rate:,.0f} 条/秒 ({rate / baseline:.2f}x), "
+              f"收到 {checker.events}/{expected}, 乱序 {checker.out_of_order}, "
+              f"缓冲区等待 {stats['ring_producer_waits']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export Benchmark
+消息导出性能测试
+
+以固定速率（或尽可能快地）向事件总线发布合成消息，分别导出为 JSONL / CSV、压缩 / 不压缩，统计:
+
+- 持续写入速率（条/秒、MB/s）和文件大小
+- 发布一条消息的耗时（导出不应拖慢发布）
+- 队列满时丢弃的消息数
+
+--slow-write-ms 在每批写入前额外等待，模拟慢速磁盘，此时发布耗时应保持不变，多出的消息被丢弃。
+
+用法:
+    python benchmarks/bench_export.py [--messages 200000] [--rate 0] [--slow-write-ms 0]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.message_types import MessageType
+from core.event_bus import EventBus
+from core.export_sink import ExportSink
+
+CJK_CHARS = "的一是不了人我在有他这中大来上个国到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长"
+
+
+def generate_events(count: int, rng: random.Random):
+    """生成合成消息（80% 聊天、15% 点赞、5% 礼物）"""
+    events = []
+    now = time.time()
+    for index in range(count):
+        event = {
+            'method': 'WebcastChatMessage',
+            'msg_id': 7300000000000000000 + index,
+            'cursor': f"t-{index}",
+            'server_time': int(now),
+            'receive_time': now,
+            'decode_time': now,
+            'user_id': rng.randint(1, 10 ** 12),
+            'user': ''.join(rng.choice(CJK_CHARS) for _ in range(rng.randint(2, 8))),
+        }
+        roll = rng.random()
+        if roll < 0.8:
+            event['type'] = int(MessageType.CHAT)
+            event['content'] = ''.join(rng.choice(CJK_CHARS) for _ in range(rng.randint(4, 40)))
+        elif roll < 0.95:
+            event.update(type=int(MessageType.LIKE), method='WebcastLikeMessage', count=rng.randint(1, 20))
+        else:
+            event.update(type=int(MessageType.GIFT), method='WebcastGiftMessage', gift_id=rng.randint(1, 500),
+                         gift_name="玫瑰", count=rng.randint(1, 99), diamond_count=1)
+        events.append(event)
+    return events
+
+
+class SlowExportSink(ExportSink):
+    """每批写入前额外等待的导出器"""
+
+    def __init__(self, delay: float, **kwargs):
+        super().__init__(**kwargs)
+        self._delay = delay
+
+    def _write(self, events):
+        time.sleep(self._delay)
+        super()._write(events)
+
+
+def run_case(events, fmt: str, compress: bool, args):
+    """
+    运行一种导出配置
+
+    Returns:
+        dict: 结果
+    """
+    directory = tempfile.mkdtemp(prefix='bench-export-')
+    try:
+        options = dict(directory=directory, fmt=fmt, compress=compress, queue_size=args.queue_size)
+        if args.slow_write_ms > 0:
+            sink = SlowExportSink(args.slow_write_ms / 1000, **options)
+        else:
+            sink = ExportSink(**options)
+        bus = EventBus()
+        sink.attach(bus)
+
+        interval = 1.0 / args.rate if args.rate > 0 else 0.0
+        publish_time = 0.0
+        started = time.perf_counter()
+        for index, event in enumerate(events):
+            if interval:
+                target = started + index * interval
+                delay = target - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            publish_started = time.perf_counter()
+            bus.publish(event)
+            publish_time += time.perf_counter() - publish_started
+        published = time.perf_counter()
+
+        # 等待写完队列
+        while sink.stats()['queue_depth'] > 0:
+            time.sleep(0.01)
+        sink.close(timeout=60.0)
+        elapsed = time.perf_counter() - started
+
+        stats = sink.stats()
+        disk_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        return {
+            'name': f"{fmt}{' + gzip' if compress else ''}",
+            'publish_ns': publish_time / len(events) * 1e9,
+            'publish_seconds': published - started,
+            'elapsed': elapsed,
+            'written': stats['events_written'],
+            'dropped': stats['dropped'],
+            'bytes': stats['bytes_written'],
+            'disk_bytes': disk_bytes,
+            'fsyncs': stats['fsyncs'],
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="消息导出性能测试")
+    parser.add_argument('--messages', type=int, default=200000, help="消息数")
+    parser.add_argument('--rate', type=float, default=0, help="发布速率（条/秒），0表示尽可能快")
+    parser.add_argument('--queue-size', type=int, default=50000, help="导出队列容量")
+    parser.add_argument('--slow-write-ms', type=float, default=0, help="每批写入前额外等待的时间（毫秒）")
+    parser.add_argument('--formats', default='jsonl,csv', help="导出格式，逗号分隔")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    events = generate_events(args.messages, rng)
+    print(f"消息数: {args.messages}, 发布速率: {'不限' if args.rate <= 0 else f'{args.rate:.0f} 条/秒'}, "
+          f"队列容量: {args.queue_size}, 慢速写入: {args.slow_write_ms:.0f} ms/批")
+    print(f"\n{'配置':<14}{'写入 条/秒':>12}{'写入 MB/s':>11}{'发布 ns/条':>12}{'丢弃':>9}"
+          f"{'原始 MB':>10}{'文件 MB':>10}{'fsync':>7}")
+
+    for fmt in args.formats.split(','):
+        for compress in (False, True):
+            result = run_case(events, fmt.strip(), compress, args)
+            elapsed = max(result['elapsed'], 1e-9)
+            print(f"{result['name']:<14}{result['written'] / elapsed:>12.0f}"
+                  f"{result['bytes'] / elapsed / (1024 * 1024):>11.2f}{result['publish_ns']:>12.0f}"
+                  f"{result['dropped']:>9}{result['bytes'] / (1024 * 1024):>10.1f}"
+                  f"{result['disk_bytes'] / (1024 * 1024):>10.1f}{result['fsyncs']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Heartbeat Benchmark
+心跳调度开销测试
+
+对比共享时间轮与每个直播间一个 threading.Timer 的定时器开销，
+模拟每个直播间按 heartbeatDuration 发送心跳、按 needAck 批量发送ACK。
+
+用法:
+    python benchmarks/bench_heartbeat.py [--rooms 100 500 1000] [--duration 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.heartbeat import HeartbeatScheduler
+
+
+class Counters:
+    def __init__(self):
+        self.heartbeats = 0
+        self.acks = 0
+        self.sends = 0
+        self.lock = threading.Lock()
+
+    def heartbeat(self):
+        with self.lock:
+            self.heartbeats += 1
+            self.sends += 1
+
+    def ack_batch(self, acks):
+        with self.lock:
+            self.acks += len(acks)
+            self.sends += 1
+
+
+def feed_responses(rooms, duration, response_rate, on_response):
+    """
+    模拟所有直播间按固定速率收到需要ACK的 Response
+    """
+    interval = 1.0 / response_rate
+    deadline = time.monotonic() + duration
+    next_time = time.monotonic()
+    while time.monotonic() < deadline:
+        for room in range(rooms):
+            on_response(room)
+        next_time += interval
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def bench_wheel(rooms, duration, heartbeat, response_rate):
+    counters = Counters()
+    scheduler = HeartbeatScheduler()
+    scheduler.start()
+    for room in range(rooms):
+        scheduler.register(room, counters.heartbeat, counters.ack_batch, heartbeat)
+
+    threads_before = threading.active_count()
+    cpu_start = time.process_time()
+    feed_responses(rooms, duration, response_rate,
+                   lambda room: scheduler.on_response(room, int(heartbeat * 1000), True, room))
+    cpu = time.process_time() - cpu_start
+    stats = scheduler.stats()
+    scheduler.stop()
+    return cpu, counters, threads_before, stats['timer_max_lateness_seconds']
+
+
+def bench_timers(rooms, duration, heartbeat, response_rate, ack_delay=0.1):
+    """
+    对照组: 每个直播间各自的心跳定时器和ACK定时器
+    """
+    counters = Counters()
+    state = {}
+    max_lateness = [0.0]
+    running = [True]
+
+    def start_heartbeat(room):
+        deadline = time.monotonic() + heartbeat
+
+        def fire():
+            lateness = time.monotonic() - deadline
+            max_lateness[0] = max(max_lateness[0], lateness)
+            if running[0]:
+                counters.heartbeat()
+                start_heartbeat(room)
+
+        timer = threading.Timer(heartbeat, fire)
+        timer.daemon = True
+        timer.start()
+        state.setdefault(room, {})['heartbeat'] = timer
+
+    lock = threading.Lock()
+
+    def on_response(room):
+        with lock:
+            room_state = state[room]
+            room_state.setdefault('acks', []).append(room)
+            if room_state.get('ack_timer') is None:
+                def flush():
+                    with lock:
+                        acks = room_state['acks']
+                        room_state['acks'] = []
+                        room_state['ack_timer'] = None
+                    if running[0] and acks:
+                        counters.ack_batch(acks)
+
+                timer = threading.Timer(ack_delay, flush)
+                timer.daemon = True
+                room_state['ack_timer'] = timer
+                timer.start()
+
+    for room in range(rooms):
+        start_heartbeat(room)
+
+    threads_before = threading.active_count()
+    cpu_start = time.process_time()
+    feed_responses(rooms, duration, response_rate, on_response)
+    cpu = time.process_time() - cpu_start
+    running[0] = False
+    return cpu, counters, threads_before, max_lateness[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="心跳调度开销测试")
+    parser.add_argument('--rooms', type=int, nargs='+', default=[100, 500, 1000], help="直播间数量")
+    parser.add_argument('--duration', type=float, default=5.0, help="每组测试时长（秒）")
+    parser.add_argument('--heartbeat', type=float, default=1.0, help="心跳间隔（秒）")
+    parser.add_argument('--response-rate', type=float, default=5.0, help="每个直播间每秒的Response数")
+    args = parser.parse_args()
+
+    for rooms in args.rooms:
+        for name, bench in (("共享时间轮", bench_wheel), ("每房间Timer", bench_timers)):
+            cpu, counters, threads, lateness = bench(rooms, args.duration, args.heartbeat, args.response_rate)
+            print(f"{rooms:5d} 个直播间 {name}: CPU {cpu / args.duration * 100:5.1f}%, "
+                  f"线程 {threads}, 心跳 {counters.heartbeats}, ACK {counters.acks} "
+                  f"({counters.sends} 次发送), 最大延迟 {lateness * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inflate Benchmark
+推送帧解压性能测试
+
+对比 gzip.decompress(bytes(slice)) 与 FrameInflater 对 memoryview 切片解压的
+吞吐量和每帧的临时内存分配
+
+用法:
+    python benchmarks/bench_inflate.py [--frames 20000] [--min-size 512] [--max-size 32768]
+"""
+
+import os
+import sys
+import gzip
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.frame_inflater import FrameInflater
+
+# 模拟推送帧头部长度（PushFrame中payload之前的字段）
+FRAME_HEADER_SIZE = 48
+
+
+def generate_frames(count, min_size, max_size, rng):
+    """
+    生成模拟推送帧: 帧头 + gzip压缩的Response
+
+    Response内容用重复度较高的文本模拟protobuf中的用户信息和URL
+
+    Returns:
+        list: (整帧数据, payload起始位置, payload结束位置)
+    """
+    words = [b'https://p3.douyinpic.com/img/', b'nickname', b'WebcastChatMessage',
+             b'avatar_thumb', b'\x08\x96\x01', b'\x12\x07', b'100x100', b'webp']
+    frames = []
+    for _ in range(count):
+        size = rng.randint(min_size, max_size)
+        parts = []
+        length = 0
+        while length < size:
+            word = rng.choice(words) + rng.randbytes(rng.randint(0, 6))
+            parts.append(word)
+            length += len(word)
+        payload = gzip.compress(b''.join(parts), compresslevel=6)
+        header = rng.randbytes(FRAME_HEADER_SIZE)
+        frames.append((header + payload, FRAME_HEADER_SIZE, FRAME_HEADER_SIZE + len(payload)))
+    return frames
+
+
+def run_naive(frames):
+    total = 0
+    for frame, start, end in frames:
+        total += len(gzip.decompress(bytes(frame[start:end])))
+    return total
+
+
+def run_inflater(frames, inflater):
+    total = 0
+    for frame, start, end in frames:
+        total += len(inflater.inflate(memoryview(frame)[start:end]))
+    return total
+
+
+def measure_throughput(name, func, frames, compressed_bytes):
+    start = time.perf_counter()
+    output_bytes = func(frames)
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {len(frames) / elapsed:,.0f} 帧/秒, "
+          f"输入 {compressed_bytes / elapsed / 1e6:.1f} MB/s, 输出 {output_bytes / elapsed / 1e6:.1f} MB/s")
+
+
+def measure_allocations(name, func, frames):
+    """
+    统计每帧解压过程中的临时内存峰值和分配块数
+    """
+    tracemalloc.start()
+    peak_total = 0
+    blocks_total = 0
+    for frame in frames:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        func([frame])
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak
+        blocks_total += sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'traceback'))
+    tracemalloc.stop()
+    print(f"{name}: 每帧临时内存峰值 {peak_total / len(frames) / 1024:.1f} KiB, "
+          f"每帧残留分配块 {blocks_total / len(frames):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="推送帧解压性能测试")
+    parser.add_argument('--frames', type=int, default=20000)
+    parser.add_argument('--min-size', type=int, default=512, help="解压后最小字节数")
+    parser.add_argument('--max-size', type=int, default=32768, help="解压后最大字节数")
+    parser.add_argument('--alloc-sample', type=int, default=200, help="内存分配统计的帧数")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    frames = generate_frames(args.frames, args.min_size, args.max_size, rng)
+    compressed_bytes = sum(end - start for _, start, end in frames)
+    print(f"帧数: {len(frames)}, 压缩数据: {compressed_bytes / 1e6:.1f} MB")
+
+    inflater = FrameInflater()
+    run_inflater(frames[:100], inflater)  # 预热缓冲大小
+
+    measure_throughput("gzip.decompress", run_naive, frames, compressed_bytes)
+    measure_throughput("FrameInflater  ", lambda f: run_inflater(f, inflater), frames, compressed_bytes)
+
+    sample = frames[:args.alloc_sample]
+    measure_allocations("gzip.decompress", run_naive, sample)
+    measure_allocations("FrameInflater  ", lambda f: run_inflater(f, inflater), sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keyword Alert Benchmark
+关键词告警性能测试
+
+对比Aho-Corasick自动机与逐个关键词匹配的吞吐量
+
+用法:
+    python benchmarks/bench_keyword_alert.py [--patterns 10000] [--corpus chat.jsonl]
+
+语料文件可以是JSONL（每行一个含 content 字段的消息）或纯文本（每行一条聊天）
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.keyword_alert import AhoCorasickAutomaton
+
+# 生成合成数据使用的字符集（常用汉字 + 英文字母）
+CJK_CHARS = "的一是不了人我在有他这中大来上个国到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长"
+LATIN_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def generate_patterns(count: int, rng: random.Random):
+    """生成随机关键词"""
+    patterns = set()
+    while len(patterns) < count:
+        length = rng.randint(3, 6)
+        charset = CJK_CHARS if rng.random() < 0.7 else LATIN_CHARS
+        patterns.add(''.join(rng.choice(charset) for _ in range(length)))
+    return list(patterns)
+
+
+def generate_corpus(count: int, patterns, rng: random.Random):
+    """生成合成聊天语料，约1%的消息包含关键词"""
+    corpus = []
+    for _ in range(count):
+        text = ''.join(rng.choice(CJK_CHARS) for _ in range(rng.randint(4, 40)))
+        if rng.random() < 0.01:
+            position = rng.randint(0, len(text))
+            text = text[:position] + rng.choice(patterns) + text[position:]
+        corpus.append(text)
+    return corpus
+
+
+def load_corpus(path: str):
+    """读取录制的聊天语料"""
+    corpus = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                try:
+                    content = json.loads(line).get('content')
+                except ValueError:
+                    content = line
+            else:
+                content = line
+            if content:
+                corpus.append(content)
+    return corpus
+
+
+def bench_automaton(automaton, corpus):
+    """测试自动机吞吐量"""
+    start = time.perf_counter()
+    hits = 0
+    for text in corpus:
+        if automaton.match(text):
+            hits += 1
+    return time.perf_counter() - start, hits
+
+
+def bench_naive(patterns, corpus):
+    """测试逐个关键词匹配的吞吐量"""
+    lowered = [p.lower() for p in patterns]
+    start = time.perf_counter()
+    hits = 0
+    for text in corpus:
+        text = text.lower()
+        if any(p in text for p in lowered):
+            hits += 1
+    return time.perf_counter() - start, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词告警性能测试")
+    parser.add_argument('--patterns', type=int, default=10000, help="关键词数量")
+    parser.add_argument('--messages', type=int, default=100000, help="合成语料消息数量")
+    parser.add_argument('--corpus', help="录制的聊天语料文件")
+    parser.add_argument('--naive-sample', type=int, default=2000, help="逐个匹配测试的消息数量")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    patterns = generate_patterns(args.patterns, rng)
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus(args.messages, patterns, rng)
+    total_chars = sum(len(text) for text in corpus)
+
+    start = time.perf_counter()
+    automaton = AhoCorasickAutomaton(patterns)
+    build_time = time.perf_counter() - start
+
+    print(f"关键词数量: {automaton.pattern_count}, 状态数量: {automaton.state_count}")
+    print(f"编译耗时: {build_time * 1000:.1f} ms")
+    print(f"语料: {len(corpus)} 条消息, {total_chars} 个字符")
+
+    elapsed, hits = bench_automaton(automaton, corpus)
+    print(f"Aho-Corasick: {len(corpus) / elapsed:,.0f} 条/秒, "
+          f"{total_chars / elapsed / 1e6:.2f} M字符/秒, 命中 {hits} 条")
+
+    sample = corpus[:args.naive_sample]
+    elapsed, hits = bench_naive(patterns, sample)
+    print(f"逐个匹配:     {len(sample) / elapsed:,.0f} 条/秒 (样本 {len(sample)} 条), 命中 {hits} 条")
+
+
+if __name__ == "__main__":
+    main()
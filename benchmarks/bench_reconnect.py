@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reconnect Benchmark
+断线重连测试
+
+启动一个会定期主动断开连接的本地模拟推送服务器，
+测量指数退避重连的恢复耗时，以及使用/不使用cursor续传时补发和丢失的消息数量。
+
+用法:
+    python benchmarks/bench_reconnect.py [--duration 10] [--rate 500] [--drop-interval 1.0]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.reconnect import ExponentialBackoff, ResumeCursor, ReconnectTracker
+
+
+class DroppingPushServer:
+    """
+    模拟推送服务器
+
+    按固定速率产生消息并保存历史；客户端连接时可携带cursor，
+    服务器先补发cursor之后的历史消息，再推送实时消息。
+    每个连接存活一段随机时间后被服务器主动断开。
+    """
+
+    def __init__(self, rate: int, drop_interval: float, seed: int = 1):
+        self._rate = rate
+        self._drop_interval = drop_interval
+        self._rng = random.Random(seed)
+        self._history = []
+        self._history_lock = threading.Condition()
+        self._running = True
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(8)
+
+    @property
+    def address(self):
+        return self._socket.getsockname()
+
+    @property
+    def produced(self) -> int:
+        return len(self._history)
+
+    def start(self):
+        threading.Thread(target=self._produce, daemon=True).start()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        with self._history_lock:
+            self._history_lock.notify_all()
+        self._socket.close()
+
+    def _produce(self):
+        interval = 1.0 / self._rate
+        next_time = time.perf_counter()
+        while self._running:
+            next_time += interval
+            with self._history_lock:
+                seq = len(self._history)
+                self._history.append(json.dumps({
+                    'seq': seq, 'cursor': str(seq), 'server_time': time.time()
+                }).encode() + b'\n')
+                self._history_lock.notify_all()
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def _accept(self):
+        while self._running:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            request = conn.makefile('rb').readline().decode().strip()
+            if request.startswith('RESUME '):
+                position = int(request.split(' ', 1)[1]) + 1
+            else:
+                with self._history_lock:
+                    position = len(self._history)
+
+            deadline = time.time() + self._rng.uniform(0.5, 1.5) * self._drop_interval
+            while self._running and time.time() < deadline:
+                with self._history_lock:
+                    while self._running and position >= len(self._history):
+                        self._history_lock.wait(0.05)
+                    batch = self._history[position:]
+                position += len(batch)
+                if batch:
+                    conn.sendall(b''.join(batch))
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+
+def run_client(address, duration: float, use_resume: bool):
+    """
+    运行带自动重连的客户端
+
+    Returns:
+        dict: 测试结果
+    """
+    backoff = ExponentialBackoff(base_delay=0.05, max_delay=2.0)
+    resume = ResumeCursor()
+    tracker = ReconnectTracker()
+    received = set()
+    recovery_times = []
+    reconnects = 0
+    deadline = time.time() + duration
+
+    while time.time() < deadline:
+        try:
+            conn = socket.create_connection(address, timeout=1.0)
+        except OSError:
+            tracker.on_disconnected()
+            time.sleep(backoff.next_delay())
+            continue
+
+        if use_resume and resume.available:
+            conn.sendall(f"RESUME {resume.cursor}\n".encode())
+        else:
+            conn.sendall(b"NEW\n")
+
+        recovery = tracker.on_reconnected()
+        if recovery is not None:
+            recovery_times.append(recovery)
+        backoff.reset()
+
+        try:
+            for line in conn.makefile('rb'):
+                message = json.loads(line)
+                resume.update(message)
+                tracker.is_recovered_message(message)
+                received.add(message['seq'])
+                if time.time() >= deadline:
+                    break
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+        if time.time() < deadline:
+            # 服务器断开连接，按退避等待后重连
+            reconnects += 1
+            tracker.on_disconnected()
+            time.sleep(backoff.next_delay())
+
+    return {
+        'received': received,
+        'reconnects': reconnects,
+        'recovery_times': sorted(recovery_times),
+        'recovered': tracker.recovered_messages
+    }
+
+
+def report(name, result):
+    received = result['received']
+    first, last = min(received), max(received)
+    lost = (last - first + 1) - len(received)
+    times = result['recovery_times']
+    if times:
+        mean = sum(times) / len(times)
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+        recovery = f"平均 {mean * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms"
+    else:
+        recovery = "无"
+    print(f"{name}: 重连 {result['reconnects']} 次, 恢复耗时 {recovery}, "
+          f"收到 {len(received)} 条, 补发 {result['recovered']} 条, 丢失 {lost} 条")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="断线重连测试")
+    parser.add_argument('--duration', type=float, default=10.0, help="每种模式的测试时长（秒）")
+    parser.add_argument('--rate', type=int, default=500, help="服务器每秒产生的消息数")
+    parser.add_argument('--drop-interval', type=float, default=1.0, help="服务器断开连接的平均间隔（秒）")
+    args = parser.parse_args()
+
+    for name, use_resume in (("cursor续传", True), ("不续传", False)):
+        server = DroppingPushServer(args.rate, args.drop_interval)
+        server.start()
+        try:
+            result = run_client(server.address, args.duration, use_resume)
+        finally:
+            server.stop()
+        report(name, result)
+
+
+if __name__ == "__main__":
+    main()
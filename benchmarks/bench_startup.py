@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup Benchmark
+程序启动耗时测试
+
+多次以 `python -X importtime gui_main.py --startup-benchmark` 启动程序（默认使用 offscreen 平台，
+不需要显示器），窗口显示后程序输出耗时并退出。统计:
+
+- 从启动进程到窗口显示的时间（含解释器启动），以及 gui_main 开始执行到窗口显示的时间
+- -X importtime 的导入耗时，按顶层包汇总，并列出最慢的模块
+- 窗口显示前是否已经导入了应在第一次连接时才导入的重量级模块
+
+--import-only 只测量导入主窗口模块的耗时，用于没有安装Qt平台插件的环境。
+
+用法:
+    python benchmarks/bench_startup.py [--runs 5] [--top 15] [--import-only]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+GUI_MAIN = os.path.join(ROOT, 'gui_main.py')
+
+# 与 gui_main.STARTUP_MARKER 相同（不导入 gui_main，避免在本进程中加载Qt）
+STARTUP_MARKER = "STARTUP_WINDOW_SHOWN_MS"
+
+# 窗口显示之前不应导入的模块（第一次连接或启用对应功能时才需要）
+DEFERRED_MODULES = (
+    'requests', 'websocket', 'py_mini_racer', 'execjs', 'betterproto', 'protobuf.douyin',
+    'core.live_data_manager', 'core.douyin_live_fetcher', 'core.decode_pool', 'core.ingest_process',
+    'multiprocessing', 'http.server', 'http.client', 'ssl',
+)
+
+# -X importtime 的输出行: "import time:  自身耗时 |  累计耗时 | 缩进 + 模块名"（微秒）
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 输出
+
+    Returns:
+        list: (模块名, 自身耗时(微秒), 累计耗时(微秒), 嵌套层级)
+    """
+    imports = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return imports
+
+
+def run_once(args, env):
+    """
+    启动一次程序
+
+    Returns:
+        tuple: (总耗时(毫秒), 程序内耗时(毫秒)或None, 导入列表)
+    """
+    if args.import_only:
+        command = [sys.executable, '-X', 'importtime', '-c', 'import ui.main_window']
+    else:
+        command = [sys.executable, '-X', 'importtime', GUI_MAIN, '--startup-benchmark']
+
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, timeout=args.timeout)
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    shown_ms = None
+    for line in result.stdout.splitlines():
+        if line.startswith(STARTUP_MARKER):
+            shown_ms = float(line.split()[1])
+    if result.returncode != 0 or (shown_ms is None and not args.import_only):
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"程序启动失败 (退出码 {result.returncode}):\n" + "\n".join(errors[-20:]))
+    return wall_ms, shown_ms, parse_importtime(result.stderr)
+
+
+def summarize_imports(runs, top):
+    """
+    输出导入耗时（各次运行取中位数）
+    """
+    package_self = defaultdict(list)
+    module_self = defaultdict(list)
+    module_cumulative = defaultdict(list)
+    for imports in runs:
+        per_package = defaultdict(int)
+        for name, self_us, cumulative_us, _ in imports:
+            per_package[name.split('.')[0]] += self_us
+            module_self[name].append(self_us)
+            module_cumulative[name].append(cumulative_us)
+        for package, total in per_package.items():
+            package_self[package].append(total)
+
+    total_ms = statistics.median(sum(self_us for _, self_us, _, _ in imports) for imports in runs) / 1000
+    print(f"\n导入总耗时（自身耗时之和）: {total_ms:.1f} ms")
+
+    print(f"\n按顶层包汇总的导入耗时 (前 {top} 个):")
+    ranked = sorted(package_self.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for package, values in ranked[:top]:
+        print(f"  {package:<32} {statistics.median(values) / 1000:8.1f} ms")
+
+    print(f"\n累计耗时最长的模块 (前 {top} 个):")
+    ranked = sorted(module_cumulative.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, values in ranked[:top]:
+        print(f"  {name:<32} {statistics.median(values) / 1000:8.1f} ms "
+              f"(自身 {statistics.median(module_self[name]) / 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="程序启动耗时测试")
+    parser.add_argument('--runs', type=int, default=5, help="启动次数（第一次用于生成字节码缓存，不计入）")
+    parser.add_argument('--top', type=int, default=15, help="列出的包和模块数")
+    parser.add_argument('--budget', type=float, default=1000.0, help="窗口显示的目标时间（毫秒）")
+    parser.add_argument('--timeout', type=float, default=60.0, help="单次启动的超时时间（秒）")
+    parser.add_argument('--import-only', action='store_true', help="只测量导入主窗口模块的耗时，不创建窗口")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    # 预热: 生成 .pyc 缓存，并让系统缓存共享库
+    run_once(args, env)
+
+    wall_times = []
+    shown_times = []
+    runs = []
+    for index in range(max(args.runs, 1)):
+        wall_ms, shown_ms, imports = run_once(args, env)
+        wall_times.append(wall_ms)
+        runs.append(imports)
+        if shown_ms is None:
+            print(f"第 {index + 1} 次: 进程总耗时 {wall_ms:.0f} ms")
+        else:
+            shown_times.append(shown_ms)
+            print(f"第 {index + 1} 次: 进程总耗时 {wall_ms:.0f} ms, gui_main 开始到窗口显示 {shown_ms:.0f} ms")
+
+    wall_median = statistics.median(wall_times)
+    print(f"\n进程总耗时中位数: {wall_median:.0f} ms（含解释器启动和退出）")
+    if shown_times:
+        shown_median = statistics.median(shown_times)
+        verdict = "达成" if wall_median < args.budget else "未达成"
+        print(f"窗口显示耗时中位数: {shown_median:.0f} ms, 目标 {args.budget:.0f} ms 以内: {verdict}")
+
+    imported = {name for imports in runs for name, _, _, _ in imports}
+    early = [name for name in DEFERRED_MODULES if name in imported]
+    if early:
+        print(f"\n窗口显示前已导入（应推迟到第一次连接）: {', '.join(early)}")
+    else:
+        print("\n窗口显示前没有导入需要推迟的模块")
+
+    summarize_imports(runs, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transport Benchmark
+传输方式对比测试
+
+在子进程中启动本地模拟服务器，按固定速率产生消息，分别用两种方式接收:
+
+- 推送: TCP长连接上的长度前缀帧（WebSocket推送的替身），有新消息即推送
+- 轮询: 保持连接的HTTP/1.1服务器模拟 im/fetch 接口，客户端使用 DouyinLivePollingFetcher，
+  间隔跟随响应中的 fetchInterval
+
+测量从服务器产生消息到客户端解码完成的延迟，以及客户端进程的CPU时间（服务器在子进程中，不计入）。
+消息用protobuf线格式编码，解码只扫描需要的字段，不依赖生成的 protobuf 绑定。
+
+用法:
+    python benchmarks/bench_transport.py [--duration 10] [--rate 200] [--fetch-interval 1000]
+"""
+
+import os
+import sys
+import gzip
+import time
+import struct
+import socket
+import argparse
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.frame_inflater import FrameInflater
+from core.message_decoder import scan_fields
+from core.polling_fetcher import DouyinLivePollingFetcher
+
+# 每次轮询响应最多携带的消息数
+MAX_MESSAGES_PER_RESPONSE = 5000
+
+# 推送服务器检查新消息的间隔（秒）
+PUSH_CHECK_INTERVAL = 0.005
+
+
+def encode_varint(value):
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def encode_field(number, value):
+    if isinstance(value, int):
+        return encode_varint(number << 3) + encode_varint(value)
+    data = value.encode('utf-8') if isinstance(value, str) else value
+    return encode_varint((number << 3) | 2) + encode_varint(len(data)) + data
+
+
+def build_message(seq, produce_time):
+    """
+    生成一条 Message{ method, payload=ChatMessage{content, 产生时间(微秒)}, msgId }
+    """
+    chat = encode_field(3, "主播好" * (1 + seq % 5)) + encode_field(9, int(produce_time * 1e6))
+    return encode_field(1, encode_field(1, "WebcastChatMessage") + encode_field(2, chat) + encode_field(3, seq))
+
+
+def build_response(messages, cursor, fetch_interval):
+    """
+    生成 gzip(Response{ messages, cursor, fetchInterval })
+    """
+    body = b''.join(messages) + encode_field(2, str(cursor)) + encode_field(3, fetch_interval)
+    return gzip.compress(body, compresslevel=6)
+
+
+class MessageSource:
+    """
+    按固定速率产生消息并保存历史
+    """
+
+    def __init__(self, rate):
+        self._rate = rate
+        self._history = []
+        self._condition = threading.Condition()
+
+    def run(self, duration):
+        start = time.time()
+        seq = 0
+        while True:
+            now = time.time()
+            if now - start >= duration:
+                return
+            due = int((now - start) * self._rate)
+            with self._condition:
+                while seq < due:
+                    seq += 1
+                    self._history.append(build_message(seq, now))
+                self._condition.notify_all()
+            time.sleep(0.002)
+
+    def after(self, cursor, limit=MAX_MESSAGES_PER_RESPONSE):
+        with self._condition:
+            messages = self._history[cursor:cursor + limit]
+        return messages, cursor + len(messages)
+
+    def wait_after(self, cursor, timeout):
+        with self._condition:
+            if len(self._history) <= cursor:
+                self._condition.wait(timeout)
+
+
+def run_push_server(port_queue, rate, duration):
+    source = MessageSource(rate)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    port_queue.put(listener.getsockname()[1])
+
+    conn, _ = listener.accept()
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    threading.Thread(target=source.run, args=(duration,), daemon=True).start()
+    cursor = 0
+    deadline = time.time() + duration + 1.0
+    try:
+        while time.time() < deadline:
+            source.wait_after(cursor, PUSH_CHECK_INTERVAL)
+            messages, cursor_after = source.after(cursor)
+            if not messages:
+                continue
+            cursor = cursor_after
+            frame = build_response(messages, cursor, 0)
+            conn.sendall(struct.pack('>I', len(frame)) + frame)
+    except OSError:
+        pass
+    finally:
+        conn.close()
+
+
+def run_polling_server(port_queue, rate, duration, fetch_interval):
+    source = MessageSource(rate)
+
+    class FetchHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            cursor = int(query.get('cursor', ['0'])[0] or 0)
+            messages, cursor = source.after(cursor)
+            body = build_response(messages, cursor, fetch_interval)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-protobuf')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FetchHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    threading.Thread(target=source.run, args=(duration,), daemon=True).start()
+    threading.Timer(duration + 1.0, server.shutdown).start()
+    server.serve_forever()
+
+
+def iter_messages(data):
+    """
+    逐条取出 Response 中的 Message（字段1）
+    """
+    position = 0
+    size = len(data)
+    while position < size and data[position] == 0x0A:
+        position += 1
+        length = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        yield data[position:position + length]
+        position += length
+
+
+class BenchDecoder:
+    """
+    替代 MessageDecoder: 只取出 msgId 和消息产生时间
+    """
+
+    def decode(self, data, receive_time=None):
+        events = []
+        for message in iter_messages(data):
+            fields = scan_fields(message, frozenset((2, 3)))
+            chat = scan_fields(fields[2], frozenset((9,)))
+            events.append({'msg_id': fields[3], 'produce_time': chat[9] / 1e6})
+        return {}, events
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.latencies = []
+        self.msg_ids = set()
+
+    def on_message(self, event):
+        self.latencies.append(time.time() - event['produce_time'])
+        self.msg_ids.add(event['msg_id'])
+
+
+def bench_push(args):
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_push_server, args=(port_queue, args.rate, args.duration))
+    server.start()
+    port = port_queue.get()
+
+    recorder = LatencyRecorder()
+    decoder = BenchDecoder()
+    inflater = FrameInflater()
+    cpu_start = time.process_time()
+    sock = socket.create_connection(('127.0.0.1', port))
+    stream = sock.makefile('rb')
+    try:
+        while True:
+            header = stream.read(4)
+            if len(header) < 4:
+                break
+            frame = stream.read(struct.unpack('>I', header)[0])
+            _, events = decoder.decode(inflater.inflate(frame), time.time())
+            for event in events:
+                recorder.on_message(event)
+    finally:
+        sock.close()
+    cpu = time.process_time() - cpu_start
+    server.join()
+    return recorder, cpu, inflater.frames
+
+
+def bench_polling(args):
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_polling_server,
+                                     args=(port_queue, args.rate, args.duration, args.fetch_interval))
+    server.start()
+    port = port_queue.get()
+
+    recorder = LatencyRecorder()
+    disconnected = threading.Event()
+    fetcher = DouyinLivePollingFetcher(
+        live_url='bench', on_message=recorder.on_message,
+        on_connection_change=lambda connected: None if connected else disconnected.set(),
+        room_id='1', decoder=BenchDecoder(),
+        endpoint=f"http://127.0.0.1:{port}/webcast/im/fetch/"
+    )
+    cpu_start = time.process_time()
+    fetcher.start()
+    disconnected.wait(args.duration + 0.5)
+    fetcher.stop()
+    cpu = time.process_time() - cpu_start
+    server.join()
+    return recorder, cpu, fetcher.polls
+
+
+def report(name, recorder, cpu, requests, duration):
+    latencies = sorted(recorder.latencies)
+    count = len(latencies)
+    if not count:
+        print(f"{name}: 没有收到消息")
+        return
+    p50 = latencies[count // 2]
+    p99 = latencies[min(count - 1, int(count * 0.99))]
+    print(f"{name}: 收到 {len(recorder.msg_ids)} 条, 请求/帧 {requests} 次, "
+          f"延迟 p50 {p50 * 1000:.1f} ms / p99 {p99 * 1000:.1f} ms, "
+          f"客户端CPU {cpu * 1000:.0f} ms（{cpu / duration * 100:.1f}%，每千条 {cpu / count * 1e6:.1f} ms）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="传输方式对比测试")
+    parser.add_argument('--duration', type=float, default=10.0, help="每种方式的测试时长（秒）")
+    parser.add_argument('--rate', type=int, default=200, help="服务器每秒产生的消息数")
+    parser.add_argument('--fetch-interval', type=int, default=1000,
+                        help="轮询服务器返回的 fetchInterval（毫秒）")
+    args = parser.parse_args()
+
+    print(f"消息速率 {args.rate} 条/秒, 每种方式 {args.duration:.0f} 秒, fetchInterval {args.fetch_interval} ms")
+    recorder, cpu, frames = bench_push(args)
+    report("推送", recorder, cpu, frames, args.duration)
+    recorder, cpu, polls = bench_polling(args)
+    report("轮询", recorder, cpu, polls, args.duration)
+
+
+if __name__ == "__main__":
+    main()
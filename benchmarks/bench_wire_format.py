@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wire Format Benchmark
+消息二进制编码性能测试
+
+用模拟的标准化消息批次对比 wire_format、JSON 和 pickle 的
+编码后大小、编码速度和解码速度。
+
+用法:
+    python benchmarks/bench_wire_format.py [--batches 200] [--batch-size 256] [--users 2000]
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.wire_format import encode_batch, decode_batch
+from models.message_types import MessageType, MessagePriority
+
+GIFTS = ['小心心', '玫瑰', '抖音', '人气票', '加油鸭', '为你闪耀', '嘉年华']
+PHRASES = ['主播好', '来了来了', '666', '这个怎么买', '哈哈哈哈', '关注了', '晚上好呀', '求链接']
+
+
+def generate_batch(size, users, rng, cursor):
+    """
+    生成一批与 LiveDataManager 处理后结构相同的消息
+    """
+    now = time.time()
+    events = []
+    for index in range(size):
+        user_id = rng.randrange(users)
+        roll = rng.random()
+        event = {
+            'user': f"用户{user_id:05d}",
+            'user_id': 1_000_000_000_000 + user_id,
+            'msg_id': 7_300_000_000_000_000_000 + rng.randrange(1 << 40),
+            'method': 'WebcastChatMessage',
+            'cursor': cursor,
+            'internal_ext': f"internal_src:dim|wss_push_room_id:7412345678901234567|fetch_time:{int(now * 1000)}",
+            'server_time': now - 0.3,
+            'receive_time': now - 0.2,
+            'decode_time': now - 0.19,
+            'dispatch_time': now - 0.18,
+            'timestamp': now - 0.3,
+            'processed': True
+        }
+        if roll < 0.6:
+            event.update(type=int(MessageType.CHAT), priority=int(MessagePriority.NORMAL),
+                         content=' '.join(rng.choices(PHRASES, k=rng.randint(1, 3))))
+        elif roll < 0.75:
+            event.update(type=int(MessageType.GIFT), priority=int(MessagePriority.HIGH),
+                         method='WebcastGiftMessage', gift_id=rng.randint(1, 50),
+                         gift_name=rng.choice(GIFTS), count=rng.randint(1, 10),
+                         total_coin=rng.randint(1, 1000))
+        elif roll < 0.9:
+            event.update(type=int(MessageType.LIKE), priority=int(MessagePriority.LOW),
+                         method='WebcastLikeMessage', count=rng.randint(1, 15),
+                         total=rng.randint(1000, 100000))
+        else:
+            event.update(type=int(MessageType.ENTER), priority=int(MessagePriority.NORMAL),
+                         method='WebcastMemberMessage', member_count=rng.randint(100, 5000))
+        events.append(event)
+    return events
+
+
+CODECS = {
+    'wire_format': (encode_batch, decode_batch),
+    'json': (lambda events: json.dumps(events, ensure_ascii=False).encode('utf-8'),
+             lambda data: json.loads(data)),
+    'pickle': (lambda events: pickle.dumps(events, protocol=pickle.HIGHEST_PROTOCOL),
+               pickle.loads),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="消息二进制编码性能测试")
+    parser.add_argument('--batches', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--users', type=int, default=2000, help="活跃用户数（影响字符串复用率）")
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    batches = [generate_batch(args.batch_size, args.users, rng, f"t-{index}_r-{index * 7}")
+               for index in range(args.batches)]
+    total_events = args.batches * args.batch_size
+    print(f"批次: {args.batches}, 每批消息: {args.batch_size}, 活跃用户: {args.users}")
+
+    for name, (encode, decode) in CODECS.items():
+        start = time.perf_counter()
+        encoded = [encode(batch) for batch in batches]
+        encode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decoded = [decode(data) for data in encoded]
+        decode_time = time.perf_counter() - start
+
+        assert decoded[0][0]['user'] == batches[0][0]['user']
+        size = sum(len(data) for data in encoded)
+        print(f"{name:12s}: 每条 {size / total_events:6.1f} 字节, "
+              f"编码 {total_events / encode_time:10,.0f} 条/秒, "
+              f"解码 {total_events / decode_time:10,.0f} 条/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,158 @@
 """
 Core module for TikTok Virtual Streamer
 抖音虚拟主播核心模块
+
+导出的名称在第一次访问时才导入对应的子模块，
+导入 core 下的任何模块都不会连带加载全部子模块（及其依赖的 multiprocessing、http.server 等）。
 """
 
+import importlib
+
 __version__ = "1.0.0"
 __author__ = "TikTok Virtual Streamer Team"
 
-from .live_data_manager import LiveDataManager
+# 导出名称 -> 所在的子模块
+_EXPORTS = {
+    'LiveDataManager': 'live_data_manager',
+    'AhoCorasickAutomaton': 'keyword_alert',
+    'KeywordAlertStage': 'keyword_alert',
+    'EventBus': 'event_bus',
+    'Subscription': 'event_bus',
+    'DeliveryMode': 'event_bus',
+    'RoomMetrics': 'metrics',
+    'MetricsRegistry': 'metrics',
+    'MetricsServer': 'metrics',
+    'default_registry': 'metrics',
+    'HdrHistogram': 'latency_tracer',
+    'LatencyTracer': 'latency_tracer',
+    'SamplingProfiler': 'profiler',
+    'ProfilerController': 'profiler',
+    'ExponentialBackoff': 'reconnect',
+    'ResumeCursor': 'reconnect',
+    'ReconnectTracker': 'reconnect',
+    'TimerWheel': 'heartbeat',
+    'HeartbeatScheduler': 'heartbeat',
+    'get_shared_scheduler': 'heartbeat',
+    'FrameInflater': 'frame_inflater',
+    'MessageDecoder': 'message_decoder',
+    'decode_frame': 'message_decoder',
+    'BindingsError': 'proto_bindings',
+    'generate_bindings': 'proto_bindings',
+    'load_bindings': 'proto_bindings',
+    'SharedRingBuffer': 'decode_pool',
+    'DecodePool': 'decode_pool',
+    'enable_shared_decode_pool': 'decode_pool',
+    'WireFormatError': 'wire_format',
+    'encode_batch': 'wire_format',
+    'decode_batch': 'wire_format',
+    'iter_batches': 'wire_format',
+    'HTTPError': 'http_pool',
+    'HTTPConnectionPool': 'http_pool',
+    'TokenBucket': 'request_scheduler',
+    'RequestScheduler': 'request_scheduler',
+    'get_request_scheduler': 'request_scheduler',
+    'DiskAssetStore': 'asset_cache',
+    'AssetLoader': 'asset_cache',
+    'GiftInfo': 'gift_catalog',
+    'GiftCatalog': 'gift_catalog',
+    'GiftRevenue': 'gift_catalog',
+    'get_gift_catalog': 'gift_catalog',
+    'ChatDedupStage': 'chat_dedup',
+    'CountMinSketch': 'chat_terms',
+    'ChatTermTracker': 'chat_terms',
+    'HyperLogLog': 'unique_users',
+    'UniqueUserTracker': 'unique_users',
+    'merge_unique_users': 'unique_users',
+    'unique_users_total': 'unique_users',
+    'BloomFilter': 'msg_id_filter',
+    'MsgIdFilter': 'msg_id_filter',
+    'DouyinLivePollingFetcher': 'polling_fetcher',
+    'TransportSelector': 'transport',
+    'StartupGraph': 'cold_start',
+    'StartupPrefetcher': 'cold_start',
+    'get_startup_prefetcher': 'cold_start',
+    'register_warmup': 'cold_start',
+    'ExportSink': 'export_sink',
+    'AlertRuleStage': 'alert_rules',
+    'RuleError': 'alert_rules',
+    'compile_rule': 'alert_rules',
+}
 
 __all__ = [
-    'LiveDataManager'
-]
\ No newline at end of file
+    'LiveDataManager',
+    'AhoCorasickAutomaton',
+    'KeywordAlertStage',
+    'EventBus',
+    'Subscription',
+    'DeliveryMode',
+    'RoomMetrics',
+    'MetricsRegistry',
+    'MetricsServer',
+    'default_registry',
+    'HdrHistogram',
+    'LatencyTracer',
+    'SamplingProfiler',
+    'ProfilerController',
+    'ExponentialBackoff',
+    'ResumeCursor',
+    'ReconnectTracker',
+    'TimerWheel',
+    'HeartbeatScheduler',
+    'get_shared_scheduler',
+    'FrameInflater',
+    'MessageDecoder',
+    'decode_frame',
+    'BindingsError',
+    'generate_bindings',
+    'load_bindings',
+    'SharedRingBuffer',
+    'DecodePool',
+    'enable_shared_decode_pool',
+    'WireFormatError',
+    'encode_batch',
+    'decode_batch',
+    'iter_batches',
+    'HTTPError',
+    'HTTPConnectionPool',
+    'TokenBucket',
+    'RequestScheduler',
+    'get_request_scheduler',
+    'DiskAssetStore',
+    'AssetLoader',
+    'GiftInfo',
+    'GiftCatalog',
+    'GiftRevenue',
+    'get_gift_catalog',
+    'ChatDedupStage',
+    'CountMinSketch',
+    'ChatTermTracker',
+    'HyperLogLog',
+    'UniqueUserTracker',
+    'merge_unique_users',
+    'unique_users_total',
+    'BloomFilter',
+    'MsgIdFilter',
+    'DouyinLivePollingFetcher',
+    'TransportSelector',
+    'StartupGraph',
+    'StartupPrefetcher',
+    'get_startup_prefetcher',
+    'register_warmup',
+    'ExportSink',
+    'AlertRuleStage',
+    'RuleError',
+    'compile_rule',
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,718 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alert Rules
+规则告警
+
+把声明式的告警规则（JSON 文件）编译为判断函数，消息满足规则时生成告警系统消息，例如:
+
+    [
+        {"name": "大额礼物", "type": "gift", "field": "total_coin", "op": ">", "value": 1000},
+        {"name": "关注激增", "type": "follow", "aggregate": "rate", "window": 60, "op": ">", "value": 20},
+        {"name": "在线下跌", "type": "stats", "field": "online", "aggregate": "drop", "window": 60,
+         "op": ">=", "value": "30%"}
+    ]
+
+- 规则按消息类型建立索引，每条消息只检查对应类型的规则
+- 窗口聚合增量计算: 次数/合计使用按秒分桶的环形数组，下跌/上涨使用单调队列维护窗口内的最大/最小值，
+  每条消息的开销与窗口长度无关
+- 规则文件修改后在后台线程中重新编译并整体替换；定义没有变化的规则保留窗口状态和统计
+- 记录每条规则的检查次数、触发次数，并抽样计时估计平均和累计耗时
+"""
+
+import os
+import json
+import math
+import time
+import operator
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Callable, Sequence
+
+from models.message_types import MessageType, MessagePriority
+from .latency_tracer import TRACE_RECEIVE_TIME
+
+# 比较运算符
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+    'in': lambda value, options: value in options,
+    'contains': lambda value, part: part in value,
+}
+
+# 聚合方式
+AGGREGATE_VALUE = 'value'   # 消息字段的值
+AGGREGATE_COUNT = 'count'   # 窗口内的消息数
+AGGREGATE_RATE = 'rate'     # 窗口内平均每分钟的消息数
+AGGREGATE_SUM = 'sum'       # 窗口内字段值的合计
+AGGREGATE_DROP = 'drop'     # 当前值相对窗口内最大值的下跌比例
+AGGREGATE_RISE = 'rise'     # 当前值相对窗口内最小值的上涨比例
+AGGREGATES = (AGGREGATE_VALUE, AGGREGATE_COUNT, AGGREGATE_RATE, AGGREGATE_SUM, AGGREGATE_DROP, AGGREGATE_RISE)
+
+# 输出为百分比的聚合方式
+RATIO_AGGREGATES = (AGGREGATE_DROP, AGGREGATE_RISE)
+
+# 窗口分桶精度（秒）
+WINDOW_RESOLUTION = 1.0
+
+# 每条规则每隔多少次检查计时一次（2的幂），计时本身的开销与简单规则的检查相当
+COST_SAMPLE_INTERVAL = 16
+_COST_SAMPLE_MASK = COST_SAMPLE_INTERVAL - 1
+
+# 未指定类型的规则检查的消息类型（不检查系统消息，避免告警触发告警）
+DEFAULT_RULE_TYPES = tuple(message_type for message_type in MessageType if message_type != MessageType.SYSTEM)
+
+# 没有告警时的返回值
+_NO_ALERTS: Tuple[Dict[str, Any], ...] = ()
+
+
+class RuleError(ValueError):
+    """
+    规则定义错误
+    """
+
+
+class WindowCounter:
+    """
+    滑动窗口计数/合计
+
+    按 WINDOW_RESOLUTION 分桶的环形数组，时间前进时清空过期的桶并从合计中减去
+    """
+
+    __slots__ = ('_resolution', '_buckets', '_head', '_total')
+
+    def __init__(self, window: float, resolution: float = WINDOW_RESOLUTION):
+        self._resolution = resolution
+        self._buckets = [0.0] * max(1, int(math.ceil(window / resolution)))
+        self._head: Optional[int] = None
+        self._total = 0.0
+
+    def add(self, now: float, amount: float = 1.0) -> float:
+        """
+        记录一个值
+
+        Args:
+            now: 当前时间（秒）
+            amount: 数量
+
+        Returns:
+            float: 窗口内的合计
+        """
+        slot = int(now // self._resolution)
+        if slot != self._head:
+            self._advance(slot)
+        self._buckets[self._head % len(self._buckets)] += amount
+        self._total += amount
+        return self._total
+
+    def total(self, now: float) -> float:
+        """
+        窗口内的合计
+
+        Args:
+            now: 当前时间（秒）
+
+        Returns:
+            float: 合计
+        """
+        self._advance(int(now // self._resolution))
+        return self._total
+
+    def _advance(self, slot: int):
+        head = self._head
+        if head is None:
+            self._head = slot
+            return
+        if slot <= head:
+            # 乱序到达的消息计入当前桶
+            return
+        buckets = self._buckets
+        size = len(buckets)
+        if slot - head >= size:
+            for index in range(size):
+                buckets[index] = 0.0
+            self._total = 0.0
+        else:
+            for absolute in range(head + 1, slot + 1):
+                index = absolute % size
+                self._total -= buckets[index]
+                buckets[index] = 0.0
+        self._head = slot
+
+
+class WindowExtreme:
+    """
+    滑动窗口最大值/最小值
+
+    单调队列: 新值入队时移除队尾不可能再成为极值的旧值，队首即为窗口内的极值
+    """
+
+    __slots__ = ('_window', '_keep_max', '_queue')
+
+    def __init__(self, window: float, keep_max: bool = True):
+        self._window = window
+        self._keep_max = keep_max
+        self._queue: deque = deque()
+
+    def add(self, now: float, value: float) -> float:
+        """
+        记录一个值
+
+        Args:
+            now: 当前时间（秒）
+            value: 值
+
+        Returns:
+            float: 窗口内（含该值）的极值
+        """
+        queue = self._queue
+        if self._keep_max:
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+        else:
+            while queue and queue[-1][1] >= value:
+                queue.pop()
+        queue.append((now, value))
+        while now - queue[0][0] > self._window:
+            queue.popleft()
+        return queue[0][1]
+
+
+class CompiledRule:
+    """
+    编译后的规则
+
+    evaluate(消息, 当前时间) 在规则满足时返回聚合值，否则返回 None
+    """
+
+    __slots__ = ('name', 'key', 'definition', 'message_types', 'evaluate', 'describe', 'cooldown',
+                 'priority', 'template', 'last_fired', 'evaluations', 'fires', 'errors',
+                 'sampled_ns', 'samples')
+
+    def __init__(self, name: str, key: str, definition: Dict[str, Any], message_types: Tuple[MessageType, ...],
+                 evaluate: Callable[[Dict[str, Any], float], Optional[float]],
+                 describe: Callable[[float], str], cooldown: float, priority: MessagePriority,
+                 template: Optional[str]):
+        self.name = name
+        self.key = key
+        self.definition = definition
+        self.message_types = message_types
+        self.evaluate = evaluate
+        self.describe = describe
+        self.cooldown = cooldown
+        self.priority = priority
+        self.template = template
+        self.last_fired = -math.inf
+
+        # 统计
+        self.evaluations = 0
+        self.fires = 0
+        self.errors = 0
+        self.sampled_ns = 0
+        self.samples = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取规则统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        mean_ns = self.sampled_ns / self.samples if self.samples else 0.0
+        return {
+            'name': self.name,
+            'types': [message_type.name.lower() for message_type in self.message_types],
+            'evaluations': self.evaluations,
+            'fires': self.fires,
+            'errors': self.errors,
+            'cost_seconds': mean_ns * self.evaluations / 1e9,
+            'mean_ns': mean_ns,
+        }
+
+
+def _parse_types(value: Any, name: str) -> Tuple[MessageType, ...]:
+    if value is None:
+        return DEFAULT_RULE_TYPES
+    names = [value] if isinstance(value, (str, int)) else list(value)
+    types = []
+    for item in names:
+        try:
+            types.append(MessageType(item) if isinstance(item, int) else MessageType[str(item).upper()])
+        except (KeyError, ValueError):
+            raise RuleError(f"规则 {name}: 未知的消息类型 {item}")
+    return tuple(dict.fromkeys(types))
+
+
+def _parse_threshold(value: Any, name: str) -> Any:
+    # "30%" 表示 0.3
+    if isinstance(value, str) and value.endswith('%'):
+        try:
+            return float(value[:-1]) / 100
+        except ValueError:
+            raise RuleError(f"规则 {name}: 无效的百分比 {value}")
+    return value
+
+
+def _compile_conditions(conditions: Any, name: str) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """
+    编译 where 条件（全部满足时为真）
+
+    Args:
+        conditions: [[字段, 运算符, 值], ...]
+        name: 规则名
+
+    Returns:
+        Optional[Callable[[Dict[str, Any]], bool]]: 判断函数，没有条件时为 None
+    """
+    if not conditions:
+        return None
+    compiled = []
+    for condition in conditions:
+        if not isinstance(condition, (list, tuple)) or len(condition) != 3:
+            raise RuleError(f"规则 {name}: where 条件应为 [字段, 运算符, 值]")
+        field, op, value = condition
+        compare = OPERATORS.get(op)
+        if compare is None:
+            raise RuleError(f"规则 {name}: 未知的运算符 {op}")
+        compiled.append((field, compare, _parse_threshold(value, name)))
+
+    if len(compiled) == 1:
+        field, compare, value = compiled[0]
+
+        def match(event: Dict[str, Any]) -> bool:
+            actual = event.get(field)
+            return actual is not None and compare(actual, value)
+        return match
+
+    def match_all(event: Dict[str, Any]) -> bool:
+        for field, compare, value in compiled:
+            actual = event.get(field)
+            if actual is None or not compare(actual, value):
+                return False
+        return True
+    return match_all
+
+
+def compile_rule(definition: Dict[str, Any]) -> CompiledRule:
+    """
+    编译一条规则
+
+    规则字段: name、type（消息类型名或列表，默认为系统消息以外的全部类型）、where（过滤条件）、
+    aggregate（默认 value）、field、window（秒，窗口聚合必填）、op、value（阈值，可写作 "30%"）、
+    cooldown（两次告警的最小间隔，窗口聚合默认为窗口长度）、priority（high / critical）、
+    message（告警内容模板，可引用消息字段和 {value}）
+
+    Args:
+        definition: 规则定义
+
+    Returns:
+        CompiledRule: 编译后的规则
+
+    Raises:
+        RuleError: 规则定义错误
+    """
+    if not isinstance(definition, dict):
+        raise RuleError(f"规则应为对象: {definition!r}")
+    name = definition.get('name')
+    if not name or not isinstance(name, str):
+        raise RuleError(f"规则缺少名称: {definition!r}")
+
+    message_types = _parse_types(definition.get('type'), name)
+    match = _compile_conditions(definition.get('where'), name)
+    aggregate = definition.get('aggregate', AGGREGATE_VALUE)
+    if aggregate not in AGGREGATES:
+        raise RuleError(f"规则 {name}: 未知的聚合方式 {aggregate}")
+
+    field = definition.get('field')
+    if aggregate not in (AGGREGATE_COUNT, AGGREGATE_RATE) and not field:
+        raise RuleError(f"规则 {name}: 聚合方式 {aggregate} 需要指定 field")
+
+    window = 0.0
+    if aggregate != AGGREGATE_VALUE:
+        try:
+            window = float(definition.get('window', 0))
+        except (TypeError, ValueError):
+            window = 0.0
+        if window <= 0:
+            raise RuleError(f"规则 {name}: 聚合方式 {aggregate} 需要指定大于0的 window（秒）")
+
+    op = definition.get('op')
+    compare = OPERATORS.get(op)
+    if compare is None:
+        raise RuleError(f"规则 {name}: 未知的运算符 {op}")
+    if 'value' not in definition:
+        raise RuleError(f"规则 {name}: 缺少阈值 value")
+    threshold = _parse_threshold(definition['value'], name)
+
+    try:
+        cooldown = float(definition.get('cooldown', window))
+        priority = MessagePriority[str(definition.get('priority', 'critical')).upper()]
+    except (TypeError, ValueError, KeyError) as e:
+        raise RuleError(f"规则 {name}: 无效的 cooldown 或 priority ({str(e)})")
+
+    evaluate = _build_evaluator(aggregate, field, window, match, compare, threshold)
+    describe = _build_describer(aggregate, field, window, op, threshold)
+    template = definition.get('message')
+    key = json.dumps(definition, sort_keys=True, ensure_ascii=False, default=str)
+    return CompiledRule(name, key, definition, message_types, evaluate, describe, cooldown, priority, template)
+
+
+def _build_evaluator(aggregate: str, field: Optional[str], window: float,
+                     match: Optional[Callable[[Dict[str, Any]], bool]],
+                     compare: Callable[[Any, Any], bool], threshold: Any) -> Callable[[Dict[str, Any], float], Optional[float]]:
+    """
+    按聚合方式生成判断函数，窗口状态保存在闭包中
+    """
+    if aggregate == AGGREGATE_VALUE:
+        def evaluate_value(event: Dict[str, Any], now: float) -> Optional[float]:
+            if match is not None and not match(event):
+                return None
+            value = event.get(field)
+            if value is None or not compare(value, threshold):
+                return None
+            return value
+        return evaluate_value
+
+    if aggregate in (AGGREGATE_COUNT, AGGREGATE_RATE, AGGREGATE_SUM):
+        counter = WindowCounter(window)
+        scale = 60.0 / window if aggregate == AGGREGATE_RATE else 1.0
+        amount_field = field if aggregate == AGGREGATE_SUM else None
+
+        def evaluate_window(event: Dict[str, Any], now: float) -> Optional[float]:
+            if match is not None and not match(event):
+                return None
+            if amount_field is None:
+                total = counter.add(now)
+            else:
+                amount = event.get(amount_field)
+                if not isinstance(amount, (int, float)):
+                    return None
+                total = counter.add(now, amount)
+            value = total * scale
+            return value if compare(value, threshold) else None
+        return evaluate_window
+
+    extreme = WindowExtreme(window, keep_max=aggregate == AGGREGATE_DROP)
+    dropping = aggregate == AGGREGATE_DROP
+
+    def evaluate_change(event: Dict[str, Any], now: float) -> Optional[float]:
+        if match is not None and not match(event):
+            return None
+        current = event.get(field)
+        if not isinstance(current, (int, float)):
+            return None
+        reference = extreme.add(now, current)
+        if reference <= 0:
+            return None
+        ratio = (reference - current) / reference if dropping else (current - reference) / reference
+        return ratio if compare(ratio, threshold) else None
+    return evaluate_change
+
+
+def _build_describer(aggregate: str, field: Optional[str], window: float, op: str, threshold: Any) -> Callable[[float], str]:
+    """
+    生成告警说明，例如 "60秒内 online 下跌 32% >= 30%"
+    """
+    window_text = f"{window:g}秒内"
+    labels = {
+        AGGREGATE_VALUE: f"{field}",
+        AGGREGATE_COUNT: f"{window_text}次数",
+        AGGREGATE_RATE: f"{window_text}每分钟次数",
+        AGGREGATE_SUM: f"{window_text} {field} 合计",
+        AGGREGATE_DROP: f"{window_text} {field} 下跌",
+        AGGREGATE_RISE: f"{window_text} {field} 上涨",
+    }
+    label = labels[aggregate]
+    if aggregate in RATIO_AGGREGATES and isinstance(threshold, (int, float)):
+        threshold_text = f"{threshold:.0%}"
+        return lambda value: f"{label} {value:.0%} {op} {threshold_text}"
+
+    def describe(value: Any) -> str:
+        value_text = f"{value:g}" if isinstance(value, float) else str(value)
+        return f"{label} {value_text} {op} {threshold}"
+    return describe
+
+
+def load_rules(path: str) -> List[Dict[str, Any]]:
+    """
+    读取规则文件
+
+    文件内容为规则列表，或 {"rules": [...]}
+
+    Args:
+        path: 规则文件路径
+
+    Returns:
+        List[Dict[str, Any]]: 规则定义列表
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('rules', [])
+    if not isinstance(data, list):
+        raise RuleError("规则文件应为规则列表或 {\"rules\": [...]}")
+    return data
+
+
+class _FormatFields(dict):
+    """告警模板中缺失的字段显示为空"""
+
+    def __missing__(self, key):
+        return ''
+
+
+class AlertRuleStage:
+    """
+    规则告警处理阶段
+
+    规则在后台线程中编译，编译完成后整体替换类型索引，检查过程不加锁
+    """
+
+    def __init__(self, rules_path: Optional[str] = None, clock=time.time):
+        self._rules_path = rules_path
+        self._clock = clock
+        self._rules: Tuple[CompiledRule, ...] = ()
+        self._index: Dict[int, Tuple[CompiledRule, ...]] = {}
+        self._file_signature: Optional[Tuple[float, int]] = None
+        self._reload_thread: Optional[threading.Thread] = None
+        self._last_error: Optional[str] = None
+        self._alert_count = 0
+
+    @property
+    def rules_path(self) -> Optional[str]:
+        """获取规则文件路径"""
+        return self._rules_path
+
+    @property
+    def rule_count(self) -> int:
+        """当前生效的规则数量"""
+        return len(self._rules)
+
+    @property
+    def alert_count(self) -> int:
+        """已产生的告警数量"""
+        return self._alert_count
+
+    def take_error(self) -> Optional[str]:
+        """
+        取出最近一次加载错误，取出后清空
+
+        Returns:
+            Optional[str]: 错误信息
+        """
+        error, self._last_error = self._last_error, None
+        return error
+
+    def set_rules_path(self, path: Optional[str]):
+        """
+        设置规则文件路径，下次检查时加载
+
+        Args:
+            path: 规则文件路径
+        """
+        self._rules_path = path
+        self._file_signature = None
+        if not path:
+            self._install(())
+
+    def set_rules(self, definitions: Sequence[Dict[str, Any]]):
+        """
+        直接设置规则（同步编译）
+
+        Args:
+            definitions: 规则定义列表
+
+        Raises:
+            RuleError: 规则定义错误
+        """
+        self._install(self._compile(definitions))
+
+    def reload_if_changed(self) -> bool:
+        """
+        检查规则文件是否有变化，有变化时在后台线程重新编译
+
+        Returns:
+            bool: 是否触发了重新加载
+        """
+        path = self._rules_path
+        if not path:
+            return False
+
+        if self._reload_thread and self._reload_thread.is_alive():
+            return False
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        signature = (stat.st_mtime, stat.st_size)
+        if signature == self._file_signature:
+            return False
+
+        self._file_signature = signature
+        self._reload_thread = threading.Thread(
+            target=self._reload, args=(path,), name="AlertRuleReload", daemon=True
+        )
+        self._reload_thread.start()
+        return True
+
+    def _reload(self, path: str):
+        """
+        重新读取并编译规则，出错时保留原有规则
+
+        Args:
+            path: 规则文件路径
+        """
+        try:
+            self._install(self._compile(load_rules(path)))
+            self._last_error = None
+        except Exception as e:
+            self._last_error = f"加载告警规则失败: {str(e)}"
+
+    def _compile(self, definitions: Sequence[Dict[str, Any]]) -> Tuple[CompiledRule, ...]:
+        """
+        编译规则，定义没有变化的规则沿用原来的对象（保留窗口状态和统计）
+
+        Args:
+            definitions: 规则定义列表
+
+        Returns:
+            Tuple[CompiledRule, ...]: 编译后的规则
+        """
+        existing = {rule.key: rule for rule in self._rules}
+        rules = []
+        names = set()
+        for definition in definitions:
+            rule = compile_rule(definition)
+            if rule.name in names:
+                raise RuleError(f"重复的规则名: {rule.name}")
+            names.add(rule.name)
+            rules.append(existing.get(rule.key, rule))
+        return tuple(rules)
+
+    def _install(self, rules: Tuple[CompiledRule, ...]):
+        """
+        建立消息类型索引并替换当前规则
+
+        Args:
+            rules: 编译后的规则
+        """
+        index: Dict[int, List[CompiledRule]] = {}
+        for rule in rules:
+            for message_type in rule.message_types:
+                index.setdefault(int(message_type), []).append(rule)
+        self._index = {message_type: tuple(items) for message_type, items in index.items()}
+        self._rules = rules
+
+    def evaluate(self, message_data: Dict[str, Any], now: Optional[float] = None) -> Sequence[Dict[str, Any]]:
+        """
+        检查消息类型对应的规则
+
+        Args:
+            message_data: 消息数据
+            now: 消息时间，默认为接收时间
+
+        Returns:
+            Sequence[Dict[str, Any]]: 告警消息
+        """
+        rules = self._index.get(message_data.get('type', MessageType.UNKNOWN))
+        if not rules:
+            return _NO_ALERTS
+        if now is None:
+            now = message_data.get(TRACE_RECEIVE_TIME) or self._clock()
+
+        alerts = None
+        for rule in rules:
+            evaluations = rule.evaluations
+            rule.evaluations = evaluations + 1
+            try:
+                # 第 1、17、33… 次检查计时
+                if evaluations & _COST_SAMPLE_MASK:
+                    value = rule.evaluate(message_data, now)
+                else:
+                    started = time.perf_counter_ns()
+                    value = rule.evaluate(message_data, now)
+                    rule.sampled_ns += time.perf_counter_ns() - started
+                    rule.samples += 1
+            except (TypeError, ValueError):
+                # 字段类型与阈值不可比较
+                value = None
+                rule.errors += 1
+
+            if value is None or now - rule.last_fired < rule.cooldown:
+                continue
+            rule.last_fired = now
+            rule.fires += 1
+            self._alert_count += 1
+            if alerts is None:
+                alerts = []
+            alerts.append(self._alert(rule, message_data, value))
+        return alerts or _NO_ALERTS
+
+    def _alert(self, rule: CompiledRule, message_data: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        """
+        生成告警消息
+
+        Args:
+            rule: 触发的规则
+            message_data: 触发规则的消息
+            value: 聚合值
+
+        Returns:
+            Dict[str, Any]: 告警系统消息
+        """
+        content = None
+        if rule.template:
+            try:
+                content = rule.template.format_map(_FormatFields(message_data, value=value, rule=rule.name))
+            except (ValueError, AttributeError, IndexError, KeyError):
+                content = None
+        if content is None:
+            content = f"规则告警 [{rule.name}] {rule.describe(value)}"
+        return {
+            'type': MessageType.SYSTEM,
+            'priority': rule.priority,
+            'timestamp': time.time(),
+            'processed': True,
+            'alert': 'rule',
+            'rule': rule.name,
+            'value': value,
+            'source_type': message_data.get('type', MessageType.UNKNOWN),
+            'user': message_data.get('user', ''),
+            'content': content
+        }
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        获取各规则的统计，按累计耗时排序
+
+        Returns:
+            List[Dict[str, Any]]: 统计信息列表
+        """
+        stats = [rule.stats() for rule in self._rules]
+        stats.sort(key=lambda item: item['cost_seconds'], reverse=True)
+        return stats
+
+
+def format_rule_stats(stats: List[Dict[str, Any]]) -> str:
+    """
+    生成规则统计的文本表格
+
+    Args:
+        stats: AlertRuleStage.stats() 的结果
+
+    Returns:
+        str: 每条规则一行
+    """
+    if not stats:
+        return "没有生效的告警规则"
+    lines = [f"{'规则':<16}{'检查次数':>10}{'触发':>6}{'平均耗时':>12}{'累计耗时':>12}"]
+    for item in stats:
+        lines.append(f"{item['name']:<16}{item['evaluations']:>10}{item['fires']:>6}"
+                     f"{item['mean_ns'] / 1000:>10.2f}µs{item['cost_seconds'] * 1000:>10.1f}ms")
+    return "\n".join(lines)
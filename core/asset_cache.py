@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asset Cache
+图片资源缓存
+
+头像（User.avatarThumb）、礼物图标（GiftMessage.icon / giftPictureNew）和表情
+（EmojiChatMessage.emojiDetailsList）都是远程图片。本模块负责在后台线程中获取它们：
+
+- 磁盘缓存按内容寻址: 图片按 SHA-256 存放，不同URL的相同图片只保存一份，
+  URL 到内容摘要的映射单独保存，读取时校验摘要
+- 下载经过全局请求调度器（request_scheduler.py），使用最低优先级，不会挤占连接直播间和轮询的请求
+- 同一URL的并发请求合并为一次下载，结果回调给所有请求者
+
+回调在工作线程中执行，不依赖Qt；界面端的内存缓存见 ui/pixmap_cache.py。
+"""
+
+import os
+import time
+import queue
+import hashlib
+import threading
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from .http_pool import HTTPError
+from .request_scheduler import RequestScheduler, PRIORITY_ASSET, get_request_scheduler
+
+# 默认磁盘缓存目录
+DEFAULT_ASSET_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'assets'
+)
+
+# 默认磁盘缓存上限（字节）
+DEFAULT_DISK_LIMIT = 256 * 1024 * 1024
+
+# 默认下载线程数
+DEFAULT_WORKERS = 4
+
+# 单个图片的最大字节数，超过时放弃
+MAX_ASSET_SIZE = 8 * 1024 * 1024
+
+# 下载失败的URL在该时间内（秒）不再重试
+FAILURE_RETRY_INTERVAL = 60.0
+
+# 图片请求头（其余请求头见 http_pool.REQUEST_HEADERS）
+IMAGE_HEADERS = {
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+}
+
+# 回调: (URL, 解码结果, 错误信息)，成功时错误信息为 None
+AssetCallback = Callable[[str, Any, Optional[str]], None]
+
+
+class DiskAssetStore:
+    """
+    按内容寻址的磁盘缓存
+
+    objects/<摘要前2位>/<SHA-256>  图片内容
+    refs/<URL摘要前2位>/<SHA-1(URL)>  对应的内容摘要
+
+    写入先写临时文件再改名，进程中途退出不会留下不完整的文件
+    """
+
+    def __init__(self, root: str = DEFAULT_ASSET_DIR, max_bytes: int = DEFAULT_DISK_LIMIT):
+        self._root = root
+        self._max_bytes = max_bytes
+        self._objects_dir = os.path.join(root, 'objects')
+        self._refs_dir = os.path.join(root, 'refs')
+
+    @property
+    def root(self) -> str:
+        """缓存目录"""
+        return self._root
+
+    def get(self, url: str) -> Optional[bytes]:
+        """
+        读取URL对应的图片
+
+        Args:
+            url: 图片URL
+
+        Returns:
+            Optional[bytes]: 图片内容，未缓存或校验失败时为 None
+        """
+        ref_path = self._ref_path(url)
+        try:
+            with open(ref_path, 'r', encoding='ascii') as f:
+                digest = f.read().strip()
+            object_path = self._object_path(digest)
+            with open(object_path, 'rb') as f:
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+
+        if hashlib.sha256(data).hexdigest() != digest:
+            # 内容损坏，删除后重新下载
+            self._remove(object_path)
+            self._remove(ref_path)
+            return None
+        return data
+
+    def put(self, url: str, data: bytes) -> str:
+        """
+        保存图片
+
+        Args:
+            url: 图片URL
+            data: 图片内容
+
+        Returns:
+            str: 内容摘要
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            self._write_atomic(object_path, data)
+        self._write_atomic(self._ref_path(url), digest.encode('ascii'))
+        return digest
+
+    def prune(self) -> int:
+        """
+        缓存超过上限时按修改时间删除最旧的图片，失效的URL映射在读取时清理
+
+        Returns:
+            int: 删除的文件数
+        """
+        entries = []
+        total = 0
+        for directory, _, files in os.walk(self._objects_dir):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+                removed += 1
+        return removed
+
+    def _object_path(self, digest: str) -> str:
+        if len(digest) != 64:
+            raise ValueError(digest)
+        return os.path.join(self._objects_dir, digest[:2], digest)
+
+    def _ref_path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self._refs_dir, key[:2], key)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+class AssetLoader:
+    """
+    后台图片加载器
+
+    request() 立即返回；工作线程依次查磁盘缓存、下载、写入缓存，
+    再用 decoder 解码（例如生成 QImage），最后回调所有等待该URL的请求者
+    """
+
+    def __init__(self, store: Optional[DiskAssetStore] = None, workers: int = DEFAULT_WORKERS,
+                 decoder: Optional[Callable[[bytes], Any]] = None,
+                 scheduler: Optional[RequestScheduler] = None):
+        self._store = store if store is not None else DiskAssetStore()
+        self._workers = max(1, workers)
+        self._decoder = decoder
+        self._scheduler = scheduler if scheduler is not None else get_request_scheduler()
+
+        self._queue: 'queue.Queue[Optional[str]]' = queue.Queue()
+        self._inflight: Dict[str, List[AssetCallback]] = {}
+        self._failures: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+
+        # 统计
+        self.requests = 0
+        self.merged = 0
+        self.disk_hits = 0
+        self.downloads = 0
+        self.failures = 0
+        self.bytes_downloaded = 0
+
+    @property
+    def is_running(self) -> bool:
+        """工作线程是否在运行"""
+        return self._running
+
+    def start(self):
+        """
+        启动工作线程，并在后台清理超出上限的磁盘缓存
+        """
+        if self._running:
+            return
+        self._running = True
+        threading.Thread(target=self._store.prune, name="AssetPrune", daemon=True).start()
+        for index in range(self._workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"AssetLoader-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 2.0):
+        """
+        停止工作线程，未完成的请求不再回调
+
+        Args:
+            timeout: 等待每个线程退出的时间（秒）
+        """
+        if not self._running:
+            return
+        self._running = False
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        with self._lock:
+            self._inflight.clear()
+
+    def request(self, url: str, callback: AssetCallback) -> bool:
+        """
+        请求加载图片
+
+        Args:
+            url: 图片URL
+            callback: 加载完成后在工作线程中调用
+
+        Returns:
+            bool: 是否已排队（URL无效、最近下载失败或加载器未启动时为 False）
+        """
+        if not url or not self._running:
+            return False
+        with self._lock:
+            self.requests += 1
+            callbacks = self._inflight.get(url)
+            if callbacks is not None:
+                # 同一URL正在加载，合并请求
+                callbacks.append(callback)
+                self.merged += 1
+                return True
+            failed_at = self._failures.get(url)
+            if failed_at is not None:
+                if time.monotonic() - failed_at < FAILURE_RETRY_INTERVAL:
+                    return False
+                del self._failures[url]
+            self._inflight[url] = [callback]
+        self._queue.put(url)
+        return True
+
+    def pending(self) -> int:
+        """
+        正在加载的URL数
+
+        Returns:
+            int: URL数
+        """
+        with self._lock:
+            return len(self._inflight)
+
+    def _worker_loop(self):
+        """
+        工作线程主循环
+        """
+        while self._running:
+            url = self._queue.get()
+            if url is None:
+                continue
+            result, error = self._load(url)
+
+            with self._lock:
+                callbacks = self._inflight.pop(url, [])
+                if error is not None:
+                    self.failures += 1
+                    self._failures[url] = time.monotonic()
+            for callback in callbacks:
+                try:
+                    callback(url, result, error)
+                except Exception:
+                    pass
+
+    def _load(self, url: str) -> Tuple[Any, Optional[str]]:
+        """
+        加载并解码一张图片
+
+        Args:
+            url: 图片URL
+
+        Returns:
+            Tuple[Any, Optional[str]]: (解码结果, 错误信息)
+        """
+        data = self._store.get(url)
+        if data is not None:
+            self.disk_hits += 1
+        else:
+            try:
+                data = self._scheduler.get(url, PRIORITY_ASSET, MAX_ASSET_SIZE, IMAGE_HEADERS)
+            except HTTPError as e:
+                return None, str(e)
+            self.downloads += 1
+            self.bytes_downloaded += len(data)
+            try:
+                self._store.put(url, data)
+            except OSError:
+                # 磁盘缓存写入失败不影响本次显示
+                pass
+
+        if self._decoder is None:
+            return data, None
+        try:
+            result = self._decoder(data)
+        except Exception as e:
+            return None, f"图片解码失败: {str(e)}"
+        if result is None:
+            return None, "图片解码失败"
+        return result, None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取加载统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            'requests': self.requests,
+            'merged': self.merged,
+            'disk_hits': self.disk_hits,
+            'downloads': self.downloads,
+            'failures': self.failures,
+            'bytes_downloaded': self.bytes_downloaded,
+            'pending': self.pending(),
+        }
+
+    def collect(self):
+        """
+        生成指标族，供 MetricsRegistry 使用
+
+        Returns:
+            Iterable: 指标族列表
+        """
+        stats = self.stats()
+        yield ('tvs_asset_requests_total', 'counter', "图片加载请求数", [({}, stats['requests'])])
+        yield ('tvs_asset_merged_total', 'counter', "与进行中的加载合并的请求数", [({}, stats['merged'])])
+        yield ('tvs_asset_disk_hits_total', 'counter', "磁盘缓存命中数", [({}, stats['disk_hits'])])
+        yield ('tvs_asset_downloads_total', 'counter', "图片下载次数", [({}, stats['downloads'])])
+        yield ('tvs_asset_failures_total', 'counter', "图片加载失败次数", [({}, stats['failures'])])
+        yield ('tvs_asset_download_bytes_total', 'counter', "下载的图片字节数",
+               [({}, stats['bytes_downloaded'])])
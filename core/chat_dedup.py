@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chat Dedup
+刷屏合并
+
+大直播间的聊天中充满重复和几乎相同的内容（"666"、"6666!!"、复制粘贴的口号），
+逐条显示会淹没界面，也会扭曲后续的统计分析。
+
+本模块在滑动时间窗口内对聊天和表情消息做流式去重:
+- 文本先归一化（NFKC、小写、去掉标点和空白、连续重复字符压缩为两个），完全相同的直接命中
+- 其余用字符二元组的 MinHash 签名和 LSH 分桶查找近似重复，候选再用签名估计的相似度确认
+
+同一簇的第一条消息正常显示，之后的重复不再单独分发，
+簇过期或每隔一段时间合并为一行"×N"汇总。文本只取前若干个字符，
+簇的数量有上限，每条消息的处理开销与窗口内的消息数无关。
+"""
+
+import time
+import random
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from models.message_types import MessageType, MessagePriority
+
+# 参与去重的消息类型
+DEDUP_MESSAGE_TYPES = (MessageType.CHAT, MessageType.EMOJI)
+
+# 默认滑动窗口（秒），簇在该时间内没有新的重复即过期
+DEFAULT_DEDUP_WINDOW = 30.0
+
+# 活跃的簇每隔该时间（秒）输出一次汇总
+DEFAULT_REPORT_INTERVAL = 10.0
+
+# 近似重复的相似度阈值（签名估计的Jaccard相似度）
+DEFAULT_SIMILARITY = 0.6
+
+# 窗口内最多保留的簇数
+DEFAULT_MAX_CLUSTERS = 5000
+
+# 归一化时最多处理的字符数
+MAX_TEXT_LENGTH = 64
+
+# 短于该长度的归一化文本只做完全匹配
+MIN_SHINGLE_TEXT = 4
+
+# MinHash 签名长度和 LSH 分桶（BANDS × ROWS = NUM_PERMUTATIONS）
+NUM_PERMUTATIONS = 16
+LSH_BANDS = 4
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# 每个簇最多记录的用户数和完全匹配键数
+MAX_CLUSTER_USERS = 100
+MAX_CLUSTER_VARIANTS = 8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_HASH_MASK = (1 << 61) - 1
+
+# 固定种子，同一进程内签名稳定
+_PERMUTATIONS: Tuple[Tuple[int, int], ...] = tuple(
+    (random.Random(7919 + index).randrange(1, _MERSENNE_PRIME),
+     random.Random(104729 + index).randrange(0, _MERSENNE_PRIME))
+    for index in range(NUM_PERMUTATIONS)
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    归一化聊天文本
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        str: 归一化后的文本（最多 MAX_TEXT_LENGTH 个字符）
+    """
+    text = unicodedata.normalize('NFKC', text[:MAX_TEXT_LENGTH * 2]).lower()
+    chars = []
+    previous = ''
+    run = 0
+    for char in text:
+        if not char.isalnum():
+            continue
+        if char == previous:
+            run += 1
+            if run > 2:
+                continue
+        else:
+            previous = char
+            run = 1
+        chars.append(char)
+        if len(chars) >= MAX_TEXT_LENGTH:
+            break
+    return ''.join(chars)
+
+
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    """
+    计算字符二元组集合的 MinHash 签名
+
+    Args:
+        text: 归一化后的文本
+
+    Returns:
+        Tuple[int, ...]: 签名
+    """
+    hashes = {hash(text[index:index + 2]) & _HASH_MASK for index in range(len(text) - 1)}
+    return tuple(
+        min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def _band_keys(signature: Tuple[int, ...]) -> Tuple[int, ...]:
+    return tuple(
+        hash((band,) + signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+        for band in range(LSH_BANDS)
+    )
+
+
+class DedupCluster:
+    """
+    一组重复或近似重复的消息
+    """
+
+    __slots__ = ('cluster_id', 'message', 'signature', 'band_keys', 'exact_keys',
+                 'last_time', 'count', 'reported', 'users')
+
+    def __init__(self, cluster_id: int, message: Dict[str, Any], signature: Optional[Tuple[int, ...]],
+                 band_keys: Tuple[int, ...], exact_key: str, now: float):
+        self.cluster_id = cluster_id
+        self.message = message
+        self.signature = signature
+        self.band_keys = band_keys
+        self.exact_keys = [exact_key]
+        self.last_time = now
+        # 簇内消息总数（包括第一条）和已经显示的条数
+        self.count = 1
+        self.reported = 1
+        self.users = {message.get('user_id') or message.get('user')}
+
+
+class ChatDedupStage:
+    """
+    刷屏合并处理阶段
+
+    process() 判断消息是否需要单独分发；take_summaries() 取出需要显示的"×N"汇总消息
+    """
+
+    def __init__(self, window: float = DEFAULT_DEDUP_WINDOW,
+                 similarity: float = DEFAULT_SIMILARITY,
+                 report_interval: float = DEFAULT_REPORT_INTERVAL,
+                 max_clusters: int = DEFAULT_MAX_CLUSTERS,
+                 clock=time.time):
+        self._window = window
+        self._similarity = similarity
+        self._report_interval = report_interval
+        self._max_clusters = max_clusters
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # 按最后出现时间排序的簇，最旧的在前
+        self._clusters: 'OrderedDict[int, DedupCluster]' = OrderedDict()
+        # 有未汇总重复的簇，按第一次未汇总重复的时间排序
+        self._pending: 'OrderedDict[int, float]' = OrderedDict()
+        self._exact: Dict[str, DedupCluster] = {}
+        self._bands: Dict[int, DedupCluster] = {}
+        self._summaries: List[Dict[str, Any]] = []
+        self._next_id = 1
+
+        # 统计
+        self.messages = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用（窗口为0时关闭）"""
+        return self._window > 0
+
+    @property
+    def duplicates(self) -> int:
+        """已合并的重复消息数"""
+        return self.exact_duplicates + self.near_duplicates
+
+    @property
+    def cluster_count(self) -> int:
+        """窗口内的簇数"""
+        return len(self._clusters)
+
+    def process(self, message: Dict[str, Any]) -> bool:
+        """
+        处理一条消息
+
+        Args:
+            message: 处理后的消息
+
+        Returns:
+            bool: 是否需要单独分发（False 表示已合并到之前的消息中）
+        """
+        if self._window <= 0 or message.get('type') not in DEDUP_MESSAGE_TYPES:
+            return True
+        content = message.get('content')
+        if not content:
+            return True
+
+        normalized = normalize_text(content) or content.strip()
+        if not normalized:
+            return True
+
+        now = self._clock()
+        with self._lock:
+            self.messages += 1
+            self._expire(now)
+
+            cluster = self._exact.get(normalized)
+            if cluster is not None:
+                self.exact_duplicates += 1
+                self._add_repeat(cluster, message, now)
+                return False
+
+            signature = None
+            band_keys: Tuple[int, ...] = ()
+            if len(normalized) >= MIN_SHINGLE_TEXT:
+                signature = minhash_signature(normalized)
+                band_keys = _band_keys(signature)
+                cluster = self._find_similar(signature, band_keys)
+                if cluster is not None:
+                    self.near_duplicates += 1
+                    if len(cluster.exact_keys) < MAX_CLUSTER_VARIANTS:
+                        cluster.exact_keys.append(normalized)
+                        self._exact[normalized] = cluster
+                    self._add_repeat(cluster, message, now)
+                    return False
+
+            cluster = DedupCluster(self._next_id, message, signature, band_keys, normalized, now)
+            self._next_id += 1
+            self._clusters[cluster.cluster_id] = cluster
+            self._exact[normalized] = cluster
+            for key in band_keys:
+                self._bands[key] = cluster
+            if len(self._clusters) > self._max_clusters:
+                self._evict(next(iter(self._clusters.values())))
+            return True
+
+    def take_summaries(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        取出需要显示的汇总消息（簇过期，或距上次汇总超过 report_interval）
+
+        Args:
+            now: 当前时间，默认为时钟时间
+
+        Returns:
+            List[Dict[str, Any]]: 汇总消息
+        """
+        if now is None:
+            now = self._clock()
+        with self._lock:
+            self._expire(now)
+            pending = self._pending
+            while pending:
+                cluster_id, since = next(iter(pending.items()))
+                if now - since < self._report_interval:
+                    break
+                self._report(self._clusters[cluster_id], now)
+            summaries, self._summaries = self._summaries, []
+        return summaries
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """
+        结束所有簇并取出汇总（例如停止监控时）
+
+        Returns:
+            List[Dict[str, Any]]: 汇总消息
+        """
+        return self.take_summaries(float('inf'))
+
+    def reset(self):
+        """
+        清空窗口内的所有簇（不输出汇总）
+        """
+        with self._lock:
+            self._clusters.clear()
+            self._pending.clear()
+            self._exact.clear()
+            self._bands.clear()
+            self._summaries = []
+
+    def _find_similar(self, signature: Tuple[int, ...], band_keys: Tuple[int, ...]) -> Optional[DedupCluster]:
+        """
+        在 LSH 分桶中查找相似的簇
+
+        Args:
+            signature: 签名
+            band_keys: 分桶键
+
+        Returns:
+            Optional[DedupCluster]: 相似度达到阈值的簇
+        """
+        threshold = self._similarity * NUM_PERMUTATIONS
+        for key in band_keys:
+            candidate = self._bands.get(key)
+            if candidate is None or candidate.signature is None:
+                continue
+            matches = sum(1 for left, right in zip(signature, candidate.signature) if left == right)
+            if matches >= threshold:
+                return candidate
+        return None
+
+    def _add_repeat(self, cluster: DedupCluster, message: Dict[str, Any], now: float):
+        """
+        把重复消息计入簇，并移到最近使用的位置
+
+        Args:
+            cluster: 簇
+            message: 重复消息
+            now: 当前时间
+        """
+        cluster.count += 1
+        cluster.last_time = now
+        if len(cluster.users) < MAX_CLUSTER_USERS:
+            cluster.users.add(message.get('user_id') or message.get('user'))
+        self._clusters.move_to_end(cluster.cluster_id)
+        if cluster.cluster_id not in self._pending:
+            self._pending[cluster.cluster_id] = now
+
+    def _expire(self, now: float):
+        """
+        移除窗口外的簇
+        """
+        clusters = self._clusters
+        deadline = now - self._window
+        while clusters:
+            cluster = next(iter(clusters.values()))
+            if cluster.last_time > deadline:
+                break
+            self._evict(cluster)
+
+    def _evict(self, cluster: DedupCluster):
+        """
+        移除一个簇，有未汇总的重复时先输出汇总
+        """
+        if cluster.count > cluster.reported:
+            self._report(cluster, cluster.last_time)
+        del self._clusters[cluster.cluster_id]
+        for key in cluster.exact_keys:
+            if self._exact.get(key) is cluster:
+                del self._exact[key]
+        for key in cluster.band_keys:
+            if self._bands.get(key) is cluster:
+                del self._bands[key]
+
+    def _report(self, cluster: DedupCluster, now: float):
+        """
+        生成簇的"×N"汇总消息
+
+        Args:
+            cluster: 簇
+            now: 汇总时间
+        """
+        self._pending.pop(cluster.cluster_id, None)
+        repeats = cluster.count - cluster.reported
+        if repeats <= 0:
+            return
+        cluster.reported = cluster.count
+
+        first = cluster.message
+        summary = {
+            'type': first.get('type', MessageType.CHAT),
+            'priority': MessagePriority.NORMAL,
+            'timestamp': now,
+            'processed': True,
+            'user': first.get('user', '未知用户'),
+            'user_id': first.get('user_id'),
+            'content': first.get('content', ''),
+            'dedup_id': cluster.cluster_id,
+            'repeat_count': repeats,
+            'repeat_users': len(cluster.users)
+        }
+        for key in ('avatar_url', 'emoji_urls'):
+            if key in first:
+                summary[key] = first[key]
+        self._summaries.append(summary)
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chat Terms
+聊天热词
+
+不保存聊天原文，流式统计"聊天在说什么"。
+
+- 分词: 中日文连续字符取二元和三元组，其他文字按空白和标点切分为词
+- 计数: Count-Min Sketch（保守更新），内存由宽度和深度固定
+- 衰减: 前向衰减（forward decay），每次计数的权重随时间指数增长，
+  查询时除以当前权重即得到按半衰期衰减的计数；词之间的相对顺序不随时间变化，
+  因此 top-k 堆不需要逐项衰减
+- top-k: 小顶堆加惰性删除，每次更新 O(log k)
+
+ChatTermTracker 作为事件总线的 THREAD 订阅者运行，不占用界面线程；
+界面定时调用 hot_terms() 取快照，重叠的 n-gram 拼回原短语后显示。
+"""
+
+import re
+import math
+import time
+import heapq
+import threading
+import unicodedata
+from array import array
+from typing import Optional, Dict, Any, List, Tuple
+
+from models.message_types import MessageType, message_type_mask
+from .event_bus import EventBus, Subscription, DeliveryMode
+
+# 统计的消息类型
+TERM_MESSAGE_TYPES = (MessageType.CHAT, MessageType.EMOJI)
+
+# 默认半衰期（秒）
+DEFAULT_HALF_LIFE = 60.0
+
+# 默认保留的候选热词数（同一短语的多个 n-gram 会合并显示，候选需要多于显示数）
+DEFAULT_TOP_K = 50
+
+# 计数相差在该比例以内的重叠 n-gram 视为同一短语
+OVERLAP_RATIO = 0.7
+
+# 拼接后短语的最大长度
+MAX_PHRASE_LENGTH = 16
+
+# Count-Min Sketch 默认宽度和深度（内存 = 宽度 × 深度 × 8 字节）
+DEFAULT_SKETCH_WIDTH = 4096
+DEFAULT_SKETCH_DEPTH = 4
+
+# 中日文字符取的 n-gram 长度
+CJK_NGRAM_SIZES = (2, 3)
+
+# 每条消息最多处理的字符数
+MAX_TEXT_LENGTH = 128
+
+# 前向衰减的指数超过该值时整体缩放，避免浮点溢出
+RESCALE_EXPONENT = 50.0
+
+# 订阅队列容量
+SUBSCRIPTION_MAXSIZE = 10000
+
+# 中日文连续字符，或由字母数字组成的词
+_TOKEN_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\u3040-\u30ff]+|[0-9a-z]+(?:['_-][0-9a-z]+)*")
+_CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\u3040-\u30ff]")
+
+
+def extract_terms(text: str) -> List[str]:
+    """
+    从聊天文本中提取词（同一条消息中的重复词只保留一次）
+
+    Args:
+        text: 聊天文本
+
+    Returns:
+        List[str]: 词列表
+    """
+    text = unicodedata.normalize('NFKC', text[:MAX_TEXT_LENGTH]).lower()
+    terms = []
+    seen = set()
+    for token in _TOKEN_PATTERN.findall(text):
+        if _CJK_PATTERN.match(token):
+            candidates = [token[index:index + size]
+                          for size in CJK_NGRAM_SIZES
+                          for index in range(len(token) - size + 1)]
+        elif len(token) >= 2:
+            candidates = (token,)
+        else:
+            continue
+        for term in candidates:
+            if term not in seen:
+                seen.add(term)
+                terms.append(term)
+    return terms
+
+
+def _merge_overlap(left: str, right: str) -> Optional[str]:
+    """
+    合并互相包含或首尾相接的两个词
+
+    Args:
+        left: 词
+        right: 词
+
+    Returns:
+        Optional[str]: 合并后的短语，不重叠或超过长度上限时为 None
+    """
+    if right in left:
+        return left
+    if left in right:
+        return right
+    for size in range(min(len(left), len(right)) - 1, 0, -1):
+        if left[-size:] == right[:size]:
+            merged = left + right[size:]
+            break
+        if right[-size:] == left[:size]:
+            merged = right + left[size:]
+            break
+    else:
+        return None
+    return merged if len(merged) <= MAX_PHRASE_LENGTH else None
+
+
+class CountMinSketch:
+    """
+    Count-Min Sketch
+
+    计数只会高估不会低估；保守更新（只抬高不足新估计值的计数器）可以减小高估
+    """
+
+    def __init__(self, width: int = DEFAULT_SKETCH_WIDTH, depth: int = DEFAULT_SKETCH_DEPTH):
+        self._width = width
+        self._depth = depth
+        self._rows = [array('d', bytes(8 * width)) for _ in range(depth)]
+
+    @property
+    def memory_bytes(self) -> int:
+        """计数器占用的字节数"""
+        return self._width * self._depth * 8
+
+    def _indexes(self, item: str) -> List[int]:
+        # 双重哈希: 由一个64位哈希派生 depth 个下标
+        value = hash(item) & 0xFFFFFFFFFFFFFFFF
+        low = value & 0xFFFFFFFF
+        high = (value >> 32) | 1
+        width = self._width
+        return [(low + row * high) % width for row in range(self._depth)]
+
+    def add(self, item: str, weight: float = 1.0) -> float:
+        """
+        增加计数（保守更新）
+
+        Args:
+            item: 词
+            weight: 权重
+
+        Returns:
+            float: 增加后的估计值
+        """
+        indexes = self._indexes(item)
+        rows = self._rows
+        estimate = min(row[index] for row, index in zip(rows, indexes)) + weight
+        for row, index in zip(rows, indexes):
+            if row[index] < estimate:
+                row[index] = estimate
+        return estimate
+
+    def estimate(self, item: str) -> float:
+        """
+        查询估计值
+
+        Args:
+            item: 词
+
+        Returns:
+            float: 估计值
+        """
+        return min(row[index] for row, index in zip(self._rows, self._indexes(item)))
+
+    def scale(self, factor: float):
+        """
+        所有计数器乘以同一个系数
+
+        Args:
+            factor: 系数
+        """
+        for row in self._rows:
+            for index, value in enumerate(row):
+                if value:
+                    row[index] = value * factor
+
+    def clear(self):
+        """
+        清空计数
+        """
+        for row in self._rows:
+            row[:] = array('d', bytes(8 * self._width))
+
+
+class ChatTermTracker:
+    """
+    单个直播间的聊天热词统计
+
+    内存固定: 一个 Count-Min Sketch 加最多 top_k 个候选词（堆中的过期条目定期清理）
+    """
+
+    def __init__(self, half_life: float = DEFAULT_HALF_LIFE, top_k: int = DEFAULT_TOP_K,
+                 width: int = DEFAULT_SKETCH_WIDTH, depth: int = DEFAULT_SKETCH_DEPTH,
+                 clock=time.time):
+        self._rate = math.log(2) / half_life
+        self._top_k = top_k
+        self._clock = clock
+        self._sketch = CountMinSketch(width, depth)
+        self._landmark = clock()
+        self._lock = threading.Lock()
+
+        # 当前的热词及其前向衰减计数，和带惰性删除的小顶堆
+        self._top: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+
+        self._subscription: Optional[Subscription] = None
+
+        # 统计
+        self.messages = 0
+        self.terms = 0
+
+    @property
+    def sketch(self) -> CountMinSketch:
+        """Count-Min Sketch"""
+        return self._sketch
+
+    def attach(self, event_bus: EventBus) -> Subscription:
+        """
+        订阅事件总线上的聊天和表情消息，在订阅线程中统计
+
+        Args:
+            event_bus: 事件总线
+
+        Returns:
+            Subscription: 订阅
+        """
+        self.detach()
+        self._subscription = event_bus.subscribe(
+            message_type_mask(*TERM_MESSAGE_TYPES), callback=self._on_event,
+            mode=DeliveryMode.THREAD, maxsize=SUBSCRIPTION_MAXSIZE, name="chat-terms"
+        )
+        return self._subscription
+
+    def detach(self):
+        """
+        取消订阅
+        """
+        subscription, self._subscription = self._subscription, None
+        if subscription is not None:
+            subscription.cancel()
+
+    def add_text(self, text: str, weight: float = 1.0, now: Optional[float] = None):
+        """
+        统计一条聊天
+
+        Args:
+            text: 聊天文本
+            weight: 权重（刷屏合并的汇总消息为合并的条数）
+            now: 消息时间，默认为时钟时间
+        """
+        terms = extract_terms(text)
+        if not terms:
+            return
+        if now is None:
+            now = self._clock()
+
+        with self._lock:
+            self.messages += 1
+            self.terms += len(terms)
+            decayed_weight = weight * self._forward_weight(now)
+            for term in terms:
+                self._update_top(term, self._sketch.add(term, decayed_weight))
+
+    def top(self, count: Optional[int] = None, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        获取当前的热词
+
+        Args:
+            count: 数量，默认为 top_k
+            now: 当前时间，默认为时钟时间
+
+        Returns:
+            List[Tuple[str, float]]: (词, 衰减后的计数)，按计数从高到低排列
+        """
+        if now is None:
+            now = self._clock()
+        with self._lock:
+            items = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+            scale = math.exp(-self._rate * (now - self._landmark))
+        return [(term, value * scale) for term, value in items[:count or self._top_k]]
+
+    def hot_terms(self, count: int = 10, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        获取用于显示的热词
+
+        计数接近且首尾相接的 n-gram 拼回原短语（"链接"+"接在"+"在哪" -> "链接在哪"），
+        被已有短语包含的 n-gram 不再单独列出
+
+        Args:
+            count: 数量
+            now: 当前时间，默认为时钟时间
+
+        Returns:
+            List[Tuple[str, float]]: (短语, 衰减后的计数)
+        """
+        phrases: List[List[Any]] = []
+        for term, value in self.top(self._top_k, now):
+            for phrase in phrases:
+                if value >= phrase[1] * OVERLAP_RATIO:
+                    merged = _merge_overlap(phrase[0], term)
+                    if merged is not None:
+                        phrase[0] = merged
+                        break
+            else:
+                phrases.append([term, value])
+
+        # 先后出现的片段可能要等中间的 n-gram 才能相接，再合并一轮
+        index = 0
+        while index < len(phrases):
+            for other in phrases[index + 1:]:
+                if other[1] >= phrases[index][1] * OVERLAP_RATIO:
+                    merged = _merge_overlap(phrases[index][0], other[0])
+                    if merged is not None:
+                        phrases[index][0] = merged
+                        phrases.remove(other)
+                        break
+            else:
+                index += 1
+        return [(phrase, value) for phrase, value in phrases[:count]]
+
+    def reset(self):
+        """
+        清空统计
+        """
+        with self._lock:
+            self._sketch.clear()
+            self._top.clear()
+            self._heap = []
+            self._landmark = self._clock()
+
+    def _on_event(self, event: Dict[str, Any]):
+        """
+        事件总线回调（订阅线程）
+
+        Args:
+            event: 聊天或表情消息
+        """
+        content = event.get('content')
+        if content:
+            self.add_text(content, event.get('repeat_count') or 1)
+
+    def _forward_weight(self, now: float) -> float:
+        """
+        当前时刻的前向衰减权重，指数过大时把所有计数缩放到新的基准时间
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            float: 权重
+        """
+        exponent = self._rate * (now - self._landmark)
+        if exponent > RESCALE_EXPONENT:
+            factor = math.exp(-exponent)
+            self._sketch.scale(factor)
+            for term in self._top:
+                self._top[term] *= factor
+            self._heap = [(value, term) for term, value in self._top.items()]
+            heapq.heapify(self._heap)
+            self._landmark = now
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def _update_top(self, term: str, estimate: float):
+        """
+        用新的估计值更新 top-k
+
+        Args:
+            term: 词
+            estimate: 前向衰减计数的估计值
+        """
+        top = self._top
+        heap = self._heap
+        if term in top:
+            top[term] = estimate
+            heapq.heappush(heap, (estimate, term))
+        elif len(top) < self._top_k:
+            top[term] = estimate
+            heapq.heappush(heap, (estimate, term))
+        else:
+            # 弹出过期条目，找到当前最小的热词
+            while heap[0][1] not in top or top[heap[0][1]] != heap[0][0]:
+                heapq.heappop(heap)
+            if estimate <= heap[0][0]:
+                return
+            _, evicted = heapq.heapreplace(heap, (estimate, term))
+            del top[evicted]
+            top[term] = estimate
+
+        # 过期条目过多时重建堆，保持内存固定
+        if len(heap) > 4 * self._top_k:
+            self._heap = [(value, name) for name, value in top.items()]
+            heapq.heapify(self._heap)
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cold Start
+连接冷启动
+
+连接直播间原本是一条串行链: 解析URL、请求直播间信息、初始化签名脚本、WebSocket握手。
+其中请求直播间信息和初始化签名脚本互不依赖。本模块把连接准备组织成依赖图:
+
+- 每个步骤声明依赖，依赖完成后立即在独立线程中执行，互不依赖的步骤并行
+- 输入URL后（点击连接之前）就开始预取: 解析URL、请求直播间信息、加载 protobuf 绑定、
+  以及注册的预热步骤（例如导入WebSocket获取器并初始化签名脚本的JS上下文）；点击连接时复用预取的结果
+- 记录每个步骤的开始和耗时，以及从点击连接到连接成功、收到首条消息的时间，
+  汇总显示在状态栏并导出为指标
+
+依赖失败不会阻止后续步骤: 后续步骤拿不到失败步骤的结果，按没有预取处理。
+"""
+
+import time
+import threading
+from typing import Optional, Dict, Any, List, Callable, Iterable
+
+from .proto_bindings import load_bindings
+from .polling_fetcher import parse_web_rid, resolve_room_id
+
+# 预取步骤名
+STEP_PARSE_URL = 'parse_url'
+STEP_ROOM_INFO = 'room_info'
+STEP_DECODER = 'decoder'
+
+# 点击连接之后的步骤和时间点
+STEP_CONNECT = 'connect'
+MARK_CONNECTED = 'connected'
+MARK_FIRST_MESSAGE = 'first_message'
+
+# 预取结果的有效期（秒），超过后重新预取（直播状态可能已经变化）
+PREFETCH_TTL = 60.0
+
+# 步骤的显示名
+STEP_DISPLAY_NAMES = {
+    STEP_PARSE_URL: "解析URL",
+    STEP_ROOM_INFO: "直播间信息",
+    STEP_DECODER: "解码器",
+    'web_fetcher': "获取器和签名脚本",
+    STEP_CONNECT: "创建获取器",
+    MARK_CONNECTED: "连接",
+    MARK_FIRST_MESSAGE: "首条消息",
+}
+
+# 注册的预热步骤: 名称 -> 无参数函数
+_warmups: Dict[str, Callable[[], Any]] = {}
+
+
+def register_warmup(name: str, func: Callable[[], Any]):
+    """
+    注册预热步骤，之后创建的启动图都会在预取阶段执行它
+
+    Args:
+        name: 步骤名
+        func: 无参数函数，在后台线程中执行
+    """
+    _warmups[name] = func
+
+
+class StartupStep:
+    """
+    启动图中的一个步骤
+    """
+
+    __slots__ = ('name', 'func', 'deps', 'done', 'result', 'error', 'started', 'finished')
+
+    def __init__(self, name: str, func: Optional[Callable[[Dict[str, Any]], Any]], deps: Iterable[str]):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+
+class StartupGraph:
+    """
+    启动依赖图
+
+    add() 加入步骤并立即在独立线程中等待依赖、执行；mark() 记录一个时间点。
+    步骤函数的参数是已成功的依赖步骤的结果 {步骤名: 结果}
+    """
+
+    def __init__(self, live_url: str = "", clock=time.perf_counter):
+        self.live_url = live_url
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._steps: Dict[str, StartupStep] = {}
+        self._cancelled = False
+        self.created = clock()
+
+    def now(self) -> float:
+        """当前时间（与步骤时间使用相同的时钟）"""
+        return self._clock()
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = ()) -> StartupStep:
+        """
+        加入步骤
+
+        依赖必须已经加入，因此图中不会出现环
+
+        Args:
+            name: 步骤名
+            func: 步骤函数
+            deps: 依赖的步骤名
+
+        Returns:
+            StartupStep: 步骤
+        """
+        with self._lock:
+            if name in self._steps:
+                raise ValueError(f"重复的启动步骤: {name}")
+            missing = [dep for dep in deps if dep not in self._steps]
+            if missing:
+                raise ValueError(f"启动步骤 {name} 依赖未知的步骤: {', '.join(missing)}")
+            step = StartupStep(name, func, deps)
+            self._steps[name] = step
+        threading.Thread(target=self._run_step, args=(step,), name=f"startup-{name}", daemon=True).start()
+        return step
+
+    def mark(self, name: str) -> bool:
+        """
+        记录一个时间点（只记录第一次）
+
+        Args:
+            name: 时间点名
+
+        Returns:
+            bool: 是否是第一次记录
+        """
+        with self._lock:
+            if name in self._steps:
+                return False
+            step = StartupStep(name, None, ())
+            step.started = step.finished = self._clock()
+            step.done.set()
+            self._steps[name] = step
+            return True
+
+    def has(self, name: str) -> bool:
+        """
+        是否包含某个步骤
+
+        Args:
+            name: 步骤名
+
+        Returns:
+            bool: 是否包含
+        """
+        with self._lock:
+            return name in self._steps
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        等待步骤完成并返回结果
+
+        Args:
+            name: 步骤名
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            Any: 步骤结果，步骤失败或超时时为 None
+        """
+        with self._lock:
+            step = self._steps.get(name)
+        if step is None or not step.done.wait(timeout):
+            return None
+        return step.result if step.error is None else None
+
+    def cancel(self):
+        """
+        取消尚未开始的步骤
+        """
+        self._cancelled = True
+
+    def timings(self, origin: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        获取各步骤的时间
+
+        Args:
+            origin: 计时起点，默认为图的创建时间；早于起点完成的步骤标记为预取
+
+        Returns:
+            List[Dict[str, Any]]: 按开始时间排序的 {name, start, duration, error, prefetched}，
+            未完成的步骤 duration 为 None
+        """
+        origin = self.created if origin is None else origin
+        with self._lock:
+            steps = list(self._steps.values())
+        timings = []
+        for step in steps:
+            if step.started is None:
+                continue
+            finished = step.finished
+            timings.append({
+                'name': step.name,
+                'start': step.started - origin,
+                'duration': None if finished is None else finished - step.started,
+                'error': step.error,
+                'prefetched': finished is not None and finished <= origin,
+            })
+        timings.sort(key=lambda timing: timing['start'])
+        return timings
+
+    def _run_step(self, step: StartupStep):
+        """
+        等待依赖完成后执行步骤
+
+        Args:
+            step: 步骤
+        """
+        results = {}
+        for dep in step.deps:
+            dep_step = self._steps[dep]
+            dep_step.done.wait()
+            if dep_step.error is None:
+                results[dep] = dep_step.result
+
+        if self._cancelled:
+            step.error = "已取消"
+            step.done.set()
+            return
+        step.started = self._clock()
+        try:
+            step.result = step.func(results)
+        except Exception as e:
+            step.error = str(e)
+        finally:
+            step.finished = self._clock()
+            step.done.set()
+
+
+def warmup_steps() -> List[str]:
+    """
+    已注册的预热步骤名
+
+    Returns:
+        List[str]: 步骤名列表
+    """
+    return list(_warmups)
+
+
+def _warm_decoder(results: Dict[str, Any]) -> str:
+    # 加载 protobuf 绑定（proto 修改后首次加载需要重新生成，较慢），之后创建的解码器直接使用已加载的模块
+    return load_bindings().__name__
+
+
+def _run_warmup(func: Callable[[], Any]) -> Callable[[Dict[str, Any]], Any]:
+    return lambda results: func()
+
+
+def build_startup_graph(live_url: str) -> StartupGraph:
+    """
+    创建启动图并开始预取步骤
+
+    Args:
+        live_url: 直播间URL
+
+    Returns:
+        StartupGraph: 启动图
+    """
+    graph = StartupGraph(live_url)
+    graph.add(STEP_PARSE_URL, lambda results: parse_web_rid(live_url))
+    graph.add(STEP_ROOM_INFO, lambda results: resolve_room_id(results[STEP_PARSE_URL]), (STEP_PARSE_URL,))
+    graph.add(STEP_DECODER, _warm_decoder)
+    for name, func in list(_warmups.items()):
+        graph.add(name, _run_warmup(func))
+    return graph
+
+
+class StartupPrefetcher:
+    """
+    预取缓存
+
+    界面在输入URL后调用 prefetch()，数据管理器在开始监控时调用 take() 取得（或新建）启动图。
+    只保留最后一个URL的启动图
+    """
+
+    def __init__(self, ttl: float = PREFETCH_TTL, clock=time.monotonic):
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._graph: Optional[StartupGraph] = None
+        self._prefetched_at = 0.0
+
+        # 统计
+        self.prefetches = 0
+        self.hits = 0
+
+    def prefetch(self, live_url: str) -> Optional[StartupGraph]:
+        """
+        开始预取（同一URL已在有效期内预取过时不重复）
+
+        Args:
+            live_url: 直播间URL
+
+        Returns:
+            Optional[StartupGraph]: 启动图，URL中没有直播间号时为 None
+        """
+        live_url = live_url.strip()
+        if not parse_web_rid(live_url).isdigit():
+            # 还没有输入完整的直播间号
+            return None
+        with self._lock:
+            graph = self._graph
+            if graph is not None and graph.live_url == live_url and not self._expired():
+                return graph
+            self._graph = build_startup_graph(live_url)
+            self._prefetched_at = self._clock()
+            self.prefetches += 1
+            return self._graph
+
+    def take(self, live_url: str) -> StartupGraph:
+        """
+        取出该URL的启动图，没有有效的预取时新建
+
+        Args:
+            live_url: 直播间URL
+
+        Returns:
+            StartupGraph: 启动图
+        """
+        live_url = live_url.strip()
+        with self._lock:
+            graph, self._graph = self._graph, None
+            if graph is not None and graph.live_url == live_url and not self._expired():
+                self.hits += 1
+                return graph
+        return build_startup_graph(live_url)
+
+    def _expired(self) -> bool:
+        return self._clock() - self._prefetched_at > self._ttl
+
+
+_prefetcher: Optional[StartupPrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_startup_prefetcher() -> StartupPrefetcher:
+    """
+    获取进程内共享的预取缓存
+
+    Returns:
+        StartupPrefetcher: 预取缓存
+    """
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = StartupPrefetcher()
+        return _prefetcher
+
+
+def format_startup_summary(summary: Dict[str, Any]) -> str:
+    """
+    生成状态栏显示的启动耗时
+
+    Args:
+        summary: LiveDataManager.startup_timeline 信号的数据
+
+    Returns:
+        str: 例如 "首条消息 1.24 秒（直播间信息 预取 · 签名脚本 预取+0.12s · 连接 0.52s）"
+    """
+    parts = []
+    for timing in summary.get('steps', []):
+        name = timing['name']
+        if name == MARK_FIRST_MESSAGE:
+            continue
+        display = STEP_DISPLAY_NAMES.get(name, name)
+        if timing['error']:
+            parts.append(f"{display} 失败")
+        elif timing['prefetched']:
+            parts.append(f"{display} 预取")
+        elif name == MARK_CONNECTED:
+            parts.append(f"{display} {timing['start']:.2f}s")
+        elif timing['duration'] is None:
+            continue
+        elif timing['start'] < 0:
+            # 点击连接时预取还没有完成，只计点击之后的等待时间
+            parts.append(f"{display} 预取+{timing['start'] + timing['duration']:.2f}s")
+        else:
+            parts.append(f"{display} {timing['duration']:.2f}s")
+    text = f"首条消息 {summary.get('time_to_first_message', 0.0):.2f} 秒"
+    if parts:
+        text += f"（{' · '.join(parts)}）"
+    return text
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Decode Pool
+多进程解码池
+
+同时监控很多直播间时，单进程里的 protobuf 解码会先被GIL限制住。
+解码池把原始推送帧交给多个工作进程解压和解码，
+解码后的消息通过 multiprocessing.shared_memory 环形缓冲区传回主进程，不经过pickle。
+环形缓冲区记录使用 marshal 而不是 wire_format: 主进程的收集线程是解码池的吞吐上限，
+marshal 的C实现解码比纯Python的 wire_format 快一个数量级。
+直播间按哈希固定分配给一个工作进程，同一直播间的消息保持原有顺序。
+"""
+
+import os
+import time
+import zlib
+import struct
+import marshal
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Optional, Dict, Any, List, Callable, Hashable
+
+from .message_decoder import decode_frame
+
+# 环形缓冲区头部: 已读字节数、已写字节数、生产者等待次数（均为单调递增的计数）
+RING_HEADER = struct.Struct('<QQQ')
+RING_HEADER_SIZE = 64
+
+# 记录长度前缀
+RECORD_LENGTH = struct.Struct('<I')
+
+# 填充标记: 缓冲区末尾放不下完整记录时跳回开头
+RECORD_PADDING = 0xFFFFFFFF
+
+# 默认环形缓冲区大小
+DEFAULT_RING_CAPACITY = 8 * 1024 * 1024
+
+# 每个工作进程的待解码帧队列长度
+DEFAULT_MAX_PENDING = 1024
+
+
+class SharedRingBuffer:
+    """
+    共享内存单生产者单消费者环形缓冲区
+
+    记录为 4字节长度 + 数据，记录在缓冲区中连续存放。
+    生产者只写已写计数，消费者只写已读计数；计数为8字节对齐的整数，
+    在支持的平台上单次写入不会被读到一半。
+    """
+
+    def __init__(self, capacity: int = DEFAULT_RING_CAPACITY, name: Optional[str] = None,
+                 create: bool = True):
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True,
+                                                   size=RING_HEADER_SIZE + capacity)
+            RING_HEADER.pack_into(self._shm.buf, 0, 0, 0, 0)
+        else:
+            # 连接已有缓冲区时必须使用创建时的容量，共享内存的实际大小可能被按页对齐
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._capacity = capacity
+        self._buf = self._shm.buf
+        self._owner = create
+
+    @property
+    def name(self) -> str:
+        """共享内存名称"""
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        """数据区大小"""
+        return self._capacity
+
+    def _counters(self):
+        return RING_HEADER.unpack_from(self._buf, 0)
+
+    @property
+    def used(self) -> int:
+        """未读取的字节数"""
+        head, tail, _ = self._counters()
+        return tail - head
+
+    @property
+    def producer_waits(self) -> int:
+        """生产者因缓冲区满而等待的次数"""
+        return self._counters()[2]
+
+    def write(self, record: bytes) -> bool:
+        """
+        写入一条记录（仅生产者调用）
+
+        Args:
+            record: 记录数据
+
+        Returns:
+            bool: 缓冲区空间不足时返回 False
+
+        Raises:
+            ValueError: 记录超过缓冲区容量
+        """
+        size = RECORD_LENGTH.size + len(record)
+        if size > self._capacity:
+            raise ValueError(f"记录过大: {len(record)} 字节，缓冲区容量 {self._capacity} 字节")
+
+        head, tail, waits = self._counters()
+        position = tail % self._capacity
+        padding = 0
+        if position + size > self._capacity:
+            padding = self._capacity - position
+        if tail + padding + size - head > self._capacity:
+            struct.pack_into('<Q', self._buf, 16, waits + 1)
+            return False
+
+        if padding:
+            if padding >= RECORD_LENGTH.size:
+                RECORD_LENGTH.pack_into(self._buf, RING_HEADER_SIZE + position, RECORD_PADDING)
+            tail += padding
+            position = 0
+
+        offset = RING_HEADER_SIZE + position
+        RECORD_LENGTH.pack_into(self._buf, offset, len(record))
+        self._buf[offset + RECORD_LENGTH.size:offset + size] = record
+        struct.pack_into('<Q', self._buf, 8, tail + size)
+        return True
+
+    def consume(self, handler: Callable[[memoryview], None], max_records: Optional[int] = None) -> int:
+        """
+        读取记录（仅消费者调用）
+
+        handler 直接拿到共享内存中的 memoryview，返回后该区域才会被释放，
+        因此 handler 不能保留这个 memoryview
+
+        Args:
+            handler: 记录处理函数
+            max_records: 最多读取的记录数
+
+        Returns:
+            int: 读取的记录数
+        """
+        head, tail, _ = self._counters()
+        count = 0
+        while head < tail and (max_records is None or count < max_records):
+            position = head % self._capacity
+            remaining = self._capacity - position
+            if remaining < RECORD_LENGTH.size:
+                head += remaining
+                continue
+            offset = RING_HEADER_SIZE + position
+            (length,) = RECORD_LENGTH.unpack_from(self._buf, offset)
+            if length == RECORD_PADDING:
+                head += remaining
+                continue
+            start = offset + RECORD_LENGTH.size
+            record = self._buf[start:start + length]
+            try:
+                handler(record)
+            finally:
+                record.release()
+            head += RECORD_LENGTH.size + length
+            count += 1
+            # 每读完一条就释放空间，生产者不必等整批读完
+            struct.pack_into('<Q', self._buf, 0, head)
+        struct.pack_into('<Q', self._buf, 0, head)
+        return count
+
+    def close(self):
+        """
+        关闭共享内存，创建者同时删除共享内存
+        """
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _worker_main(ring_name: str, ring_capacity: int, frames, decoder: Callable, stop_event):
+    """
+    解码工作进程入口
+
+    Args:
+        ring_name: 输出环形缓冲区名称
+        ring_capacity: 环形缓冲区容量
+        frames: 待解码帧队列，元素为 (直播间标识, 帧数据, 接收时间)，None 表示退出
+        decoder: 解码函数 decoder(payload, receive_time) -> 消息列表
+        stop_event: 停止事件
+    """
+    ring = SharedRingBuffer(ring_capacity, name=ring_name, create=False)
+    try:
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            room, payload, receive_time = item
+            try:
+                record = marshal.dumps((room, decoder(payload, receive_time), None))
+            except Exception as e:
+                record = marshal.dumps((room, [], f"解码失败: {str(e)}"))
+
+            # 主进程来不及读取时等待，不丢弃也不乱序
+            delay = 0.0002
+            while not ring.write(record):
+                if stop_event.is_set():
+                    return
+                time.sleep(delay)
+                delay = min(delay * 2, 0.01)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+
+class DecodeWorker:
+    """
+    解码工作进程及其输入队列和输出环形缓冲区
+    """
+
+    def __init__(self, context, decoder: Callable, ring_capacity: int, max_pending: int,
+                 stop_event, index: int):
+        self.ring = SharedRingBuffer(ring_capacity)
+        self.frames = context.Queue(max_pending)
+        self.process = context.Process(
+            target=_worker_main, args=(self.ring.name, ring_capacity, self.frames, decoder, stop_event),
+            name=f"DecodeWorker-{index}", daemon=True
+        )
+        self.submitted = 0
+
+
+class DecodePool:
+    """
+    多进程解码池
+
+    获取器把原始帧交给 submit()，解码后的消息由收集线程按直播间回调
+    register_room() 注册的处理函数。回调在收集线程中执行。
+    """
+
+    def __init__(self, workers: Optional[int] = None, decoder: Callable = decode_frame,
+                 ring_capacity: int = DEFAULT_RING_CAPACITY,
+                 max_pending: int = DEFAULT_MAX_PENDING, start_method: str = 'spawn'):
+        self._worker_count = max(1, workers or os.cpu_count() or 1)
+        self._decoder = decoder
+        self._ring_capacity = ring_capacity
+        self._max_pending = max_pending
+        self._context = multiprocessing.get_context(start_method)
+        self._workers: List[DecodeWorker] = []
+        self._rooms: Dict[Hashable, tuple] = {}
+        self._stop_event = None
+        self._collector: Optional[threading.Thread] = None
+        self._running = False
+
+        # 统计
+        self.frames_decoded = 0
+        self.events_decoded = 0
+        self.decode_errors = 0
+        self.orphan_records = 0
+
+    @property
+    def worker_count(self) -> int:
+        """工作进程数"""
+        return self._worker_count
+
+    @property
+    def is_running(self) -> bool:
+        """是否正在运行"""
+        return self._running
+
+    def start(self):
+        """
+        启动工作进程和收集线程
+        """
+        if self._running:
+            return
+        self._stop_event = self._context.Event()
+        self._workers = [
+            DecodeWorker(self._context, self._decoder, self._ring_capacity,
+                         self._max_pending, self._stop_event, index)
+            for index in range(self._worker_count)
+        ]
+        for worker in self._workers:
+            worker.process.start()
+        self._running = True
+        self._collector = threading.Thread(target=self._collect_loop, name="DecodePoolCollector",
+                                           daemon=True)
+        self._collector.start()
+
+    def stop(self, timeout: float = 2.0):
+        """
+        停止解码池，已提交的帧会先处理完
+
+        Args:
+            timeout: 等待每个工作进程退出的时间（秒）
+        """
+        if not self._running:
+            return
+        for worker in self._workers:
+            worker.frames.put(None)
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            # 工作进程可能在等待环形缓冲区空间，收集线程仍在读取
+            worker.process.join(max(deadline - time.monotonic(), 0.0))
+
+        self._running = False
+        self._stop_event.set()
+        if self._collector:
+            self._collector.join(timeout=1.0)
+            self._collector = None
+
+        for worker in self._workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join(0.5)
+            worker.frames.close()
+            worker.ring.close()
+        self._workers = []
+
+    def worker_for(self, room: Hashable) -> int:
+        """
+        计算直播间对应的工作进程序号
+
+        使用 crc32 而不是 hash()，保证不同进程和不同运行之间分配一致
+
+        Args:
+            room: 直播间标识
+
+        Returns:
+            int: 工作进程序号
+        """
+        return zlib.crc32(str(room).encode('utf-8')) % self._worker_count
+
+    def register_room(self, room: Hashable, on_events: Callable[[List[Dict[str, Any]]], None],
+                      on_error: Optional[Callable[[str], None]] = None):
+        """
+        注册直播间的消息处理函数
+
+        Args:
+            room: 直播间标识（str 或 int，会随帧一起传给工作进程）
+            on_events: 处理一帧解码出的消息列表
+            on_error: 处理解码错误
+        """
+        self._rooms[room] = (on_events, on_error)
+
+    def unregister_room(self, room: Hashable):
+        """
+        注销直播间，之后到达的该直播间消息会被丢弃
+
+        Args:
+            room: 直播间标识
+        """
+        self._rooms.pop(room, None)
+
+    def submit(self, room: Hashable, payload: bytes, receive_time: Optional[float] = None):
+        """
+        提交一帧待解码数据
+
+        工作进程积压超过 max_pending 帧时阻塞调用方（获取器的接收线程）
+
+        Args:
+            room: 直播间标识
+            payload: 推送帧 payload
+            receive_time: 帧接收时间，默认为当前时间
+        """
+        if not self._running:
+            raise RuntimeError("解码池未启动")
+        if receive_time is None:
+            receive_time = time.time()
+        worker = self._workers[self.worker_for(room)]
+        worker.frames.put((room, bytes(payload), receive_time))
+        worker.submitted += 1
+
+    def _handle_record(self, record: memoryview):
+        """
+        处理环形缓冲区中的一条记录
+
+        Args:
+            record: 共享内存中的记录
+        """
+        room, events, error = marshal.loads(record)
+        self.frames_decoded += 1
+        self.events_decoded += len(events)
+        callbacks = self._rooms.get(room)
+        if callbacks is None:
+            self.orphan_records += 1
+            return
+        on_events, on_error = callbacks
+        if error:
+            self.decode_errors += 1
+            if on_error:
+                on_error(error)
+        if events:
+            on_events(events)
+
+    def _collect_loop(self):
+        """
+        收集线程: 轮询各工作进程的环形缓冲区
+
+        空闲时逐步延长轮询间隔，有数据时立即继续读取
+        """
+        idle_delay = 0.0002
+        while self._running:
+            count = 0
+            for worker in self._workers:
+                try:
+                    count += worker.ring.consume(self._handle_record, 256)
+                except Exception:
+                    self.decode_errors += 1
+            if count:
+                idle_delay = 0.0002
+            else:
+                time.sleep(idle_delay)
+                idle_delay = min(idle_delay * 2, 0.005)
+
+        # 读取剩余记录
+        for worker in self._workers:
+            try:
+                worker.ring.consume(self._handle_record)
+            except Exception:
+                self.decode_errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取解码池统计信息
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            'workers': self._worker_count,
+            'rooms': len(self._rooms),
+            'frames_submitted': sum(worker.submitted for worker in self._workers),
+            'frames_decoded': self.frames_decoded,
+            'events_decoded': self.events_decoded,
+            'decode_errors': self.decode_errors,
+            'ring_bytes_used': [worker.ring.used for worker in self._workers],
+            'ring_producer_waits': sum(worker.ring.producer_waits for worker in self._workers)
+        }
+
+    def collect(self):
+        """
+        生成指标族，供 MetricsRegistry 使用
+
+        Returns:
+            Iterable: 指标族列表
+        """
+        stats = self.stats()
+        yield ('tvs_decode_pool_workers', 'gauge', "解码工作进程数", [({}, stats['workers'])])
+        yield ('tvs_decode_pool_frames_total', 'counter', "解码池已解码的帧数",
+               [({}, stats['frames_decoded'])])
+        yield ('tvs_decode_pool_events_total', 'counter', "解码池已解码的消息数",
+               [({}, stats['events_decoded'])])
+        yield ('tvs_decode_pool_errors_total', 'counter', "解码失败的帧数",
+               [({}, stats['decode_errors'])])
+        yield ('tvs_decode_pool_ring_waits_total', 'counter', "工作进程等待环形缓冲区空间的次数",
+               [({}, stats['ring_producer_waits'])])
+        yield ('tvs_decode_pool_ring_bytes', 'gauge', "环形缓冲区中未读取的字节数",
+               [({'worker': str(index)}, used) for index, used in enumerate(stats['ring_bytes_used'])])
+
+
+_shared_pool: Optional[DecodePool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def enable_shared_decode_pool(workers: Optional[int] = None) -> DecodePool:
+    """
+    启用进程内共享的解码池，之后创建的获取器都把原始帧交给它解码
+
+    Args:
+        workers: 工作进程数，默认为CPU核数
+
+    Returns:
+        DecodePool: 共享解码池
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            from .metrics import default_registry
+
+            _shared_pool = DecodePool(workers)
+            _shared_pool.start()
+            default_registry.register(_shared_pool)
+        return _shared_pool
+
+
+def get_shared_decode_pool() -> Optional[DecodePool]:
+    """
+    获取共享解码池
+
+    Returns:
+        Optional[DecodePool]: 未启用时返回 None
+    """
+    return _shared_pool
+
+
+def shutdown_shared_decode_pool():
+    """
+    停止共享解码池
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        pool = _shared_pool
+        _shared_pool = None
+    if pool:
+        pool.stop()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Event Bus
+事件总线
+
+进程内的类型化发布/订阅事件总线。
+订阅者按消息类型位掩码注册，发布时只分发给匹配的订阅者；
+每个订阅者拥有独立的有界队列，慢速订阅者不会阻塞发布者。
+"""
+
+import itertools
+import threading
+from collections import deque
+from enum import IntEnum
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+from models.message_types import MessageType, ALL_MESSAGE_TYPES_MASK, mask_to_message_types
+
+EventPredicate = Callable[[Dict[str, Any]], bool]
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
+class DeliveryMode(IntEnum):
+    """
+    事件投递方式枚举
+    """
+    INLINE = 0      # 在发布线程中直接回调
+    THREAD = 1      # 在订阅者独立的后台线程中回调
+    POLL = 2        # 由订阅者自行调用 drain() 拉取（例如GUI线程的定时器）
+
+
+class Subscription:
+    """
+    事件订阅
+
+    由 EventBus.subscribe() 创建，保存订阅条件、有界队列和投递统计
+    """
+
+    def __init__(self, bus: 'EventBus', subscription_id: int, name: str, mask: int,
+                 predicate: Optional[EventPredicate], callback: Optional[EventCallback],
+                 mode: DeliveryMode, maxsize: int):
+        self._bus = bus
+        self.subscription_id = subscription_id
+        self.name = name
+        self.mask = mask
+        self.mode = mode
+        self.maxsize = maxsize
+        self._predicate = predicate
+        self._callback = callback
+
+        # 有界队列，队列满时丢弃最旧的事件
+        self._queue: deque = deque()
+        self._wakeup = threading.Event()
+        self._active = True
+        self._thread: Optional[threading.Thread] = None
+
+        # 投递统计
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+        if mode == DeliveryMode.THREAD:
+            self._thread = threading.Thread(
+                target=self._run, name=f"EventBus-{name}", daemon=True
+            )
+            self._thread.start()
+
+    @property
+    def active(self) -> bool:
+        """订阅是否有效"""
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        """当前队列深度"""
+        return len(self._queue)
+
+    def offer(self, event: Dict[str, Any]):
+        """
+        向订阅投递事件（由事件总线在发布线程中调用）
+
+        Args:
+            event: 事件数据
+        """
+        if not self._active:
+            return
+
+        predicate = self._predicate
+        if predicate is not None:
+            try:
+                if not predicate(event):
+                    return
+            except Exception:
+                self.errors += 1
+                return
+
+        self.received += 1
+
+        if self.mode == DeliveryMode.INLINE:
+            self._invoke(event)
+            return
+
+        queue = self._queue
+        queue.append(event)
+        if len(queue) > self.maxsize:
+            try:
+                queue.popleft()
+                self.dropped += 1
+            except IndexError:
+                pass
+
+        if self.mode == DeliveryMode.THREAD:
+            self._wakeup.set()
+
+    def drain(self, max_items: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        取出队列中的事件（POLL模式使用）
+
+        Args:
+            max_items: 最多取出的事件数量，None表示全部
+
+        Returns:
+            List[Dict[str, Any]]: 事件列表
+        """
+        queue = self._queue
+        count = len(queue) if max_items is None else min(max_items, len(queue))
+        events = []
+        popleft = queue.popleft
+        try:
+            for _ in range(count):
+                events.append(popleft())
+        except IndexError:
+            pass
+        self.delivered += len(events)
+        return events
+
+    def cancel(self):
+        """
+        取消订阅
+        """
+        self._bus.unsubscribe(self)
+
+    def _close(self):
+        """
+        关闭订阅，停止后台线程
+        """
+        self._active = False
+        self._wakeup.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._queue.clear()
+
+    def _invoke(self, event: Dict[str, Any]):
+        """
+        调用订阅回调
+
+        Args:
+            event: 事件数据
+        """
+        try:
+            self._callback(event)
+            self.delivered += 1
+        except Exception:
+            self.errors += 1
+
+    def _run(self):
+        """
+        THREAD模式的投递线程
+        """
+        queue = self._queue
+        while self._active:
+            self._wakeup.wait(0.5)
+            self._wakeup.clear()
+            while self._active:
+                try:
+                    event = queue.popleft()
+                except IndexError:
+                    break
+                self._invoke(event)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取订阅统计信息
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            'name': self.name,
+            'mode': self.mode.name,
+            'queue_depth': len(self._queue),
+            'maxsize': self.maxsize,
+            'received': self.received,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors
+        }
+
+
+class EventBus:
+    """
+    类型化发布/订阅事件总线
+
+    按消息类型维护订阅者索引，发布一个事件的开销只与匹配的订阅者数量有关。
+    订阅变更时重建索引（写时复制），发布路径不加锁。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: Tuple[Subscription, ...] = ()
+        self._index: List[Tuple[Subscription, ...]] = [() for _ in range(len(MessageType))]
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    @property
+    def subscriptions(self) -> Tuple[Subscription, ...]:
+        """获取当前全部订阅"""
+        return self._subscriptions
+
+    def subscribe(self, mask: int = ALL_MESSAGE_TYPES_MASK,
+                  callback: Optional[EventCallback] = None,
+                  predicate: Optional[EventPredicate] = None,
+                  mode: DeliveryMode = DeliveryMode.THREAD,
+                  maxsize: int = 1000,
+                  name: Optional[str] = None) -> Subscription:
+        """
+        注册订阅
+
+        Args:
+            mask: 消息类型位掩码，参见 message_type_mask()
+            callback: 事件回调，INLINE和THREAD模式必填
+            predicate: 可选的过滤条件，返回False的事件不会入队
+            mode: 投递方式
+            maxsize: 队列容量，队列满时丢弃最旧的事件
+            name: 订阅名称，用于统计和线程命名
+
+        Returns:
+            Subscription: 订阅对象
+        """
+        if mode != DeliveryMode.POLL and callback is None:
+            raise ValueError("INLINE和THREAD模式必须提供回调函数")
+        if maxsize <= 0:
+            raise ValueError("队列容量必须大于0")
+
+        subscription_id = next(self._ids)
+        subscription = Subscription(
+            self, subscription_id, name or f"subscriber-{subscription_id}",
+            mask, predicate, callback, mode, maxsize
+        )
+
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+            self._rebuild_index()
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        取消订阅
+
+        Args:
+            subscription: 订阅对象
+        """
+        with self._lock:
+            self._subscriptions = tuple(
+                s for s in self._subscriptions if s is not subscription
+            )
+            self._rebuild_index()
+
+        subscription._close()
+
+    def publish(self, event: Dict[str, Any]):
+        """
+        发布事件
+
+        Args:
+            event: 事件数据，必须包含 'type' 字段
+        """
+        self.published += 1
+        try:
+            subscribers = self._index[event.get('type', MessageType.UNKNOWN)]
+        except (IndexError, TypeError):
+            subscribers = self._index[MessageType.UNKNOWN]
+
+        for subscription in subscribers:
+            subscription.offer(event)
+
+    def close(self):
+        """
+        关闭事件总线，取消全部订阅
+        """
+        with self._lock:
+            subscriptions = self._subscriptions
+            self._subscriptions = ()
+            self._rebuild_index()
+
+        for subscription in subscriptions:
+            subscription._close()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        获取全部订阅的统计信息
+
+        Returns:
+            List[Dict[str, Any]]: 统计信息列表
+        """
+        return [subscription.stats() for subscription in self._subscriptions]
+
+    def _rebuild_index(self):
+        """
+        重建消息类型到订阅者的索引（调用方需持有锁）
+        """
+        index: List[List[Subscription]] = [[] for _ in range(len(MessageType))]
+        for subscription in self._subscriptions:
+            for message_type in mask_to_message_types(subscription.mask):
+                index[message_type].append(subscription)
+        self._index = [tuple(subscribers) for subscribers in index]
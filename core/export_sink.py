@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export Sink
+消息导出
+
+把事件总线上的标准化消息持续写入 JSONL 或 CSV 文件，供离线分析:
+
+- 每个导出器拥有独立的有界订阅队列（POLL 模式，队列满时丢弃最旧的消息并计数），
+  由后台线程批量取出并写入，磁盘再慢也不会阻塞采集和界面
+- 文件按大小或时间轮换，可选 gzip 压缩；正在写入的文件带 .part 后缀，关闭后改为正式文件名
+- 写入经过缓冲，每隔 fsync_interval 秒才 flush + fsync 一次，而不是每条消息一次
+- 统计最近一段时间内的持续写入速率（条/秒、字节/秒），并导出为指标
+
+JSONL 每行是一条完整的消息字典；CSV 只包含 CSV_COLUMNS 中的常用字段，
+文件以 UTF-8 BOM 开头，可以直接用 Excel 打开。两种格式的消息类型都输出为小写名称（如 chat）。
+
+导出器订阅的是刷屏合并之后的消息: 重复的聊天只导出第一条和"×N"汇总行，
+汇总行的 repeat_count 为被合并的消息数（不含已单独导出的第一条），
+统计聊天量时普通行计 1，汇总行计 repeat_count。
+"""
+
+import io
+import os
+import csv
+import gzip
+import json
+import time
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple
+
+from models.message_types import MessageType, ALL_MESSAGE_TYPES_MASK
+from .event_bus import EventBus, Subscription, DeliveryMode
+from .metrics import Histogram, default_registry
+
+# 默认导出目录
+DEFAULT_EXPORT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exports'
+)
+
+# 支持的导出格式
+EXPORT_FORMATS = ('jsonl', 'csv')
+
+# 默认单个文件的上限（字节，压缩时按压缩后的大小计算）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 默认轮换间隔（秒）
+DEFAULT_ROTATE_INTERVAL = 3600.0
+
+# 默认 fsync 间隔（秒）
+DEFAULT_FSYNC_INTERVAL = 1.0
+
+# 默认订阅队列容量（条）
+DEFAULT_QUEUE_SIZE = 50000
+
+# 每批最多写入的消息数
+DEFAULT_BATCH_SIZE = 2000
+
+# 队列为空时写入线程的等待间隔（秒）
+POLL_INTERVAL = 0.1
+
+# 文件写入缓冲区大小（字节）
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# gzip 压缩级别（速度优先）
+COMPRESS_LEVEL = 1
+
+# 写入失败后暂停写入的时间（秒），期间的消息丢弃并计数
+ERROR_RETRY_INTERVAL = 5.0
+
+# 写入速率的统计窗口（秒）
+THROUGHPUT_WINDOW = 10.0
+
+# CSV 的列（repeat_count / repeat_users / dedup_id 只在刷屏合并的汇总行中有值）
+CSV_COLUMNS = (
+    'receive_time', 'server_time', 'type', 'method', 'msg_id', 'user_id', 'user', 'content',
+    'gift_id', 'gift_name', 'count', 'diamond_count', 'total_coin', 'online', 'total_user',
+    'repeat_count', 'repeat_users', 'dedup_id',
+)
+
+
+def _type_name(value: Any) -> str:
+    try:
+        return MessageType(value).name.lower()
+    except ValueError:
+        return str(value)
+
+
+def encode_jsonl(events: List[Dict[str, Any]]) -> bytes:
+    """
+    编码为 JSONL，消息类型与 CSV 相同输出为小写名称
+
+    Args:
+        events: 消息列表
+
+    Returns:
+        bytes: 每条消息一行
+    """
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+    lines = []
+    for event in events:
+        if 'type' in event:
+            event = dict(event, type=_type_name(event['type']))
+        lines.append(dumps(event) + '\n')
+    return ''.join(lines).encode('utf-8')
+
+
+def encode_csv(events: List[Dict[str, Any]]) -> bytes:
+    """
+    编码为 CSV（不含表头），消息类型输出为小写名称
+
+    Args:
+        events: 消息列表
+
+    Returns:
+        bytes: CSV 行
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for event in events:
+        row = [event.get(column, '') for column in CSV_COLUMNS]
+        row[2] = _type_name(row[2])
+        writer.writerow(row)
+    return buffer.getvalue().encode('utf-8')
+
+
+def csv_header() -> bytes:
+    """
+    CSV 文件头（UTF-8 BOM 和表头）
+
+    Returns:
+        bytes: 文件头
+    """
+    return ('\ufeff' + ','.join(CSV_COLUMNS) + '\n').encode('utf-8')
+
+
+class ThroughputMeter:
+    """
+    滑动窗口写入速率
+
+    每次写入记录 (时间, 累计条数, 累计字节数)，速率按窗口首尾的差值计算
+    """
+
+    def __init__(self, window: float = THROUGHPUT_WINDOW, clock=time.monotonic):
+        self._window = window
+        self._clock = clock
+        self._samples: deque = deque()
+        self._lock = threading.Lock()
+
+    def record(self, events: int, nbytes: int):
+        """
+        记录累计写入量
+
+        Args:
+            events: 累计写入条数
+            nbytes: 累计写入字节数
+        """
+        now = self._clock()
+        with self._lock:
+            samples = self._samples
+            samples.append((now, events, nbytes))
+            while len(samples) > 2 and now - samples[1][0] >= self._window:
+                samples.popleft()
+
+    def rates(self) -> Tuple[float, float]:
+        """
+        最近窗口内的写入速率
+
+        Returns:
+            Tuple[float, float]: (条/秒, 字节/秒)，样本不足时为 0
+        """
+        now = self._clock()
+        with self._lock:
+            if len(self._samples) < 2:
+                return 0.0, 0.0
+            first_time, first_events, first_bytes = self._samples[0]
+            _, last_events, last_bytes = self._samples[-1]
+        # 最后一次写入之后的空闲时间也计入，停止写入后速率逐渐降为 0
+        elapsed = max(now - first_time, 1e-6)
+        return (last_events - first_events) / elapsed, (last_bytes - first_bytes) / elapsed
+
+
+class ExportSink:
+    """
+    消息导出器
+
+    attach() 订阅事件总线并启动写入线程；close() 写完队列中剩余的消息、关闭当前文件后取消订阅
+    """
+
+    def __init__(self, directory: str = DEFAULT_EXPORT_DIR, fmt: str = 'jsonl', prefix: str = 'live',
+                 mask: int = ALL_MESSAGE_TYPES_MASK, compress: bool = False,
+                 max_bytes: int = DEFAULT_MAX_BYTES, rotate_interval: float = DEFAULT_ROTATE_INTERVAL,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, name: Optional[str] = None):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {fmt}")
+        self.directory = directory
+        self.fmt = fmt
+        self.prefix = prefix
+        self.compress = compress
+        self.name = name or f"export-{fmt}"
+        self._mask = mask
+        self._max_bytes = max_bytes
+        self._rotate_interval = rotate_interval
+        self._fsync_interval = fsync_interval
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._encode = encode_jsonl if fmt == 'jsonl' else encode_csv
+
+        self._subscription: Optional[Subscription] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # 当前文件
+        self._raw = None
+        self._stream = None
+        self._path: Optional[str] = None
+        self._opened_at = 0.0
+        self._last_sync = 0.0
+        self._dirty = False
+        self._sequence = 0
+        self._paused_until = 0.0
+
+        # 统计
+        self.events_written = 0
+        self.bytes_written = 0
+        self.events_failed = 0
+        self.events_overflowed = 0
+        self.files_completed = 0
+        self.fsyncs = 0
+        self.write_errors = 0
+        self.last_error: Optional[str] = None
+        self.last_file: Optional[str] = None
+        self.fsync_latency = Histogram()
+        self.throughput = ThroughputMeter()
+
+    @property
+    def is_running(self) -> bool:
+        """写入线程是否在运行"""
+        return self._thread is not None
+
+    @property
+    def current_file(self) -> Optional[str]:
+        """正在写入的文件（写完后的文件名，写入中带 .part 后缀），没有时为 None"""
+        return self._path
+
+    def attach(self, event_bus: EventBus) -> Subscription:
+        """
+        订阅事件总线并启动写入线程
+
+        Args:
+            event_bus: 事件总线
+
+        Returns:
+            Subscription: 订阅
+        """
+        if self._thread is not None:
+            raise RuntimeError("导出器已在运行")
+        self._subscription = event_bus.subscribe(
+            self._mask, mode=DeliveryMode.POLL, maxsize=self._queue_size, name=self.name
+        )
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"ExportSink-{self.name}", daemon=True)
+        self._thread.start()
+        default_registry.register(self)
+        return self._subscription
+
+    def close(self, timeout: float = 5.0):
+        """
+        写完队列中的消息，关闭当前文件并取消订阅
+
+        Args:
+            timeout: 等待写入线程退出的时间（秒）
+        """
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop_event.set()
+        thread.join(timeout)
+        subscription, self._subscription = self._subscription, None
+        if subscription is not None:
+            subscription.cancel()
+            self.events_overflowed += subscription.dropped
+        default_registry.unregister(self)
+
+    def _run(self):
+        """
+        写入线程主循环
+        """
+        subscription = self._subscription
+        try:
+            while True:
+                stopping = self._stop_event.wait(POLL_INTERVAL)
+                while True:
+                    events = subscription.drain(self._batch_size)
+                    if not events:
+                        break
+                    self._write(events)
+                if self._dirty and time.monotonic() - self._last_sync >= self._fsync_interval:
+                    self._guarded(self._sync)
+                if self._stream is not None and time.time() - self._opened_at >= self._rotate_interval:
+                    self._guarded(self._close_file)
+                if stopping:
+                    break
+        finally:
+            self._guarded(self._close_file)
+
+    def _write(self, events: List[Dict[str, Any]]):
+        """
+        写入一批消息，写入失败后的一段时间内直接丢弃
+
+        Args:
+            events: 消息列表
+        """
+        if time.monotonic() < self._paused_until:
+            self.events_failed += len(events)
+            return
+        try:
+            data = self._encode(events)
+            if self._stream is None:
+                self._open_file()
+            self._stream.write(data)
+            self._dirty = True
+        except (OSError, ValueError) as e:
+            self.events_failed += len(events)
+            self._fail(e)
+            return
+
+        self.events_written += len(events)
+        self.bytes_written += len(data)
+        self.throughput.record(self.events_written, self.bytes_written)
+        if self._raw.tell() >= self._max_bytes:
+            self._guarded(self._close_file)
+
+    def _open_file(self):
+        """
+        打开新文件（.part），CSV 先写入表头
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        suffix = f".{self.fmt}.gz" if self.compress else f".{self.fmt}"
+        while True:
+            self._sequence += 1
+            name = f"{self.prefix}-{stamp}-{self._sequence:03d}{suffix}"
+            path = os.path.join(self.directory, name)
+            if os.path.exists(path):
+                continue
+            try:
+                # 同一秒内创建的其他导出器可能使用了相同的文件名
+                raw = open(path + '.part', 'xb', buffering=WRITE_BUFFER_SIZE)
+                break
+            except FileExistsError:
+                continue
+        if self.compress:
+            stream = gzip.GzipFile(filename=name[:-3], mode='wb', fileobj=raw, compresslevel=COMPRESS_LEVEL)
+        else:
+            stream = raw
+        if self.fmt == 'csv':
+            stream.write(csv_header())
+        self._raw, self._stream, self._path = raw, stream, path
+        self._opened_at = now
+        self._last_sync = time.monotonic()
+
+    def _sync(self):
+        """
+        把缓冲区写入磁盘（一批消息一次 fsync）
+        """
+        if self._stream is None:
+            return
+        started = time.monotonic()
+        self._stream.flush()
+        if self._stream is not self._raw:
+            self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._last_sync = time.monotonic()
+        self._dirty = False
+        self.fsyncs += 1
+        self.fsync_latency.observe(self._last_sync - started)
+
+    def _close_file(self):
+        """
+        关闭当前文件并去掉 .part 后缀
+        """
+        stream, raw, path = self._stream, self._raw, self._path
+        if stream is None:
+            return
+        self._stream = self._raw = self._path = None
+        self._dirty = False
+        try:
+            if stream is not raw:
+                # 写入 gzip 结尾，不关闭底层文件
+                stream.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+            self.fsyncs += 1
+        finally:
+            raw.close()
+        os.replace(path + '.part', path)
+        self.files_completed += 1
+        self.last_file = path
+
+    def _guarded(self, operation):
+        """
+        执行文件操作，失败时记录错误并丢弃当前文件
+        """
+        try:
+            operation()
+        except (OSError, ValueError) as e:
+            self._fail(e)
+
+    def _fail(self, error: Exception):
+        """
+        记录写入错误，关闭当前文件并暂停写入
+
+        Args:
+            error: 异常
+        """
+        self.write_errors += 1
+        self.last_error = str(error)
+        self._paused_until = time.monotonic() + ERROR_RETRY_INTERVAL
+        raw, self._stream, self._raw, self._path = self._raw, None, None, None
+        self._dirty = False
+        if raw is not None:
+            try:
+                raw.close()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取导出统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        subscription = self._subscription
+        events_per_second, bytes_per_second = self.throughput.rates()
+        return {
+            'name': self.name,
+            'format': self.fmt,
+            'compress': self.compress,
+            'events_written': self.events_written,
+            'bytes_written': self.bytes_written,
+            'events_per_second': events_per_second,
+            'bytes_per_second': bytes_per_second,
+            'queue_depth': subscription.queue_depth if subscription is not None else 0,
+            'dropped': (subscription.dropped if subscription is not None else 0) + self.events_overflowed
+                       + self.events_failed,
+            'files_completed': self.files_completed,
+            'fsyncs': self.fsyncs,
+            'write_errors': self.write_errors,
+            'last_error': self.last_error,
+            'failing': time.monotonic() < self._paused_until,
+            'current_file': self._path,
+            'last_file': self.last_file,
+        }
+
+    def collect(self):
+        """
+        生成指标族，供 MetricsRegistry 使用
+
+        Returns:
+            Iterable: 指标族列表
+        """
+        stats = self.stats()
+        labels = {'sink': self.name}
+        yield ('tvs_export_events_total', 'counter', "导出的消息数", [(labels, stats['events_written'])])
+        yield ('tvs_export_bytes_total', 'counter', "导出的字节数（压缩前）", [(labels, stats['bytes_written'])])
+        yield ('tvs_export_events_per_second', 'gauge', "最近10秒的导出速率（条/秒）",
+               [(labels, stats['events_per_second'])])
+        yield ('tvs_export_bytes_per_second', 'gauge', "最近10秒的导出速率（字节/秒，压缩前）",
+               [(labels, stats['bytes_per_second'])])
+        yield ('tvs_export_queue_depth', 'gauge', "等待写入的消息数", [(labels, stats['queue_depth'])])
+        yield ('tvs_export_dropped_total', 'counter', "队列满或写入失败而丢弃的消息数",
+               [(labels, stats['dropped'])])
+        yield ('tvs_export_files_total', 'counter', "写完的文件数", [(labels, stats['files_completed'])])
+        yield ('tvs_export_write_errors_total', 'counter', "写入失败次数", [(labels, stats['write_errors'])])
+        yield ('tvs_export_fsync_seconds', 'histogram', "fsync 耗时", self.fsync_latency.samples(labels))
+
+
+def format_export_status(stats: Dict[str, Any]) -> str:
+    """
+    生成状态栏显示的导出状态
+
+    Args:
+        stats: ExportSink.stats() 的结果
+
+    Returns:
+        str: 例如 "导出: 1520 条/秒 0.84 MB/s"
+    """
+    if stats['failing']:
+        return f"导出失败: {stats['last_error']}"
+    text = f"导出: {stats['events_per_second']:.0f} 条/秒 {stats['bytes_per_second'] / (1024 * 1024):.2f} MB/s"
+    if stats['dropped']:
+        text += f"，丢弃 {stats['dropped']}"
+    return text
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Frame Inflater
+推送帧解压
+
+推送帧的 payload 是gzip压缩的 Response。
+gzip.decompress() 每帧都会创建文件对象和读取缓冲，并在多个中间缓冲之间复制数据；
+这里直接用 zlib 对 memoryview 做一次性解压，输入不复制，输出按近期帧大小预估缓冲大小，
+只产生一次输出分配，解压结果直接交给 Response 解码器。
+"""
+
+import time
+import zlib
+from typing import Union
+
+# gzip魔数
+GZIP_MAGIC = b'\x1f\x8b'
+
+# zlib窗口参数: 31 = 只接受gzip格式
+GZIP_WBITS = 31
+
+# 输出缓冲大小的上下限
+MIN_BUFFER_SIZE = 16 * 1024
+MAX_BUFFER_SIZE = 16 * 1024 * 1024
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class FrameInflater:
+    """
+    推送帧解压器
+
+    输出缓冲大小根据最近的解压结果自适应，避免 zlib 在解压过程中反复扩容。
+    每个连接一个实例，只在该连接的接收线程中使用。
+    """
+
+    def __init__(self, initial_buffer_size: int = 64 * 1024, metrics=None):
+        self._buffer_size = initial_buffer_size
+        self._metrics = metrics
+
+        # 统计
+        self.frames = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.passthrough = 0
+
+    @property
+    def buffer_size(self) -> int:
+        """当前预估的输出缓冲大小"""
+        return self._buffer_size
+
+    def inflate(self, payload: BytesLike) -> bytes:
+        """
+        解压推送帧 payload
+
+        非gzip格式的payload原样返回（bytes类型时不复制）
+
+        Args:
+            payload: 帧负载，可以是整帧缓冲的 memoryview 切片
+
+        Returns:
+            bytes: 解压后的 Response 数据
+
+        Raises:
+            zlib.error: gzip数据损坏
+        """
+        start = time.perf_counter()
+        view = payload if isinstance(payload, memoryview) else memoryview(payload)
+        size = view.nbytes
+
+        self.frames += 1
+        self.bytes_in += size
+        if self._metrics is not None:
+            self._metrics.record_frame(size)
+
+        if view[:2] != GZIP_MAGIC:
+            self.passthrough += 1
+            return payload if isinstance(payload, bytes) else view.tobytes()
+
+        data = zlib.decompress(view, GZIP_WBITS, self._buffer_size)
+        self.bytes_out += len(data)
+        self._adapt_buffer_size(len(data))
+
+        if self._metrics is not None:
+            self._metrics.inflate_latency.observe(time.perf_counter() - start)
+
+        return data
+
+    def _adapt_buffer_size(self, output_size: int):
+        """
+        根据本次输出大小调整预估缓冲大小
+
+        超出时扩大到下一个2的幂；持续偏小时缓慢收缩，避免为偶发大帧长期占用内存
+
+        Args:
+            output_size: 本次解压结果大小
+        """
+        size = self._buffer_size
+        if output_size > size:
+            size = 1 << (output_size - 1).bit_length()
+        elif output_size * 4 < size:
+            size = size - (size >> 3)
+        self._buffer_size = max(MIN_BUFFER_SIZE, min(size, MAX_BUFFER_SIZE))
+
+    def stats(self) -> dict:
+        """
+        获取解压统计信息
+
+        Returns:
+            dict: 统计信息
+        """
+        return {
+            'frames': self.frames,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'passthrough': self.passthrough,
+            'buffer_size': self._buffer_size
+        }
+
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gift Catalog
+礼物目录
+
+每条 GiftMessage 都重复携带礼物名称、图标和 GiftExtra 等子消息，
+而一个直播间用到的 giftId 只有几百个。礼物目录按 giftId 保存名称、单价（钻石）、
+图标URI和礼物类型，从流量中增量学习并保存到磁盘，启动时加载。
+
+解码器见到已知的 giftId 后只读取标量字段，跳过重的子消息（见 message_decoder.py）；
+营收按目录中的单价计算（GiftRevenue）。
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Optional, Dict, Any, Tuple
+
+# 默认目录文件
+DEFAULT_CATALOG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'gift_catalog.json'
+)
+
+# 有新礼物时两次保存的最小间隔（秒）
+DEFAULT_SAVE_INTERVAL = 10.0
+
+# 连击状态最多保留的条目数
+MAX_COMBO_ENTRIES = 10000
+
+
+class GiftInfo:
+    """
+    礼物目录条目
+    """
+
+    __slots__ = ('gift_id', 'name', 'diamond_count', 'icon_uri', 'icon_url', 'gift_type')
+
+    def __init__(self, gift_id: int, name: str = '', diamond_count: int = 0,
+                 icon_uri: str = '', icon_url: str = '', gift_type: int = 0):
+        self.gift_id = gift_id
+        self.name = name
+        self.diamond_count = diamond_count
+        self.icon_uri = icon_uri
+        self.icon_url = icon_url
+        self.gift_type = gift_type
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为可JSON序列化的字典
+
+        Returns:
+            Dict[str, Any]: 条目字段
+        """
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GiftInfo':
+        """
+        从字典创建条目
+
+        Args:
+            data: 条目字段
+
+        Returns:
+            GiftInfo: 条目
+        """
+        return cls(int(data['gift_id']), str(data.get('name', '')), int(data.get('diamond_count', 0)),
+                   str(data.get('icon_uri', '')), str(data.get('icon_url', '')), int(data.get('gift_type', 0)))
+
+
+def unit_diamonds(total_coin: int, count: int, group_count: int = 1) -> int:
+    """
+    由消息的 totalCoin 推算礼物单价
+
+    Args:
+        total_coin: 消息的 totalCoin
+        count: 礼物数量（repeatCount / comboCount）
+        group_count: 每组数量
+
+    Returns:
+        int: 单价（钻石），无法推算时为0
+    """
+    if total_coin <= 0:
+        return 0
+    return max(1, round(total_coin / (max(count, 1) * max(group_count, 1))))
+
+
+class GiftCatalog:
+    """
+    按 giftId 索引的礼物目录
+
+    observe() 在解码线程中调用，get() 可在任意线程调用。
+    单价取观察到的最小正值: totalCoin 若是连击累计值只会偏大，取最小值后收敛到真实单价。
+    多个进程（解码工作进程）可以共用同一个文件，保存时合并文件中已有的条目
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CATALOG_PATH,
+                 save_interval: float = DEFAULT_SAVE_INTERVAL):
+        self._path = path
+        self._save_interval = save_interval
+        self._gifts: Dict[int, GiftInfo] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+
+    @property
+    def path(self) -> Optional[str]:
+        """目录文件路径，None 表示不保存"""
+        return self._path
+
+    def __len__(self) -> int:
+        return len(self._gifts)
+
+    def __contains__(self, gift_id: int) -> bool:
+        return gift_id in self._gifts
+
+    def get(self, gift_id: int) -> Optional[GiftInfo]:
+        """
+        查询礼物
+
+        Args:
+            gift_id: 礼物ID
+
+        Returns:
+            Optional[GiftInfo]: 条目，未知礼物为 None
+        """
+        return self._gifts.get(gift_id)
+
+    def diamond_value(self, gift_id: int) -> int:
+        """
+        查询礼物单价
+
+        Args:
+            gift_id: 礼物ID
+
+        Returns:
+            int: 单价（钻石），未知时为0
+        """
+        info = self._gifts.get(gift_id)
+        return info.diamond_count if info is not None else 0
+
+    def observe(self, gift_id: int, name: str = '', diamond_count: int = 0,
+                icon_uri: str = '', icon_url: str = '', gift_type: int = 0) -> Optional[GiftInfo]:
+        """
+        记录一次观察到的礼物信息，只补充缺失的字段和更小的单价
+
+        Args:
+            gift_id: 礼物ID
+            name: 礼物名称
+            diamond_count: 单价（钻石）
+            icon_uri: 图标URI
+            icon_url: 图标下载地址
+            gift_type: 礼物类型
+
+        Returns:
+            Optional[GiftInfo]: 条目，gift_id 无效时为 None
+        """
+        if not gift_id:
+            return None
+        info = self._gifts.get(gift_id)
+        if (info is not None and info.name and (not icon_url or info.icon_url)
+                and (not diamond_count or 0 < info.diamond_count <= diamond_count)):
+            # 已知礼物，没有新信息（热路径）
+            return info
+
+        with self._lock:
+            info = self._gifts.get(gift_id)
+            if info is None:
+                info = GiftInfo(gift_id)
+                self._gifts[gift_id] = info
+            changed = self._merge(info, name, diamond_count, icon_uri, icon_url, gift_type)
+            if changed:
+                self._dirty = True
+        if changed and time.monotonic() - self._last_save >= self._save_interval:
+            self.save()
+        return info
+
+    def observe_event(self, event: Dict[str, Any]) -> Optional[GiftInfo]:
+        """
+        从标准化的礼物消息中记录礼物信息
+
+        Args:
+            event: 礼物消息
+
+        Returns:
+            Optional[GiftInfo]: 条目
+        """
+        diamond_count = event.get('diamond_count') or unit_diamonds(
+            event.get('total_coin', 0), event.get('count', 1), event.get('group_count', 1)
+        )
+        return self.observe(
+            event.get('gift_id', 0), event.get('gift_name', ''), diamond_count,
+            event.get('gift_icon_uri', ''), event.get('gift_icon_url', ''), event.get('gift_type', 0)
+        )
+
+    def load(self) -> int:
+        """
+        从文件加载目录，已有条目与文件合并
+
+        Returns:
+            int: 加载后的条目数
+        """
+        for data in self._read_file():
+            try:
+                loaded = GiftInfo.from_dict(data)
+            except (KeyError, TypeError, ValueError):
+                continue
+            with self._lock:
+                info = self._gifts.setdefault(loaded.gift_id, GiftInfo(loaded.gift_id))
+                self._merge(info, loaded.name, loaded.diamond_count, loaded.icon_uri,
+                            loaded.icon_url, loaded.gift_type)
+        return len(self._gifts)
+
+    def save(self, force: bool = False) -> bool:
+        """
+        保存目录（先合并文件中其他进程写入的条目，再原子替换文件）
+
+        Args:
+            force: 没有新条目时也保存
+
+        Returns:
+            bool: 是否写入了文件
+        """
+        if self._path is None or not (self._dirty or force):
+            return False
+        with self._save_lock:
+            self._last_save = time.monotonic()
+            self.load()
+            with self._lock:
+                self._dirty = False
+                document = {
+                    'version': 1,
+                    'gifts': [info.to_dict() for _, info in sorted(self._gifts.items())]
+                }
+            try:
+                os.makedirs(os.path.dirname(self._path), exist_ok=True)
+                temp_path = f"{self._path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(document, f, ensure_ascii=False, indent=1)
+                os.replace(temp_path, self._path)
+            except OSError:
+                self._dirty = True
+                return False
+        return True
+
+    def _read_file(self):
+        if self._path is None:
+            return []
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except (OSError, ValueError):
+            return []
+        gifts = document.get('gifts') if isinstance(document, dict) else None
+        return gifts if isinstance(gifts, list) else []
+
+    @staticmethod
+    def _merge(info: GiftInfo, name: str, diamond_count: int, icon_uri: str,
+               icon_url: str, gift_type: int) -> bool:
+        """
+        补充条目字段
+
+        Returns:
+            bool: 条目是否有变化
+        """
+        changed = False
+        if name and not info.name:
+            info.name = name
+            changed = True
+        if diamond_count > 0 and (info.diamond_count == 0 or diamond_count < info.diamond_count):
+            info.diamond_count = diamond_count
+            changed = True
+        if icon_uri and not info.icon_uri:
+            info.icon_uri = icon_uri
+            changed = True
+        if icon_url and not info.icon_url:
+            info.icon_url = icon_url
+            changed = True
+        if gift_type and not info.gift_type:
+            info.gift_type = gift_type
+            changed = True
+        return changed
+
+
+class GiftRevenue:
+    """
+    礼物营收统计
+
+    连击礼物会连续推送多条 repeatCount 递增的消息，按 (用户, 礼物, 连击组) 记录
+    上次的数量，只累计增量；repeatEnd 后清除该连击
+    """
+
+    def __init__(self, catalog: GiftCatalog):
+        self._catalog = catalog
+        self._combos: Dict[Tuple[Any, int, int], int] = {}
+
+        # 统计
+        self.diamonds = 0
+        self.gifts = 0
+        self.unpriced_gifts = 0
+
+    def add(self, event: Dict[str, Any]) -> int:
+        """
+        累计一条礼物消息
+
+        Args:
+            event: 礼物消息
+
+        Returns:
+            int: 本条消息新增的钻石数
+        """
+        gift_id = event.get('gift_id', 0)
+        count = event.get('count', 1) or 1
+        group_id = event.get('group_id', 0)
+
+        delta = count
+        if group_id:
+            key = (event.get('user_id') or event.get('user'), gift_id, group_id)
+            last = self._combos.pop(key, 0)
+            delta = count - last if count >= last else count
+            if not event.get('repeat_end'):
+                self._combos[key] = count
+                if len(self._combos) > MAX_COMBO_ENTRIES:
+                    # 丢弃最早的连击（字典保持插入顺序）
+                    del self._combos[next(iter(self._combos))]
+        if delta <= 0:
+            return 0
+
+        quantity = delta * max(event.get('group_count', 1) or 1, 1)
+        self.gifts += quantity
+        unit = event.get('diamond_count') or self._catalog.diamond_value(gift_id)
+        if not unit:
+            self.unpriced_gifts += quantity
+            return 0
+        diamonds = quantity * unit
+        self.diamonds += diamonds
+        return diamonds
+
+    def reset(self):
+        """
+        清空营收统计
+        """
+        self._combos.clear()
+        self.diamonds = 0
+        self.gifts = 0
+        self.unpriced_gifts = 0
+
+
+_catalog: Optional[GiftCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_gift_catalog() -> GiftCatalog:
+    """
+    获取进程内共享的礼物目录，第一次调用时从默认文件加载
+
+    Returns:
+        GiftCatalog: 礼物目录
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = GiftCatalog()
+            _catalog.load()
+        return _catalog
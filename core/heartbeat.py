@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Heartbeat Scheduler
+心跳与ACK调度
+
+按服务器下发的 heartbeatDuration 发送心跳，按 needAck 批量发送ACK。
+所有直播间共享一个时间轮和一个调度线程，而不是每个直播间各开线程或定时器。
+"""
+
+import time
+import threading
+from typing import Optional, Dict, Any, List, Callable, Hashable
+
+# 默认心跳间隔（秒），服务器未下发 heartbeatDuration 时使用
+DEFAULT_HEARTBEAT_INTERVAL = 10.0
+
+
+class TimerHandle:
+    """
+    时间轮定时器句柄
+    """
+
+    __slots__ = ('deadline', 'rounds', 'callback', 'args', 'cancelled')
+
+    def __init__(self, deadline: float, rounds: int, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        取消定时器（惰性删除，到期时跳过）
+        """
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    哈希时间轮
+
+    定时器按到期刻度放入对应槽位，每个刻度只处理一个槽位，
+    添加和取消都是O(1)，与定时器总数无关
+    """
+
+    def __init__(self, tick: float = 0.05, slots: int = 512):
+        self._tick = tick
+        self._slots: List[List[TimerHandle]] = [[] for _ in range(slots)]
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._current_tick = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 运行统计
+        self.fired = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.max_lateness = 0.0
+
+    @property
+    def tick(self) -> float:
+        """刻度长度（秒）"""
+        return self._tick
+
+    def schedule(self, delay: float, callback: Callable, *args) -> TimerHandle:
+        """
+        添加定时器
+
+        Args:
+            delay: 延迟（秒）
+            callback: 到期回调，在时间轮线程中调用
+            args: 回调参数
+
+        Returns:
+            TimerHandle: 定时器句柄
+        """
+        deadline = time.monotonic() + max(delay, 0.0)
+        target_tick = int((deadline - self._start) / self._tick) + 1
+        with self._lock:
+            ticks = max(target_tick - self._current_tick, 1)
+            slot_count = len(self._slots)
+            handle = TimerHandle(deadline, (ticks - 1) // slot_count, callback, args)
+            self._slots[(self._current_tick + ticks) % slot_count].append(handle)
+        return handle
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """
+        推进时间轮到当前时间，执行到期的定时器
+
+        Args:
+            now: 当前单调时间，默认为 time.monotonic()
+
+        Returns:
+            int: 本次执行的定时器数量
+        """
+        if now is None:
+            now = time.monotonic()
+        target_tick = int((now - self._start) / self._tick)
+        fired = 0
+        begin = time.perf_counter()
+
+        while self._current_tick < target_tick:
+            with self._lock:
+                self._current_tick += 1
+                index = self._current_tick % len(self._slots)
+                slot = self._slots[index]
+                due = []
+                remaining = []
+                for handle in slot:
+                    if handle.cancelled:
+                        continue
+                    if handle.rounds > 0:
+                        handle.rounds -= 1
+                        remaining.append(handle)
+                    else:
+                        due.append(handle)
+                self._slots[index] = remaining
+
+            for handle in due:
+                lateness = now - handle.deadline
+                if lateness > self.max_lateness:
+                    self.max_lateness = lateness
+                try:
+                    handle.callback(*handle.args)
+                except Exception:
+                    self.errors += 1
+                fired += 1
+
+        self.fired += fired
+        self.busy_time += time.perf_counter() - begin
+        return fired
+
+    def start(self):
+        """
+        启动时间轮线程
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="TimerWheel", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        停止时间轮线程
+        """
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self):
+        """
+        时间轮线程
+        """
+        while not self._stop_event.wait(self._tick):
+            self.advance()
+
+
+class RoomHeartbeat:
+    """
+    单个直播间的心跳和ACK状态
+
+    由 HeartbeatScheduler.register() 创建
+    """
+
+    def __init__(self, key: Hashable, send_heartbeat: Callable[[], None],
+                 send_acks: Callable[[List[Any]], None], heartbeat_interval: float):
+        self.key = key
+        self.send_heartbeat = send_heartbeat
+        self.send_acks = send_acks
+        self.heartbeat_interval = heartbeat_interval
+        self.active = True
+        self.pending_acks: List[Any] = []
+        self.heartbeat_timer: Optional[TimerHandle] = None
+        self.ack_timer: Optional[TimerHandle] = None
+
+        # 发送统计
+        self.heartbeats_sent = 0
+        self.acks_sent = 0
+        self.ack_batches = 0
+
+
+class HeartbeatScheduler:
+    """
+    心跳与ACK调度器
+
+    多个直播间共享一个时间轮。获取器每收到一个 Response 调用 on_response()，
+    调度器根据 heartbeatDuration 调整心跳间隔，并把需要确认的帧合并成批发送。
+    """
+
+    def __init__(self, wheel: Optional[TimerWheel] = None,
+                 ack_delay: float = 0.1, max_ack_batch: int = 32):
+        self._wheel = wheel or TimerWheel()
+        self._ack_delay = ack_delay
+        self._max_ack_batch = max_ack_batch
+        self._lock = threading.Lock()
+        self._rooms: Dict[Hashable, RoomHeartbeat] = {}
+
+    @property
+    def wheel(self) -> TimerWheel:
+        """获取时间轮"""
+        return self._wheel
+
+    @property
+    def room_count(self) -> int:
+        """已注册的直播间数量"""
+        return len(self._rooms)
+
+    def start(self):
+        """
+        启动调度线程
+        """
+        self._wheel.start()
+
+    def stop(self):
+        """
+        停止调度线程
+        """
+        self._wheel.stop()
+
+    def register(self, key: Hashable, send_heartbeat: Callable[[], None],
+                 send_acks: Callable[[List[Any]], None],
+                 heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL) -> RoomHeartbeat:
+        """
+        注册直播间连接
+
+        Args:
+            key: 连接标识
+            send_heartbeat: 发送心跳的回调
+            send_acks: 发送一批ACK的回调，参数为ACK数据列表
+            heartbeat_interval: 初始心跳间隔（秒）
+
+        Returns:
+            RoomHeartbeat: 直播间心跳状态
+        """
+        room = RoomHeartbeat(key, send_heartbeat, send_acks, heartbeat_interval)
+        with self._lock:
+            previous = self._rooms.get(key)
+            self._rooms[key] = room
+        if previous:
+            self._deactivate(previous)
+        room.heartbeat_timer = self._wheel.schedule(heartbeat_interval, self._on_heartbeat, room)
+        return room
+
+    def unregister(self, key: Hashable):
+        """
+        注销直播间连接，未发送的ACK会被丢弃
+
+        Args:
+            key: 连接标识
+        """
+        with self._lock:
+            room = self._rooms.pop(key, None)
+        if room:
+            self._deactivate(room)
+
+    def on_response(self, key: Hashable, heartbeat_duration: int = 0,
+                    need_ack: bool = False, ack: Any = None):
+        """
+        处理收到的 Response
+
+        Args:
+            key: 连接标识
+            heartbeat_duration: Response.heartbeatDuration（毫秒），0表示不变
+            need_ack: Response.needAck
+            ack: 需要确认时的ACK数据（例如 logId 和 internalExt）
+        """
+        room = self._rooms.get(key)
+        if room is None or not room.active:
+            return
+
+        if heartbeat_duration > 0:
+            interval = heartbeat_duration / 1000.0
+            if abs(interval - room.heartbeat_interval) > 1e-3:
+                room.heartbeat_interval = interval
+                if room.heartbeat_timer:
+                    room.heartbeat_timer.cancel()
+                room.heartbeat_timer = self._wheel.schedule(interval, self._on_heartbeat, room)
+
+        if need_ack:
+            with self._lock:
+                room.pending_acks.append(ack)
+                batch_full = len(room.pending_acks) >= self._max_ack_batch
+                if room.ack_timer is None or batch_full:
+                    if room.ack_timer:
+                        room.ack_timer.cancel()
+                    delay = 0.0 if batch_full else self._ack_delay
+                    room.ack_timer = self._wheel.schedule(delay, self._flush_acks, room)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取调度统计信息
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        rooms = list(self._rooms.values())
+        return {
+            'rooms': len(rooms),
+            'heartbeats_sent': sum(room.heartbeats_sent for room in rooms),
+            'acks_sent': sum(room.acks_sent for room in rooms),
+            'ack_batches': sum(room.ack_batches for room in rooms),
+            'timers_fired': self._wheel.fired,
+            'timer_errors': self._wheel.errors,
+            'timer_busy_seconds': self._wheel.busy_time,
+            'timer_max_lateness_seconds': self._wheel.max_lateness
+        }
+
+    def collect(self):
+        """
+        生成指标族，供 MetricsRegistry 使用
+
+        Returns:
+            Iterable: 指标族列表
+        """
+        stats = self.stats()
+        yield ('tvs_heartbeat_rooms', 'gauge', "共享心跳调度器中的连接数", [({}, stats['rooms'])])
+        yield ('tvs_heartbeats_sent_total', 'counter', "已发送的心跳数", [({}, stats['heartbeats_sent'])])
+        yield ('tvs_acks_sent_total', 'counter', "已发送的ACK数", [({}, stats['acks_sent'])])
+        yield ('tvs_ack_batches_total', 'counter', "已发送的ACK批次数", [({}, stats['ack_batches'])])
+        yield ('tvs_timer_wheel_busy_seconds_total', 'counter', "时间轮执行回调的累计耗时",
+               [({}, stats['timer_busy_seconds'])])
+
+    def _deactivate(self, room: RoomHeartbeat):
+        """
+        停用直播间的定时器
+
+        Args:
+            room: 直播间心跳状态
+        """
+        room.active = False
+        if room.heartbeat_timer:
+            room.heartbeat_timer.cancel()
+        if room.ack_timer:
+            room.ack_timer.cancel()
+        room.pending_acks = []
+
+    def _on_heartbeat(self, room: RoomHeartbeat):
+        """
+        心跳定时器到期
+
+        Args:
+            room: 直播间心跳状态
+        """
+        if not room.active:
+            return
+        room.heartbeat_timer = self._wheel.schedule(room.heartbeat_interval, self._on_heartbeat, room)
+        room.send_heartbeat()
+        room.heartbeats_sent += 1
+
+    def _flush_acks(self, room: RoomHeartbeat):
+        """
+        发送累积的ACK
+
+        Args:
+            room: 直播间心跳状态
+        """
+        with self._lock:
+            acks = room.pending_acks
+            room.pending_acks = []
+            room.ack_timer = None
+        if not room.active or not acks:
+            return
+        room.send_acks(acks)
+        room.acks_sent += len(acks)
+        room.ack_batches += 1
+
+
+_shared_scheduler: Optional[HeartbeatScheduler] = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_shared_scheduler() -> HeartbeatScheduler:
+    """
+    获取进程内共享的心跳调度器，首次调用时启动
+
+    Returns:
+        HeartbeatScheduler: 共享调度器
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            from .metrics import default_registry
+
+            _shared_scheduler = HeartbeatScheduler()
+            _shared_scheduler.start()
+            default_registry.register(_shared_scheduler)
+        return _shared_scheduler
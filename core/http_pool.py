@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP Pool
+HTTP连接池
+
+所有对外HTTP请求（图片、轮询、直播间页面）共用的保持连接（keep-alive）连接池，
+只依赖标准库 http.client。请求一般不直接使用连接池，而是经过
+request_scheduler.py 中的全局调度器限速和排队。
+"""
+
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit, urljoin
+from typing import Optional, Dict, List, Tuple
+
+# 默认每个主机保留的空闲连接数
+DEFAULT_MAX_IDLE_PER_HOST = 4
+
+# 单个响应的默认最大字节数
+DEFAULT_MAX_SIZE = 8 * 1024 * 1024
+
+# 请求超时（秒）
+DEFAULT_TIMEOUT = 10.0
+
+# 最多跟随的重定向次数
+MAX_REDIRECTS = 3
+
+# 默认请求头
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': '*/*',
+}
+
+
+class HTTPError(Exception):
+    """
+    HTTP请求失败
+
+    Attributes:
+        status: HTTP状态码（连接错误时为 None）
+        retry_after: 响应头 Retry-After 的秒数
+        timed_out: 是否为超时
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None,
+                 retry_after: Optional[float] = None, timed_out: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.timed_out = timed_out
+
+
+class HTTPConnectionPool:
+    """
+    按主机复用的HTTP连接池
+
+    空闲连接按 (协议, 主机, 端口) 保存，请求完成后放回；
+    复用的连接已被服务器关闭时换新连接重试一次
+    """
+
+    def __init__(self, max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST, timeout: float = DEFAULT_TIMEOUT):
+        self._max_idle_per_host = max_idle_per_host
+        self._timeout = timeout
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+        # 统计
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    def get(self, url: str, max_size: int = DEFAULT_MAX_SIZE,
+            headers: Optional[Dict[str, str]] = None) -> bytes:
+        """
+        下载URL的内容
+
+        Args:
+            url: URL
+            max_size: 最大字节数
+            headers: 额外的请求头（覆盖默认请求头）
+
+        Returns:
+            bytes: 响应内容
+
+        Raises:
+            HTTPError: 请求失败
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            status, location, retry_after, body = self._request(url, max_size, headers)
+            if status == 200:
+                return body
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            raise HTTPError(f"HTTP {status}", status=status, retry_after=_parse_retry_after(retry_after))
+        raise HTTPError("重定向次数过多")
+
+    def close(self):
+        """
+        关闭所有空闲连接
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _request(self, url: str, max_size: int,
+                 headers: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[str], Optional[str], bytes]:
+        """
+        发送一次GET请求
+
+        Args:
+            url: URL
+            max_size: 最大字节数
+            headers: 额外的请求头
+
+        Returns:
+            Tuple[int, Optional[str], Optional[str], bytes]: (状态码, 重定向地址, Retry-After, 响应内容)
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise HTTPError(f"不支持的URL: {url}")
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        request_headers = dict(REQUEST_HEADERS, Host=key[1])
+        if headers:
+            request_headers.update(headers)
+
+        connection, reused = self._acquire(key)
+        try:
+            try:
+                response = self._send(connection, path, request_headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # 服务器已关闭空闲连接，换新连接重试
+                connection.close()
+                connection, reused = self._acquire(key, fresh=True)
+                response = self._send(connection, path, request_headers)
+
+            length = response.getheader('Content-Length')
+            if length and length.isdigit() and int(length) > max_size:
+                raise HTTPError(f"响应过大: {length} 字节")
+            body = response.read(max_size + 1)
+            if len(body) > max_size:
+                raise HTTPError("响应过大")
+            status = response.status
+            location = response.getheader('Location')
+            retry_after = response.getheader('Retry-After')
+            will_close = response.will_close or not response.isclosed()
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            raise HTTPError(str(e) or e.__class__.__name__, timed_out=isinstance(e, socket.timeout))
+        except HTTPError:
+            connection.close()
+            raise
+
+        if will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+        return status, location, retry_after, body
+
+    @staticmethod
+    def _send(connection: http.client.HTTPConnection, path: str,
+              headers: Dict[str, str]) -> http.client.HTTPResponse:
+        connection.request('GET', path, headers=headers)
+        return connection.getresponse()
+
+    def _acquire(self, key: Tuple[str, str, int], fresh: bool = False) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        取一个空闲连接，没有时新建
+
+        Args:
+            key: (协议, 主机, 端口)
+            fresh: 是否强制新建
+
+        Returns:
+            Tuple[HTTPConnection, bool]: (连接, 是否复用)
+        """
+        if not fresh:
+            with self._lock:
+                connections = self._idle.get(key)
+                if connections:
+                    self.connections_reused += 1
+                    return connections.pop(), True
+
+        scheme, host, port = key
+        if scheme == 'https':
+            connection = http.client.HTTPSConnection(host, port, timeout=self._timeout)
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=self._timeout)
+        self.connections_created += 1
+        return connection, False
+
+    def _release(self, key: Tuple[str, str, int], connection: http.client.HTTPConnection):
+        """
+        把连接放回空闲列表
+
+        Args:
+            key: (协议, 主机, 端口)
+            connection: 连接
+        """
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self._max_idle_per_host:
+                connections.append(connection)
+                return
+        connection.close()
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头（只支持秒数格式）
+
+    Args:
+        value: 响应头的值
+
+    Returns:
+        Optional[float]: 秒数，无法解析时为 None
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
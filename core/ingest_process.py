@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingest Process
+独立采集进程
+
+把获取器和 LiveDataManager 放到子进程中运行，界面进程只负责显示。
+界面线程重绘卡顿时不会和解码争抢GIL，子进程继续接收、重连和处理消息，
+积压的消息留在子进程的订阅队列和本地套接字缓冲区中，界面恢复后批量送达。
+
+进程间通过 multiprocessing.Pipe（本地套接字）传输带长度前缀的记录，
+每条记录的第一个字节为记录类型；消息批次使用 wire_format 编码，其他记录使用 marshal 编码。
+
+房间指标在子进程中采集，启用指标端点时子进程定期把指标族发给界面进程，
+由 ForwardedMetrics 注册到界面进程的指标注册表（样本带 process="ingest" 标签）。
+"""
+
+import time
+import marshal
+import threading
+import multiprocessing
+from enum import IntEnum
+from typing import Optional, Dict, Any, List, Callable
+
+from .wire_format import encode_batch, decode_batch
+from .metrics import default_registry
+
+# 记录类型
+RECORD_EVENTS = 1            # 一批消息
+RECORD_CONNECTION_STATUS = 2  # 连接状态变化
+RECORD_ERROR = 3             # 错误信息
+RECORD_STATISTICS = 4        # 统计信息
+RECORD_STOP = 5              # 界面进程要求子进程退出
+RECORD_METRICS = 6           # 指标族
+
+# 子进程批量发送的间隔（秒）和每批最大消息数
+DEFAULT_BATCH_INTERVAL = 0.05
+DEFAULT_MAX_BATCH = 512
+
+# 统计信息的最小发送间隔（秒）
+STATISTICS_INTERVAL = 1.0
+
+# 指标的发送间隔（秒），Prometheus 的抓取间隔一般在15秒以上
+METRICS_INTERVAL = 5.0
+
+# 转发指标附加的标签，与界面进程自身的同名指标区分
+FORWARDED_METRICS_LABELS = {'process': 'ingest'}
+
+# 子进程中界面订阅的积压上限，界面长时间无响应时丢弃最旧的消息
+DEFAULT_CHILD_BACKLOG = 100000
+
+# marshal 可以直接编码的类型（不包括子类，例如 IntEnum）
+_MARSHAL_SCALARS = (str, int, float, bool, bytes, type(None))
+
+
+def _plain_value(value):
+    """
+    把值转换为 marshal 可编码的普通类型
+
+    Args:
+        value: 原始值
+
+    Returns:
+        转换后的值
+    """
+    value_type = type(value)
+    if value_type in _MARSHAL_SCALARS:
+        return value
+    if isinstance(value, IntEnum):
+        return int(value)
+    if isinstance(value, (list, tuple)):
+        return [_plain_value(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _plain_value(item) for key, item in value.items()}
+    return str(value)
+
+
+class ForwardedMetrics:
+    """
+    采集子进程转发的指标
+
+    保存子进程最近一次发送的指标族，作为采集器注册到界面进程的指标注册表
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: List[Any] = []
+
+    def update(self, families: List[Any]):
+        """
+        替换为子进程最新发送的指标族
+
+        Args:
+            families: [(名称, 类型, 说明, [(名称后缀, 标签, 值)])]
+        """
+        with self._lock:
+            self._families = families
+
+    def clear(self):
+        """
+        清空指标（子进程退出后不再导出过期的值）
+        """
+        self.update([])
+
+    def collect(self):
+        """
+        输出子进程的指标族，样本附加 FORWARDED_METRICS_LABELS
+
+        Returns:
+            Iterable[MetricFamily]: 指标族
+        """
+        with self._lock:
+            families = self._families
+        for name, metric_type, help_text, samples in families:
+            if metric_type == 'histogram':
+                yield (name, metric_type, help_text, [
+                    (suffix, dict(labels, **FORWARDED_METRICS_LABELS), value) for suffix, labels, value in samples
+                ])
+            else:
+                yield (name, metric_type, help_text, [
+                    (dict(labels, **FORWARDED_METRICS_LABELS), value) for _, labels, value in samples
+                ])
+
+
+def _collect_metric_families() -> List[Any]:
+    """
+    采集子进程的指标族，转换为 marshal 可编码的形式
+
+    Returns:
+        List: [(名称, 类型, 说明, [(名称后缀, 标签, 值)])]
+    """
+    return [
+        (name, metric_type, help_text,
+         [(suffix, {str(key): str(label) for key, label in labels.items()}, _plain_value(value))
+          for suffix, labels, value in samples])
+        for name, (metric_type, help_text, samples) in default_registry.collect_families().items()
+    ]
+
+
+def run_ingest_child(conn, live_url: str, decode_workers: int = 0, forward_metrics: bool = False,
+                     batch_interval: float = DEFAULT_BATCH_INTERVAL,
+                     max_batch: int = DEFAULT_MAX_BATCH):
+    """
+    采集子进程入口
+
+    在子进程中运行Qt事件循环（用于接收停止请求和执行性能分析信号处理器），
+    处理后的消息通过事件总线订阅批量发送给界面进程。
+    界面进程关闭连接或发送 RECORD_STOP 后退出。
+    子进程同样安装性能分析信号处理器，可以直接向子进程发送 SIGUSR1/SIGUSR2。
+
+    Args:
+        conn: 与界面进程通信的 Connection
+        live_url: 直播间URL
+        decode_workers: 多进程解码池的工作进程数，0表示不使用
+        forward_metrics: 是否定期把指标发送给界面进程
+        batch_interval: 批量发送间隔（秒）
+        max_batch: 每批最大消息数
+    """
+    from PyQt5.QtCore import QCoreApplication, QTimer
+    from .event_bus import DeliveryMode
+    from .live_data_manager import LiveDataManager
+    from .profiler import ProfilerController, install_signal_handlers
+
+    app = QCoreApplication([])
+    stop_event = threading.Event()
+    send_lock = threading.Lock()
+
+    def send(kind: int, payload: bytes):
+        with send_lock:
+            try:
+                conn.send_bytes(bytes((kind,)) + payload)
+            except (OSError, EOFError):
+                stop_event.set()
+
+    if decode_workers > 0:
+        from .decode_pool import enable_shared_decode_pool
+        enable_shared_decode_pool(decode_workers)
+
+    manager = LiveDataManager()
+    subscription = manager.event_bus.subscribe(
+        mode=DeliveryMode.POLL, maxsize=DEFAULT_CHILD_BACKLOG, name="ingest-ipc"
+    )
+    manager.connection_status_changed.connect(
+        lambda status: send(RECORD_CONNECTION_STATUS, marshal.dumps(int(status)))
+    )
+    manager.error_occurred.connect(lambda message: send(RECORD_ERROR, marshal.dumps(str(message))))
+
+    # 统计信息每条消息都会更新，最多每秒发送一次
+    last_statistics = [0.0]
+
+    def send_statistics(statistics):
+        now = time.monotonic()
+        if now - last_statistics[0] >= STATISTICS_INTERVAL:
+            last_statistics[0] = now
+            send(RECORD_STATISTICS, marshal.dumps(_plain_value(statistics)))
+
+    manager.statistics_updated.connect(send_statistics)
+
+    def sender_loop():
+        last_metrics = time.monotonic()
+        while not stop_event.is_set():
+            events = subscription.drain(max_batch)
+            if events:
+                send(RECORD_EVENTS, encode_batch(events))
+            else:
+                time.sleep(batch_interval)
+            if forward_metrics and time.monotonic() - last_metrics >= METRICS_INTERVAL:
+                last_metrics = time.monotonic()
+                send(RECORD_METRICS, marshal.dumps(_collect_metric_families()))
+
+    def reader_loop():
+        try:
+            while not stop_event.is_set():
+                data = conn.recv_bytes()
+                if data and data[0] == RECORD_STOP:
+                    break
+        except (OSError, EOFError):
+            pass
+        stop_event.set()
+
+    threading.Thread(target=sender_loop, name="IngestSender", daemon=True).start()
+    threading.Thread(target=reader_loop, name="IngestReader", daemon=True).start()
+
+    # 性能分析信号（SIGUSR1: CPU采样, SIGUSR2: 内存快照），结果输出到子进程的标准输出；
+    # 下面的定时器同时让信号处理器有机会执行
+    install_signal_handlers(ProfilerController())
+
+    # 停止请求来自后台线程，由Qt主线程的定时器检查并退出事件循环
+    stop_timer = QTimer()
+    stop_timer.timeout.connect(lambda: stop_event.is_set() and app.quit())
+    stop_timer.start(200)
+
+    if not manager.start_monitoring(live_url):
+        send(RECORD_ERROR, marshal.dumps("连接直播间失败"))
+        stop_event.set()
+    else:
+        app.exec_()
+
+    stop_event.set()
+    manager.stop_monitoring()
+    events = subscription.drain()
+    if events:
+        send(RECORD_EVENTS, encode_batch(events))
+    with send_lock:
+        conn.close()
+
+    if decode_workers > 0:
+        from .decode_pool import shutdown_shared_decode_pool
+        shutdown_shared_decode_pool()
+
+
+class IngestProcess:
+    """
+    采集子进程的界面端
+
+    启动子进程并在读取线程中接收记录，按类型回调。回调在读取线程中执行。
+    """
+
+    def __init__(self, on_events: Callable[[List[Dict[str, Any]]], None],
+                 on_connection_status: Optional[Callable[[int], None]] = None,
+                 on_error: Optional[Callable[[str], None]] = None,
+                 on_statistics: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 decode_workers: int = 0, forward_metrics: bool = False, start_method: str = 'spawn'):
+        self._on_events = on_events
+        self._on_connection_status = on_connection_status
+        self._on_error = on_error
+        self._on_statistics = on_statistics
+        self._decode_workers = decode_workers
+        self._forward_metrics = forward_metrics
+        self._context = multiprocessing.get_context(start_method)
+        self._process = None
+        self._conn = None
+        self._reader: Optional[threading.Thread] = None
+        self._running = False
+
+        # 统计
+        self.batches = 0
+        self.events = 0
+        self.bytes_received = 0
+
+        # 子进程转发的指标
+        self.metrics = ForwardedMetrics()
+
+    @property
+    def is_running(self) -> bool:
+        """子进程是否在运行"""
+        return self._running
+
+    @property
+    def pid(self) -> Optional[int]:
+        """子进程ID"""
+        return self._process.pid if self._process else None
+
+    def start(self, live_url: str):
+        """
+        启动采集子进程
+
+        Args:
+            live_url: 直播间URL
+        """
+        if self._process is not None:
+            self.stop()
+        parent_conn, child_conn = self._context.Pipe()
+        # 不设为守护进程: 守护进程不能再创建解码池的工作进程。
+        # 界面进程异常退出时连接被关闭，子进程读到EOF后自行退出
+        self._process = self._context.Process(
+            target=run_ingest_child, args=(child_conn, live_url, self._decode_workers, self._forward_metrics),
+            name="IngestProcess"
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self._running = True
+        self._reader = threading.Thread(target=self._read_loop, name="IngestProcessReader", daemon=True)
+        self._reader.start()
+        if self._forward_metrics:
+            default_registry.register(self.metrics)
+
+    def stop(self, timeout: float = 5.0):
+        """
+        停止采集子进程，子进程会先发送剩余的消息
+
+        Args:
+            timeout: 等待子进程退出的时间（秒）
+        """
+        if self._process is None:
+            return
+        self._running = False
+        try:
+            self._conn.send_bytes(bytes((RECORD_STOP,)))
+        except (OSError, EOFError):
+            pass
+
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(1.0)
+        if self._reader and self._reader is not threading.current_thread():
+            self._reader.join(timeout=1.0)
+        self._conn.close()
+        self._reader = None
+        self._process = None
+        self._conn = None
+        default_registry.unregister(self.metrics)
+        self.metrics.clear()
+
+    def _read_loop(self):
+        """
+        读取线程: 接收子进程发来的记录直到连接关闭
+        """
+        conn = self._conn
+        try:
+            while True:
+                data = conn.recv_bytes()
+                self.bytes_received += len(data)
+                try:
+                    self._handle_record(data[0], memoryview(data)[1:])
+                except Exception as e:
+                    if self._on_error:
+                        self._on_error(f"处理采集进程数据失败: {str(e)}")
+        except (OSError, EOFError):
+            pass
+
+        if self._running:
+            self._running = False
+            if self._on_error:
+                self._on_error("采集进程已退出")
+
+    def _handle_record(self, kind: int, payload: memoryview):
+        """
+        处理一条记录
+
+        Args:
+            kind: 记录类型
+            payload: 记录数据
+        """
+        if kind == RECORD_EVENTS:
+            events = decode_batch(payload)
+            self.batches += 1
+            self.events += len(events)
+            self._on_events(events)
+        elif kind == RECORD_CONNECTION_STATUS:
+            if self._on_connection_status:
+                self._on_connection_status(marshal.loads(payload))
+        elif kind == RECORD_ERROR:
+            if self._on_error:
+                self._on_error(marshal.loads(payload))
+        elif kind == RECORD_STATISTICS:
+            if self._on_statistics:
+                self._on_statistics(marshal.loads(payload))
+        elif kind == RECORD_METRICS:
+            self.metrics.update(marshal.loads(payload))
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keyword Alert
+关键词告警
+
+基于Aho-Corasick自动机的多关键词匹配，用于聊天内容审核告警。
+词表文件修改后自动热加载，无需重启程序。
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+
+from models.message_types import MessageType, MessagePriority
+
+# 需要扫描的消息类型
+SCANNED_MESSAGE_TYPES = (MessageType.CHAT, MessageType.EMOJI)
+
+
+class AhoCorasickAutomaton:
+    """
+    Aho-Corasick多模式匹配自动机
+
+    构建完成后只读，可在多个线程中同时使用
+    """
+
+    def __init__(self, patterns: Iterable[str], case_sensitive: bool = False):
+        self._case_sensitive = case_sensitive
+        self._patterns: List[str] = []
+
+        # 状态转移表、失败指针、输出表
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        seen = set()
+        for pattern in patterns:
+            key = pattern if case_sensitive else pattern.lower()
+            if key and key not in seen:
+                seen.add(key)
+                self._add_pattern(key, pattern)
+
+        self._build()
+
+    @property
+    def pattern_count(self) -> int:
+        """关键词数量"""
+        return len(self._patterns)
+
+    @property
+    def state_count(self) -> int:
+        """自动机状态数量"""
+        return len(self._goto)
+
+    def _add_pattern(self, key: str, pattern: str):
+        """
+        将关键词插入字典树
+
+        Args:
+            key: 规范化后的关键词
+            pattern: 原始关键词
+        """
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+
+        self._output[state] = (len(self._patterns),)
+        self._patterns.append(pattern)
+
+    def _build(self):
+        """
+        按广度优先顺序计算失败指针，并合并后缀输出
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+
+                if output[fail[next_state]]:
+                    output[next_state] = output[next_state] + output[fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """
+        查找文本中出现的所有关键词
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            List[Tuple[int, str]]: (结束位置, 关键词) 列表
+        """
+        if not self._case_sensitive:
+            text = text.lower()
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        patterns = self._patterns
+
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for pattern_index in output[state]:
+                    matches.append((index, patterns[pattern_index]))
+
+        return matches
+
+    def match(self, text: str) -> List[str]:
+        """
+        返回文本中命中的关键词（去重，保持首次出现顺序）
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            List[str]: 命中的关键词
+        """
+        return list(dict.fromkeys(pattern for _, pattern in self.find_all(text)))
+
+
+def load_word_list(path: str) -> List[str]:
+    """
+    读取词表文件
+
+    每行一个关键词，空行和以 # 开头的行会被忽略
+
+    Args:
+        path: 词表文件路径
+
+    Returns:
+        List[str]: 关键词列表
+    """
+    words = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            word = line.strip()
+            if word and not word.startswith('#'):
+                words.append(word)
+    return words
+
+
+class KeywordAlertStage:
+    """
+    关键词告警处理阶段
+
+    扫描聊天和表情消息内容，命中关键词时生成关键优先级的系统消息。
+    词表在后台线程中重新编译，编译完成后整体替换，扫描过程不加锁。
+    """
+
+    def __init__(self, word_list_path: Optional[str] = None, case_sensitive: bool = False):
+        self._word_list_path = word_list_path
+        self._case_sensitive = case_sensitive
+        self._automaton: Optional[AhoCorasickAutomaton] = None
+        self._file_signature: Optional[Tuple[float, int]] = None
+        self._reload_thread: Optional[threading.Thread] = None
+        self._last_error: Optional[str] = None
+        self._alert_count = 0
+
+    @property
+    def word_list_path(self) -> Optional[str]:
+        """获取词表文件路径"""
+        return self._word_list_path
+
+    @property
+    def pattern_count(self) -> int:
+        """当前生效的关键词数量"""
+        automaton = self._automaton
+        return automaton.pattern_count if automaton else 0
+
+    @property
+    def alert_count(self) -> int:
+        """已产生的告警数量"""
+        return self._alert_count
+
+    def take_error(self) -> Optional[str]:
+        """
+        取出最近一次加载错误，取出后清空
+
+        Returns:
+            Optional[str]: 错误信息
+        """
+        error, self._last_error = self._last_error, None
+        return error
+
+    def set_word_list_path(self, path: Optional[str]):
+        """
+        设置词表文件路径，下次检查时加载
+
+        Args:
+            path: 词表文件路径
+        """
+        self._word_list_path = path
+        self._file_signature = None
+        if not path:
+            self._automaton = None
+
+    def set_patterns(self, patterns: Iterable[str]):
+        """
+        直接设置关键词（同步编译）
+
+        Args:
+            patterns: 关键词列表
+        """
+        self._automaton = AhoCorasickAutomaton(patterns, self._case_sensitive)
+
+    def reload_if_changed(self) -> bool:
+        """
+        检查词表文件是否有变化，有变化时在后台线程重新编译
+
+        Returns:
+            bool: 是否触发了重新加载
+        """
+        path = self._word_list_path
+        if not path:
+            return False
+
+        if self._reload_thread and self._reload_thread.is_alive():
+            return False
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        signature = (stat.st_mtime, stat.st_size)
+        if signature == self._file_signature:
+            return False
+
+        self._file_signature = signature
+        self._reload_thread = threading.Thread(
+            target=self._reload, args=(path,), name="KeywordAlertReload", daemon=True
+        )
+        self._reload_thread.start()
+        return True
+
+    def _reload(self, path: str):
+        """
+        重新读取词表并编译自动机
+
+        Args:
+            path: 词表文件路径
+        """
+        try:
+            automaton = AhoCorasickAutomaton(load_word_list(path), self._case_sensitive)
+            self._automaton = automaton
+            self._last_error = None
+        except Exception as e:
+            self._last_error = f"加载关键词词表失败: {str(e)}"
+
+    def scan(self, message_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        扫描消息内容
+
+        Args:
+            message_data: 消息数据
+
+        Returns:
+            Optional[Dict[str, Any]]: 命中时返回告警消息，否则返回None
+        """
+        automaton = self._automaton
+        if automaton is None:
+            return None
+
+        message_type = message_data.get('type', MessageType.UNKNOWN)
+        if message_type not in SCANNED_MESSAGE_TYPES:
+            return None
+
+        content = message_data.get('content')
+        if not content:
+            return None
+
+        keywords = automaton.match(content)
+        if not keywords:
+            return None
+
+        self._alert_count += 1
+        user = message_data.get('user', '未知用户')
+        return {
+            'type': MessageType.SYSTEM,
+            'priority': MessagePriority.CRITICAL,
+            'timestamp': time.time(),
+            'processed': True,
+            'alert': 'keyword',
+            'keywords': keywords,
+            'source_type': message_type,
+            'user': user,
+            'content': f"关键词告警 [{', '.join(keywords)}] {user}: {content}"
+        }
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latency Tracer
+延迟追踪
+
+记录每条消息从服务器产生到界面显示的各阶段时间戳，
+并用HDR风格的对数分桶直方图统计各阶段延迟分布。
+"""
+
+import math
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+# 消息数据中的时间戳字段（单位均为秒，墙上时钟）
+TRACE_SERVER_TIME = 'server_time'       # 服务器时间（Response.now / 消息创建时间）
+TRACE_RECEIVE_TIME = 'receive_time'     # 收到网络帧的时间
+TRACE_DECODE_TIME = 'decode_time'       # 解码完成的时间
+TRACE_DISPATCH_TIME = 'dispatch_time'   # 发布到事件总线的时间
+TRACE_RENDER_TIME = 'render_time'       # 显示到界面的时间
+
+# 追踪阶段: (名称, 起始字段, 结束字段)
+TRACE_STAGES: Tuple[Tuple[str, str, str], ...] = (
+    ('network', TRACE_SERVER_TIME, TRACE_RECEIVE_TIME),
+    ('decode', TRACE_RECEIVE_TIME, TRACE_DECODE_TIME),
+    ('dispatch', TRACE_DECODE_TIME, TRACE_DISPATCH_TIME),
+    ('render', TRACE_DISPATCH_TIME, TRACE_RENDER_TIME),
+    ('server_lag', TRACE_SERVER_TIME, TRACE_RENDER_TIME),
+)
+
+
+def normalize_server_time(value: Any) -> Optional[float]:
+    """
+    将服务器时间统一转换为秒
+
+    Response.now 和消息创建时间通常是毫秒时间戳
+
+    Args:
+        value: 服务器时间（秒或毫秒）
+
+    Returns:
+        Optional[float]: 秒级时间戳，无效时返回None
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value <= 0:
+        return None
+    # 大于 1e11 的值视为毫秒时间戳
+    return value / 1000.0 if value > 1e11 else value
+
+
+class HdrHistogram:
+    """
+    HDR风格的对数线性分桶直方图
+
+    以微秒为单位记录，每个2的幂区间划分为64个子桶，相对误差约1.6%。
+    分桶数组在创建时预分配，记录操作只做整数运算。
+    """
+
+    SUB_BUCKET_BITS = 7
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+    def __init__(self, max_value_us: int = 3600 * 1000 * 1000):
+        self._max_value = max_value_us
+        self._counts = [0] * (self._index_of(max_value_us) + 1)
+        self.total = 0
+        self.max = 0
+
+    @classmethod
+    def _index_of(cls, value: int) -> int:
+        """
+        计算数值所在的分桶下标
+
+        Args:
+            value: 数值（微秒）
+
+        Returns:
+            int: 分桶下标
+        """
+        if value < cls.SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        return cls.SUB_BUCKET_COUNT + (shift - 1) * cls.SUB_BUCKET_HALF + (value >> shift) - cls.SUB_BUCKET_HALF
+
+    @classmethod
+    def _highest_value_at(cls, index: int) -> int:
+        """
+        计算分桶对应的最大数值
+
+        Args:
+            index: 分桶下标
+
+        Returns:
+            int: 数值（微秒）
+        """
+        if index < cls.SUB_BUCKET_COUNT:
+            return index
+        shift, offset = divmod(index - cls.SUB_BUCKET_COUNT, cls.SUB_BUCKET_HALF)
+        shift += 1
+        return ((offset + cls.SUB_BUCKET_HALF + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        """
+        记录一个延迟值
+
+        Args:
+            seconds: 延迟（秒），负值按0处理
+        """
+        value = int(seconds * 1000000) if seconds > 0 else 0
+        if value > self._max_value:
+            value = self._max_value
+        self._counts[self._index_of(value)] += 1
+        self.total += 1
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'HdrHistogram'):
+        """
+        合并另一个直方图
+
+        Args:
+            other: 分桶配置相同的直方图
+        """
+        counts = self._counts
+        for index, count in enumerate(other._counts):
+            if count:
+                counts[index] += count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> float:
+        """
+        计算百分位数
+
+        Args:
+            percent: 百分比（0-100）
+
+        Returns:
+            float: 延迟（秒），无数据时返回0
+        """
+        if self.total == 0:
+            return 0.0
+        target = max(1, int(math.ceil(percent / 100.0 * self.total)))
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(self._highest_value_at(index), self.max) / 1000000.0
+        return self.max / 1000000.0
+
+    def reset(self):
+        """
+        清空直方图
+        """
+        self._counts = [0] * len(self._counts)
+        self.total = 0
+        self.max = 0
+
+
+class LatencyTracer:
+    """
+    分阶段延迟追踪器
+
+    每个阶段维护当前和上一个时间窗口两个直方图，百分位数基于最近两个窗口计算，
+    因此反映的是最近的延迟，而不是整个会话的累计分布。
+    只应在一个线程（界面线程）中调用。
+    """
+
+    def __init__(self, window_seconds: float = 10.0):
+        self._window_seconds = window_seconds
+        self._window_start = time.monotonic()
+        self._current: Dict[str, HdrHistogram] = {name: HdrHistogram() for name, _, _ in TRACE_STAGES}
+        self._previous: Dict[str, HdrHistogram] = {name: HdrHistogram() for name, _, _ in TRACE_STAGES}
+
+    def record(self, message_data: Dict[str, Any], render_time: Optional[float] = None):
+        """
+        根据消息中的时间戳记录各阶段延迟
+
+        消息字典可能同时被其他订阅者读取，显示时间通过参数传入而不写回消息。
+        缺少起始或结束时间戳的阶段会被跳过。
+
+        Args:
+            message_data: 带有追踪时间戳的消息数据
+            render_time: 显示时间，默认为当前时间
+        """
+        self._rotate_if_needed()
+        if render_time is None:
+            render_time = time.time()
+
+        current = self._current
+        get = message_data.get
+        for name, start_field, end_field in TRACE_STAGES:
+            start = get(start_field)
+            end = render_time if end_field == TRACE_RENDER_TIME else get(end_field)
+            if start is not None and end is not None:
+                current[name].record(end - start)
+
+    def percentiles(self, stage: str, percents: Tuple[float, ...] = (50.0, 99.0)) -> List[float]:
+        """
+        获取某个阶段最近的延迟百分位数
+
+        Args:
+            stage: 阶段名称，参见 TRACE_STAGES
+            percents: 百分比列表
+
+        Returns:
+            List[float]: 延迟（秒）
+        """
+        self._rotate_if_needed()
+        merged = HdrHistogram()
+        merged.merge(self._previous[stage])
+        merged.merge(self._current[stage])
+        return [merged.percentile(percent) for percent in percents]
+
+    def sample_count(self, stage: str) -> int:
+        """
+        获取某个阶段最近两个窗口的样本数量
+
+        Args:
+            stage: 阶段名称
+
+        Returns:
+            int: 样本数量
+        """
+        return self._previous[stage].total + self._current[stage].total
+
+    def _rotate_if_needed(self):
+        """
+        时间窗口到期时轮换直方图
+        """
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self._window_seconds:
+            return
+
+        if elapsed >= self._window_seconds * 2:
+            # 超过两个窗口没有数据，全部清空
+            for histogram in self._previous.values():
+                histogram.reset()
+        else:
+            self._previous, self._current = self._current, self._previous
+        for histogram in self._current.values():
+            histogram.reset()
+        self._window_start = now
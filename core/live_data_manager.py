@@ -7,29 +7,108 @@ Live Data Manager
 负责管理直播数据的获取、处理和分发
 """
 
+import os
 import time
 import threading
-from typing import Optional, Dict, Any, Callable
-from PyQt5.QtCore import QObject, pyqtSignal, QTimer
+import functools
+from typing import Optional, Dict, Any, List, Callable
+from PyQt5.QtCore import QObject, pyqtSignal
 from PyQt5.QtWidgets import QApplication
 
-try:
-    from .douyin_live_fetcher import DouyinLiveWebFetcher
-except ImportError:
-    # 如果导入失败，创建一个模拟的类
-    class DouyinLiveWebFetcher:
-        def __init__(self, *args, **kwargs):
-            pass
-        
-        def start(self):
-            pass
-        
-        def stop(self):
-            pass
-
 from models.message_types import (
     MessageType, MessagePriority, ConnectionStatus, LiveStatus
 )
+from .keyword_alert import KeywordAlertStage
+from .alert_rules import AlertRuleStage
+from .event_bus import EventBus
+from .metrics import RoomMetrics, default_registry
+from .reconnect import ExponentialBackoff, ResumeCursor, ReconnectTracker
+from .heartbeat import get_shared_scheduler
+from .frame_inflater import FrameInflater
+from .decode_pool import DecodePool, get_shared_decode_pool
+from .gift_catalog import GiftCatalog, GiftRevenue, get_gift_catalog
+from .chat_dedup import ChatDedupStage, DEFAULT_DEDUP_WINDOW
+from .unique_users import UniqueUserTracker, unique_users_total
+from .msg_id_filter import MsgIdFilter
+from .polling_fetcher import DouyinLivePollingFetcher
+from .transport import TransportSelector, TRANSPORT_AUTO, TRANSPORT_POLLING
+from .cold_start import (
+    StartupGraph, get_startup_prefetcher, register_warmup, warmup_steps,
+    STEP_ROOM_INFO, STEP_CONNECT, MARK_CONNECTED, MARK_FIRST_MESSAGE
+)
+from .latency_tracer import (
+    TRACE_SERVER_TIME, TRACE_RECEIVE_TIME, TRACE_DECODE_TIME, TRACE_DISPATCH_TIME,
+    normalize_server_time
+)
+
+# WebSocket获取器类，第一次连接（或输入URL后的预取）时才导入
+_web_fetcher_class = None
+
+
+class _UnavailableWebFetcher:
+    """
+    获取器模块导入失败时使用的替身，不建立连接
+    """
+    
+    def __init__(self, *args, **kwargs):
+        pass
+    
+    def start(self):
+        pass
+    
+    def stop(self):
+        pass
+
+
+def load_web_fetcher():
+    """
+    导入WebSocket获取器
+    
+    获取器模块依赖 requests、websocket-client 和JS引擎，导入较慢，
+    不在程序启动时导入
+    
+    Returns:
+        type: DouyinLiveWebFetcher，导入失败时为不建立连接的替身类
+    """
+    global _web_fetcher_class
+    if _web_fetcher_class is None:
+        try:
+            from .douyin_live_fetcher import DouyinLiveWebFetcher
+        except ImportError:
+            DouyinLiveWebFetcher = _UnavailableWebFetcher
+        _web_fetcher_class = DouyinLiveWebFetcher
+    return _web_fetcher_class
+
+
+def _warm_web_fetcher() -> str:
+    # 预取阶段导入获取器；获取器提供 warm_up() 时同时初始化签名脚本的JS上下文
+    fetcher_class = load_web_fetcher()
+    warm_up = getattr(fetcher_class, 'warm_up', None)
+    if warm_up is not None:
+        warm_up()
+    return fetcher_class.__name__
+
+
+register_warmup('web_fetcher', _warm_web_fetcher)
+
+# 已定义的消息类型，用于指标计数
+KNOWN_MESSAGE_TYPES = frozenset(MessageType)
+
+# 默认关键词告警词表路径
+DEFAULT_KEYWORD_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'alert_keywords.txt'
+)
+
+# 默认告警规则文件路径
+DEFAULT_RULES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'alert_rules.json'
+)
+
+# 监控循环间隔（秒）
+MONITOR_INTERVAL = 1.0
+
+# 统计重置间隔（秒）
+STATS_RESET_INTERVAL = 3600.0
 
 class LiveDataManager(QObject):
     """
@@ -44,10 +123,29 @@ class LiveDataManager(QObject):
     live_status_changed = pyqtSignal(int)  # 直播状态变化
     error_occurred = pyqtSignal(str)  # 发生错误
     statistics_updated = pyqtSignal(dict)  # 统计信息更新
+    startup_timeline = pyqtSignal(dict)  # 收到首条消息，启动各步骤的耗时
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, keyword_file: Optional[str] = DEFAULT_KEYWORD_FILE,
+                 event_bus: Optional[EventBus] = None,
+                 decode_pool: Optional[DecodePool] = None,
+                 gift_catalog: Optional[GiftCatalog] = None,
+                 dedup_window: float = DEFAULT_DEDUP_WINDOW,
+                 msg_id_filter: Optional[MsgIdFilter] = None,
+                 transport: str = TRANSPORT_AUTO,
+                 rules_file: Optional[str] = DEFAULT_RULES_FILE):
         super().__init__(parent)
         
+        # 事件总线，处理后的消息通过总线分发给订阅者
+        self._event_bus = event_bus or EventBus()
+        
+        # 多进程解码池，未指定时使用共享解码池（未启用则在获取器中解码）
+        self._decode_pool = decode_pool or get_shared_decode_pool()
+        self._decode_room = None
+        
+        # 礼物目录（按 giftId 保存名称和单价）和营收统计
+        self._gift_catalog = gift_catalog or get_gift_catalog()
+        self._gift_revenue = GiftRevenue(self._gift_catalog)
+        
         # 初始化状态
         self._connection_status = ConnectionStatus.DISCONNECTED
         self._live_status = LiveStatus.UNKNOWN
@@ -63,6 +161,14 @@ class LiveDataManager(QObject):
             'like_messages': 0,
             'enter_messages': 0,
             'follow_messages': 0,
+            'gift_diamonds': 0,
+            'duplicate_messages': 0,
+            'unique_viewers_1m': 0,
+            'unique_viewers_10m': 0,
+            'unique_viewers': 0,
+            'unique_chatters_1m': 0,
+            'unique_chatters_10m': 0,
+            'unique_chatters': 0,
             'start_time': None,
             'last_message_time': None
         }
@@ -74,6 +180,7 @@ class LiveDataManager(QObject):
             MessageType.LIKE: self._handle_like_message,
             MessageType.ENTER: self._handle_enter_message,
             MessageType.FOLLOW: self._handle_follow_message,
+            MessageType.SOCIAL: self._handle_social_message,
             MessageType.STATS: self._handle_stats_message,
             MessageType.FANSCLUB: self._handle_fansclub_message,
             MessageType.LIVE_STATUS: self._handle_live_status_message,
@@ -81,16 +188,58 @@ class LiveDataManager(QObject):
             MessageType.RANKING: self._handle_ranking_message
         }
         
+        # 运行指标
+        self._metrics = RoomMetrics()
+        self._metrics.event_bus = self._event_bus
+        default_registry.register(self._metrics)
+        
+        # 关键词告警
+        self._keyword_alert = KeywordAlertStage(keyword_file)
+        self._keyword_alert.reload_if_changed()
+        
+        # 规则告警（礼物金额、关注速率、在线人数变化等）
+        self._alert_rules = AlertRuleStage(rules_file)
+        self._alert_rules.reload_if_changed()
+        self._metrics.alert_rules = self._alert_rules
+        
+        # msgId 去重: 重连补发或多个来源重复送达的消息在流水线最前端丢弃
+        self._msg_id_filter = msg_id_filter or MsgIdFilter()
+        
+        # 刷屏合并（窗口为0时关闭）
+        self._chat_dedup = ChatDedupStage(dedup_window)
+        
+        # 独立观众和独立发言（HyperLogLog），同时计入所有直播间的合计
+        self._unique_users = UniqueUserTracker()
+        self._metrics.unique_users = self._unique_users
+        unique_users_total.add(self._unique_users)
+        
+        # 传输方式: WebSocket推送或HTTP轮询，auto 时按连接情况自动切换
+        self._transport = TransportSelector(transport)
+        self._metrics.transport = self._transport.current
+        
         # 初始化抖音直播获取器
         self._fetcher = None
+        self._fetcher_generation = 0
+        
+        # 冷启动依赖图，收到首条消息后清空
+        self._startup: Optional[StartupGraph] = None
+        self._startup_origin = 0.0
+        self._startup_lock = threading.Lock()
+        self._prefetched_room_id: Optional[str] = None
         
-        # 监控定时器
-        self._monitor_timer = QTimer()
-        self._monitor_timer.timeout.connect(self._monitor_loop)
+        # 断线重连
+        self._reconnect_lock = threading.Lock()
+        # 创建/替换获取器与停止监控互斥: 持锁检查 _is_running，停止监控后不会再启动新的获取器
+        self._fetcher_lock = threading.RLock()
+        self._reconnect_timer: Optional[threading.Timer] = None
+        self._backoff = ExponentialBackoff()
+        self._resume_cursor = ResumeCursor()
+        self._reconnect_tracker = ReconnectTracker()
         
-        # 统计重置定时器
-        self._stats_reset_timer = QTimer()
-        self._stats_reset_timer.timeout.connect(self._reset_statistics)
+        # 监控线程: 每秒执行一次监控循环，每小时重置统计。
+        # 不使用 QTimer: LiveDataThread 中没有运行Qt事件循环，定时器不会触发
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._monitor_stop = threading.Event()
     
     @property
     def connection_status(self) -> ConnectionStatus:
@@ -117,6 +266,52 @@ class LiveDataManager(QObject):
         """获取统计信息"""
         return self._statistics.copy()
     
+    @property
+    def event_bus(self) -> EventBus:
+        """获取事件总线"""
+        return self._event_bus
+    
+    @property
+    def metrics(self) -> RoomMetrics:
+        """获取运行指标"""
+        return self._metrics
+    
+    @property
+    def alert_rules(self) -> AlertRuleStage:
+        """获取规则告警阶段"""
+        return self._alert_rules
+    
+    @property
+    def keyword_alert(self) -> KeywordAlertStage:
+        """获取关键词告警阶段"""
+        return self._keyword_alert
+    
+    @property
+    def chat_dedup(self) -> ChatDedupStage:
+        """获取刷屏合并阶段"""
+        return self._chat_dedup
+    
+    @property
+    def msg_id_filter(self) -> MsgIdFilter:
+        """获取 msgId 去重过滤器"""
+        return self._msg_id_filter
+    
+    @property
+    def unique_users(self) -> UniqueUserTracker:
+        """获取独立用户统计"""
+        return self._unique_users
+    
+    def register_message_handler(self, message_type: MessageType,
+                                 handler: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        """
+        注册消息处理器，替换该消息类型的默认处理器
+        
+        Args:
+            message_type: 消息类型
+            handler: 处理器，接收原始消息数据并返回增强的消息数据
+        """
+        self._message_handlers[message_type] = handler
+    
     def start_monitoring(self, live_url: str) -> bool:
         """
         开始监控直播间
@@ -133,31 +328,28 @@ class LiveDataManager(QObject):
             
             self._live_url = live_url
             self._room_id = self._extract_room_id(live_url)
+            self._metrics.room = self._room_id or live_url
             
-            # 重置统计信息
+            # 重置统计信息（独立用户数只在开始监控时重置）
+            self._unique_users.reset()
             self._reset_statistics()
             self._statistics['start_time'] = time.time()
             
-            # 创建并配置抖音直播获取器
-            self._fetcher = DouyinLiveWebFetcher(
-                live_url=live_url,
-                on_message=self._on_message_received,
-                on_error=self._on_error_occurred,
-                on_connection_change=self._on_connection_changed
-            )
+            # 新的直播间从头开始，不使用上一次的续传位置
+            self._backoff.reset()
+            self._resume_cursor.clear()
+            self._reconnect_tracker = ReconnectTracker()
+            self._msg_id_filter.clear()
             
-            # 启动获取器
-            self._fetcher.start()
+            # 按依赖图准备连接并启动获取器，输入URL时已开始的预取直接复用
+            self._is_running = True
+            self._begin_startup(live_url)
             
             # 更新状态
-            self._is_running = True
             self._set_connection_status(ConnectionStatus.CONNECTING)
             
-            # 启动监控定时器
-            self._monitor_timer.start(1000)  # 每秒检查一次
-            
-            # 启动统计重置定时器（每小时重置一次）
-            self._stats_reset_timer.start(3600000)
+            # 启动监控线程（每秒检查一次，每小时重置统计）
+            self._start_monitor_thread()
             
             return True
             
@@ -172,14 +364,27 @@ class LiveDataManager(QObject):
         try:
             self._is_running = False
             
-            # 停止定时器
-            self._monitor_timer.stop()
-            self._stats_reset_timer.stop()
+            # 停止监控线程
+            self._stop_monitor_thread()
+            self._cancel_reconnect()
+            
+            # 尚未执行的启动步骤不再执行
+            with self._startup_lock:
+                startup, self._startup = self._startup, None
+            if startup is not None:
+                startup.cancel()
             
-            # 停止获取器
-            if self._fetcher:
-                self._fetcher.stop()
-                self._fetcher = None
+            # 停止获取器；正在进行的重连完成后再停止，之后的重连看到 _is_running 为 False 不再启动
+            with self._fetcher_lock:
+                self._is_running = False
+                self._stop_fetcher()
+            
+            # 输出尚未结束的刷屏汇总
+            for summary in self._chat_dedup.flush():
+                self._dispatch(summary)
+            
+            # 保存新学到的礼物信息
+            self._gift_catalog.save()
             
             # 更新状态
             self._set_connection_status(ConnectionStatus.DISCONNECTED)
@@ -188,6 +393,203 @@ class LiveDataManager(QObject):
         except Exception as e:
             self.error_occurred.emit(f"停止监控失败: {str(e)}")
     
+    def _begin_startup(self, live_url: str):
+        """
+        取得（或新建）启动依赖图，并加入创建获取器的步骤
+        
+        轮询需要 roomId，等待直播间信息；WebSocket获取器自行请求直播间信息，
+        只等待签名脚本等预热步骤，与直播间信息的请求并行
+        
+        Args:
+            live_url: 直播间URL
+        """
+        graph = get_startup_prefetcher().take(live_url)
+        self._prefetched_room_id = None
+        with self._startup_lock:
+            self._startup = graph
+            self._startup_origin = graph.now()
+        
+        if self._transport.current == TRANSPORT_POLLING:
+            deps = [STEP_ROOM_INFO]
+        else:
+            deps = [name for name in warmup_steps() if graph.has(name)]
+        graph.add(STEP_CONNECT, functools.partial(self._connect_step, graph=graph), deps)
+    
+    def _connect_step(self, results: Dict[str, Any], graph: StartupGraph) -> bool:
+        """
+        启动图的最后一步: 创建并启动获取器
+        
+        Args:
+            results: 依赖步骤的结果
+            graph: 启动图，已被新的启动替换或已停止监控时不再创建获取器
+            
+        Returns:
+            bool: 是否创建了获取器
+        """
+        try:
+            with self._fetcher_lock:
+                if self._startup is not graph or not self._is_running:
+                    return False
+                self._prefetched_room_id = results.get(STEP_ROOM_INFO)
+                self._start_fetcher()
+        except Exception as e:
+            self.error_occurred.emit(f"连接直播间失败: {str(e)}")
+            self._schedule_reconnect()
+            return False
+        return True
+    
+    def _finish_startup(self):
+        """
+        收到首条消息: 记录启动耗时并发出 startup_timeline 信号
+        """
+        with self._startup_lock:
+            graph, self._startup = self._startup, None
+        if graph is None:
+            return
+        graph.mark(MARK_FIRST_MESSAGE)
+        steps = graph.timings(self._startup_origin)
+        time_to_first_message = next(
+            timing['start'] for timing in steps if timing['name'] == MARK_FIRST_MESSAGE
+        )
+        
+        self._metrics.time_to_first_message.observe(time_to_first_message)
+        self._metrics.startup_steps = {
+            timing['name']: max(timing['start'] + (timing['duration'] or 0.0), 0.0)
+            for timing in steps
+        }
+        self.startup_timeline.emit({
+            'time_to_first_message': time_to_first_message,
+            'steps': steps
+        })
+    
+    def _start_fetcher(self):
+        """
+        创建并启动抖音直播获取器
+        
+        有续传位置时通过 resume_params 交给获取器，获取器在连接参数中带上
+        cursor / internal_ext，服务器会补发断线期间的消息。
+        心跳和ACK由所有直播间共享的调度器发送，获取器收到 Response 后调用
+        heartbeat_scheduler.on_response() 上报 heartbeatDuration / needAck。
+        推送帧 payload 交给 frame_inflater 解压，同时记录接收字节数。
+        启用解码池时，获取器改为调用 decode_pool.submit(decode_room, payload)，
+        解码后的消息由解码池的收集线程送回 _on_decoded_events()。
+        传输方式为轮询时使用参数和回调相同的 DouyinLivePollingFetcher，
+        启动图已取得 roomId 时直接交给它，不再重复请求直播间页面
+        """
+        self._fetcher_generation += 1
+        kwargs = {
+            'heartbeat_scheduler': get_shared_scheduler(),
+            'frame_inflater': FrameInflater(metrics=self._metrics)
+        }
+        resume_params = self._resume_cursor.to_params()
+        if resume_params:
+            kwargs['resume_params'] = resume_params
+        if self._decode_pool is not None:
+            # 每个获取器使用独立的标识，被替换的获取器残留的帧不会再送回来
+            self._decode_room = f"{id(self)}:{self._fetcher_generation}"
+            self._decode_pool.register_room(self._decode_room, self._on_decoded_events,
+                                            self._on_error_occurred)
+            kwargs['decode_pool'] = self._decode_pool
+            kwargs['decode_room'] = self._decode_room
+        
+        transport = self._transport.current
+        self._metrics.transport = transport
+        fetcher_class = DouyinLivePollingFetcher if transport == TRANSPORT_POLLING else load_web_fetcher()
+        if transport == TRANSPORT_POLLING and self._prefetched_room_id:
+            kwargs['room_id'] = self._prefetched_room_id
+        self._fetcher = fetcher_class(
+            live_url=self._live_url,
+            on_message=self._on_message_received,
+            on_error=self._on_error_occurred,
+            on_connection_change=functools.partial(
+                self._on_connection_changed, generation=self._fetcher_generation
+            ),
+            **kwargs
+        )
+        self._fetcher.start()
+    
+    def _stop_fetcher(self):
+        """
+        停止当前的获取器
+        
+        先更新获取器编号，被停止的获取器之后发出的连接回调都会被忽略
+        """
+        self._fetcher_generation += 1
+        fetcher = self._fetcher
+        self._fetcher = None
+        if fetcher:
+            fetcher.stop()
+        if self._decode_room is not None:
+            self._decode_pool.unregister_room(self._decode_room)
+            self._decode_room = None
+    
+    def _schedule_reconnect(self):
+        """
+        按指数退避安排一次重连
+        """
+        with self._reconnect_lock:
+            if self._reconnect_timer is not None or not self._is_running:
+                return
+            
+            self._reconnect_tracker.on_disconnected()
+            
+            if self._backoff.exhausted:
+                self._set_connection_status(ConnectionStatus.ERROR)
+                self.error_occurred.emit(f"重连失败，已重试 {self._backoff.attempts} 次")
+                return
+            
+            delay = self._backoff.next_delay()
+            self._reconnect_timer = threading.Timer(delay, self._reconnect)
+            self._reconnect_timer.daemon = True
+            self._reconnect_timer.start()
+        
+        self._set_connection_status(ConnectionStatus.RECONNECTING)
+    
+    def _cancel_reconnect(self):
+        """
+        取消尚未执行的重连
+        """
+        with self._reconnect_lock:
+            if self._reconnect_timer is not None:
+                self._reconnect_timer.cancel()
+                self._reconnect_timer = None
+    
+    def _reconnect(self):
+        """
+        重新创建获取器，从上一次的续传位置继续
+        """
+        with self._reconnect_lock:
+            self._reconnect_timer = None
+            if not self._is_running:
+                return
+        
+        self._metrics.reconnects += 1
+        self._replace_fetcher()
+    
+    def _probe_websocket(self):
+        """
+        轮询期间试探WebSocket是否恢复: 取消尚未执行的重连，在后台线程中按新的传输方式替换获取器
+        
+        停止轮询获取器需要等待其线程退出，不在监控线程中执行；试探不计入重连次数。
+        _replace_fetcher 持锁检查 _is_running，停止监控后试探线程不会再启动获取器
+        """
+        self._cancel_reconnect()
+        threading.Thread(target=self._replace_fetcher, name="TransportProbe", daemon=True).start()
+    
+    def _replace_fetcher(self):
+        """
+        停止当前的获取器并按当前的传输方式重新创建，失败时按退避安排重连
+        """
+        try:
+            with self._fetcher_lock:
+                if not self._is_running:
+                    return
+                self._stop_fetcher()
+                self._start_fetcher()
+        except Exception as e:
+            self.error_occurred.emit(f"重连失败: {str(e)}")
+            self._schedule_reconnect()
+    
     def _extract_room_id(self, live_url: str) -> Optional[str]:
         """
         从直播URL中提取房间ID
@@ -218,6 +620,7 @@ class LiveDataManager(QObject):
         """
         if self._connection_status != status:
             self._connection_status = status
+            self._metrics.connection_status = status
             self.connection_status_changed.emit(status.value)
     
     def _set_live_status(self, status: LiveStatus):
@@ -229,6 +632,7 @@ class LiveDataManager(QObject):
         """
         if self._live_status != status:
             self._live_status = status
+            self._metrics.live_status = status
             self.live_status_changed.emit(status.value)
     
     def _on_message_received(self, message_data: Dict[str, Any]):
@@ -239,12 +643,36 @@ class LiveDataManager(QObject):
             message_data: 消息数据
         """
         try:
+            dispatch_start = time.perf_counter()
+            
+            # 已处理过的 msgId 直接丢弃，不计入任何统计
+            if self._msg_id_filter.is_duplicate(message_data):
+                self._metrics.messages_deduplicated += 1
+                return
+            
+            # 首条消息: 结束启动计时
+            if self._startup is not None:
+                self._finish_startup()
+            
+            # 获取者提供了解码时间戳时，记录解码耗时
+            receive_time = message_data.get(TRACE_RECEIVE_TIME)
+            decode_time = message_data.get(TRACE_DECODE_TIME)
+            if receive_time is not None and decode_time is not None:
+                self._metrics.decode_latency.observe(max(decode_time - receive_time, 0.0))
+            
             # 更新统计信息
             self._statistics['total_messages'] += 1
             self._statistics['last_message_time'] = time.time()
             
+            # 记录续传位置
+            self._resume_cursor.update(message_data)
+            
             # 获取消息类型
             message_type = message_data.get('type', MessageType.UNKNOWN)
+            if message_type in KNOWN_MESSAGE_TYPES:
+                self._metrics.messages_by_type[message_type] += 1
+            else:
+                self._metrics.messages_by_type[MessageType.UNKNOWN] += 1
             
             # 调用对应的处理器
             handler = self._message_handlers.get(message_type)
@@ -253,8 +681,33 @@ class LiveDataManager(QObject):
             else:
                 enhanced_message = self._handle_unknown_message(message_data)
             
-            # 发射信号
-            self.message_received.emit(enhanced_message)
+            # 独立用户统计（重复的聊天同样计入）
+            self._unique_users.observe(enhanced_message)
+            
+            # 统计断线期间补发的消息；补发的消息集中到达，不计入规则的窗口聚合
+            recovered = self._reconnect_tracker.is_recovered_message(enhanced_message)
+            if recovered:
+                self._metrics.messages_recovered += 1
+            
+            # 刷屏合并: 重复的聊天不单独分发，稍后合并为一行"×N"汇总
+            if self._chat_dedup.process(enhanced_message):
+                # 分发消息
+                self._dispatch(enhanced_message)
+                
+                # 关键词告警
+                alert_message = self._keyword_alert.scan(enhanced_message)
+                if alert_message:
+                    self._dispatch(alert_message)
+            else:
+                self._statistics['duplicate_messages'] += 1
+            
+            # 规则告警（重复的聊天同样计入），在触发消息之后分发
+            if not recovered:
+                for alert_message in self._alert_rules.evaluate(enhanced_message):
+                    self._dispatch(alert_message)
+            self._dispatch_dedup_summaries()
+            
+            self._metrics.dispatch_latency.observe(time.perf_counter() - dispatch_start)
             
             # 更新统计信息
             self.statistics_updated.emit(self._statistics)
@@ -262,6 +715,36 @@ class LiveDataManager(QObject):
         except Exception as e:
             self.error_occurred.emit(f"处理消息失败: {str(e)}")
     
+    def _dispatch_dedup_summaries(self):
+        """
+        分发刷屏合并产生的"×N"汇总消息
+        """
+        for summary in self._chat_dedup.take_summaries():
+            self._dispatch(summary)
+    
+    def _on_decoded_events(self, events: List[Dict[str, Any]]):
+        """
+        处理解码池送回的一帧消息
+        
+        Args:
+            events: 解码后的消息列表，保持帧内顺序
+        """
+        for message_data in events:
+            self._on_message_received(message_data)
+    
+    def _dispatch(self, message: Dict[str, Any]):
+        """
+        分发处理后的消息
+        
+        发布到事件总线，同时保留 message_received 信号以兼容旧的使用方式
+        
+        Args:
+            message: 处理后的消息数据
+        """
+        message[TRACE_DISPATCH_TIME] = time.time()
+        self._event_bus.publish(message)
+        self.message_received.emit(message)
+    
     def _on_error_occurred(self, error_message: str):
         """
         处理错误
@@ -271,39 +754,85 @@ class LiveDataManager(QObject):
         """
         self.error_occurred.emit(error_message)
     
-    def _on_connection_changed(self, is_connected: bool):
+    def _on_connection_changed(self, is_connected: bool, generation: Optional[int] = None):
         """
         处理连接状态变化
         
+        运行中断开连接时自动按指数退避重连；已被替换的获取器的回调会被忽略
+        
         Args:
             is_connected: 是否已连接
+            generation: 获取器编号
         """
+        if generation is not None and generation != self._fetcher_generation:
+            return
+        
         if is_connected:
+            startup = self._startup
+            if startup is not None:
+                startup.mark(MARK_CONNECTED)
+            self._transport.on_connected()
+            self._backoff.reset()
+            recovery_time = self._reconnect_tracker.on_reconnected()
+            if recovery_time is not None:
+                self._metrics.recovery_time.observe(recovery_time)
             self._set_connection_status(ConnectionStatus.CONNECTED)
+        elif self._is_running:
+            # 连续失败时切换传输方式，下一次重连使用新的方式
+            if self._transport.on_disconnected():
+                self._metrics.transport_switches += 1
+            self._schedule_reconnect()
         else:
             self._set_connection_status(ConnectionStatus.DISCONNECTED)
     
-    def _handle_chat_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _enhance_message(self, message_data: Dict[str, Any],
+                         priority: MessagePriority) -> Dict[str, Any]:
         """
-        处理聊天消息
+        生成增强的消息数据
+        
+        保留获取者提供的服务器时间和接收/解码时间戳，缺失时以当前时间补齐；
+        timestamp 优先使用服务器时间，用于界面显示
         
         Args:
             message_data: 原始消息数据
+            priority: 消息优先级
             
         Returns:
             Dict[str, Any]: 增强的消息数据
         """
-        self._statistics['chat_messages'] += 1
-        
+        now = time.time()
         enhanced_message = message_data.copy()
+        
+        server_time = normalize_server_time(enhanced_message.get(TRACE_SERVER_TIME))
+        if server_time is None:
+            enhanced_message.pop(TRACE_SERVER_TIME, None)
+        else:
+            enhanced_message[TRACE_SERVER_TIME] = server_time
+        
+        receive_time = enhanced_message.setdefault(TRACE_RECEIVE_TIME, now)
+        enhanced_message.setdefault(TRACE_DECODE_TIME, receive_time)
         enhanced_message.update({
-            'priority': MessagePriority.NORMAL,
-            'timestamp': time.time(),
+            'priority': priority,
+            'timestamp': server_time or receive_time,
             'processed': True
         })
         
         return enhanced_message
     
+    def _handle_chat_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理聊天消息
+        
+        Args:
+            message_data: 原始消息数据
+            
+        Returns:
+            Dict[str, Any]: 增强的消息数据
+        """
+        self._statistics['chat_messages'] += 1
+        
+        return self._enhance_message(message_data, MessagePriority.NORMAL)
+    
     def _handle_gift_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         处理礼物消息
@@ -316,14 +845,12 @@ class LiveDataManager(QObject):
         """
         self._statistics['gift_messages'] += 1
         
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.HIGH,
-            'timestamp': time.time(),
-            'processed': True
-        })
+        # 从流量中学习礼物信息，按目录中的单价累计营收
+        self._gift_catalog.observe_event(message_data)
+        self._gift_revenue.add(message_data)
+        self._statistics['gift_diamonds'] = self._gift_revenue.diamonds
         
-        return enhanced_message
+        return self._enhance_message(message_data, MessagePriority.HIGH)
     
     def _handle_like_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -337,14 +864,7 @@ class LiveDataManager(QObject):
         """
         self._statistics['like_messages'] += 1
         
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.LOW,
-            'timestamp': time.time(),
-            'processed': True
-        })
-        
-        return enhanced_message
+        return self._enhance_message(message_data, MessagePriority.LOW)
     
     def _handle_enter_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -358,14 +878,7 @@ class LiveDataManager(QObject):
         """
         self._statistics['enter_messages'] += 1
         
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.NORMAL,
-            'timestamp': time.time(),
-            'processed': True
-        })
-        
-        return enhanced_message
+        return self._enhance_message(message_data, MessagePriority.NORMAL)
     
     def _handle_follow_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -379,14 +892,19 @@ class LiveDataManager(QObject):
         """
         self._statistics['follow_messages'] += 1
         
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.HIGH,
-            'timestamp': time.time(),
-            'processed': True
-        })
+        return self._enhance_message(message_data, MessagePriority.HIGH)
+    
+    def _handle_social_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理分享等社交消息（不计入关注）
         
-        return enhanced_message
+        Args:
+            message_data: 原始消息数据
+            
+        Returns:
+            Dict[str, Any]: 增强的消息数据
+        """
+        return self._enhance_message(message_data, MessagePriority.NORMAL)
     
     def _handle_stats_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -398,14 +916,7 @@ class LiveDataManager(QObject):
         Returns:
             Dict[str, Any]: 增强的消息数据
         """
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.LOW,
-            'timestamp': time.time(),
-            'processed': True
-        })
-        
-        return enhanced_message
+        return self._enhance_message(message_data, MessagePriority.LOW)
     
     def _handle_fansclub_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -417,14 +928,7 @@ class LiveDataManager(QObject):
         Returns:
             Dict[str, Any]: 增强的消息数据
         """
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.NORMAL,
-            'timestamp': time.time(),
-            'processed': True
-        })
-        
-        return enhanced_message
+        return self._enhance_message(message_data, MessagePriority.NORMAL)
     
     def _handle_live_status_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -446,14 +950,7 @@ class LiveDataManager(QObject):
         
         self._set_live_status(status)
         
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.CRITICAL,
-            'timestamp': time.time(),
-            'processed': True
-        })
-        
-        return enhanced_message
+        return self._enhance_message(message_data, MessagePriority.CRITICAL)
     
     def _handle_emoji_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -465,14 +962,7 @@ class LiveDataManager(QObject):
         Returns:
             Dict[str, Any]: 增强的消息数据
         """
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.NORMAL,
-            'timestamp': time.time(),
-            'processed': True
-        })
-        
-        return enhanced_message
+        return self._enhance_message(message_data, MessagePriority.NORMAL)
     
     def _handle_ranking_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -484,14 +974,7 @@ class LiveDataManager(QObject):
         Returns:
             Dict[str, Any]: 增强的消息数据
         """
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.LOW,
-            'timestamp': time.time(),
-            'processed': True
-        })
-        
-        return enhanced_message
+        return self._enhance_message(message_data, MessagePriority.LOW)
     
     def _handle_unknown_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -503,16 +986,47 @@ class LiveDataManager(QObject):
         Returns:
             Dict[str, Any]: 增强的消息数据
         """
-        enhanced_message = message_data.copy()
-        enhanced_message.update({
-            'priority': MessagePriority.LOW,
-            'timestamp': time.time(),
-            'processed': True,
-            'unknown': True
-        })
+        enhanced_message = self._enhance_message(message_data, MessagePriority.LOW)
+        enhanced_message['unknown'] = True
         
         return enhanced_message
     
+    def _start_monitor_thread(self):
+        """
+        启动监控线程
+        """
+        self._stop_monitor_thread()
+        # 每次启动使用新的事件，尚未退出的旧线程不会被重新唤醒
+        stop_event = threading.Event()
+        self._monitor_stop = stop_event
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_run, args=(stop_event,), name="LiveDataMonitor", daemon=True
+        )
+        self._monitor_thread.start()
+    
+    def _stop_monitor_thread(self):
+        """
+        停止监控线程
+        """
+        self._monitor_stop.set()
+        thread, self._monitor_thread = self._monitor_thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=MONITOR_INTERVAL * 2)
+    
+    def _monitor_run(self, stop_event: threading.Event):
+        """
+        监控线程: 每隔 MONITOR_INTERVAL 执行监控循环，每隔 STATS_RESET_INTERVAL 重置统计
+        
+        Args:
+            stop_event: 停止事件
+        """
+        next_reset = time.monotonic() + STATS_RESET_INTERVAL
+        while not stop_event.wait(MONITOR_INTERVAL):
+            self._monitor_loop()
+            if time.monotonic() >= next_reset:
+                next_reset += STATS_RESET_INTERVAL
+                self._reset_statistics()
+    
     def _monitor_loop(self):
         """
         监控循环
@@ -525,10 +1039,31 @@ class LiveDataManager(QObject):
                 # 这里可以添加更多的监控逻辑
                 pass
             
+            # 没有新消息时也要输出过期簇的汇总
+            self._dispatch_dedup_summaries()
+            
+            # 轮询期间定期试探WebSocket是否恢复
+            if self._is_running and self._transport.should_probe():
+                self._metrics.transport_switches += 1
+                self._probe_websocket()
+            
+            # 检查关键词词表是否更新
+            self._keyword_alert.reload_if_changed()
+            keyword_error = self._keyword_alert.take_error()
+            if keyword_error:
+                self.error_occurred.emit(keyword_error)
+            
+            # 检查告警规则是否更新
+            self._alert_rules.reload_if_changed()
+            rules_error = self._alert_rules.take_error()
+            if rules_error:
+                self.error_occurred.emit(rules_error)
+            
             # 更新统计信息
             current_time = time.time()
             if self._statistics['start_time']:
                 self._statistics['running_time'] = current_time - self._statistics['start_time']
+            self._statistics.update(self._unique_users.estimates(current_time))
             
             # 发射统计信息更新信号
             self.statistics_updated.emit(self._statistics)
@@ -540,6 +1075,7 @@ class LiveDataManager(QObject):
         """
         重置统计信息
         """
+        self._gift_revenue.reset()
         start_time = self._statistics.get('start_time')
         self._statistics = {
             'total_messages': 0,
@@ -548,9 +1084,19 @@ class LiveDataManager(QObject):
             'like_messages': 0,
             'enter_messages': 0,
             'follow_messages': 0,
+            'gift_diamonds': 0,
+            'duplicate_messages': 0,
+            'unique_viewers_1m': 0,
+            'unique_viewers_10m': 0,
+            'unique_viewers': 0,
+            'unique_chatters_1m': 0,
+            'unique_chatters_10m': 0,
+            'unique_chatters': 0,
             'start_time': start_time,
             'last_message_time': None,
             'running_time': 0
         }
+        # 独立用户数按整场直播估计，不随每小时的计数重置
+        self._statistics.update(self._unique_users.estimates(time.time()))
         
         self.statistics_updated.emit(self._statistics)
\ No newline at end of file
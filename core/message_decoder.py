@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Message Decoder
+推送消息解码
+
+把解压后的 Response 解码为标准化的消息字典（LiveDataManager 处理的格式）。
+消息字典只包含 str / int / float / bool / None，可以直接跨进程序列化。
+protobuf 绑定（由 protobuf/douyin.proto 生成并缓存，见 proto_bindings.py）在第一次解码时才加载，
+加载时为每个 method 预先建立解码函数，解码每条消息只需一次字典查找和一次调用。
+"""
+
+import time
+from functools import partial
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+from models.message_types import MessageType, LiveStatus
+from .frame_inflater import FrameInflater
+from .gift_catalog import GiftCatalog, get_gift_catalog, unit_diamonds
+from .proto_bindings import load_bindings
+
+# Message.method -> (消息类型, protobuf 消息类名)
+# SocialMessage 的类型由字段提取函数按 action 改写（见 social_message_type）
+METHOD_MESSAGE_TYPES: Dict[str, Tuple[MessageType, str]] = {
+    'WebcastChatMessage': (MessageType.CHAT, 'ChatMessage'),
+    'WebcastGiftMessage': (MessageType.GIFT, 'GiftMessage'),
+    'WebcastLikeMessage': (MessageType.LIKE, 'LikeMessage'),
+    'WebcastMemberMessage': (MessageType.ENTER, 'MemberMessage'),
+    'WebcastSocialMessage': (MessageType.FOLLOW, 'SocialMessage'),
+    'WebcastRoomUserSeqMessage': (MessageType.STATS, 'RoomUserSeqMessage'),
+    'WebcastControlMessage': (MessageType.LIVE_STATUS, 'ControlMessage'),
+    'WebcastEmojiChatMessage': (MessageType.EMOJI, 'EmojiChatMessage'),
+    'WebcastRoomNotifyMessage': (MessageType.SYSTEM, 'RoomNotifyMessage'),
+}
+
+# SocialMessage.action: 关注和分享都使用 SocialMessage，按 action 区分
+SOCIAL_ACTION_FOLLOW = 1
+SOCIAL_ACTION_SHARE = 3
+
+
+def social_message_type(action: int) -> MessageType:
+    """
+    SocialMessage 的消息类型: 关注为 FOLLOW，分享等其他动作为 SOCIAL，不计入关注
+
+    Args:
+        action: SocialMessage.action
+
+    Returns:
+        MessageType: 消息类型
+    """
+    return MessageType.FOLLOW if action == SOCIAL_ACTION_FOLLOW else MessageType.SOCIAL
+
+# ControlMessage.status -> 直播状态
+CONTROL_STATUS = {
+    3: LiveStatus.END,
+}
+
+# GiftMessage 快速路径读取的字段编号（其余子消息直接跳过）
+GIFT_FIELD_GIFT_ID = 2
+GIFT_FIELD_GROUP_COUNT = 4
+GIFT_FIELD_REPEAT_COUNT = 5
+GIFT_FIELD_COMBO_COUNT = 6
+GIFT_FIELD_USER = 7
+GIFT_FIELD_REPEAT_END = 9
+GIFT_FIELD_GROUP_ID = 11
+GIFT_FIELD_TOTAL_COIN = 30
+GIFT_FIELD_GIFT_TYPE = 33
+GIFT_FAST_FIELDS = frozenset((
+    GIFT_FIELD_GIFT_ID, GIFT_FIELD_GROUP_COUNT, GIFT_FIELD_REPEAT_COUNT, GIFT_FIELD_COMBO_COUNT,
+    GIFT_FIELD_USER, GIFT_FIELD_REPEAT_END, GIFT_FIELD_GROUP_ID, GIFT_FIELD_TOTAL_COIN,
+    GIFT_FIELD_GIFT_TYPE
+))
+
+def scan_fields(data: bytes, wanted: frozenset) -> Dict[int, Any]:
+    """
+    按protobuf线格式扫描消息，只取需要的顶层字段
+
+    不需要的字段（包括长度前缀的子消息）只跳过不解析。
+    varint 字段按 int64 解释，长度前缀字段返回原始字节；重复出现时保留最后一次
+
+    Args:
+        data: 消息数据
+        wanted: 需要的字段编号
+
+    Returns:
+        Dict[int, Any]: 字段编号 -> 值
+
+    Raises:
+        ValueError: 数据格式错误
+    """
+    fields = {}
+    position = 0
+    size = len(data)
+    while position < size:
+        key = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            key |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        number = key >> 3
+        wire_type = key & 7
+
+        if wire_type == 0:
+            value = 0
+            shift = 0
+            while True:
+                byte = data[position]
+                position += 1
+                value |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            if number in wanted:
+                fields[number] = value - (1 << 64) if value >= 1 << 63 else value
+        elif wire_type == 2:
+            length = 0
+            shift = 0
+            while True:
+                byte = data[position]
+                position += 1
+                length |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            if number in wanted:
+                fields[number] = data[position:position + length]
+            position += length
+        elif wire_type == 1:
+            position += 8
+        elif wire_type == 5:
+            position += 4
+        else:
+            raise ValueError(f"不支持的线格式类型: {wire_type}")
+
+    if position > size:
+        raise ValueError("消息数据不完整")
+    return fields
+
+
+def _image_url(image) -> str:
+    """
+    取图片的第一个下载地址
+
+    Args:
+        image: protobuf Image
+
+    Returns:
+        str: 下载地址，没有时为空字符串
+    """
+    if image is None or not image.url_list:
+        return ''
+    return image.url_list[0]
+
+
+def _user_fields(user) -> Dict[str, Any]:
+    """
+    提取用户字段
+
+    Args:
+        user: protobuf User
+
+    Returns:
+        Dict[str, Any]: user / user_id / avatar_url（有头像时）
+    """
+    if user is None:
+        return {}
+    fields = {'user': user.nickname or '未知用户', 'user_id': user.id}
+    avatar_url = _image_url(user.avatar_thumb)
+    if avatar_url:
+        fields['avatar_url'] = avatar_url
+    return fields
+
+
+def _chat_fields(message) -> Dict[str, Any]:
+    fields = _user_fields(message.user)
+    fields['content'] = message.content
+    if message.event_time:
+        fields['server_time'] = message.event_time
+    return fields
+
+
+def _gift_fields(message) -> Dict[str, Any]:
+    fields = _user_fields(message.user)
+    fields.update({
+        'gift_id': message.gift_id,
+        'gift_name': message.gift_name or message.describe,
+        'count': message.repeat_count or message.combo_count or 1,
+        'total_coin': message.total_coin,
+        'group_id': message.group_id,
+        'group_count': message.group_count or 1,
+        'repeat_end': message.repeat_end,
+        'gift_type': message.gift_type
+    })
+    icon = message.gift_picture_new if message.gift_picture_new and message.gift_picture_new.url_list else message.icon
+    icon_url = _image_url(icon)
+    if icon_url:
+        fields['gift_icon_url'] = icon_url
+        fields['gift_icon_uri'] = icon.uri
+    return fields
+
+
+def _like_fields(message) -> Dict[str, Any]:
+    fields = _user_fields(message.user)
+    fields.update({'count': message.count, 'total': message.total})
+    return fields
+
+
+def _member_fields(message) -> Dict[str, Any]:
+    fields = _user_fields(message.user)
+    fields['member_count'] = message.member_count
+    return fields
+
+
+def _social_fields(message) -> Dict[str, Any]:
+    fields = _user_fields(message.user)
+    # 覆盖 method 对应的默认类型（FOLLOW）
+    fields['type'] = int(social_message_type(message.action))
+    if message.action == SOCIAL_ACTION_SHARE:
+        fields['content'] = "分享了直播间"
+    fields['action'] = message.action
+    fields['share_type'] = message.share_type
+    fields['follow_count'] = message.follow_count
+    return fields
+
+
+def _stats_fields(message) -> Dict[str, Any]:
+    return {
+        'online': message.total,
+        'total_user': message.total_user,
+        'content': f"在线 {message.total}，累计 {message.total_user_str or message.total_user}"
+    }
+
+
+def _control_fields(message) -> Dict[str, Any]:
+    fields = {'control_status': message.status}
+    status = CONTROL_STATUS.get(message.status)
+    if status is not None:
+        fields['status'] = int(status)
+        fields['content'] = "直播已结束"
+    return fields
+
+
+def _emoji_fields(message) -> Dict[str, Any]:
+    fields = _user_fields(message.user)
+    fields['content'] = message.content
+    emoji_urls = [url for url in (_image_url(detail.emoji_icon) for detail in message.emoji_details_list) if url]
+    if emoji_urls:
+        fields['emoji_urls'] = emoji_urls
+    return fields
+
+
+def _notify_fields(message) -> Dict[str, Any]:
+    return {'notify_type': message.type}
+
+
+# 消息类型 -> 字段提取函数
+FIELD_EXTRACTORS: Dict[MessageType, Callable[[Any], Dict[str, Any]]] = {
+    MessageType.CHAT: _chat_fields,
+    MessageType.GIFT: _gift_fields,
+    MessageType.LIKE: _like_fields,
+    MessageType.ENTER: _member_fields,
+    MessageType.FOLLOW: _social_fields,
+    MessageType.STATS: _stats_fields,
+    MessageType.LIVE_STATUS: _control_fields,
+    MessageType.EMOJI: _emoji_fields,
+    MessageType.SYSTEM: _notify_fields,
+}
+
+
+def _payload_decoder(message_class, extract: Callable[[Any], Dict[str, Any]]) -> Callable[[bytes], Dict[str, Any]]:
+    """
+    生成解析 payload 并提取字段的函数
+
+    Args:
+        message_class: protobuf 消息类
+        extract: 字段提取函数
+
+    Returns:
+        Callable[[bytes], Dict[str, Any]]: 解码函数
+    """
+    def decode_payload(payload: bytes) -> Dict[str, Any]:
+        return extract(message_class().parse(payload))
+    return decode_payload
+
+
+class MessageDecoder:
+    """
+    Response 解码器
+
+    未知的 method 以 UNKNOWN 类型输出，不解析 payload。
+    礼物消息的 giftId 已在礼物目录中时只扫描标量字段和 User，
+    名称、图标和单价取自目录；未知礼物完整解析并加入目录
+    """
+
+    def __init__(self, bindings=None, gift_catalog: Optional[GiftCatalog] = None):
+        self._bindings = bindings
+        self._gift_catalog = gift_catalog
+        self._response_class = None
+        self._user_class = None
+        # Message.method -> (消息类型, payload 解码函数)
+        self._message_decoders: Dict[str, Tuple[int, Callable[[bytes], Dict[str, Any]]]] = {}
+
+        # 统计
+        self.responses = 0
+        self.messages = 0
+        self.unknown_methods = 0
+        self.gift_fast_decodes = 0
+        self.gift_full_decodes = 0
+
+    def _load(self):
+        """
+        加载 protobuf 绑定并建立 method -> 解码函数的映射
+        """
+        bindings = self._bindings or load_bindings()
+        self._bindings = bindings
+        self._response_class = bindings.Response
+        self._user_class = bindings.User
+        if self._gift_catalog is None:
+            self._gift_catalog = get_gift_catalog()
+        for method, (message_type, class_name) in METHOD_MESSAGE_TYPES.items():
+            message_class = getattr(bindings, class_name)
+            if message_type == MessageType.GIFT:
+                decode_payload = partial(self._decode_gift, message_class=message_class)
+            else:
+                decode_payload = _payload_decoder(message_class, FIELD_EXTRACTORS[message_type])
+            self._message_decoders[method] = (int(message_type), decode_payload)
+
+    def decode(self, data: bytes, receive_time: Optional[float] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        解码 Response
+
+        Args:
+            data: 解压后的 Response 数据
+            receive_time: 帧接收时间
+
+        Returns:
+            Tuple[Dict[str, Any], List[Dict[str, Any]]]: (Response 元信息, 消息列表)
+        """
+        if self._response_class is None:
+            self._load()
+        if receive_time is None:
+            receive_time = time.time()
+
+        response = self._response_class().parse(data)
+        meta = {
+            'cursor': response.cursor,
+            'internal_ext': response.internal_ext,
+            'fetch_interval': response.fetch_interval,
+            'heartbeat_duration': response.heartbeat_duration,
+            'need_ack': response.need_ack,
+            'server_time': response.now
+        }
+
+        events = []
+        for message in response.messages:
+            event = {
+                'type': int(MessageType.UNKNOWN),
+                'method': message.method,
+                'msg_id': message.msg_id,
+                'cursor': response.cursor,
+                'internal_ext': response.internal_ext,
+                'server_time': response.now,
+                'receive_time': receive_time
+            }
+            decoder = self._message_decoders.get(message.method)
+            if decoder is None:
+                self.unknown_methods += 1
+            else:
+                event['type'] = decoder[0]
+                event.update(decoder[1](message.payload))
+            events.append(event)
+
+        decode_time = time.time()
+        for event in events:
+            event['decode_time'] = decode_time
+
+        self.responses += 1
+        self.messages += len(events)
+        return meta, events
+
+    def _decode_gift(self, payload: bytes, message_class) -> Dict[str, Any]:
+        """
+        解码礼物消息
+
+        Args:
+            payload: GiftMessage 数据
+            message_class: GiftMessage 类
+
+        Returns:
+            Dict[str, Any]: 礼物消息字段
+        """
+        catalog = self._gift_catalog
+        raw = scan_fields(payload, GIFT_FAST_FIELDS)
+        gift_id = raw.get(GIFT_FIELD_GIFT_ID, 0)
+        info = catalog.get(gift_id)
+
+        if info is None or not info.name:
+            fields = _gift_fields(message_class().parse(payload))
+            catalog.observe_event(fields)
+            self.gift_full_decodes += 1
+        else:
+            user = raw.get(GIFT_FIELD_USER)
+            fields = _user_fields(self._user_class().parse(user)) if user is not None else {}
+            count = raw.get(GIFT_FIELD_REPEAT_COUNT) or raw.get(GIFT_FIELD_COMBO_COUNT) or 1
+            group_count = raw.get(GIFT_FIELD_GROUP_COUNT) or 1
+            total_coin = raw.get(GIFT_FIELD_TOTAL_COIN, 0)
+            fields.update({
+                'gift_id': gift_id,
+                'gift_name': info.name,
+                'count': count,
+                'total_coin': total_coin,
+                'group_id': raw.get(GIFT_FIELD_GROUP_ID, 0),
+                'group_count': group_count,
+                'repeat_end': raw.get(GIFT_FIELD_REPEAT_END, 0),
+                'gift_type': raw.get(GIFT_FIELD_GIFT_TYPE) or info.gift_type
+            })
+            if info.icon_url:
+                fields['gift_icon_url'] = info.icon_url
+                fields['gift_icon_uri'] = info.icon_uri
+            # 单价只需要标量字段，快速路径上继续学习
+            catalog.observe(gift_id, diamond_count=unit_diamonds(total_coin, count, group_count))
+            self.gift_fast_decodes += 1
+
+        diamond_count = catalog.diamond_value(gift_id)
+        if diamond_count:
+            fields['diamond_count'] = diamond_count
+        return fields
+
+
+# 每个进程（解码工作进程）各自的解压器和解码器
+_inflater: Optional[FrameInflater] = None
+_decoder: Optional[MessageDecoder] = None
+
+
+def decode_frame(payload: bytes, receive_time: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    解压并解码一帧推送数据
+
+    模块级函数，可以作为 DecodePool 的解码函数在工作进程中调用
+
+    Args:
+        payload: 推送帧 payload（gzip压缩的 Response）
+        receive_time: 帧接收时间
+
+    Returns:
+        List[Dict[str, Any]]: 消息列表
+    """
+    global _inflater, _decoder
+    if _decoder is None:
+        _inflater = FrameInflater()
+        _decoder = MessageDecoder()
+    _, events = _decoder.decode(_inflater.inflate(payload), receive_time)
+    return events
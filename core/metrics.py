@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics
+运行指标
+
+预分配的计数器和直方图，以及Prometheus文本格式的本地HTTP导出端点。
+
+热路径上只做整数自增和列表下标写入，不加锁：
+每个房间的指标只由该房间的采集线程写入，抓取线程只读，读到的值最多落后一次更新。
+"""
+
+import time
+import threading
+import weakref
+from bisect import bisect_left
+from typing import Optional, Dict, List, Tuple, Iterable, Sequence
+
+from models.message_types import MessageType, ConnectionStatus, LiveStatus
+from .unique_users import metric_samples
+
+# 延迟直方图默认分桶（秒）
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0
+)
+
+# 断线恢复耗时分桶（秒）
+RECOVERY_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 首条消息时间分桶（秒）
+STARTUP_BUCKETS: Tuple[float, ...] = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0)
+
+# Prometheus文本格式的Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 指标族: (名称, 类型, 说明, [(标签, 值)])
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class Histogram:
+    """
+    固定分桶直方图
+
+    分桶计数在创建时预分配，observe() 只做一次二分查找和三次自增
+    """
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """
+        记录一个观测值
+
+        Args:
+            value: 观测值
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, labels: Dict[str, str]) -> List[Tuple[str, Dict[str, str], float]]:
+        """
+        生成Prometheus直方图样本（累计分桶）
+
+        Args:
+            labels: 公共标签
+
+        Returns:
+            List[Tuple[str, Dict[str, str], float]]: (后缀, 标签, 值) 列表
+        """
+        samples = []
+        cumulative = 0
+        counts = list(self.counts)
+        for bound, bucket_count in zip(self.bounds, counts):
+            cumulative += bucket_count
+            samples.append(('_bucket', dict(labels, le=_format_value(bound)), cumulative))
+        cumulative += counts[-1]
+        samples.append(('_bucket', dict(labels, le='+Inf'), cumulative))
+        samples.append(('_sum', labels, self.sum))
+        samples.append(('_count', labels, cumulative))
+        return samples
+
+
+class RoomMetrics:
+    """
+    单个直播间的运行指标
+
+    由 LiveDataManager 持有并写入，注册到 MetricsRegistry 后可被抓取
+    """
+
+    def __init__(self, room: str = ""):
+        self.room = room
+
+        # 按消息类型预分配的计数器
+        self.messages_by_type: List[int] = [0] * len(MessageType)
+
+        # 延迟直方图
+        self.inflate_latency = Histogram()
+        self.decode_latency = Histogram()
+        self.dispatch_latency = Histogram()
+
+        # 传输层计数
+        self.websocket_bytes_in = 0
+        self.websocket_frames_in = 0
+        self.reconnects = 0
+        self.messages_recovered = 0
+        self.messages_deduplicated = 0
+        self.transport = ""
+        self.transport_switches = 0
+        self.recovery_time = Histogram(RECOVERY_BUCKETS)
+
+        # 冷启动: 从点击连接到收到首条消息的时间，以及最近一次启动中各步骤完成的时间
+        self.time_to_first_message = Histogram(STARTUP_BUCKETS)
+        self.startup_steps: Dict[str, float] = {}
+
+        # 状态
+        self.connection_status = ConnectionStatus.DISCONNECTED
+        self.live_status = LiveStatus.UNKNOWN
+
+        # 事件总线，抓取时读取各订阅的队列深度和丢弃数量
+        self.event_bus = None
+
+        # 独立用户统计（UniqueUserTracker），抓取时估计
+        self.unique_users = None
+
+        # 规则告警（AlertRuleStage），抓取时读取各规则的检查次数和耗时
+        self.alert_rules = None
+
+    def record_frame(self, size: int):
+        """
+        记录收到的WebSocket帧
+
+        Args:
+            size: 帧字节数
+        """
+        self.websocket_bytes_in += size
+        self.websocket_frames_in += 1
+
+    def collect(self) -> Iterable[MetricFamily]:
+        """
+        生成指标族
+
+        Returns:
+            Iterable[MetricFamily]: 指标族列表
+        """
+        room = {'room': self.room}
+
+        yield ('tvs_messages_total', 'counter', "按消息类型统计的消息数量", [
+            (dict(room, type=message_type.name.lower()), self.messages_by_type[message_type])
+            for message_type in MessageType
+        ])
+        yield ('tvs_websocket_bytes_received_total', 'counter', "收到的WebSocket字节数",
+               [(room, self.websocket_bytes_in)])
+        yield ('tvs_websocket_frames_received_total', 'counter', "收到的WebSocket帧数",
+               [(room, self.websocket_frames_in)])
+        yield ('tvs_reconnects_total', 'counter', "自动重连次数", [(room, self.reconnects)])
+        yield ('tvs_messages_recovered_total', 'counter', "重连后补发的断线期间消息数",
+               [(room, self.messages_recovered)])
+        yield ('tvs_messages_deduplicated_total', 'counter', "按 msgId 丢弃的重复消息数",
+               [(room, self.messages_deduplicated)])
+        yield ('tvs_recovery_seconds', 'histogram', "从断线到重连成功的耗时",
+               self.recovery_time.samples(room))
+        yield ('tvs_time_to_first_message_seconds', 'histogram', "从点击连接到收到首条消息的时间",
+               self.time_to_first_message.samples(room))
+        yield ('tvs_startup_step_seconds', 'gauge', "最近一次启动中点击连接后各步骤完成的时间（预取的步骤为0）", [
+            (dict(room, step=step), seconds) for step, seconds in list(self.startup_steps.items())
+        ])
+        yield ('tvs_transport_switches_total', 'counter', "WebSocket与轮询之间的切换次数",
+               [(room, self.transport_switches)])
+        yield ('tvs_transport_info', 'gauge', "当前的传输方式",
+               [(dict(room, transport=self.transport), 1)])
+        yield ('tvs_connection_status', 'gauge', "连接状态（ConnectionStatus枚举值）",
+               [(room, int(self.connection_status))])
+        yield ('tvs_live_status', 'gauge', "直播状态（LiveStatus枚举值）",
+               [(room, int(self.live_status))])
+        yield ('tvs_inflate_latency_seconds', 'histogram', "推送帧解压耗时",
+               self.inflate_latency.samples(room))
+        yield ('tvs_decode_latency_seconds', 'histogram', "消息解码耗时",
+               self.decode_latency.samples(room))
+        yield ('tvs_dispatch_latency_seconds', 'histogram', "消息处理和分发耗时",
+               self.dispatch_latency.samples(room))
+
+        unique_users = self.unique_users
+        if unique_users is not None:
+            yield ('tvs_unique_users', 'gauge', "独立用户数估计（kind: viewers/chatters）", [
+                (dict(room, **labels), value) for labels, value in metric_samples(unique_users.estimates())
+            ])
+
+        alert_rules = self.alert_rules
+        if alert_rules is not None:
+            rules = alert_rules.stats()
+            yield ('tvs_alert_rule_evaluations_total', 'counter', "告警规则的检查次数", [
+                (dict(room, rule=rule['name']), rule['evaluations']) for rule in rules
+            ])
+            yield ('tvs_alert_rule_fires_total', 'counter', "告警规则的触发次数", [
+                (dict(room, rule=rule['name']), rule['fires']) for rule in rules
+            ])
+            yield ('tvs_alert_rule_eval_seconds_total', 'counter', "告警规则的累计检查耗时", [
+                (dict(room, rule=rule['name']), rule['cost_seconds']) for rule in rules
+            ])
+
+        event_bus = self.event_bus
+        if event_bus is not None:
+            subscriptions = event_bus.stats()
+            yield ('tvs_event_bus_published_total', 'counter', "发布到事件总线的事件数",
+                   [(room, event_bus.published)])
+            yield ('tvs_subscriber_queue_depth', 'gauge', "订阅者队列深度", [
+                (dict(room, subscriber=s['name']), s['queue_depth']) for s in subscriptions
+            ])
+            yield ('tvs_subscriber_dropped_total', 'counter', "订阅者队列满时丢弃的事件数", [
+                (dict(room, subscriber=s['name']), s['dropped']) for s in subscriptions
+            ])
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+
+    以弱引用保存指标采集器，采集器被回收后自动从注册表移除
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors: 'weakref.WeakSet' = weakref.WeakSet()
+        self._start_time = time.time()
+
+    def register(self, collector):
+        """
+        注册采集器
+
+        Args:
+            collector: 提供 collect() 方法的对象
+        """
+        with self._lock:
+            self._collectors.add(collector)
+
+    def unregister(self, collector):
+        """
+        注销采集器
+
+        Args:
+            collector: 采集器
+        """
+        with self._lock:
+            self._collectors.discard(collector)
+
+    def collect_families(self) -> Dict[str, Tuple[str, str, List[Tuple[str, Dict[str, str], float]]]]:
+        """
+        采集所有注册的采集器（不含进程运行时间），同名指标族的样本合并
+
+        Returns:
+            Dict: 指标名称 -> (类型, 说明, [(名称后缀, 标签, 值)])
+        """
+        with self._lock:
+            collectors = list(self._collectors)
+
+        families: Dict[str, Tuple[str, str, List[Tuple[str, Dict[str, str], float]]]] = {}
+        for collector in collectors:
+            try:
+                for name, metric_type, help_text, samples in collector.collect():
+                    family = families.setdefault(name, (metric_type, help_text, []))
+                    if metric_type == 'histogram':
+                        family[2].extend(samples)
+                    else:
+                        family[2].extend(('', labels, value) for labels, value in samples)
+            except Exception:
+                continue
+        return families
+
+    def render(self) -> str:
+        """
+        生成Prometheus文本格式的指标
+
+        Returns:
+            str: 指标文本
+        """
+        families: Dict[str, Tuple[str, str, List[Tuple[str, Dict[str, str], float]]]] = {}
+        families['tvs_uptime_seconds'] = ('gauge', "进程运行时间", [
+            ('', {}, time.time() - self._start_time)
+        ])
+        for name, (metric_type, help_text, samples) in self.collect_families().items():
+            families.setdefault(name, (metric_type, help_text, []))[2].extend(samples)
+
+        lines = []
+        for name, (metric_type, help_text, samples) in families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """
+    格式化标签
+
+    Args:
+        labels: 标签字典
+
+    Returns:
+        str: Prometheus标签文本
+    """
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    """
+    格式化样本值
+
+    Args:
+        value: 样本值
+
+    Returns:
+        str: 样本值文本
+    """
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+# 全局默认注册表
+default_registry = MetricsRegistry()
+
+
+def _make_request_handler(registry: MetricsRegistry):
+    """
+    创建指标HTTP请求处理器类
+
+    http.server 只在启用指标端点时才导入，不影响程序启动时间
+
+    Args:
+        registry: 指标注册表
+
+    Returns:
+        type: BaseHTTPRequestHandler 子类
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        """
+        指标HTTP请求处理器
+        """
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # 抓取请求很频繁，不输出访问日志
+            pass
+
+    return MetricsRequestHandler
+
+
+class MetricsServer:
+    """
+    本地指标导出HTTP服务
+
+    在后台线程中运行，默认只监听本机地址
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1",
+                 registry: Optional[MetricsRegistry] = None):
+        self._host = host
+        self._port = port
+        self._registry = registry or default_registry
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """获取实际监听地址"""
+        if self._server:
+            return self._server.server_address[:2]
+        return (self._host, self._port)
+
+    def start(self):
+        """
+        启动HTTP服务
+        """
+        if self._server:
+            return
+
+        from http.server import ThreadingHTTPServer
+        self._server = ThreadingHTTPServer((self._host, self._port), _make_request_handler(self._registry))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="MetricsServer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        停止HTTP服务
+        """
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Message ID Filter
+消息ID去重
+
+每条 Message 都带有 msgId。重连后服务器按续传位置补发消息，或同时使用WebSocket和
+轮询获取时，同一条消息可能到达两次，使所有统计偏大。本过滤器位于处理流水线的最前端，
+丢弃已经处理过的 msgId:
+
+- 最近的 msgId 保存在按到达时间排序的有界哈希表中，精确判断
+- 超出容量或存活时间后移入轮换的布隆过滤器（多代，写满一代后丢弃最旧的一代），
+  以固定内存覆盖更长的时间；布隆过滤器可能误判（把新消息当作重复），误判率可配置。
+  查询时检查所有代，误判率约为各代之和，因此每代按 误判率 / 代数 设计
+"""
+
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
+
+# 精确哈希表的默认容量和存活时间（秒）
+DEFAULT_RECENT_CAPACITY = 50000
+DEFAULT_RECENT_TTL = 120.0
+
+# 布隆过滤器默认总内存（字节，所有代合计）和误判率（所有代合计）
+DEFAULT_BLOOM_MEMORY = 1024 * 1024
+DEFAULT_FALSE_POSITIVE_RATE = 1e-4
+
+# 布隆过滤器的代数
+DEFAULT_BLOOM_GENERATIONS = 2
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _mix64(value: int) -> int:
+    """
+    64位整数混合（MurmurHash3 fmix64），msgId 的低位分布不均匀，不能直接取模
+
+    Args:
+        value: 整数
+
+    Returns:
+        int: 混合后的64位整数
+    """
+    value &= _MASK64
+    value ^= value >> 33
+    value = (value * 0xFF51AFD7ED558CCD) & _MASK64
+    value ^= value >> 33
+    value = (value * 0xC4CEB9FE1A85EC53) & _MASK64
+    value ^= value >> 33
+    return value
+
+
+class BloomFilter:
+    """
+    布隆过滤器（位数组为 bytearray）
+    """
+
+    __slots__ = ('_bits', '_size', '_hashes', '_capacity', 'count')
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        size = max(64, int(math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))))
+        self._size = size
+        self._hashes = max(1, int(round(size / capacity * math.log(2))))
+        self._capacity = capacity
+        self._bits = bytearray((size + 7) // 8)
+        self.count = 0
+
+    @property
+    def capacity(self) -> int:
+        """达到设定误判率时可容纳的元素数"""
+        return self._capacity
+
+    @property
+    def full(self) -> bool:
+        """是否已达到容量"""
+        return self.count >= self._capacity
+
+    @property
+    def memory_bytes(self) -> int:
+        """位数组占用的字节数"""
+        return len(self._bits)
+
+    def _positions(self, key: int):
+        # 双重哈希: 由两个32位值派生 k 个位置
+        value = _mix64(key)
+        low = value & 0xFFFFFFFF
+        high = (value >> 32) | 1
+        size = self._size
+        for index in range(self._hashes):
+            yield (low + index * high) % size
+
+    def add(self, key: int):
+        """
+        加入元素
+
+        Args:
+            key: 整数键
+        """
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: int) -> bool:
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class MsgIdFilter:
+    """
+    msgId 去重过滤器
+
+    seen() 判断消息是否重复并记录新的 msgId
+    """
+
+    def __init__(self, recent_capacity: int = DEFAULT_RECENT_CAPACITY,
+                 recent_ttl: float = DEFAULT_RECENT_TTL,
+                 bloom_memory: int = DEFAULT_BLOOM_MEMORY,
+                 false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+                 generations: int = DEFAULT_BLOOM_GENERATIONS,
+                 clock=time.time):
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"误判率必须在0和1之间: {false_positive_rate}")
+        self._recent_capacity = recent_capacity
+        self._recent_ttl = recent_ttl
+        self._generation_count = max(generations, 1)
+        # 查询时检查所有代，每代的误判率按代数平分
+        self._generation_rate = false_positive_rate / self._generation_count
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # 每代的位数 = 总内存 / 代数，由位数和每代误判率反推每代容量
+        bits = bloom_memory * 8 // self._generation_count
+        self._bloom_capacity = max(1, int(bits * math.log(2) ** 2 / -math.log(self._generation_rate)))
+
+        # msgId -> 到达时间，最早到达的在前
+        self._recent: 'OrderedDict[int, float]' = OrderedDict()
+        # 布隆过滤器，最新的一代在最后
+        self._generations: List[BloomFilter] = []
+
+        # 统计
+        self.checked = 0
+        self.suppressed = 0
+        self.bloom_hits = 0
+        self.rotations = 0
+
+    @property
+    def bloom_capacity(self) -> int:
+        """每代布隆过滤器的容量"""
+        return self._bloom_capacity
+
+    def seen(self, msg_id: Optional[int]) -> bool:
+        """
+        判断 msgId 是否已经处理过，未处理过则记录
+
+        Args:
+            msg_id: 消息ID，为空时视为未处理过
+
+        Returns:
+            bool: 是否为重复消息
+        """
+        if not msg_id:
+            return False
+        now = self._clock()
+        with self._lock:
+            self.checked += 1
+            recent = self._recent
+            if msg_id in recent:
+                self.suppressed += 1
+                return True
+            for bloom in self._generations:
+                if msg_id in bloom:
+                    self.suppressed += 1
+                    self.bloom_hits += 1
+                    return True
+
+            recent[msg_id] = now
+            self._expire(now)
+            return False
+
+    def is_duplicate(self, message: Dict[str, Any]) -> bool:
+        """
+        判断消息是否重复
+
+        Args:
+            message: 消息数据（msg_id 字段）
+
+        Returns:
+            bool: 是否为重复消息
+        """
+        return self.seen(message.get('msg_id'))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取过滤器统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        with self._lock:
+            return {
+                'checked': self.checked,
+                'suppressed': self.suppressed,
+                'bloom_hits': self.bloom_hits,
+                'rotations': self.rotations,
+                'recent': len(self._recent),
+                'bloom_items': sum(bloom.count for bloom in self._generations),
+                'bloom_bytes': sum(bloom.memory_bytes for bloom in self._generations)
+            }
+
+    def clear(self):
+        """
+        清空记录（例如切换直播间时）
+        """
+        with self._lock:
+            self._recent.clear()
+            self._generations = []
+
+    def _expire(self, now: float):
+        """
+        把超出容量或存活时间的 msgId 移入布隆过滤器
+
+        Args:
+            now: 当前时间
+        """
+        recent = self._recent
+        deadline = now - self._recent_ttl
+        while recent:
+            msg_id, arrived = next(iter(recent.items()))
+            if len(recent) <= self._recent_capacity and arrived > deadline:
+                break
+            del recent[msg_id]
+            self._current_generation().add(msg_id)
+
+    def _current_generation(self) -> BloomFilter:
+        """
+        获取正在写入的一代，写满时轮换
+
+        Returns:
+            BloomFilter: 布隆过滤器
+        """
+        generations = self._generations
+        if not generations or generations[-1].full:
+            generations.append(BloomFilter(self._bloom_capacity, self._generation_rate))
+            if len(generations) > self._generation_count:
+                del generations[0]
+                self.rotations += 1
+        return generations[-1]
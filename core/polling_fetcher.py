@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Polling Fetcher
+HTTP轮询获取器
+
+部分网络会屏蔽或限速WebSocket。抖音网页端在这种情况下改用HTTP轮询:
+定期请求 im/fetch 接口，响应与推送帧 payload 相同，是（可能经过gzip压缩的）Response，
+其中 cursor / internalExt 作为下一次请求的参数，fetchInterval 是服务器建议的轮询间隔。
+
+DouyinLivePollingFetcher 与 DouyinLiveWebFetcher 使用相同的构造参数和回调
+（on_message / on_error / on_connection_change），LiveDataManager 可以直接替换使用:
+
+- 请求经过全局请求调度器（request_scheduler.py）发送，使用保持连接（keep-alive）的连接池，
+  不会每次轮询都重新握手；直播间页面按建立连接的优先级请求，轮询次之
+- 轮询间隔跟随服务器的 fetchInterval，连续的空响应逐渐拉长间隔，有新消息时立即恢复
+- 启用解码池时响应交给解码池，否则在轮询线程中解码；cursor 只需扫描顶层字段
+"""
+
+import re
+import time
+import zlib
+import threading
+from urllib.parse import urlencode, urlsplit
+from typing import Optional, Dict, Any, Callable
+
+from .http_pool import HTTPError
+from .frame_inflater import FrameInflater
+from .message_decoder import MessageDecoder, scan_fields
+from .reconnect import ExponentialBackoff
+from .request_scheduler import RequestScheduler, PRIORITY_CONNECT, PRIORITY_POLL, get_request_scheduler
+
+# 轮询接口
+DEFAULT_FETCH_ENDPOINT = 'https://live.douyin.com/webcast/im/fetch/'
+
+# 直播间页面（用于从网页直播间号解析 roomId）
+LIVE_PAGE_URL = 'https://live.douyin.com/{web_rid}'
+
+# 轮询请求的固定参数
+DEFAULT_FETCH_PARAMS = {
+    'aid': '6383',
+    'app_name': 'douyin_web',
+    'live_id': '1',
+    'device_platform': 'web',
+    'resp_content_type': 'protobuf',
+    'fetch_rule': '1',
+    'did_rule': '3',
+    'identity': 'audience',
+}
+
+# 请求头（覆盖连接池的默认请求头）
+FETCH_HEADERS = {
+    'Accept': 'application/x-protobuf, */*',
+    'Referer': 'https://live.douyin.com/',
+}
+
+# 服务器未给出 fetchInterval 时的轮询间隔，以及间隔的上下限（秒）
+DEFAULT_FETCH_INTERVAL = 1.0
+MIN_FETCH_INTERVAL = 0.2
+MAX_FETCH_INTERVAL = 5.0
+
+# 空响应时间隔的放大倍数及上限
+IDLE_BACKOFF = 1.5
+MAX_IDLE_FACTOR = 4.0
+
+# 单次响应的最大字节数
+MAX_RESPONSE_SIZE = 4 * 1024 * 1024
+
+# 连续失败该次数后报告断开，由管理器重连或切换传输方式
+MAX_POLL_ERRORS = 3
+
+# Response 顶层字段编号
+RESPONSE_FIELD_MESSAGES = 1
+RESPONSE_FIELD_CURSOR = 2
+RESPONSE_FIELD_FETCH_INTERVAL = 3
+RESPONSE_FIELD_INTERNAL_EXT = 5
+RESPONSE_FIELD_FETCH_TYPE = 6
+RESPONSE_FIELD_PUSH_SERVER = 10
+RESPONSE_META_FIELDS = frozenset((
+    RESPONSE_FIELD_MESSAGES, RESPONSE_FIELD_CURSOR, RESPONSE_FIELD_FETCH_INTERVAL,
+    RESPONSE_FIELD_INTERNAL_EXT, RESPONSE_FIELD_FETCH_TYPE, RESPONSE_FIELD_PUSH_SERVER
+))
+
+# 直播间页面中的 roomId（页面内嵌的JSON可能经过转义）
+_ROOM_ID_PATTERN = re.compile(rb'roomId\\?"\s*:\s*\\?"(\d+)')
+
+
+def parse_web_rid(live_url: str) -> str:
+    """
+    从直播间URL中取出网页直播间号（路径的最后一段），不是URL时原样返回
+
+    Args:
+        live_url: 直播间URL或直播间号
+
+    Returns:
+        str: 网页直播间号
+    """
+    path = urlsplit(live_url).path.strip('/')
+    return path.split('/')[-1] if path else live_url.strip()
+
+
+def resolve_room_id(live_url: str, scheduler: Optional[RequestScheduler] = None) -> str:
+    """
+    从直播间页面解析 roomId
+
+    Args:
+        live_url: 直播间URL或网页直播间号
+        scheduler: 请求调度器，未指定时使用共享调度器
+
+    Returns:
+        str: roomId
+
+    Raises:
+        HTTPError: 页面请求失败或找不到 roomId
+    """
+    scheduler = scheduler if scheduler is not None else get_request_scheduler()
+    page = scheduler.get(LIVE_PAGE_URL.format(web_rid=parse_web_rid(live_url)), PRIORITY_CONNECT,
+                         MAX_RESPONSE_SIZE, {'Accept': 'text/html'})
+    match = _ROOM_ID_PATTERN.search(page)
+    if match is None:
+        raise HTTPError("页面中没有 roomId")
+    return match.group(1).decode('ascii')
+
+
+class DouyinLivePollingFetcher:
+    """
+    HTTP轮询获取器
+
+    start() 启动轮询线程，stop() 停止；回调在轮询线程（或解码池的收集线程）中执行
+    """
+
+    def __init__(self, live_url: str,
+                 on_message: Callable[[Dict[str, Any]], None],
+                 on_error: Optional[Callable[[str], None]] = None,
+                 on_connection_change: Optional[Callable[[bool], None]] = None,
+                 heartbeat_scheduler=None,
+                 frame_inflater: Optional[FrameInflater] = None,
+                 resume_params: Optional[Dict[str, str]] = None,
+                 decode_pool=None,
+                 decode_room=None,
+                 room_id: Optional[str] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 decoder: Optional[MessageDecoder] = None,
+                 endpoint: str = DEFAULT_FETCH_ENDPOINT,
+                 headers: Optional[Dict[str, str]] = None,
+                 extra_params: Optional[Dict[str, str]] = None):
+        # 轮询不需要WebSocket心跳，heartbeat_scheduler 只为与 DouyinLiveWebFetcher 保持相同参数
+        self._live_url = live_url
+        self._on_message = on_message
+        self._on_error = on_error
+        self._on_connection_change = on_connection_change
+        self._inflater = frame_inflater or FrameInflater()
+        self._decode_pool = decode_pool
+        self._decode_room = decode_room
+        self._room_id = room_id
+        self._scheduler = scheduler if scheduler is not None else get_request_scheduler()
+        self._decoder = decoder
+        self._endpoint = endpoint
+        self._headers = dict(FETCH_HEADERS, **(headers or {}))
+        self._params = dict(DEFAULT_FETCH_PARAMS, **(extra_params or {}))
+
+        # 续传位置，每次响应后更新
+        self._cursor = ''
+        self._internal_ext = ''
+        if resume_params:
+            self._cursor = resume_params.get('cursor', '')
+            self._internal_ext = resume_params.get('internal_ext', '')
+
+        self._server_interval = DEFAULT_FETCH_INTERVAL
+        self._idle_factor = 1.0
+        self._backoff = ExponentialBackoff(base_delay=0.5, max_delay=MAX_FETCH_INTERVAL)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 服务器建议的传输方式（fetchType / pushServer），供切换传输方式时参考
+        self.fetch_type = 0
+        self.push_server = ''
+
+        # 统计
+        self.polls = 0
+        self.empty_polls = 0
+        self.errors = 0
+
+    @property
+    def fetch_interval(self) -> float:
+        """当前的轮询间隔（秒）"""
+        return min(self._server_interval * self._idle_factor, MAX_FETCH_INTERVAL)
+
+    def start(self):
+        """
+        启动轮询线程
+        """
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="polling-fetcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        停止轮询
+
+        Args:
+            timeout: 等待轮询线程退出的时间（秒）
+        """
+        self._stop_event.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        """
+        轮询循环
+        """
+        connected = False
+        try:
+            if self._room_id is None:
+                self._room_id = resolve_room_id(self._live_url, self._scheduler)
+
+            errors = 0
+            while not self._stop_event.is_set():
+                started = time.monotonic()
+                try:
+                    receive_time = time.time()
+                    body = self._scheduler.get(self._fetch_url(), PRIORITY_POLL, MAX_RESPONSE_SIZE, self._headers)
+                    self._handle_response(body, receive_time)
+                except (HTTPError, ValueError, IndexError, zlib.error) as e:
+                    self.errors += 1
+                    errors += 1
+                    if errors >= MAX_POLL_ERRORS:
+                        self._report_error(f"轮询失败: {e}")
+                        break
+                    self._stop_event.wait(self._backoff.next_delay())
+                    continue
+
+                errors = 0
+                self._backoff.reset()
+                if not connected:
+                    connected = True
+                    self._notify_connection(True)
+
+                # 扣除请求本身的耗时，保持服务器要求的节奏
+                self._stop_event.wait(max(self.fetch_interval - (time.monotonic() - started), 0.0))
+        except HTTPError as e:
+            self._report_error(f"解析直播间失败: {e}")
+        except Exception as e:
+            self._report_error(f"轮询获取器错误: {e}")
+
+        if not self._stop_event.is_set():
+            self._notify_connection(False)
+
+    def _handle_response(self, body: bytes, receive_time: float):
+        """
+        处理一次轮询响应
+
+        Args:
+            body: 响应内容（可能经过gzip压缩的 Response）
+            receive_time: 接收时间
+        """
+        data = self._inflater.inflate(body)
+        meta = scan_fields(data, RESPONSE_META_FIELDS)
+        self.polls += 1
+
+        cursor = meta.get(RESPONSE_FIELD_CURSOR)
+        if cursor:
+            self._cursor = bytes(cursor).decode('utf-8', 'replace')
+        internal_ext = meta.get(RESPONSE_FIELD_INTERNAL_EXT)
+        if internal_ext:
+            self._internal_ext = bytes(internal_ext).decode('utf-8', 'replace')
+        self.fetch_type = meta.get(RESPONSE_FIELD_FETCH_TYPE, 0)
+        push_server = meta.get(RESPONSE_FIELD_PUSH_SERVER)
+        if push_server:
+            self.push_server = bytes(push_server).decode('utf-8', 'replace')
+
+        fetch_interval = meta.get(RESPONSE_FIELD_FETCH_INTERVAL, 0)
+        if fetch_interval > 0:
+            self._server_interval = min(max(fetch_interval / 1000.0, MIN_FETCH_INTERVAL), MAX_FETCH_INTERVAL)
+
+        # 没有新消息时逐渐拉长间隔
+        if RESPONSE_FIELD_MESSAGES not in meta:
+            self.empty_polls += 1
+            self._idle_factor = min(self._idle_factor * IDLE_BACKOFF, MAX_IDLE_FACTOR)
+            return
+        self._idle_factor = 1.0
+
+        if self._decode_pool is not None:
+            # 与推送帧一样提交压缩的原始响应，由工作进程解压
+            self._decode_pool.submit(self._decode_room, body, receive_time)
+            return
+        if self._decoder is None:
+            self._decoder = MessageDecoder()
+        _, events = self._decoder.decode(data, receive_time)
+        for event in events:
+            self._on_message(event)
+
+    def _fetch_url(self) -> str:
+        """
+        生成本次轮询的URL
+
+        Returns:
+            str: URL
+        """
+        params = dict(self._params, room_id=self._room_id or '')
+        if self._cursor:
+            params['cursor'] = self._cursor
+        if self._internal_ext:
+            params['internal_ext'] = self._internal_ext
+        return f"{self._endpoint}?{urlencode(params)}"
+
+    def _notify_connection(self, connected: bool):
+        if self._on_connection_change:
+            self._on_connection_change(connected)
+
+    def _report_error(self, message: str):
+        if self._on_error:
+            self._on_error(message)
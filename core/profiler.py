@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiler
+性能分析
+
+运行时按需启动的采样CPU分析和tracemalloc内存快照。
+未启动时没有任何钩子或后台线程，对正常运行没有额外开销。
+
+CPU采样结果同时输出为:
+- .prof 文件（pstats格式，可用 snakeviz 打开）
+- .speedscope.json 文件（可用 speedscope 打开）
+"""
+
+import os
+import sys
+import json
+import time
+import marshal
+import signal
+import threading
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Optional, Dict, List, Tuple, Callable
+
+# 默认输出目录
+DEFAULT_PROFILE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiles'
+)
+
+# 函数标识: (文件名, 首行行号, 函数名)，与pstats保持一致
+FrameKey = Tuple[str, int, str]
+Stack = Tuple[FrameKey, ...]
+
+
+class SamplingProfiler:
+    """
+    采样CPU分析器
+
+    在独立线程中以固定间隔读取目标线程的调用栈，不修改目标线程，
+    因此可以在运行中对采集线程进行分析。
+    """
+
+    def __init__(self, interval: float = 0.005,
+                 thread_filter: Optional[Callable[[int], bool]] = None):
+        self._interval = interval
+        self._thread_filter = thread_filter
+        self._samples: Dict[int, Counter] = defaultdict(Counter)
+        self._thread_names: Dict[int, str] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_time = 0.0
+        self._duration = 0.0
+
+    @property
+    def interval(self) -> float:
+        """采样间隔（秒）"""
+        return self._interval
+
+    @property
+    def duration(self) -> float:
+        """采样持续时间（秒）"""
+        return self._duration
+
+    @property
+    def is_running(self) -> bool:
+        """是否正在采样"""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def samples(self) -> Dict[int, Counter]:
+        """按线程分组的调用栈采样计数"""
+        return self._samples
+
+    def thread_name(self, thread_id: int) -> str:
+        """
+        获取线程名称
+
+        Args:
+            thread_id: 线程ID
+
+        Returns:
+            str: 线程名称
+        """
+        return self._thread_names.get(thread_id, f"Thread-{thread_id}")
+
+    def start(self):
+        """
+        开始采样
+        """
+        if self.is_running:
+            return
+
+        self._samples = defaultdict(Counter)
+        self._thread_names = {}
+        self._stop_event.clear()
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        停止采样
+        """
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._duration = time.perf_counter() - self._start_time
+
+    def _run(self):
+        """
+        采样线程
+        """
+        own_id = threading.get_ident()
+        thread_filter = self._thread_filter
+        code_keys: Dict[object, FrameKey] = {}
+
+        while not self._stop_event.wait(self._interval):
+            for thread in threading.enumerate():
+                if thread.ident is not None and thread.ident not in self._thread_names:
+                    self._thread_names[thread.ident] = thread.name
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_filter is not None and not thread_filter(thread_id):
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    key = code_keys.get(code)
+                    if key is None:
+                        key = (code.co_filename, code.co_firstlineno, code.co_name)
+                        code_keys[code] = key
+                    stack.append(key)
+                    frame = frame.f_back
+
+                # 调用栈顺序: 从最外层到当前函数
+                stack.reverse()
+                self._samples[thread_id][tuple(stack)] += 1
+
+    def write_pstats(self, path: str):
+        """
+        输出pstats格式文件
+
+        根据采样估算各函数的自身耗时和累计耗时，调用次数记为采样次数
+
+        Args:
+            path: 输出文件路径
+        """
+        interval = self._interval
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        caller_counts: Dict[FrameKey, Counter] = defaultdict(Counter)
+
+        for stacks in self._samples.values():
+            for stack, count in stacks.items():
+                self_counts[stack[-1]] += count
+                for key in set(stack):
+                    total_counts[key] += count
+                for caller, callee in set(zip(stack, stack[1:])):
+                    caller_counts[callee][caller] += count
+
+        stats = {}
+        for key, total in total_counts.items():
+            callers = {
+                caller: (count, count, 0.0, count * interval)
+                for caller, count in caller_counts[key].items()
+            }
+            stats[key] = (total, total, self_counts[key] * interval, total * interval, callers)
+
+        with open(path, 'wb') as f:
+            marshal.dump(stats, f)
+
+    def write_speedscope(self, path: str):
+        """
+        输出speedscope格式文件，每个线程一个分析
+
+        Args:
+            path: 输出文件路径
+        """
+        frames: List[Dict[str, object]] = []
+        frame_index: Dict[FrameKey, int] = {}
+        profiles = []
+
+        for thread_id, stacks in self._samples.items():
+            samples = []
+            weights = []
+            for stack, count in stacks.items():
+                indices = []
+                for key in stack:
+                    index = frame_index.get(key)
+                    if index is None:
+                        index = len(frames)
+                        frame_index[key] = index
+                        frames.append({'name': key[2], 'file': key[0], 'line': key[1]})
+                    indices.append(index)
+                samples.append(indices)
+                weights.append(count * self._interval)
+
+            profiles.append({
+                'type': 'sampled',
+                'name': self.thread_name(thread_id),
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights
+            })
+
+        document = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': os.path.basename(path),
+            'exporter': 'TikTokVirtualStreamer',
+            'shared': {'frames': frames},
+            'profiles': profiles
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+
+
+class ProfilerController:
+    """
+    性能分析控制器
+
+    供菜单和信号处理使用，负责启动/停止分析并把结果写入带时间戳的文件
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR,
+                 thread_filter: Optional[Callable[[int], bool]] = None):
+        self._output_dir = output_dir
+        self._thread_filter = thread_filter
+        self._cpu_profiler: Optional[SamplingProfiler] = None
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def output_dir(self) -> str:
+        """输出目录"""
+        return self._output_dir
+
+    @property
+    def is_cpu_profiling(self) -> bool:
+        """是否正在进行CPU采样"""
+        return self._cpu_profiler is not None
+
+    @property
+    def is_memory_tracing(self) -> bool:
+        """是否正在追踪内存分配"""
+        return tracemalloc.is_tracing()
+
+    def set_thread_filter(self, thread_filter: Optional[Callable[[int], bool]]):
+        """
+        设置需要采样的线程，下次启动CPU采样时生效
+
+        Args:
+            thread_filter: 接收线程ID，返回是否采样
+        """
+        self._thread_filter = thread_filter
+
+    def start_cpu_profile(self, interval: float = 0.005):
+        """
+        开始CPU采样
+
+        Args:
+            interval: 采样间隔（秒）
+        """
+        if self._cpu_profiler:
+            return
+        self._cpu_profiler = SamplingProfiler(interval, self._thread_filter)
+        self._cpu_profiler.start()
+
+    def stop_cpu_profile(self) -> List[str]:
+        """
+        停止CPU采样并写入结果文件
+
+        Returns:
+            List[str]: 生成的文件路径
+        """
+        profiler = self._cpu_profiler
+        if profiler is None:
+            return []
+        self._cpu_profiler = None
+        profiler.stop()
+
+        base = self._output_path('cpu')
+        pstats_path = base + '.prof'
+        speedscope_path = base + '.speedscope.json'
+        profiler.write_pstats(pstats_path)
+        profiler.write_speedscope(speedscope_path)
+        return [pstats_path, speedscope_path]
+
+    def toggle_cpu_profile(self) -> List[str]:
+        """
+        切换CPU采样状态
+
+        Returns:
+            List[str]: 停止时生成的文件路径，开始时为空列表
+        """
+        if self._cpu_profiler:
+            return self.stop_cpu_profile()
+        self.start_cpu_profile()
+        return []
+
+    def take_memory_snapshot(self, top: int = 50) -> Optional[str]:
+        """
+        获取内存快照
+
+        首次调用时开始追踪并记录基线；之后每次调用保存快照，
+        并输出与上一次快照的差异
+
+        Args:
+            top: 差异报告中列出的条目数量
+
+        Returns:
+            Optional[str]: 差异报告路径，首次调用时返回None
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            self._last_snapshot = tracemalloc.take_snapshot()
+            return None
+
+        snapshot = tracemalloc.take_snapshot()
+        base = self._output_path('memory')
+        snapshot.dump(base + '.tracemalloc')
+
+        report_path = base + '.diff.txt'
+        previous = self._last_snapshot
+        with open(report_path, 'w', encoding='utf-8') as f:
+            current, peak = tracemalloc.get_traced_memory()
+            f.write(f"当前追踪内存: {current / 1024 / 1024:.2f} MiB, 峰值: {peak / 1024 / 1024:.2f} MiB\n\n")
+            if previous is not None:
+                f.write(f"与上一次快照的差异（前 {top} 项）:\n")
+                for stat in snapshot.compare_to(previous, 'lineno')[:top]:
+                    f.write(f"{stat}\n")
+                f.write("\n")
+            f.write(f"当前分配最多的位置（前 {top} 项）:\n")
+            for stat in snapshot.statistics('lineno')[:top]:
+                f.write(f"{stat}\n")
+
+        self._last_snapshot = snapshot
+        return report_path
+
+    def stop_memory_tracing(self):
+        """
+        停止内存追踪，释放追踪开销
+        """
+        self._last_snapshot = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _output_path(self, kind: str) -> str:
+        """
+        生成带时间戳的输出文件路径（不含扩展名）
+
+        Args:
+            kind: 分析类型
+
+        Returns:
+            str: 文件路径
+        """
+        os.makedirs(self._output_dir, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self._output_dir, f"{kind}-{timestamp}-{os.getpid()}")
+
+
+def install_signal_handlers(controller: ProfilerController,
+                            on_result: Optional[Callable[[str], None]] = None) -> bool:
+    """
+    安装用于无界面环境的信号处理器（仅POSIX）
+
+    - SIGUSR1: 开始/停止CPU采样
+    - SIGUSR2: 获取内存快照
+
+    Args:
+        controller: 性能分析控制器
+        on_result: 结果回调，接收描述文本
+
+    Returns:
+        bool: 是否安装成功
+    """
+    if not hasattr(signal, 'SIGUSR1'):
+        return False
+
+    report = on_result or (lambda text: print(text))
+
+    def handle_cpu(signum, frame):
+        paths = controller.toggle_cpu_profile()
+        if paths:
+            report(f"CPU采样已保存: {', '.join(paths)}")
+        else:
+            report("CPU采样已开始")
+
+    def handle_memory(signum, frame):
+        path = controller.take_memory_snapshot()
+        if path:
+            report(f"内存快照差异已保存: {path}")
+        else:
+            report("内存追踪已开始，再次发送信号获取快照差异")
+
+    signal.signal(signal.SIGUSR1, handle_cpu)
+    signal.signal(signal.SIGUSR2, handle_memory)
+    return True
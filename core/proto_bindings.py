@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protobuf Bindings
+protobuf 绑定的生成与缓存
+
+仓库中只保存 protobuf/douyin.proto。本模块用 betterproto 的 protoc 插件生成 Python 绑定，
+并按内容寻址缓存:
+
+- 缓存目录按 proto 文件内容和 betterproto 版本的摘要命名（cache/protobuf/<摘要>/douyin.py），
+  修改 proto 或升级 betterproto 后摘要改变，下一次加载时自动重新生成
+- 生成后立即编译为字节码，之后的加载不需要再解析源码
+- 先生成到临时目录再改名，多个进程（解码工作进程）同时生成时不会读到不完整的文件
+
+生成需要 grpcio-tools 或 protoc，以及 betterproto[compiler]；都不可用时
+回退到手动生成的 protobuf/douyin.py（如果存在）。
+
+构建: python -m core.proto_bindings [--force]
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import py_compile
+import subprocess
+import importlib
+import importlib.util
+from types import ModuleType
+from typing import Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# proto 文件
+DEFAULT_PROTO_FILE = os.path.join(ROOT_DIR, 'protobuf', 'douyin.proto')
+
+# 生成绑定的缓存目录
+DEFAULT_CACHE_DIR = os.path.join(ROOT_DIR, 'cache', 'protobuf')
+
+# 绑定的模块名（手动生成的 protobuf/douyin.py 使用同一名称）
+BINDINGS_MODULE = 'protobuf.douyin'
+
+# 生成的文件名
+BINDINGS_FILE = 'douyin.py'
+
+# 保留的旧版本缓存数（切换分支时不必重新生成）
+KEEP_CACHED_VERSIONS = 3
+
+# 摘要长度（十六进制字符）
+DIGEST_LENGTH = 16
+
+
+class BindingsError(Exception):
+    """
+    生成或加载绑定失败
+    """
+
+
+def generator_version() -> str:
+    """
+    betterproto 的版本，计入缓存摘要
+
+    Returns:
+        str: 版本号，未安装时为空字符串
+    """
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return ''
+    try:
+        return version('betterproto')
+    except PackageNotFoundError:
+        return ''
+
+
+def proto_digest(proto_file: str = DEFAULT_PROTO_FILE) -> str:
+    """
+    计算 proto 文件内容与生成器版本的摘要
+
+    Args:
+        proto_file: proto 文件路径
+
+    Returns:
+        str: 摘要（十六进制）
+    """
+    digest = hashlib.sha256()
+    with open(proto_file, 'rb') as f:
+        digest.update(f.read())
+    digest.update(b'\0' + generator_version().encode('utf-8'))
+    return digest.hexdigest()[:DIGEST_LENGTH]
+
+
+def _protoc_command(proto_file: str, output_dir: str) -> List[str]:
+    """
+    生成 protoc 命令，优先使用 grpcio-tools 自带的 protoc
+
+    Args:
+        proto_file: proto 文件路径
+        output_dir: 输出目录
+
+    Returns:
+        List[str]: 命令
+
+    Raises:
+        BindingsError: 找不到 protoc
+    """
+    arguments = [f"-I{os.path.dirname(proto_file)}", f"--python_betterproto_out={output_dir}",
+                 os.path.basename(proto_file)]
+    if importlib.util.find_spec('grpc_tools') is not None:
+        return [sys.executable, '-m', 'grpc_tools.protoc'] + arguments
+    protoc = shutil.which('protoc')
+    if protoc is not None:
+        return [protoc] + arguments
+    raise BindingsError("找不到 protoc，请运行 pip install grpcio-tools \"betterproto[compiler]\"")
+
+
+def generate_bindings(proto_file: str = DEFAULT_PROTO_FILE, cache_dir: str = DEFAULT_CACHE_DIR,
+                      force: bool = False) -> str:
+    """
+    生成绑定并编译为字节码，已缓存时直接返回
+
+    Args:
+        proto_file: proto 文件路径
+        cache_dir: 缓存目录
+        force: 是否忽略缓存重新生成
+
+    Returns:
+        str: 生成的模块文件路径
+
+    Raises:
+        BindingsError: 生成失败
+    """
+    digest = proto_digest(proto_file)
+    target_dir = os.path.join(cache_dir, digest)
+    target_file = os.path.join(target_dir, BINDINGS_FILE)
+    if os.path.exists(target_file) and not force:
+        return target_file
+
+    os.makedirs(cache_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=f".{digest}-", dir=cache_dir)
+    try:
+        output_dir = os.path.join(work_dir, 'out')
+        os.makedirs(output_dir)
+        result = subprocess.run(_protoc_command(proto_file, output_dir), capture_output=True, text=True)
+        if result.returncode != 0:
+            raise BindingsError(f"生成 protobuf 绑定失败: {result.stderr.strip() or result.stdout.strip()}")
+
+        # betterproto 按 proto 的 package 生成 douyin/__init__.py（旧版本生成 douyin.py）
+        package = os.path.splitext(BINDINGS_FILE)[0]
+        for candidate in (os.path.join(output_dir, package, '__init__.py'),
+                          os.path.join(output_dir, BINDINGS_FILE)):
+            if os.path.exists(candidate):
+                break
+        else:
+            raise BindingsError(f"protoc 没有生成 {package} 模块")
+
+        staged_dir = os.path.join(work_dir, digest)
+        os.makedirs(staged_dir)
+        staged_file = os.path.join(staged_dir, BINDINGS_FILE)
+        shutil.copyfile(candidate, staged_file)
+        py_compile.compile(staged_file, doraise=True)
+
+        if force and os.path.exists(target_dir):
+            shutil.rmtree(target_dir, ignore_errors=True)
+        try:
+            os.rename(staged_dir, target_dir)
+        except OSError:
+            # 其他进程已经生成了同一版本
+            if not os.path.exists(target_file):
+                raise
+    except (OSError, py_compile.PyCompileError) as e:
+        raise BindingsError(f"生成 protobuf 绑定失败: {str(e)}") from e
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    _prune_cache(cache_dir, digest)
+    return target_file
+
+
+def _prune_cache(cache_dir: str, current: str):
+    """
+    删除较旧的缓存版本
+
+    Args:
+        cache_dir: 缓存目录
+        current: 当前版本的摘要
+    """
+    try:
+        entries = [entry for entry in os.scandir(cache_dir)
+                   if entry.is_dir() and not entry.name.startswith('.') and entry.name != current]
+    except OSError:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[KEEP_CACHED_VERSIONS - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _has_fallback() -> bool:
+    """是否有手动生成的 protobuf/douyin.py"""
+    try:
+        return importlib.util.find_spec(BINDINGS_MODULE) is not None
+    except ImportError:
+        return False
+
+
+# 已加载的绑定: 摘要 -> 模块
+_loaded: Dict[str, ModuleType] = {}
+_load_lock = threading.Lock()
+
+
+def load_bindings(proto_file: str = DEFAULT_PROTO_FILE, cache_dir: str = DEFAULT_CACHE_DIR) -> ModuleType:
+    """
+    加载与 proto 文件内容一致的绑定，缓存中没有时先生成
+
+    无法生成时回退到 protobuf/douyin.py
+
+    Args:
+        proto_file: proto 文件路径
+        cache_dir: 缓存目录
+
+    Returns:
+        ModuleType: 绑定模块
+
+    Raises:
+        BindingsError: 无法生成，也没有可用的 protobuf/douyin.py
+    """
+    digest = proto_digest(proto_file)
+    with _load_lock:
+        module = _loaded.get(digest)
+        if module is not None:
+            return module
+
+        try:
+            path = generate_bindings(proto_file, cache_dir)
+        except BindingsError as e:
+            if not _has_fallback():
+                raise
+            # 没有生成工具时使用手动生成的绑定（可能与 proto 不一致）
+            sys.stderr.write(f"{e}，使用 {BINDINGS_MODULE}\n")
+            module = importlib.import_module(BINDINGS_MODULE)
+        else:
+            spec = importlib.util.spec_from_file_location(BINDINGS_MODULE, path)
+            module = importlib.util.module_from_spec(spec)
+            # betterproto 通过 sys.modules 解析字段类型，执行前先注册
+            sys.modules[BINDINGS_MODULE] = module
+            try:
+                spec.loader.exec_module(module)
+            except Exception as e:
+                sys.modules.pop(BINDINGS_MODULE, None)
+                raise BindingsError(f"加载 protobuf 绑定失败: {str(e)}") from e
+
+        _loaded[digest] = module
+        return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 protobuf 绑定")
+    parser.add_argument('--proto', default=DEFAULT_PROTO_FILE, help="proto 文件")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="缓存目录")
+    parser.add_argument('--force', action='store_true', help="忽略缓存重新生成")
+    args = parser.parse_args()
+
+    try:
+        path = generate_bindings(args.proto, args.cache_dir, args.force)
+    except BindingsError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(f"protobuf 绑定: {path}（摘要 {proto_digest(args.proto)}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reconnect
+断线重连
+
+带随机抖动的指数退避，以及基于 Response.cursor / internalExt 的断点续传状态。
+"""
+
+import time
+import random
+from typing import Optional, Dict, Any
+
+
+class ExponentialBackoff:
+    """
+    带随机抖动的指数退避
+
+    第n次重试的等待时间在 [0, min(max_delay, base_delay * multiplier^n)] 内均匀随机（full jitter），
+    避免大量客户端在同一时刻重连
+    """
+
+    def __init__(self, base_delay: float = 0.5, max_delay: float = 30.0,
+                 multiplier: float = 2.0, max_attempts: Optional[int] = None,
+                 rng: Optional[random.Random] = None):
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._multiplier = multiplier
+        self._max_attempts = max_attempts
+        self._rng = rng or random.Random()
+        self._attempts = 0
+
+    @property
+    def attempts(self) -> int:
+        """已重试次数"""
+        return self._attempts
+
+    @property
+    def exhausted(self) -> bool:
+        """是否已达到最大重试次数"""
+        return self._max_attempts is not None and self._attempts >= self._max_attempts
+
+    def next_delay(self) -> float:
+        """
+        计算下一次重试前的等待时间，并增加重试计数
+
+        Returns:
+            float: 等待时间（秒）
+        """
+        ceiling = min(self._max_delay, self._base_delay * (self._multiplier ** self._attempts))
+        self._attempts += 1
+        return self._rng.uniform(0, ceiling)
+
+    def reset(self):
+        """
+        连接成功后重置重试计数
+        """
+        self._attempts = 0
+
+
+class ResumeCursor:
+    """
+    断点续传状态
+
+    记录最近一次 Response 的 cursor 和 internalExt，重连时交给获取器，
+    服务器会从该位置补发断线期间的消息
+    """
+
+    def __init__(self):
+        self.cursor: Optional[str] = None
+        self.internal_ext: Optional[str] = None
+        self.server_time: Optional[float] = None
+
+    @property
+    def available(self) -> bool:
+        """是否有可用的续传位置"""
+        return bool(self.cursor)
+
+    def update(self, message_data: Dict[str, Any]):
+        """
+        根据消息中携带的 Response 字段更新续传位置
+
+        Args:
+            message_data: 消息数据，获取器在其中附带 cursor / internal_ext
+        """
+        cursor = message_data.get('cursor')
+        if cursor:
+            self.cursor = cursor
+            internal_ext = message_data.get('internal_ext')
+            if internal_ext:
+                self.internal_ext = internal_ext
+            server_time = message_data.get('server_time')
+            if server_time:
+                self.server_time = server_time
+
+    def to_params(self) -> Dict[str, str]:
+        """
+        生成重连请求使用的参数
+
+        Returns:
+            Dict[str, str]: 连接参数，没有续传位置时为空
+        """
+        if not self.cursor:
+            return {}
+        params = {'cursor': self.cursor}
+        if self.internal_ext:
+            params['internal_ext'] = self.internal_ext
+        return params
+
+    def clear(self):
+        """
+        清空续传位置
+        """
+        self.cursor = None
+        self.internal_ext = None
+        self.server_time = None
+
+
+class ReconnectTracker:
+    """
+    重连过程统计
+
+    记录断线时间、恢复耗时和断线期间补发的消息数量
+    """
+
+    def __init__(self):
+        self.disconnected_at: Optional[float] = None
+        self.last_recovery_time: Optional[float] = None
+        self.recovered_messages = 0
+        self._last_gap: Optional[tuple] = None
+
+    @property
+    def in_gap(self) -> bool:
+        """是否处于断线状态"""
+        return self.disconnected_at is not None
+
+    def on_disconnected(self):
+        """
+        记录断线
+        """
+        if self.disconnected_at is None:
+            self.disconnected_at = time.time()
+
+    def on_reconnected(self) -> Optional[float]:
+        """
+        记录重连成功
+
+        Returns:
+            Optional[float]: 从断线到恢复的耗时（秒）
+        """
+        if self.disconnected_at is None:
+            return None
+        now = time.time()
+        self.last_recovery_time = now - self.disconnected_at
+        self._last_gap = (self.disconnected_at, now)
+        self.disconnected_at = None
+        return self.last_recovery_time
+
+    def is_recovered_message(self, message_data: Dict[str, Any]) -> bool:
+        """
+        判断消息是否为断线期间产生、重连后补发的消息
+
+        Args:
+            message_data: 消息数据
+
+        Returns:
+            bool: 是否为补发消息
+        """
+        gap = self._last_gap
+        if gap is None:
+            return False
+        server_time = message_data.get('server_time')
+        if server_time is None or not gap[0] <= server_time < gap[1]:
+            return False
+        self.recovered_messages += 1
+        return True
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Request Scheduler
+对外请求调度
+
+请求过于频繁会导致IP被限流。同时监控多个直播间时，启动阶段的直播间页面、轮询和
+图片下载会同时涌向同一批主机。所有对外HTTP请求都经过本模块的全局调度器:
+
+- 按主机的令牌桶限速，收到429时按 Retry-After 暂停该主机的全部请求
+- 优先级: 建立连接（直播间页面、签名）先于轮询，轮询先于图片；同一主机上高优先级的请求先拿到令牌
+- 相同的并发请求合并为一次，结果返回给所有调用方
+- 重试预算: 成功的请求按比例积累重试额度，429、超时和5xx只在有额度时重试，
+  避免服务器出问题时重试把流量放大
+
+429、超时和失败次数按主机导出为指标。
+"""
+
+import time
+import heapq
+import itertools
+import threading
+from urllib.parse import urlsplit
+from typing import Optional, Dict, Any, List, Tuple
+
+from .http_pool import HTTPConnectionPool, HTTPError, DEFAULT_MAX_SIZE
+from .metrics import Histogram, default_registry
+
+# 请求优先级（数值越小越优先）
+PRIORITY_CONNECT = 0
+PRIORITY_POLL = 1
+PRIORITY_ASSET = 2
+
+# 每个主机默认的速率（请求/秒）和突发容量
+DEFAULT_HOST_RATE = 5.0
+DEFAULT_HOST_BURST = 10
+
+# 每个主机同时保留的空闲连接数
+DEFAULT_CONNECTIONS_PER_HOST = 4
+
+# 每次成功请求积累的重试额度，以及额度上限
+DEFAULT_RETRY_RATIO = 0.2
+MAX_RETRY_BUDGET = 10.0
+
+# 单个请求最多重试的次数
+DEFAULT_MAX_RETRIES = 2
+
+# 收到429但没有 Retry-After 时暂停该主机的时间（秒）
+DEFAULT_THROTTLE_PAUSE = 5.0
+
+# 可以重试的状态码（超时也可以重试）
+RETRYABLE_STATUS = frozenset((429, 500, 502, 503, 504))
+
+# 排队等待时间分桶（秒）
+QUEUE_WAIT_BUCKETS: Tuple[float, ...] = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    每秒补充 rate 个令牌，最多积累 burst 个；pause() 之后到指定时间之前不发放令牌
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+        self.paused_until = 0.0
+
+    def delay(self, now: float) -> float:
+        """
+        距离下一个可用令牌的时间
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            float: 等待时间（秒），0表示现在就有令牌
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def consume(self):
+        """
+        取走一个令牌（调用前 delay() 应返回0）
+        """
+        self.tokens -= 1.0
+
+    def pause(self, until: float):
+        """
+        暂停发放令牌，并清空积累的令牌
+
+        Args:
+            until: 恢复时间
+        """
+        self.paused_until = max(self.paused_until, until)
+        self.tokens = 0.0
+
+
+class HostState:
+    """
+    单个主机的令牌桶、等待队列和计数
+    """
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.bucket = TokenBucket(rate, burst, now)
+        # 等待令牌的请求: (优先级, 序号)
+        self.waiting: List[Tuple[int, int]] = []
+
+        # 统计
+        self.requests = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.errors = 0
+
+
+class _PendingCall:
+    """
+    进行中的请求，合并的调用方等待同一个结果
+    """
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[bytes] = None
+        self.error: Optional[HTTPError] = None
+        self.waiters = 0
+
+
+class RequestScheduler:
+    """
+    全局对外请求调度器
+
+    get() 与 HTTPConnectionPool.get() 用法相同，多了优先级参数；在调用线程中阻塞到请求完成
+    """
+
+    def __init__(self, pool: Optional[HTTPConnectionPool] = None,
+                 rate: float = DEFAULT_HOST_RATE, burst: int = DEFAULT_HOST_BURST,
+                 host_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 retry_ratio: float = DEFAULT_RETRY_RATIO,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 clock=time.monotonic):
+        self._pool = pool if pool is not None else HTTPConnectionPool(DEFAULT_CONNECTIONS_PER_HOST)
+        self._rate = rate
+        self._burst = burst
+        self._host_limits = dict(host_limits or {})
+        self._retry_ratio = retry_ratio
+        self._max_retries = max_retries
+        self._clock = clock
+
+        self._condition = threading.Condition()
+        self._hosts: Dict[str, HostState] = {}
+        self._sequence = itertools.count()
+        self._inflight: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], _PendingCall] = {}
+        self._retry_budget = MAX_RETRY_BUDGET
+
+        # 统计
+        self.coalesced = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.queue_wait = Histogram(QUEUE_WAIT_BUCKETS)
+
+    @property
+    def pool(self) -> HTTPConnectionPool:
+        """底层连接池"""
+        return self._pool
+
+    def set_host_limit(self, host: str, rate: float, burst: int):
+        """
+        设置某个主机的速率
+
+        Args:
+            host: 主机名
+            rate: 速率（请求/秒）
+            burst: 突发容量
+        """
+        with self._condition:
+            self._host_limits[host] = (rate, burst)
+            state = self._hosts.get(host)
+            if state is not None:
+                state.bucket.rate = rate
+                state.bucket.burst = burst
+
+    def get(self, url: str, priority: int = PRIORITY_ASSET, max_size: int = DEFAULT_MAX_SIZE,
+            headers: Optional[Dict[str, str]] = None) -> bytes:
+        """
+        发送GET请求
+
+        Args:
+            url: URL
+            priority: 优先级（PRIORITY_CONNECT / PRIORITY_POLL / PRIORITY_ASSET）
+            max_size: 最大字节数
+            headers: 额外的请求头
+
+        Returns:
+            bytes: 响应内容
+
+        Raises:
+            HTTPError: 请求失败（重试后仍失败）
+        """
+        key = (url, tuple(sorted(headers.items())) if headers else ())
+        with self._condition:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _PendingCall()
+                self._inflight[key] = call
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        if not leader:
+            # 相同的请求正在进行，等待它的结果
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._execute(url, priority, max_size, headers)
+            return call.result
+        except HTTPError as e:
+            call.error = e
+            raise
+        finally:
+            with self._condition:
+                self._inflight.pop(key, None)
+            if call.result is None and call.error is None:
+                # 请求因其他异常中断，等待的调用方也按失败处理
+                call.error = HTTPError("请求中断")
+            call.done.set()
+
+    def close(self):
+        """
+        关闭空闲连接
+        """
+        self._pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取调度统计
+
+        Returns:
+            Dict[str, Any]: 统计信息，hosts 为按主机的计数
+        """
+        with self._condition:
+            hosts = {
+                host: {
+                    'requests': state.requests,
+                    'throttled': state.throttled,
+                    'timeouts': state.timeouts,
+                    'errors': state.errors,
+                    'waiting': len(state.waiting),
+                }
+                for host, state in self._hosts.items()
+            }
+            return {
+                'hosts': hosts,
+                'coalesced': self.coalesced,
+                'retries': self.retries,
+                'retries_denied': self.retries_denied,
+                'retry_budget': self._retry_budget,
+                'inflight': len(self._inflight),
+                'connections_created': self._pool.connections_created,
+                'connections_reused': self._pool.connections_reused,
+            }
+
+    def collect(self):
+        """
+        生成指标族，供 MetricsRegistry 使用
+
+        Returns:
+            Iterable: 指标族列表
+        """
+        stats = self.stats()
+        hosts = stats['hosts']
+        yield ('tvs_http_requests_total', 'counter', "对外HTTP请求数（含重试）",
+               [({'host': host}, counts['requests']) for host, counts in hosts.items()])
+        yield ('tvs_http_throttled_total', 'counter', "收到429的次数",
+               [({'host': host}, counts['throttled']) for host, counts in hosts.items()])
+        yield ('tvs_http_timeouts_total', 'counter', "请求超时次数",
+               [({'host': host}, counts['timeouts']) for host, counts in hosts.items()])
+        yield ('tvs_http_errors_total', 'counter', "请求失败次数（含429和超时）",
+               [({'host': host}, counts['errors']) for host, counts in hosts.items()])
+        yield ('tvs_http_queue_depth', 'gauge', "等待令牌的请求数",
+               [({'host': host}, counts['waiting']) for host, counts in hosts.items()])
+        yield ('tvs_http_coalesced_total', 'counter', "与进行中的相同请求合并的次数",
+               [({}, stats['coalesced'])])
+        yield ('tvs_http_retries_total', 'counter', "重试次数", [({}, stats['retries'])])
+        yield ('tvs_http_retries_denied_total', 'counter', "重试预算不足而放弃的重试次数",
+               [({}, stats['retries_denied'])])
+        yield ('tvs_http_queue_wait_seconds', 'histogram', "请求等待令牌的时间",
+               self.queue_wait.samples({}))
+        yield ('tvs_http_connections_total', 'counter', "HTTP连接数",
+               [({'reused': 'false'}, stats['connections_created']),
+                ({'reused': 'true'}, stats['connections_reused'])])
+
+    def _execute(self, url: str, priority: int, max_size: int,
+                 headers: Optional[Dict[str, str]]) -> bytes:
+        """
+        取得令牌后发送请求，按重试预算重试
+
+        Returns:
+            bytes: 响应内容
+        """
+        host = urlsplit(url).hostname or ''
+        attempt = 0
+        while True:
+            state = self._acquire(host, priority)
+            try:
+                body = self._pool.get(url, max_size, headers)
+            except HTTPError as e:
+                if not self._record_failure(state, e) or attempt >= self._max_retries:
+                    raise
+                with self._condition:
+                    if self._retry_budget < 1.0:
+                        self.retries_denied += 1
+                        raise
+                    self._retry_budget -= 1.0
+                    self.retries += 1
+                attempt += 1
+                continue
+
+            with self._condition:
+                self._retry_budget = min(MAX_RETRY_BUDGET, self._retry_budget + self._retry_ratio)
+            return body
+
+    def _acquire(self, host: str, priority: int) -> HostState:
+        """
+        等待主机的令牌；同一主机上优先级高的请求先拿到
+
+        Args:
+            host: 主机名
+            priority: 优先级
+
+        Returns:
+            HostState: 主机状态
+        """
+        started = self._clock()
+        with self._condition:
+            state = self._hosts.get(host)
+            if state is None:
+                rate, burst = self._host_limits.get(host, (self._rate, self._burst))
+                state = HostState(rate, burst, started)
+                self._hosts[host] = state
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(state.waiting, ticket)
+            while True:
+                if state.waiting[0] == ticket:
+                    delay = state.bucket.delay(self._clock())
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+                else:
+                    self._condition.wait()
+            heapq.heappop(state.waiting)
+            state.bucket.consume()
+            state.requests += 1
+            # 让下一个排队的请求检查令牌
+            self._condition.notify_all()
+        self.queue_wait.observe(self._clock() - started)
+        return state
+
+    def _record_failure(self, state: HostState, error: HTTPError) -> bool:
+        """
+        记录失败，429时暂停该主机
+
+        Args:
+            state: 主机状态
+            error: 错误
+
+        Returns:
+            bool: 是否可以重试
+        """
+        with self._condition:
+            state.errors += 1
+            if error.timed_out:
+                state.timeouts += 1
+                return True
+            if error.status == 429:
+                state.throttled += 1
+                pause = error.retry_after if error.retry_after is not None else DEFAULT_THROTTLE_PAUSE
+                state.bucket.pause(self._clock() + pause)
+                self._condition.notify_all()
+            return error.status in RETRYABLE_STATUS
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler() -> RequestScheduler:
+    """
+    获取进程内共享的请求调度器，第一次调用时创建并注册到指标注册表
+
+    Returns:
+        RequestScheduler: 请求调度器
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+            default_registry.register(_scheduler)
+        return _scheduler
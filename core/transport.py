@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transport
+传输方式选择
+
+在WebSocket推送和HTTP轮询（polling_fetcher.py）之间自动切换:
+
+- 默认使用WebSocket；连续几次连不上，或连接总是很快被断开（网络限速或屏蔽），改用轮询
+- 轮询期间每隔一段时间试探一次WebSocket，成功则切回；试探失败立即回到轮询
+- 轮询同样连续失败时换回WebSocket，两种方式交替重试
+
+切换时从续传位置继续，新旧获取器重叠送达的消息由 msgId 去重过滤。
+"""
+
+import time
+from typing import Optional, Dict
+
+# 传输方式
+TRANSPORT_AUTO = 'auto'
+TRANSPORT_WEBSOCKET = 'websocket'
+TRANSPORT_POLLING = 'polling'
+TRANSPORT_MODES = (TRANSPORT_AUTO, TRANSPORT_WEBSOCKET, TRANSPORT_POLLING)
+
+# 连续失败该次数后切换传输方式
+DEFAULT_FAILURE_LIMIT = 2
+
+# 连接存活时间短于该值（秒）后断开，视为一次失败
+MIN_HEALTHY_CONNECTION = 30.0
+
+# 轮询期间试探WebSocket的间隔（秒）
+DEFAULT_PROBE_INTERVAL = 300.0
+
+
+class TransportSelector:
+    """
+    传输方式选择器
+
+    管理器在创建获取器前读取 current，在连接成功/断开时调用 on_connected() / on_disconnected()，
+    并在监控循环中调用 should_probe() 判断是否需要试探WebSocket
+    """
+
+    def __init__(self, mode: str = TRANSPORT_AUTO,
+                 failure_limit: int = DEFAULT_FAILURE_LIMIT,
+                 probe_interval: float = DEFAULT_PROBE_INTERVAL,
+                 clock=time.monotonic):
+        if mode not in TRANSPORT_MODES:
+            raise ValueError(f"未知的传输方式: {mode}")
+        self._mode = mode
+        self._failure_limit = failure_limit
+        self._probe_interval = probe_interval
+        self._clock = clock
+
+        self._current = TRANSPORT_POLLING if mode == TRANSPORT_POLLING else TRANSPORT_WEBSOCKET
+        self._failures = 0
+        self._connected_at: Optional[float] = None
+        self._fallback_at: Optional[float] = None
+
+        # 统计
+        self.switches = 0
+
+    @property
+    def mode(self) -> str:
+        """配置的传输方式"""
+        return self._mode
+
+    @property
+    def current(self) -> str:
+        """当前使用的传输方式"""
+        return self._current
+
+    def on_connected(self):
+        """
+        记录连接成功
+        """
+        self._connected_at = self._clock()
+
+    def on_disconnected(self) -> bool:
+        """
+        记录连接断开（或连接失败）
+
+        Returns:
+            bool: 是否切换了传输方式
+        """
+        now = self._clock()
+        connected_at, self._connected_at = self._connected_at, None
+        if connected_at is not None and now - connected_at >= MIN_HEALTHY_CONNECTION:
+            self._failures = 0
+            return False
+
+        self._failures += 1
+        if self._mode != TRANSPORT_AUTO or self._failures < self._failure_limit:
+            return False
+
+        if self._current == TRANSPORT_WEBSOCKET:
+            self._switch(TRANSPORT_POLLING)
+            self._fallback_at = now
+        else:
+            self._switch(TRANSPORT_WEBSOCKET)
+        return True
+
+    def should_probe(self) -> bool:
+        """
+        判断是否到了试探WebSocket的时间，是则切换到WebSocket
+
+        试探时失败计数只差一次达到上限，WebSocket仍不可用时立即回到轮询
+
+        Returns:
+            bool: 是否需要用WebSocket重新连接
+        """
+        if (self._mode != TRANSPORT_AUTO or self._current != TRANSPORT_POLLING
+                or self._fallback_at is None
+                or self._clock() - self._fallback_at < self._probe_interval):
+            return False
+        self._switch(TRANSPORT_WEBSOCKET)
+        self._failures = self._failure_limit - 1
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        """
+        获取选择器状态
+
+        Returns:
+            Dict[str, object]: 状态信息
+        """
+        return {
+            'mode': self._mode,
+            'current': self._current,
+            'failures': self._failures,
+            'switches': self.switches
+        }
+
+    def _switch(self, transport: str):
+        self._current = transport
+        self._failures = 0
+        self._connected_at = None
+        self.switches += 1
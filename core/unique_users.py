@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unique Users
+独立用户估计
+
+进场消息数（enter_messages）统计的是进场次数而不是人数，反复进出的用户会被计算多次。
+本模块用 HyperLogLog 估计一段时间内的独立用户数:
+
+- 独立观众: 进场消息和所有带用户ID的互动消息（聊天、礼物、点赞、关注等）
+- 独立发言: 聊天和表情消息
+
+每种统计按最近1分钟、最近10分钟和整场三个窗口输出。滑动窗口由若干时间桶组成，
+每个桶是一个 HyperLogLog，过期的桶整体丢弃；寄存器可以按位取最大值合并，
+多个直播间的总人数由各房间的寄存器合并得到，不需要保存用户集合。
+"""
+
+import math
+import time
+import hashlib
+import threading
+import weakref
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+
+from models.message_types import MessageType
+
+# 默认精度（寄存器数 = 2 ** precision，标准误差约 1.04 / sqrt(寄存器数)，12 时约 1.6%）
+DEFAULT_PRECISION = 12
+
+# 计为发言的消息类型
+CHATTER_MESSAGE_TYPES = (MessageType.CHAT, MessageType.EMOJI)
+
+# 滑动窗口: (名称, 窗口长度（秒）, 桶数)
+# 窗口实际覆盖的时间在 窗口长度 - 桶长度 到 窗口长度 之间
+WINDOWS: Tuple[Tuple[str, float, int], ...] = (
+    ('1m', 60.0, 6),
+    ('10m', 600.0, 10),
+)
+
+# 整场统计的窗口名称
+SESSION_WINDOW = 'session'
+
+_HASH_BITS = 64
+
+
+def _hash_user(user_id: Any) -> int:
+    """
+    计算用户ID的64位哈希（跨进程稳定，不受 PYTHONHASHSEED 影响，便于合并不同进程的寄存器）
+
+    Args:
+        user_id: 用户ID
+
+    Returns:
+        int: 哈希值
+    """
+    digest = hashlib.blake2b(str(user_id).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class HyperLogLog:
+    """
+    HyperLogLog 基数估计
+
+    每个寄存器一个字节，精度为12时占用4 KiB
+    """
+
+    __slots__ = ('_precision', '_registers')
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"精度必须在4到18之间: {precision}")
+        self._precision = precision
+        size = 1 << precision
+        if registers is None:
+            self._registers = bytearray(size)
+        elif len(registers) != size:
+            raise ValueError(f"寄存器长度 {len(registers)} 与精度 {precision} 不匹配")
+        else:
+            self._registers = bytearray(registers)
+
+    @property
+    def precision(self) -> int:
+        """精度"""
+        return self._precision
+
+    def position(self, user_id: Any) -> Tuple[int, int]:
+        """
+        计算用户对应的寄存器下标和秩（同一用户写入多个寄存器组时只需计算一次）
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            Tuple[int, int]: (下标, 秩)
+        """
+        value = _hash_user(user_id)
+        remaining = _HASH_BITS - self._precision
+        index = value >> remaining
+        rank = remaining - (value & ((1 << remaining) - 1)).bit_length() + 1
+        return index, rank
+
+    def add_position(self, index: int, rank: int):
+        """
+        按 position() 的结果更新寄存器
+
+        Args:
+            index: 寄存器下标
+            rank: 秩
+        """
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def add(self, user_id: Any):
+        """
+        加入一个用户
+
+        Args:
+            user_id: 用户ID
+        """
+        self.add_position(*self.position(user_id))
+
+    def merge(self, other: 'HyperLogLog'):
+        """
+        合并另一个估计器（寄存器逐个取最大值）
+
+        Args:
+            other: 精度相同的估计器
+        """
+        if other._precision != self._precision:
+            raise ValueError(f"精度不同，无法合并: {self._precision} != {other._precision}")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def copy(self) -> 'HyperLogLog':
+        """
+        复制估计器
+
+        Returns:
+            HyperLogLog: 副本
+        """
+        return HyperLogLog(self._precision, self._registers)
+
+    def clear(self):
+        """
+        清空寄存器
+        """
+        self._registers = bytearray(len(self._registers))
+
+    def estimate(self) -> int:
+        """
+        估计独立用户数
+
+        Returns:
+            int: 估计值
+        """
+        registers = self._registers
+        size = len(registers)
+        zeros = registers.count(0)
+        if zeros == size:
+            return 0
+
+        # 寄存器取值范围很小，按取值分组求和比逐个求和快
+        total = float(zeros)
+        for rank in range(1, max(registers) + 1):
+            count = registers.count(rank)
+            if count:
+                total += count * 2.0 ** -rank
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / total
+
+        # 小基数时用线性计数修正
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        """
+        导出寄存器（第一个字节为精度），可跨进程传输后合并
+
+        Returns:
+            bytes: 序列化结果
+        """
+        return bytes((self._precision,)) + bytes(self._registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        """
+        从 to_bytes() 的结果恢复估计器
+
+        Args:
+            data: 序列化结果
+
+        Returns:
+            HyperLogLog: 估计器
+        """
+        if not data:
+            raise ValueError("数据为空")
+        return cls(data[0], data[1:])
+
+
+class WindowedHyperLogLog:
+    """
+    滑动窗口的 HyperLogLog
+
+    窗口由 buckets 个时间桶组成；已结束的桶合并结果会被缓存，
+    查询时只需再合并当前桶
+    """
+
+    def __init__(self, window: float, buckets: int, precision: int = DEFAULT_PRECISION):
+        self._span = window / buckets
+        self._buckets = buckets
+        self._precision = precision
+        # (桶编号, 估计器)，最旧的在前
+        self._ring: 'deque[Tuple[int, HyperLogLog]]' = deque()
+        # 已结束的桶的合并结果，及计算时的当前桶编号
+        self._closed: Optional[HyperLogLog] = None
+        self._closed_number = -1
+
+    def add_position(self, index: int, rank: int, now: float):
+        """
+        在当前桶中加入用户
+
+        Args:
+            index: 寄存器下标
+            rank: 秩
+            now: 当前时间
+        """
+        number = int(now // self._span)
+        ring = self._ring
+        if not ring or ring[-1][0] != number:
+            self._expire(number)
+            ring.append((number, HyperLogLog(self._precision)))
+        ring[-1][1].add_position(index, rank)
+
+    def sketch(self, now: float) -> HyperLogLog:
+        """
+        合并窗口内的所有桶
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            HyperLogLog: 窗口内用户的估计器（新对象，可继续合并）
+        """
+        number = int(now // self._span)
+        self._expire(number)
+        ring = self._ring
+        if not ring:
+            return HyperLogLog(self._precision)
+
+        # 进入新的桶后重新合并已结束的桶
+        current = ring[-1][1] if ring[-1][0] == number else None
+        if self._closed is None or self._closed_number != number:
+            closed = HyperLogLog(self._precision)
+            for _, bucket in ring:
+                if bucket is not current:
+                    closed.merge(bucket)
+            self._closed = closed
+            self._closed_number = number
+        merged = self._closed.copy()
+        if current is not None:
+            merged.merge(current)
+        return merged
+
+    def clear(self):
+        """
+        清空所有桶
+        """
+        self._ring.clear()
+        self._closed = None
+
+    def _expire(self, number: int):
+        """
+        丢弃窗口外的桶
+
+        Args:
+            number: 当前桶编号
+        """
+        ring = self._ring
+        while ring and ring[0][0] <= number - self._buckets:
+            ring.popleft()
+
+
+class UniqueCounter:
+    """
+    一种独立用户统计，包括各滑动窗口和整场
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        self._session = HyperLogLog(precision)
+        self._windows = [(name, WindowedHyperLogLog(window, buckets, precision))
+                         for name, window, buckets in WINDOWS]
+
+    def add(self, user_id: Any, now: float):
+        """
+        加入一个用户
+
+        Args:
+            user_id: 用户ID
+            now: 当前时间
+        """
+        index, rank = self._session.position(user_id)
+        self._session.add_position(index, rank)
+        for _, window in self._windows:
+            window.add_position(index, rank, now)
+
+    def sketches(self, now: float) -> Dict[str, HyperLogLog]:
+        """
+        获取各窗口的估计器
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            Dict[str, HyperLogLog]: 窗口名称 -> 估计器（新对象）
+        """
+        sketches = {name: window.sketch(now) for name, window in self._windows}
+        sketches[SESSION_WINDOW] = self._session.copy()
+        return sketches
+
+    def clear(self):
+        """
+        清空统计
+        """
+        self._session.clear()
+        for _, window in self._windows:
+            window.clear()
+
+
+class UniqueUserTracker:
+    """
+    单个直播间的独立观众和独立发言统计
+
+    observe() 在消息处理线程中调用，estimates() / sketches() 可在任意线程调用
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._viewers = UniqueCounter(precision)
+        self._chatters = UniqueCounter(precision)
+
+    def observe(self, message: Dict[str, Any]):
+        """
+        记录一条消息的用户
+
+        Args:
+            message: 处理后的消息
+        """
+        user_id = message.get('user_id')
+        if not user_id:
+            return
+        now = self._clock()
+        with self._lock:
+            self._viewers.add(user_id, now)
+            if message.get('type') in CHATTER_MESSAGE_TYPES:
+                self._chatters.add(user_id, now)
+
+    def sketches(self, now: Optional[float] = None) -> Dict[str, Dict[str, HyperLogLog]]:
+        """
+        获取各统计各窗口的估计器，用于与其他直播间合并
+
+        Args:
+            now: 当前时间，默认为时钟时间
+
+        Returns:
+            Dict[str, Dict[str, HyperLogLog]]: {'viewers' / 'chatters': {窗口名称: 估计器}}
+        """
+        if now is None:
+            now = self._clock()
+        with self._lock:
+            return {
+                'viewers': self._viewers.sketches(now),
+                'chatters': self._chatters.sketches(now)
+            }
+
+    def estimates(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        估计独立用户数
+
+        Returns:
+            Dict[str, int]: 如 {'unique_viewers_1m': ..., 'unique_viewers_10m': ...,
+            'unique_viewers': ..., 'unique_chatters_1m': ...}，整场统计不带窗口后缀
+        """
+        return _estimate_sketches(self.sketches(now))
+
+    def reset(self):
+        """
+        清空统计
+        """
+        with self._lock:
+            self._viewers.clear()
+            self._chatters.clear()
+
+
+def _estimate_sketches(sketches: Dict[str, Dict[str, HyperLogLog]]) -> Dict[str, int]:
+    estimates = {}
+    for kind, windows in sketches.items():
+        for name, sketch in windows.items():
+            key = f"unique_{kind}" if name == SESSION_WINDOW else f"unique_{kind}_{name}"
+            estimates[key] = sketch.estimate()
+    return estimates
+
+
+def metric_samples(estimates: Dict[str, int]) -> List[Tuple[Dict[str, str], float]]:
+    """
+    把估计结果转换为带 kind / window 标签的指标样本
+
+    Args:
+        estimates: estimates() 的结果
+
+    Returns:
+        List[Tuple[Dict[str, str], float]]: (标签, 值)
+    """
+    samples = []
+    for key, value in estimates.items():
+        kind, _, window = key[len('unique_'):].partition('_')
+        samples.append(({'kind': kind, 'window': window or SESSION_WINDOW}, value))
+    return samples
+
+
+def merge_unique_users(trackers: Iterable[UniqueUserTracker], now: Optional[float] = None) -> Dict[str, int]:
+    """
+    估计多个直播间合计的独立用户数（同一用户出现在多个直播间只计一次）
+
+    Args:
+        trackers: 各直播间的统计
+        now: 当前时间，默认为时钟时间
+
+    Returns:
+        Dict[str, int]: 与 UniqueUserTracker.estimates() 相同的键
+    """
+    merged: Dict[str, Dict[str, HyperLogLog]] = {}
+    for tracker in trackers:
+        for kind, windows in tracker.sketches(now).items():
+            target = merged.setdefault(kind, {})
+            for name, sketch in windows.items():
+                if name in target:
+                    target[name].merge(sketch)
+                else:
+                    target[name] = sketch
+    return _estimate_sketches(merged)
+
+
+class UniqueUsersTotal:
+    """
+    所有直播间合计的独立用户指标采集器
+
+    以弱引用保存各直播间的统计，抓取时合并寄存器
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trackers: 'weakref.WeakSet' = weakref.WeakSet()
+
+    def add(self, tracker: UniqueUserTracker):
+        """
+        加入一个直播间的统计
+
+        Args:
+            tracker: 独立用户统计
+        """
+        with self._lock:
+            self._trackers.add(tracker)
+
+    def discard(self, tracker: UniqueUserTracker):
+        """
+        移除一个直播间的统计
+
+        Args:
+            tracker: 独立用户统计
+        """
+        with self._lock:
+            self._trackers.discard(tracker)
+
+    def estimates(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        估计所有直播间合计的独立用户数
+
+        Returns:
+            Dict[str, int]: 与 UniqueUserTracker.estimates() 相同的键
+        """
+        with self._lock:
+            trackers = list(self._trackers)
+        return merge_unique_users(trackers, now)
+
+    def collect(self):
+        """
+        生成指标族
+
+        Returns:
+            Iterable[MetricFamily]: 指标族列表
+        """
+        yield ('tvs_unique_users_all_rooms', 'gauge', "所有直播间合计的独立用户数估计",
+               metric_samples(self.estimates()))
+
+
+# 进程内所有直播间的合计
+unique_users_total = UniqueUsersTotal()
@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wire Format
+标准化消息的二进制编码
+
+进程间传输、归档和回放共用的紧凑二进制格式。一批消息编码为一个带长度前缀的记录:
+
+    u32   批次长度（不含本字段）
+    2B    魔数 b'TV'
+    u8    版本号
+    u8    标志位（保留，当前为0）
+    varint 消息数
+    varint 字符串表长度
+    字符串表: 每项为 varint 长度 + UTF-8 数据
+    消息记录 × 消息数
+
+每条消息记录:
+
+    u8    消息类型
+    u8    优先级
+    u16   字段存在位图
+    f64×5 server_time / receive_time / decode_time / dispatch_time / timestamp
+    按位图顺序写入的常用字段: 整数为 zigzag varint，字符串为字符串表下标
+    varint 其他字段数，之后每项为 键（字符串表下标）+ 带类型标记的值
+
+同一批次中重复的用户名、礼物名、cursor 等字符串只存一次。
+解码直接在 bytes / memoryview（例如共享内存）上按偏移读取，不复制数据。
+"""
+
+import struct
+from enum import IntEnum
+from typing import Dict, Any, List, Iterator, Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# 魔数和版本号，版本号不同的批次拒绝解码
+MAGIC = b'TV'
+WIRE_VERSION = 1
+
+# 批次长度前缀
+BATCH_LENGTH = struct.Struct('<I')
+
+# 批次头部: 魔数、版本号、标志位
+BATCH_HEADER = struct.Struct('<2sBB')
+
+# 消息记录的固定头部: 类型、优先级、字段位图、5个时间戳
+EVENT_HEADER = struct.Struct('<BBH5d')
+
+FLOAT64 = struct.Struct('<d')
+
+# 固定头部中的时间戳字段（位图第0~4位）
+TIMESTAMP_FIELDS = ('server_time', 'receive_time', 'decode_time', 'dispatch_time', 'timestamp')
+
+# 优先级（位图第5位）
+PRIORITY_BIT = 1 << 5
+
+# 整数字段（位图第6~8位）
+INT_FIELDS = ('msg_id', 'user_id', 'count')
+INT_FIELDS_SHIFT = 6
+
+# 字符串字段（位图第9~14位）
+STR_FIELDS = ('user', 'content', 'gift_name', 'method', 'cursor', 'internal_ext')
+STR_FIELDS_SHIFT = 9
+
+# processed 标志（位图第15位，无数据）
+PROCESSED_BIT = 1 << 15
+
+# 编码时使用的 (位, 字段名) 表
+_TIMESTAMP_MASKS = tuple((bit, 1 << bit, name) for bit, name in enumerate(TIMESTAMP_FIELDS))
+_INT_MASKS = tuple((1 << (INT_FIELDS_SHIFT + offset), name) for offset, name in enumerate(INT_FIELDS))
+_STR_MASKS = tuple((1 << (STR_FIELDS_SHIFT + offset), name) for offset, name in enumerate(STR_FIELDS))
+
+# 其他字段的值类型标记
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STR = 5
+TAG_BYTES = 6
+TAG_LIST = 7
+TAG_DICT = 8
+
+
+class WireFormatError(ValueError):
+    """
+    二进制数据格式错误
+    """
+
+
+class _BatchEncoder:
+    """
+    单个批次的编码状态（字符串表和消息数据）
+    """
+
+    __slots__ = ('strings', 'string_index', 'body')
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.string_index: Dict[str, int] = {}
+        self.body = bytearray()
+
+    def intern(self, text: str) -> int:
+        index = self.string_index.get(text)
+        if index is None:
+            index = len(self.strings)
+            self.string_index[text] = index
+            self.strings.append(text)
+        return index
+
+    def write_varint(self, value: int):
+        body = self.body
+        while value > 0x7F:
+            body.append((value & 0x7F) | 0x80)
+            value >>= 7
+        body.append(value)
+
+    def write_value(self, value):
+        """
+        写入带类型标记的值
+
+        IntEnum 按整数写入，不支持的类型按 str() 写入
+        """
+        body = self.body
+        value_type = type(value)
+        if value_type is str:
+            body.append(TAG_STR)
+            self.write_varint(self.intern(value))
+        elif value is None:
+            body.append(TAG_NONE)
+        elif value_type is bool:
+            body.append(TAG_TRUE if value else TAG_FALSE)
+        elif value_type is int or isinstance(value, IntEnum):
+            body.append(TAG_INT)
+            self.write_varint(_zigzag(int(value)))
+        elif value_type is float:
+            body.append(TAG_FLOAT)
+            body += FLOAT64.pack(value)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            body.append(TAG_BYTES)
+            self.write_varint(len(value))
+            body += value
+        elif isinstance(value, (list, tuple)):
+            body.append(TAG_LIST)
+            self.write_varint(len(value))
+            for item in value:
+                self.write_value(item)
+        elif isinstance(value, dict):
+            body.append(TAG_DICT)
+            self.write_varint(len(value))
+            for key, item in value.items():
+                self.write_varint(self.intern(str(key)))
+                self.write_value(item)
+        else:
+            body.append(TAG_STR)
+            self.write_varint(self.intern(str(value)))
+
+    def write_event(self, event: Dict[str, Any]):
+        """
+        写入一条消息记录
+
+        常用字段的值类型不符时（例如 user 为 None）改为按其他字段写入
+        """
+        fields = 0
+        encoded = []
+        timestamps = [0.0, 0.0, 0.0, 0.0, 0.0]
+        for bit, mask, name in _TIMESTAMP_MASKS:
+            value = event.get(name)
+            if type(value) is float:
+                timestamps[bit] = value
+                fields |= mask
+                encoded.append(name)
+
+        priority = event.get('priority')
+        if _is_small_int(priority):
+            fields |= PRIORITY_BIT
+            encoded.append('priority')
+        else:
+            priority = 0
+
+        message_type = event.get('type', 0)
+        if _is_small_int(message_type):
+            if 'type' in event:
+                encoded.append('type')
+        else:
+            # 类型字段无效时头部写 UNKNOWN，原值作为其他字段保留
+            message_type = 0
+
+        int_values = []
+        for mask, name in _INT_MASKS:
+            value = event.get(name)
+            if type(value) is int or isinstance(value, IntEnum):
+                fields |= mask
+                int_values.append(int(value))
+                encoded.append(name)
+
+        str_values = []
+        for mask, name in _STR_MASKS:
+            value = event.get(name)
+            if type(value) is str:
+                fields |= mask
+                str_values.append(value)
+                encoded.append(name)
+
+        if event.get('processed') is True:
+            fields |= PROCESSED_BIT
+            encoded.append('processed')
+
+        body = self.body
+        body += EVENT_HEADER.pack(int(message_type), int(priority), fields, *timestamps)
+        for value in int_values:
+            self.write_varint((value << 1) if value >= 0 else ((-value << 1) - 1))
+        string_index = self.string_index
+        for value in str_values:
+            index = string_index.get(value)
+            if index is None:
+                index = self.intern(value)
+            if index < 0x80:
+                body.append(index)
+            else:
+                self.write_varint(index)
+
+        # 未被固定头部和位图表示的字段
+        if len(encoded) == len(event):
+            self.body.append(0)
+            return
+        extras = [(key, value) for key, value in event.items() if key not in encoded]
+        self.write_varint(len(extras))
+        for key, value in extras:
+            self.write_varint(self.intern(str(key)))
+            self.write_value(value)
+
+    def finish(self, count: int) -> bytes:
+        """
+        组装完整的批次
+        """
+        head = _BatchEncoder()
+        head.write_varint(count)
+        head.write_varint(len(self.strings))
+        for text in self.strings:
+            data = text.encode('utf-8', 'surrogatepass')
+            head.write_varint(len(data))
+            head.body += data
+        length = BATCH_HEADER.size + len(head.body) + len(self.body)
+        return b''.join((
+            BATCH_LENGTH.pack(length),
+            BATCH_HEADER.pack(MAGIC, WIRE_VERSION, 0),
+            head.body,
+            self.body
+        ))
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) if value >= 0 else ((-value << 1) - 1)
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+
+
+def _is_small_int(value) -> bool:
+    """
+    判断值能否写入固定头部的 u8 字段
+    """
+    return (type(value) is int or isinstance(value, IntEnum)) and 0 <= value <= 0xFF
+
+
+def encode_batch(events: List[Dict[str, Any]]) -> bytes:
+    """
+    编码一批消息
+
+    Args:
+        events: 标准化消息列表
+
+    Returns:
+        bytes: 带长度前缀的批次数据
+    """
+    encoder = _BatchEncoder()
+    for event in events:
+        encoder.write_event(event)
+    return encoder.finish(len(events))
+
+
+class _BatchDecoder:
+    """
+    单个批次的解码状态
+    """
+
+    __slots__ = ('buffer', 'position', 'strings')
+
+    def __init__(self, buffer: memoryview, position: int):
+        self.buffer = buffer
+        self.position = position
+        self.strings: List[str] = []
+
+    def read_varint(self) -> int:
+        buffer = self.buffer
+        position = self.position
+        byte = buffer[position]
+        position += 1
+        if byte < 0x80:
+            self.position = position
+            return byte
+        value = byte & 0x7F
+        shift = 7
+        while True:
+            byte = buffer[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.position = position
+                return value
+            shift += 7
+
+    def read_value(self):
+        tag = self.buffer[self.position]
+        self.position += 1
+        if tag == TAG_STR:
+            return self.strings[self.read_varint()]
+        if tag == TAG_INT:
+            return _unzigzag(self.read_varint())
+        if tag == TAG_FLOAT:
+            (value,) = FLOAT64.unpack_from(self.buffer, self.position)
+            self.position += 8
+            return value
+        if tag == TAG_NONE:
+            return None
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_FALSE:
+            return False
+        if tag == TAG_BYTES:
+            length = self.read_varint()
+            start = self.position
+            self.position += length
+            return self.buffer[start:self.position].tobytes()
+        if tag == TAG_LIST:
+            return [self.read_value() for _ in range(self.read_varint())]
+        if tag == TAG_DICT:
+            result = {}
+            for _ in range(self.read_varint()):
+                key = self.strings[self.read_varint()]
+                result[key] = self.read_value()
+            return result
+        raise WireFormatError(f"未知的值类型标记: {tag}")
+
+    def read_event(self) -> Dict[str, Any]:
+        buffer = self.buffer
+        (message_type, priority, fields, *timestamps) = EVENT_HEADER.unpack_from(buffer, self.position)
+        position = self.position + EVENT_HEADER.size
+
+        plan = _DECODE_PLANS.get(fields)
+        if plan is None:
+            plan = _DECODE_PLANS[fields] = _decode_plan(fields)
+        timestamp_fields, int_fields, str_fields, flags = plan
+
+        event = {'type': message_type}
+        for index, name in timestamp_fields:
+            event[name] = timestamps[index]
+        if fields & PRIORITY_BIT:
+            event['priority'] = priority
+
+        # 常用字段的varint大多只有1~2字节，这里内联单字节的情况
+        for name in int_fields:
+            byte = buffer[position]
+            if byte < 0x80:
+                position += 1
+                value = byte
+            else:
+                self.position = position
+                value = self.read_varint()
+                position = self.position
+            event[name] = (value >> 1) if not value & 1 else -((value + 1) >> 1)
+        strings = self.strings
+        for name in str_fields:
+            byte = buffer[position]
+            if byte < 0x80:
+                position += 1
+                event[name] = strings[byte]
+            else:
+                self.position = position
+                event[name] = strings[self.read_varint()]
+                position = self.position
+        if flags:
+            event.update(flags)
+
+        extra_count = buffer[position]
+        self.position = position + 1
+        if extra_count:
+            if extra_count >= 0x80:
+                self.position = position
+                extra_count = self.read_varint()
+            for _ in range(extra_count):
+                key = strings[self.read_varint()]
+                event[key] = self.read_value()
+        return event
+
+
+# 字段位图 -> 解码计划，同一来源的消息位图种类很少
+_DECODE_PLANS: Dict[int, tuple] = {}
+
+
+def _decode_plan(fields: int) -> tuple:
+    """
+    根据字段位图生成解码计划
+
+    Returns:
+        tuple: (时间戳字段, 整数字段, 字符串字段, 标志字段)
+    """
+    timestamp_fields = tuple(
+        (bit, name) for bit, name in enumerate(TIMESTAMP_FIELDS) if fields & (1 << bit)
+    )
+    int_fields = tuple(
+        name for offset, name in enumerate(INT_FIELDS) if fields & (1 << (INT_FIELDS_SHIFT + offset))
+    )
+    str_fields = tuple(
+        name for offset, name in enumerate(STR_FIELDS) if fields & (1 << (STR_FIELDS_SHIFT + offset))
+    )
+    flags = {'processed': True} if fields & PROCESSED_BIT else None
+    return timestamp_fields, int_fields, str_fields, flags
+
+
+def _open_batch(buffer: BytesLike, offset: int = 0):
+    """
+    检查批次头部并读取字符串表
+
+    Returns:
+        Tuple[_BatchDecoder, int, int]: (解码器, 消息数, 批次结束位置)
+    """
+    view = buffer if isinstance(buffer, memoryview) else memoryview(buffer)
+    if len(view) - offset < BATCH_LENGTH.size + BATCH_HEADER.size:
+        raise WireFormatError("批次数据不完整")
+    (length,) = BATCH_LENGTH.unpack_from(view, offset)
+    end = offset + BATCH_LENGTH.size + length
+    if end > len(view):
+        raise WireFormatError(f"批次数据不完整: 需要 {end - offset} 字节，实际 {len(view) - offset} 字节")
+    magic, version, _ = BATCH_HEADER.unpack_from(view, offset + BATCH_LENGTH.size)
+    if magic != MAGIC:
+        raise WireFormatError("批次魔数错误")
+    if version != WIRE_VERSION:
+        raise WireFormatError(f"不支持的版本号: {version}")
+
+    decoder = _BatchDecoder(view, offset + BATCH_LENGTH.size + BATCH_HEADER.size)
+    try:
+        count = decoder.read_varint()
+        strings = decoder.strings
+        for _ in range(decoder.read_varint()):
+            length = decoder.read_varint()
+            start = decoder.position
+            decoder.position += length
+            strings.append(str(view[start:decoder.position], 'utf-8', 'surrogatepass'))
+    except IndexError:
+        raise WireFormatError("字符串表数据不完整")
+    return decoder, count, end
+
+
+def iter_events(buffer: BytesLike, offset: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    逐条解码一个批次中的消息
+
+    Args:
+        buffer: 批次数据（可以是共享内存的 memoryview）
+        offset: 批次起始位置
+
+    Yields:
+        Dict[str, Any]: 消息
+    """
+    decoder, count, end = _open_batch(buffer, offset)
+    try:
+        for _ in range(count):
+            yield decoder.read_event()
+    except (IndexError, struct.error):
+        raise WireFormatError("消息记录数据不完整")
+    if decoder.position != end:
+        raise WireFormatError("批次长度与内容不一致")
+
+
+def decode_batch(buffer: BytesLike, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    解码一个批次
+
+    Args:
+        buffer: 批次数据（可以是共享内存的 memoryview）
+        offset: 批次起始位置
+
+    Returns:
+        List[Dict[str, Any]]: 消息列表
+    """
+    return list(iter_events(buffer, offset))
+
+
+def iter_batches(buffer: BytesLike) -> Iterator[List[Dict[str, Any]]]:
+    """
+    解码连续存放的多个批次（例如归档文件的内容）
+
+    Args:
+        buffer: 数据
+
+    Yields:
+        List[Dict[str, Any]]: 每个批次的消息列表
+    """
+    view = buffer if isinstance(buffer, memoryview) else memoryview(buffer)
+    offset = 0
+    while offset < len(view):
+        yield decode_batch(view, offset)
+        (length,) = BATCH_LENGTH.unpack_from(view, offset)
+        offset += BATCH_LENGTH.size + length
+
+
+def batch_size(buffer: BytesLike, offset: int = 0) -> int:
+    """
+    读取批次的总长度（含长度前缀），用于流式读取时判断数据是否完整
+
+    Args:
+        buffer: 数据
+        offset: 批次起始位置
+
+    Returns:
+        int: 批次总长度
+    """
+    (length,) = BATCH_LENGTH.unpack_from(buffer, offset)
+    return BATCH_LENGTH.size + length
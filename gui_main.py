@@ -5,10 +5,17 @@ TikTok Virtual Streamer GUI Application
 抖音虚拟主播GUI应用程序主入口
 """
 
+import time
+
+# 程序开始执行的时间，用于统计窗口显示前的耗时（包括下面的导入）
+STARTUP_TIME = time.perf_counter()
+
 import sys
 import os
+import argparse
+import importlib.util
 from PyQt5.QtWidgets import QApplication, QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
 
 # 添加项目根目录到Python路径
@@ -21,9 +28,15 @@ except ImportError as e:
     print("请确保所有依赖模块都已正确安装")
     sys.exit(1)
 
+# 启动耗时测试模式下输出的标记行
+STARTUP_MARKER = "STARTUP_WINDOW_SHOWN_MS"
+
 def check_dependencies():
     """
     检查必要的依赖模块是否已安装
+    
+    只查找模块而不导入: requests、websocket-client、JS引擎和 betterproto
+    在第一次连接时才导入，不拖慢窗口显示
     """
     required_modules = {
         'PyQt5': 'PyQt5',
@@ -36,9 +49,7 @@ def check_dependencies():
     missing_modules = []
     
     for module_name, package_name in required_modules.items():
-        try:
-            __import__(module_name)
-        except ImportError:
+        if importlib.util.find_spec(module_name) is None:
             missing_modules.append(package_name)
     
     if missing_modules:
@@ -50,6 +61,146 @@ def check_dependencies():
     
     return True
 
+def parse_arguments(argv):
+    """
+    解析命令行参数
+    
+    未识别的参数保留给QApplication处理
+    
+    Args:
+        argv: 命令行参数列表
+        
+    Returns:
+        Tuple[argparse.Namespace, list]: 解析结果和剩余参数
+    """
+    parser = argparse.ArgumentParser(description="抖音虚拟主播数据监控")
+    parser.add_argument(
+        '--metrics-port', type=int, default=None,
+        help="启用本地Prometheus指标端点的端口号（仅监听127.0.0.1）"
+    )
+    parser.add_argument(
+        '--decode-workers', type=int, default=0,
+        help="使用多进程解码池解码推送帧的工作进程数（0表示在获取线程中解码）"
+    )
+    parser.add_argument(
+        '--ingest-process', action='store_true',
+        help="在独立子进程中运行数据采集，界面卡顿时不影响接收"
+    )
+    parser.add_argument(
+        '--summary-threshold', type=float, default=300,
+        help="消息速率超过该值（条/秒）时低优先级消息按秒汇总显示"
+    )
+    parser.add_argument(
+        '--rich-messages', action='store_true',
+        help="在消息面板中显示头像、礼物图标和表情（图片在后台下载并缓存到 cache/assets）"
+    )
+    parser.add_argument(
+        '--export', choices=('jsonl', 'csv'), default=None,
+        help="开始监控后把消息导出到文件（也可在\"文件\"菜单中开启）"
+    )
+    parser.add_argument(
+        '--export-dir', default=None,
+        help="导出目录（默认为 exports/）"
+    )
+    parser.add_argument(
+        '--export-gzip', action='store_true',
+        help="导出文件使用gzip压缩"
+    )
+    parser.add_argument(
+        '--export-max-mb', type=float, default=64,
+        help="单个导出文件的大小上限（MB），超过后轮换"
+    )
+    parser.add_argument(
+        '--export-rotate-minutes', type=float, default=60,
+        help="导出文件的轮换间隔（分钟）"
+    )
+    parser.add_argument(
+        '--startup-benchmark', action='store_true',
+        help="窗口显示后输出启动耗时并退出（供 benchmarks/bench_startup.py 使用）"
+    )
+    return parser.parse_known_args(argv[1:])
+
+def export_options(args):
+    """
+    根据命令行参数生成导出器参数
+    
+    Args:
+        args: 命令行参数
+        
+    Returns:
+        dict: ExportSink 的参数，未指定 --export 时为 None
+    """
+    if args.export is None:
+        return None
+    options = {
+        'fmt': args.export,
+        'compress': args.export_gzip,
+        'max_bytes': int(args.export_max_mb * 1024 * 1024),
+        'rotate_interval': args.export_rotate_minutes * 60,
+    }
+    if args.export_dir:
+        options['directory'] = args.export_dir
+    return options
+
+def start_metrics_server(port):
+    """
+    启动本地指标导出服务
+    
+    Args:
+        port: 监听端口
+        
+    Returns:
+        MetricsServer: 指标服务，启动失败时返回None
+    """
+    from core.metrics import MetricsServer
+    
+    try:
+        server = MetricsServer(port)
+        server.start()
+        print(f"指标端点已启动: http://127.0.0.1:{port}/metrics")
+        return server
+    except OSError as e:
+        print(f"指标端点启动失败: {e}")
+        return None
+
+def install_profiler_signals(main_window):
+    """
+    安装性能分析信号处理器，便于在无法操作界面时采集分析数据
+    
+    Qt事件循环运行期间Python信号处理器不会被调用，
+    需要一个定时器周期性地回到Python解释器
+    
+    Args:
+        main_window: 主窗口
+        
+    Returns:
+        QTimer: 唤醒定时器，不支持信号时返回None
+    """
+    from core.profiler import install_signal_handlers
+    
+    def report(text):
+        print(text)
+        main_window.status_bar.showMessage(text)
+    
+    if not install_signal_handlers(main_window.profiler, report):
+        return None
+    
+    timer = QTimer()
+    timer.timeout.connect(lambda: None)
+    timer.start(500)
+    return timer
+
+def report_startup_time(app):
+    """
+    输出从程序开始执行到窗口显示的耗时并退出
+    
+    Args:
+        app: QApplication实例
+    """
+    elapsed = time.perf_counter() - STARTUP_TIME
+    print(f"{STARTUP_MARKER} {elapsed * 1000:.1f}", flush=True)
+    app.quit()
+
 def setup_application_style(app):
     """
     设置应用程序样式
@@ -96,8 +247,11 @@ def main():
     """
     主程序入口函数
     """
+    # 解析命令行参数
+    args, qt_argv = parse_arguments(sys.argv)
+    
     # 创建QApplication实例
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_argv)
     
     # 设置应用程序属性
     app.setApplicationName("TikTok Virtual Streamer")
@@ -123,14 +277,37 @@ def main():
     # 设置应用程序样式
     setup_application_style(app)
     
+    # 启动指标端点（可选）
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = start_metrics_server(args.metrics_port)
+    
+    # 启动多进程解码池（可选），需要在创建直播数据管理器之前启用；
+    # 独立采集进程模式下由子进程启用
+    if args.decode_workers > 0 and not args.ingest_process:
+        from core.decode_pool import enable_shared_decode_pool
+        enable_shared_decode_pool(args.decode_workers)
+    
     try:
         # 创建并显示主窗口
-        main_window = MainWindow()
+        main_window = MainWindow(ingest_process=args.ingest_process,
+                                 decode_workers=args.decode_workers,
+                                 summary_threshold=args.summary_threshold,
+                                 rich_messages=args.rich_messages,
+                                 export_options=export_options(args),
+                                 forward_metrics=metrics_server is not None)
         main_window.show()
         
         # 显示欢迎信息
         main_window.status_bar.showMessage("欢迎使用TikTok Virtual Streamer！请输入直播间地址开始监控。")
         
+        # 安装性能分析信号处理器（SIGUSR1: CPU采样, SIGUSR2: 内存快照）
+        signal_timer = install_profiler_signals(main_window)
+        
+        # 启动耗时测试: 窗口显示后的第一轮事件循环中输出耗时并退出
+        if args.startup_benchmark:
+            QTimer.singleShot(0, lambda: report_startup_time(app))
+        
     except Exception as e:
         QMessageBox.critical(
             None,
@@ -140,7 +317,16 @@ def main():
         return 1
     
     # 启动事件循环
-    return app.exec()
+    exit_code = app.exec()
+    
+    if metrics_server:
+        metrics_server.stop()
+    
+    if args.decode_workers > 0 and not args.ingest_process:
+        from core.decode_pool import shutdown_shared_decode_pool
+        shutdown_shared_decode_pool()
+    
+    return exit_code
 
 if __name__ == "__main__":
     # 设置异常处理
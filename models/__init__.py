@@ -10,7 +10,8 @@ __author__ = "TikTok Virtual Streamer Team"
 
 from .message_types import (
     MessageType, MessagePriority, ConnectionStatus, LiveStatus,
-    get_message_display_name, get_message_priority, get_message_color
+    get_message_display_name, get_message_priority, get_message_color,
+    message_type_mask, mask_to_message_types, ALL_MESSAGE_TYPES_MASK
 )
 
 __all__ = [
@@ -20,5 +21,8 @@ __all__ = [
     'LiveStatus',
     'get_message_display_name',
     'get_message_priority',
-    'get_message_color'
+    'get_message_color',
+    'message_type_mask',
+    'mask_to_message_types',
+    'ALL_MESSAGE_TYPES_MASK'
 ]
\ No newline at end of file
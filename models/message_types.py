@@ -8,7 +8,7 @@ Message Types Definition
 """
 
 from enum import Enum, IntEnum
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Iterable
 
 class MessageType(IntEnum):
     """
@@ -194,4 +194,34 @@ def get_live_status_display_name(status: LiveStatus) -> str:
     Returns:
         str: 显示名称
     """
-    return LIVE_STATUS_DISPLAY_NAMES.get(status, "未知状态")
\ No newline at end of file
+    return LIVE_STATUS_DISPLAY_NAMES.get(status, "未知状态")
+
+def message_type_mask(*message_types: MessageType) -> int:
+    """
+    计算消息类型位掩码
+    
+    Args:
+        message_types: 消息类型
+        
+    Returns:
+        int: 位掩码，每个消息类型占一位
+    """
+    mask = 0
+    for message_type in message_types:
+        mask |= 1 << int(message_type)
+    return mask
+
+def mask_to_message_types(mask: int) -> Iterable[MessageType]:
+    """
+    将位掩码展开为消息类型
+    
+    Args:
+        mask: 位掩码
+        
+    Returns:
+        Iterable[MessageType]: 掩码中包含的消息类型
+    """
+    return [message_type for message_type in MessageType if mask & (1 << int(message_type))]
+
+# 全部消息类型的位掩码
+ALL_MESSAGE_TYPES_MASK: int = message_type_mask(*MessageType)
\ No newline at end of file
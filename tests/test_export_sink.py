@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ExportSink 编码测试
+"""
+
+import csv
+import io
+import json
+
+from models.message_types import MessageType
+from core.export_sink import encode_jsonl, encode_csv, csv_header
+
+
+def test_jsonl_and_csv_use_the_same_type_names():
+    events = [
+        {'type': int(MessageType.CHAT), 'user': "观众", 'content': "你好"},
+        {'type': MessageType.GIFT, 'gift_name': "玫瑰", 'count': 3},
+        {'type': 99, 'content': "未知类型"},
+    ]
+    jsonl_types = [json.loads(line)['type'] for line in encode_jsonl(events).decode('utf-8').splitlines()]
+    text = (csv_header() + encode_csv(events)).decode('utf-8').lstrip('\ufeff')
+    csv_types = [row['type'] for row in csv.DictReader(io.StringIO(text))]
+    assert jsonl_types == csv_types == ['chat', 'gift', '99']
+
+
+def test_jsonl_does_not_modify_events():
+    event = {'type': int(MessageType.CHAT), 'content': "你好"}
+    encode_jsonl([event])
+    assert event['type'] == int(MessageType.CHAT)
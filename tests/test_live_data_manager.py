@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LiveDataManager 监控循环测试
+
+监控循环由管理器自己的线程驱动，不依赖Qt事件循环（LiveDataThread 中没有运行事件循环）
+"""
+
+import json
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from models.message_types import MessageType, message_type_mask
+from core.event_bus import DeliveryMode
+from core.gift_catalog import GiftCatalog
+from core.live_data_manager import LiveDataManager
+
+
+def wait_until(predicate, timeout=5.0, interval=0.05):
+    """等待条件成立，超时返回 False"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return predicate()
+
+
+@pytest.fixture
+def make_manager():
+    managers = []
+
+    def make(**kwargs):
+        kwargs.setdefault('keyword_file', None)
+        kwargs.setdefault('rules_file', None)
+        kwargs.setdefault('gift_catalog', GiftCatalog(path=None))
+        manager = LiveDataManager(**kwargs)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.stop_monitoring()
+
+
+def chat(content, msg_id, user_id=1):
+    return {
+        'type': int(MessageType.CHAT), 'msg_id': msg_id, 'user': f"用户{user_id}",
+        'user_id': user_id, 'content': content, 'receive_time': time.time()
+    }
+
+
+def test_keyword_file_change_is_hot_reloaded(tmp_path, make_manager):
+    keyword_file = tmp_path / "alert_keywords.txt"
+    keyword_file.write_text("alpha\n", encoding="utf-8")
+    manager = make_manager(keyword_file=str(keyword_file))
+    alerts = manager.event_bus.subscribe(
+        message_type_mask(MessageType.SYSTEM), mode=DeliveryMode.POLL, name="test-alerts"
+    )
+    manager._start_monitor_thread()
+    assert wait_until(lambda: manager.keyword_alert.scan(chat("alpha", 0)) is not None)
+    assert manager.keyword_alert.scan(chat("beta", 0)) is None
+
+    keyword_file.write_text("alpha\nbeta\n", encoding="utf-8")
+    assert wait_until(lambda: manager.keyword_alert.scan(chat("beta", 0)) is not None)
+
+    manager._on_message_received(chat("有人说 beta 了", 1001))
+    events = alerts.drain()
+    assert [event.get('alert') for event in events] == ['keyword']
+    assert 'beta' in events[0]['keywords']
+
+
+class FakeFetcher:
+    def __init__(self):
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_reconnect_racing_stop_does_not_leak_fetcher(make_manager):
+    manager = make_manager()
+    manager._is_running = True
+    started = []
+    starting = threading.Event()
+
+    def slow_start_fetcher():
+        starting.set()
+        time.sleep(0.2)
+        fetcher = FakeFetcher()
+        started.append(fetcher)
+        manager._fetcher = fetcher
+
+    manager._start_fetcher = slow_start_fetcher
+    reconnect = threading.Thread(target=manager._reconnect)
+    reconnect.start()
+    assert starting.wait(2.0)
+    manager.stop_monitoring()
+    reconnect.join(2.0)
+
+    # 停止监控等待正在进行的重连完成，再停止它创建的获取器
+    assert len(started) == 1 and started[0].stopped
+    assert manager._fetcher is None
+
+    # 停止之后的重连不再创建获取器
+    manager._reconnect()
+    assert len(started) == 1
+
+
+class ProbeOnceTransport:
+    current = 'websocket'
+
+    def __init__(self):
+        self.probed = False
+
+    def should_probe(self):
+        if self.probed:
+            return False
+        self.probed = True
+        return True
+
+
+def test_monitor_loop_probes_websocket_without_counting_reconnect(make_manager):
+    manager = make_manager()
+    manager._is_running = True
+    manager._transport = ProbeOnceTransport()
+    started = []
+
+    def start_fetcher():
+        manager._fetcher = FakeFetcher()
+        started.append(manager._fetcher)
+
+    manager._start_fetcher = start_fetcher
+
+    manager._start_monitor_thread()
+    assert wait_until(lambda: len(started) == 1)
+    assert manager.metrics.reconnects == 0
+    assert manager.metrics.transport_switches == 1
+
+    manager.stop_monitoring()
+    assert started[0].stopped
+    manager._probe_websocket()
+    time.sleep(0.2)
+    assert len(started) == 1
+
+
+def test_idle_burst_summary_is_flushed_by_monitor_loop(make_manager):
+    manager = make_manager(dedup_window=0.5)
+    chats = manager.event_bus.subscribe(
+        message_type_mask(MessageType.CHAT), mode=DeliveryMode.POLL, name="test-chats"
+    )
+    manager._start_monitor_thread()
+    for index in range(5):
+        manager._on_message_received(chat("666666", 2000 + index, user_id=index))
+
+    # 刷屏之后没有新消息，"×N"汇总由监控循环输出
+    summaries = []
+
+    def summary_arrived():
+        summaries.extend(event for event in chats.drain() if 'repeat_count' in event)
+        return bool(summaries)
+
+    assert wait_until(summary_arrived)
+    assert summaries[0]['repeat_count'] == 4
+    assert summaries[0]['repeat_users'] == 5
+
+
+def test_unique_user_estimates_refresh_from_monitor_loop(make_manager):
+    manager = make_manager()
+    emitted = []
+    manager.statistics_updated.connect(lambda statistics: emitted.append(dict(statistics)))
+    manager._start_monitor_thread()
+    for index in range(3):
+        manager._on_message_received(chat(f"第{index}条消息内容各不相同 {index * 7919}", 3000 + index, user_id=100 + index))
+
+    assert wait_until(lambda: manager.statistics['unique_chatters'] == 3)
+    assert manager.statistics['unique_chatters_1m'] == 3
+    assert any(statistics.get('unique_chatters') == 3 for statistics in emitted)
+
+
+def content_rule(word):
+    return json.dumps([{"name": "关键内容", "type": "chat", "field": "content", "op": "contains",
+                        "value": word, "cooldown": 0}], ensure_ascii=False)
+
+
+def test_alert_rules_file_change_is_hot_reloaded(tmp_path, make_manager):
+    rules_file = tmp_path / "alert_rules.json"
+    rules_file.write_text(content_rule("alpha"), encoding="utf-8")
+    manager = make_manager(rules_file=str(rules_file))
+    errors = []
+    manager.error_occurred.connect(errors.append)
+    alerts = manager.event_bus.subscribe(
+        message_type_mask(MessageType.SYSTEM), mode=DeliveryMode.POLL, name="test-alerts"
+    )
+    manager._start_monitor_thread()
+    assert wait_until(lambda: manager.alert_rules.evaluate(chat("alpha", 0)))
+
+    rules_file.write_text(content_rule("beta-longer"), encoding="utf-8")
+    assert wait_until(lambda: manager.alert_rules.evaluate(chat("beta-longer", 0)))
+    alerts.drain()
+    manager._on_message_received(chat("出现了 beta-longer", 4001))
+    assert [event.get('alert') for event in alerts.drain()] == ['rule']
+
+    # 规则文件错误通过 error_occurred 报告，保留之前的规则
+    rules_file.write_text("[{not json", encoding="utf-8")
+    assert wait_until(lambda: errors)
+    assert manager.alert_rules.evaluate(chat("beta-longer", 0))
+
+
+def test_shares_are_not_counted_as_follows(make_manager):
+    manager = make_manager()
+    manager._on_message_received({'type': int(MessageType.SOCIAL), 'msg_id': 5001, 'user': "观众",
+                                  'user_id': 42, 'action': 3, 'content': "分享了直播间"})
+    manager._on_message_received({'type': int(MessageType.FOLLOW), 'msg_id': 5002, 'user': "观众",
+                                  'user_id': 42, 'action': 1})
+    assert manager.statistics['follow_messages'] == 1
+    assert manager.statistics['total_messages'] == 2
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MessageDecoder 测试
+
+使用假的 protobuf 绑定: 每个消息类的 parse(payload) 返回预先登记的对象
+"""
+
+from types import SimpleNamespace
+
+from models.message_types import MessageType
+from core.gift_catalog import GiftCatalog
+from core.message_decoder import (
+    MessageDecoder, METHOD_MESSAGE_TYPES, SOCIAL_ACTION_FOLLOW, SOCIAL_ACTION_SHARE
+)
+
+# payload -> 解析结果
+PARSED = {}
+
+
+class FakeMessage:
+    def parse(self, data):
+        return PARSED[bytes(data)]
+
+
+def fake_bindings():
+    classes = {class_name: FakeMessage for _, class_name in METHOD_MESSAGE_TYPES.values()}
+    return SimpleNamespace(Response=FakeMessage, User=FakeMessage, **classes)
+
+
+def social_payload(key: bytes, action: int) -> bytes:
+    user = SimpleNamespace(nickname="观众", id=42, avatar_thumb=None)
+    PARSED[key] = SimpleNamespace(user=user, action=action, share_type=2 if action == SOCIAL_ACTION_SHARE else 0,
+                                  follow_count=1000)
+    return key
+
+
+def decode_social(action: int):
+    payload = social_payload(f"social-{action}".encode(), action)
+    PARSED[b'response'] = SimpleNamespace(
+        cursor='c', internal_ext='', fetch_interval=0, heartbeat_duration=0, need_ack=False, now=1,
+        messages=[SimpleNamespace(method='WebcastSocialMessage', msg_id=action, payload=payload)]
+    )
+    decoder = MessageDecoder(bindings=fake_bindings(), gift_catalog=GiftCatalog(path=None))
+    _, events = decoder.decode(b'response', receive_time=1.0)
+    assert len(events) == 1
+    return events[0]
+
+
+def test_social_follow_is_typed_follow():
+    event = decode_social(SOCIAL_ACTION_FOLLOW)
+    assert event['type'] == int(MessageType.FOLLOW)
+    assert event['action'] == SOCIAL_ACTION_FOLLOW
+    assert event['user'] == "观众"
+    assert event['follow_count'] == 1000
+
+
+def test_social_share_is_not_counted_as_follow():
+    event = decode_social(SOCIAL_ACTION_SHARE)
+    assert event['type'] == int(MessageType.SOCIAL)
+    assert event['action'] == SOCIAL_ACTION_SHARE
+    assert event['share_type'] == 2
+    assert event['content'] == "分享了直播间"
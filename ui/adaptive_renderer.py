@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive Renderer
+自适应消息渲染
+
+消息速率超过阈值时，逐行显示既看不清也会占满界面线程。
+超过阈值后 LOW / NORMAL 优先级的消息按秒汇总为一行（例如"点赞 312 次，进场 45 人，
+聊天 80 条（70 位用户）"），HIGH / CRITICAL 消息仍逐条显示；速率回落后恢复逐条显示。
+每次刷新追加到文本框的行数有上限，界面线程的开销与消息速率无关。
+"""
+
+import time
+from collections import deque, Counter
+from typing import Dict, Any, List, Callable, Optional
+
+from models.message_types import MessageType, MessagePriority, get_message_display_name
+
+# 默认切换到汇总显示的速率阈值（条/秒）
+DEFAULT_RATE_THRESHOLD = 300
+
+# 速率低于 阈值 × 该比例 时恢复逐条显示，避免在阈值附近来回切换
+DEFAULT_RESUME_RATIO = 0.5
+
+# 速率统计窗口（秒）
+DEFAULT_RATE_WINDOW = 3
+
+# 汇总模式下每次刷新最多逐条显示的高优先级消息数，超出部分计入汇总
+DEFAULT_MAX_LINES_PER_TICK = 20
+
+# 汇总行中各消息类型的写法，未列出的类型写作"<显示名称> N 条"
+SUMMARY_FORMATS = {
+    MessageType.LIKE: "点赞 {} 次",
+    MessageType.ENTER: "进场 {} 人",
+    MessageType.CHAT: "聊天 {} 条",
+    MessageType.FOLLOW: "关注 {} 人",
+    MessageType.GIFT: "礼物 {} 个",
+}
+
+
+class AdaptiveRenderer:
+    """
+    单个消息面板的自适应渲染器
+
+    不依赖Qt，输入一批消息，输出需要追加到文本框的行
+    """
+
+    def __init__(self, formatter: Callable[[Dict[str, Any]], str],
+                 rate_threshold: float = DEFAULT_RATE_THRESHOLD,
+                 resume_ratio: float = DEFAULT_RESUME_RATIO,
+                 rate_window: int = DEFAULT_RATE_WINDOW,
+                 max_lines_per_tick: int = DEFAULT_MAX_LINES_PER_TICK,
+                 clock: Callable[[], float] = time.time):
+        self._formatter = formatter
+        self._rate_threshold = rate_threshold
+        self._resume_ratio = resume_ratio
+        self._rate_window = rate_window
+        self._max_lines_per_tick = max_lines_per_tick
+        self._clock = clock
+
+        # 最近每秒的消息数: deque[(秒, 条数)]
+        self._rate_buckets: deque = deque()
+        self._summary_mode = False
+
+        # 当前秒的汇总
+        self._summary_second: Optional[int] = None
+        self._summary_counts: Counter = Counter()
+        self._summary_users: set = set()
+        self._summary_dropped = 0
+
+    @property
+    def summary_mode(self) -> bool:
+        """是否处于汇总显示模式"""
+        return self._summary_mode
+
+    @property
+    def rate_threshold(self) -> float:
+        """切换到汇总显示的速率阈值"""
+        return self._rate_threshold
+
+    @rate_threshold.setter
+    def rate_threshold(self, value: float):
+        self._rate_threshold = value
+
+    @property
+    def rate(self) -> float:
+        """最近的消息速率（条/秒）"""
+        now = int(self._clock())
+        total = sum(count for second, count in self._rate_buckets if second > now - self._rate_window)
+        return total / self._rate_window
+
+    def process(self, messages: List[Dict[str, Any]], received: Optional[int] = None) -> List[str]:
+        """
+        处理一批消息
+
+        Args:
+            messages: 本次取出的消息
+            received: 本次到达的消息总数（包括订阅队列已满时丢弃的），默认为 len(messages)
+
+        Returns:
+            List[str]: 需要追加显示的行
+        """
+        now = self._clock()
+        second = int(now)
+        if received is None:
+            received = len(messages)
+        self._record_rate(second, received)
+
+        lines = []
+        self._update_mode(now, lines)
+
+        # 上一秒的汇总已经结束
+        if self._summary_second is not None and self._summary_second != second:
+            self._flush_summary(lines)
+
+        if not self._summary_mode:
+            lines.extend(self._formatter(message) for message in messages)
+            return lines
+
+        self._summary_second = second
+        self._summary_dropped += received - len(messages)
+        shown = 0
+        for message in messages:
+            priority = message.get('priority', MessagePriority.NORMAL)
+            if priority == MessagePriority.CRITICAL or (
+                    priority == MessagePriority.HIGH and shown < self._max_lines_per_tick):
+                lines.append(self._formatter(message))
+                shown += 1
+                continue
+
+            message_type = message.get('type', MessageType.UNKNOWN)
+            self._summary_counts[message_type] += 1
+            if message_type == MessageType.CHAT:
+                self._summary_users.add(message.get('user_id') or message.get('user'))
+        return lines
+
+    def flush(self) -> List[str]:
+        """
+        输出尚未结束的汇总（例如停止监控时）
+
+        Returns:
+            List[str]: 需要追加显示的行
+        """
+        lines = []
+        self._flush_summary(lines)
+        return lines
+
+    def reset(self):
+        """
+        清空速率统计和汇总，恢复逐条显示
+        """
+        self._rate_buckets.clear()
+        self._summary_mode = False
+        self._summary_second = None
+        self._summary_counts.clear()
+        self._summary_users.clear()
+        self._summary_dropped = 0
+
+    def _record_rate(self, second: int, count: int):
+        """
+        记录到达的消息数
+
+        Args:
+            second: 当前秒
+            count: 消息数
+        """
+        buckets = self._rate_buckets
+        if buckets and buckets[-1][0] == second:
+            buckets[-1] = (second, buckets[-1][1] + count)
+        else:
+            buckets.append((second, count))
+        while buckets and buckets[0][0] <= second - self._rate_window:
+            buckets.popleft()
+
+    def _update_mode(self, now: float, lines: List[str]):
+        """
+        根据速率切换显示模式
+
+        Args:
+            now: 当前时间
+            lines: 输出行
+        """
+        rate = self.rate
+        if not self._summary_mode and rate > self._rate_threshold:
+            self._summary_mode = True
+            lines.append(f"[{self._time_text(now)}] [系统] 消息速率 {rate:.0f} 条/秒，"
+                         f"低优先级消息改为按秒汇总显示")
+        elif self._summary_mode and rate < self._rate_threshold * self._resume_ratio:
+            self._flush_summary(lines)
+            self._summary_mode = False
+            lines.append(f"[{self._time_text(now)}] [系统] 消息速率 {rate:.0f} 条/秒，恢复逐条显示")
+
+    def _flush_summary(self, lines: List[str]):
+        """
+        输出当前秒的汇总行
+
+        Args:
+            lines: 输出行
+        """
+        if self._summary_second is None:
+            return
+        counts = self._summary_counts
+        if counts or self._summary_dropped:
+            parts = []
+            for message_type, count in counts.most_common():
+                summary_format = SUMMARY_FORMATS.get(message_type)
+                if summary_format:
+                    part = summary_format.format(count)
+                else:
+                    part = f"{get_message_display_name(message_type)} {count} 条"
+                if message_type == MessageType.CHAT:
+                    part += f"（{len(self._summary_users)} 位用户）"
+                parts.append(part)
+            if self._summary_dropped:
+                parts.append(f"未显示 {self._summary_dropped} 条")
+            lines.append(f"[{self._time_text(self._summary_second)}] [汇总] " + "，".join(parts))
+
+        self._summary_second = None
+        counts.clear()
+        self._summary_users.clear()
+        self._summary_dropped = 0
+
+    @staticmethod
+    def _time_text(timestamp: float) -> str:
+        return time.strftime("%H:%M:%S", time.localtime(timestamp))
@@ -8,7 +8,10 @@ Main Window
 """
 
 import sys
+import html
 import time
+import threading
+from functools import partial
 from typing import Dict, Any, Optional
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
@@ -19,35 +22,31 @@ from PyQt5.QtWidgets import (
     QComboBox, QSlider, QApplication
 )
 from PyQt5.QtCore import (
-    Qt, QThread, pyqtSignal, QTimer, QSize, QRect
+    Qt, QThread, pyqtSignal, QTimer, QSize, QRect, QUrl
 )
 from PyQt5.QtGui import (
     QFont, QColor, QPalette, QIcon, QPixmap, QPainter,
-    QLinearGradient, QBrush
+    QLinearGradient, QBrush, QTextDocument
 )
 
-try:
-    from core.live_data_manager import LiveDataManager
-except ImportError:
-    # 如果导入失败，创建一个模拟的类
-    from PyQt5.QtCore import QObject
-    class LiveDataManager(QObject):
-        message_received = pyqtSignal(dict)
-        connection_status_changed = pyqtSignal(int)
-        live_status_changed = pyqtSignal(int)
-        error_occurred = pyqtSignal(str)
-        statistics_updated = pyqtSignal(dict)
-        
-        def start_monitoring(self, url):
-            return False
-        
-        def stop_monitoring(self):
-            pass
+# 数据管理器、采集进程、图片缓存、聊天热词和连接预取在第一次用到时才导入（见 LiveDataThread.run 等），
+# 它们依赖的 multiprocessing、http.client/ssl 和获取器不会拖慢窗口显示
+from core.event_bus import EventBus, DeliveryMode
+from core.latency_tracer import LatencyTracer
+from ui.adaptive_renderer import AdaptiveRenderer, DEFAULT_RATE_THRESHOLD
+from core.profiler import ProfilerController
+
+# 输入URL停顿该时间（毫秒）后开始预取直播间信息
+PREFETCH_DELAY_MS = 500
+
+# 统计信息转发到界面线程的最小间隔（秒）
+STATISTICS_INTERVAL = 1.0
 
 from models.message_types import (
     MessageType, MessagePriority, ConnectionStatus, LiveStatus,
     get_message_display_name, get_message_color,
-    get_connection_status_display_name, get_live_status_display_name
+    get_connection_status_display_name, get_live_status_display_name,
+    message_type_mask, ALL_MESSAGE_TYPES_MASK
 )
 
 class LiveDataThread(QThread):
@@ -58,15 +57,31 @@ class LiveDataThread(QThread):
     """
     
     # 信号定义
-    data_received = pyqtSignal(dict)
     error_occurred = pyqtSignal(str)
     status_changed = pyqtSignal(str)
+    connection_status_changed = pyqtSignal(int)
+    statistics_updated = pyqtSignal(dict)
+    startup_timeline = pyqtSignal(dict)
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self._live_url = None
         self._is_running = False
         self._data_manager = None
+        self._last_statistics = 0.0
+        
+        # 事件总线，消息通过订阅分发给各个消费者
+        self._event_bus = EventBus()
+    
+    @property
+    def event_bus(self):
+        """获取事件总线"""
+        return self._event_bus
+    
+    @property
+    def data_manager(self):
+        """获取数据管理器（线程开始运行后创建）"""
+        return self._data_manager
     
     def set_live_url(self, live_url: str):
         """
@@ -89,12 +104,15 @@ class LiveDataThread(QThread):
             self._is_running = True
             self.status_changed.emit("正在连接直播间...")
             
-            # 创建数据管理器
-            self._data_manager = LiveDataManager()
+            # 创建数据管理器（第一次连接时导入）
+            from core.live_data_manager import LiveDataManager
+            self._data_manager = LiveDataManager(event_bus=self._event_bus)
             
             # 连接信号
-            self._data_manager.message_received.connect(self.data_received.emit)
             self._data_manager.error_occurred.connect(self.error_occurred.emit)
+            self._data_manager.connection_status_changed.connect(self.connection_status_changed.emit)
+            self._data_manager.statistics_updated.connect(self._forward_statistics)
+            self._data_manager.startup_timeline.connect(self.startup_timeline.emit)
             
             # 开始监控
             if self._data_manager.start_monitoring(self._live_url):
@@ -114,6 +132,20 @@ class LiveDataThread(QThread):
             self._is_running = False
             self.status_changed.emit("已断开连接")
     
+    def _forward_statistics(self, statistics: Dict[str, Any]):
+        """
+        转发统计信息
+        
+        数据管理器每条消息都会更新统计信息，最多每秒转发一次副本给界面线程
+        
+        Args:
+            statistics: 统计数据
+        """
+        now = time.monotonic()
+        if now - self._last_statistics >= STATISTICS_INTERVAL:
+            self._last_statistics = now
+            self.statistics_updated.emit(dict(statistics))
+    
     def stop_thread(self):
         """
         停止线程
@@ -123,6 +155,108 @@ class LiveDataThread(QThread):
             self._data_manager.stop_monitoring()
         self.quit()
         self.wait()
+        
+        if self._event_bus:
+            self._event_bus.close()
+
+class IngestProcessThread(QThread):
+    """
+    独立采集进程线程
+    
+    与 LiveDataThread 接口相同，但获取器和数据管理器运行在子进程中，
+    子进程送来的消息批量发布到界面进程的事件总线
+    """
+    
+    # 信号定义
+    error_occurred = pyqtSignal(str)
+    status_changed = pyqtSignal(str)
+    connection_status_changed = pyqtSignal(int)
+    statistics_updated = pyqtSignal(dict)
+    # 启动耗时在子进程中统计，不转发；只为与 LiveDataThread 接口相同
+    startup_timeline = pyqtSignal(dict)
+    
+    def __init__(self, parent=None, decode_workers: int = 0, forward_metrics: bool = False):
+        super().__init__(parent)
+        self._live_url = None
+        self._is_running = False
+        self._decode_workers = decode_workers
+        self._forward_metrics = forward_metrics
+        self._process = None
+        
+        # 事件总线，消息通过订阅分发给各个消费者
+        self._event_bus = EventBus()
+    
+    @property
+    def event_bus(self):
+        """获取事件总线"""
+        return self._event_bus
+    
+    def set_live_url(self, live_url: str):
+        """
+        设置直播间URL
+        
+        Args:
+            live_url: 直播间URL
+        """
+        self._live_url = live_url
+    
+    def run(self):
+        """
+        线程运行方法
+        """
+        try:
+            if not self._live_url:
+                self.error_occurred.emit("直播间URL不能为空")
+                return
+            
+            self._is_running = True
+            self.status_changed.emit("正在启动采集进程...")
+            
+            from core.ingest_process import IngestProcess
+            self._process = IngestProcess(
+                on_events=self._publish_events,
+                on_connection_status=self.connection_status_changed.emit,
+                on_error=self.error_occurred.emit,
+                on_statistics=self.statistics_updated.emit,
+                decode_workers=self._decode_workers,
+                forward_metrics=self._forward_metrics
+            )
+            self._process.start(self._live_url)
+            self.status_changed.emit(f"采集进程已启动 (PID {self._process.pid})")
+            
+            # 保持线程运行，子进程退出时结束
+            while self._is_running and self._process.is_running:
+                self.msleep(100)
+                
+        except Exception as e:
+            self.error_occurred.emit(f"线程运行错误: {str(e)}")
+        finally:
+            if self._process:
+                self._process.stop()
+            self._is_running = False
+            self.status_changed.emit("已断开连接")
+    
+    def _publish_events(self, events):
+        """
+        把子进程送来的一批消息发布到事件总线
+        
+        Args:
+            events: 消息列表
+        """
+        if self._event_bus:
+            for event in events:
+                self._event_bus.publish(event)
+    
+    def stop_thread(self):
+        """
+        停止线程
+        """
+        self._is_running = False
+        self.quit()
+        self.wait()
+        
+        if self._event_bus:
+            self._event_bus.close()
 
 class MainWindow(QMainWindow):
     """
@@ -131,15 +265,54 @@ class MainWindow(QMainWindow):
     构建和管理整个应用程序的用户界面
     """
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, ingest_process: bool = False, decode_workers: int = 0,
+                 summary_threshold: float = DEFAULT_RATE_THRESHOLD, rich_messages: bool = False,
+                 export_options: Optional[Dict[str, Any]] = None, forward_metrics: bool = False):
         super().__init__(parent)
         
+        # 是否在独立进程中采集数据，以及子进程的解码工作进程数
+        self._ingest_process = ingest_process
+        self._decode_workers = decode_workers
+        
+        # 指标端点已启动时，采集子进程把房间指标转发到界面进程
+        self._forward_metrics = forward_metrics
+        
+        # 消息速率超过该阈值（条/秒）时低优先级消息按秒汇总显示
+        self._summary_threshold = summary_threshold
+        
+        # 图文消息: 显示头像、礼物图标和表情，图片在后台加载
+        self._pixmap_cache = None
+        if rich_messages:
+            from ui.pixmap_cache import PixmapCache
+            self._pixmap_cache = PixmapCache(parent=self)
+        
         # 初始化状态
         self._is_monitoring = False
         self._live_thread = None
         self._message_count = 0
         self._statistics = {}
         
+        # 消息面板订阅列表: [(订阅, 文本框, 自适应渲染器)]
+        self._message_subscriptions = []
+        
+        # 各订阅上次取出时的累计到达数，用于计算包括丢弃在内的到达速率
+        self._received_counts = {}
+        
+        # 聊天热词统计（ChatTermTracker，每次监控时导入并新建，在事件总线的订阅线程中计数）
+        self._term_tracker = None
+        
+        # 消息导出（ExportSink 的参数；每次监控新建导出器，在后台线程中写文件）
+        self._export_enabled = export_options is not None
+        self._export_options = dict(export_options or {})
+        self._export_sink = None
+        
+        # 延迟追踪（服务器时间到界面显示）
+        self._latency_tracer = LatencyTracer()
+        
+        # 性能分析（只采样界面线程以外的线程）
+        main_thread_id = threading.main_thread().ident
+        self._profiler = ProfilerController(thread_filter=lambda thread_id: thread_id != main_thread_id)
+        
         # 初始化UI
         self._init_ui()
         self._init_connections()
@@ -148,6 +321,11 @@ class MainWindow(QMainWindow):
         # 设置初始状态
         self._update_connection_status(ConnectionStatus.DISCONNECTED)
     
+    @property
+    def profiler(self) -> ProfilerController:
+        """获取性能分析控制器"""
+        return self._profiler
+    
     def _init_ui(self):
         """
         初始化用户界面
@@ -319,6 +497,20 @@ class MainWindow(QMainWindow):
         
         # 初始化统计表格
         self._init_statistics_table()
+        
+        # 聊天热词表格
+        terms_group = QGroupBox("聊天热词")
+        stats_layout.addWidget(terms_group)
+        terms_layout = QVBoxLayout(terms_group)
+        
+        self.hot_terms_table = QTableWidget()
+        self.hot_terms_table.setColumnCount(2)
+        self.hot_terms_table.setHorizontalHeaderLabels(["词", "热度"])
+        self.hot_terms_table.horizontalHeader().setStretchLastSection(True)
+        self.hot_terms_table.setAlternatingRowColors(True)
+        self.hot_terms_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.hot_terms_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        terms_layout.addWidget(self.hot_terms_table)
     
     def _init_statistics_table(self):
         """
@@ -332,7 +524,11 @@ class MainWindow(QMainWindow):
             ("进场消息", "0"),
             ("关注消息", "0"),
             ("运行时间", "00:00:00"),
-            ("最后消息时间", "无")
+            ("最后消息时间", "无"),
+            ("礼物钻石", "0"),
+            ("合并刷屏", "0"),
+            ("独立观众 1分/10分/全场", "0 / 0 / 0"),
+            ("独立发言 1分/10分/全场", "0 / 0 / 0")
         ]
         
         self.stats_table.setRowCount(len(stats_items))
@@ -356,6 +552,19 @@ class MainWindow(QMainWindow):
         self.message_count_label = QLabel("消息数: 0")
         self.status_bar.addPermanentWidget(self.message_count_label)
         
+        self.latency_label = QLabel("延迟 p50/p99: -")
+        self.latency_label.setToolTip("消息从服务器产生到界面显示的延迟（最近10-20秒）")
+        self.status_bar.addPermanentWidget(self.latency_label)
+        
+        self.startup_label = QLabel("首条消息: -")
+        self.startup_label.setToolTip("从点击开始监控到收到首条消息的时间")
+        self.status_bar.addPermanentWidget(self.startup_label)
+        
+        self.export_label = QLabel("")
+        self.export_label.setToolTip("消息导出的写入速率（最近10秒）")
+        self.export_label.hide()
+        self.status_bar.addPermanentWidget(self.export_label)
+        
         # 设置初始状态
         self.status_bar.showMessage("就绪")
     
@@ -374,6 +583,14 @@ class MainWindow(QMainWindow):
         clear_action.triggered.connect(self._clear_messages)
         file_menu.addAction(clear_action)
         
+        # 导出消息动作
+        self.export_action = QAction("导出消息到文件", self)
+        self.export_action.setCheckable(True)
+        self.export_action.setChecked(self._export_enabled)
+        self.export_action.setShortcut("Ctrl+E")
+        self.export_action.triggered.connect(self._toggle_export)
+        file_menu.addAction(self.export_action)
+        
         file_menu.addSeparator()
         
         # 退出动作
@@ -382,6 +599,34 @@ class MainWindow(QMainWindow):
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
         
+        # 调试菜单
+        debug_menu = menubar.addMenu("调试")
+        
+        # CPU采样动作
+        self.cpu_profile_action = QAction("CPU采样分析", self)
+        self.cpu_profile_action.setCheckable(True)
+        self.cpu_profile_action.setShortcut("Ctrl+Shift+P")
+        self.cpu_profile_action.triggered.connect(self._toggle_cpu_profile)
+        debug_menu.addAction(self.cpu_profile_action)
+        
+        # 内存快照动作
+        memory_snapshot_action = QAction("内存快照", self)
+        memory_snapshot_action.setShortcut("Ctrl+Shift+M")
+        memory_snapshot_action.triggered.connect(self._take_memory_snapshot)
+        debug_menu.addAction(memory_snapshot_action)
+        
+        # 停止内存追踪动作
+        stop_memory_action = QAction("停止内存追踪", self)
+        stop_memory_action.triggered.connect(self._stop_memory_tracing)
+        debug_menu.addAction(stop_memory_action)
+        
+        debug_menu.addSeparator()
+        
+        # 告警规则统计动作
+        alert_rules_action = QAction("告警规则统计", self)
+        alert_rules_action.triggered.connect(self._show_alert_rule_stats)
+        debug_menu.addAction(alert_rules_action)
+        
         # 帮助菜单
         help_menu = menubar.addMenu("帮助")
         
@@ -399,6 +644,9 @@ class MainWindow(QMainWindow):
         
         # URL输入框回车事件
         self.url_input.returnPressed.connect(self._toggle_monitoring)
+        
+        # 输入URL后提前预取直播间信息
+        self.url_input.textChanged.connect(lambda text: self.prefetch_timer.start(PREFETCH_DELAY_MS))
     
     def _init_timers(self):
         """
@@ -408,6 +656,19 @@ class MainWindow(QMainWindow):
         self.ui_update_timer = QTimer()
         self.ui_update_timer.timeout.connect(self._update_ui)
         self.ui_update_timer.start(1000)  # 每秒更新一次
+        
+        # 创建消息拉取定时器，批量从事件总线取出消息
+        self.message_drain_timer = QTimer()
+        self.message_drain_timer.timeout.connect(self._drain_messages)
+        
+        # 创建热词刷新定时器，热词变化较慢，不需要逐条刷新
+        self.hot_terms_timer = QTimer()
+        self.hot_terms_timer.timeout.connect(self._update_hot_terms)
+        
+        # 创建预取定时器，输入停顿后才开始预取，避免每输入一个字符都请求一次
+        self.prefetch_timer = QTimer()
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self._prefetch_room)
     
     def _apply_styles(self):
         """
@@ -530,16 +791,42 @@ class MainWindow(QMainWindow):
         
         try:
             # 创建并启动线程
-            self._live_thread = LiveDataThread()
+            if self._ingest_process:
+                self._live_thread = IngestProcessThread(
+                    decode_workers=self._decode_workers, forward_metrics=self._forward_metrics
+                )
+            else:
+                self._live_thread = LiveDataThread()
             self._live_thread.set_live_url(live_url)
             
             # 连接信号
-            self._live_thread.data_received.connect(self._on_message_received)
             self._live_thread.error_occurred.connect(self._on_error_occurred)
             self._live_thread.status_changed.connect(self._on_status_changed)
+            self._live_thread.connection_status_changed.connect(
+                lambda status: self._update_connection_status(ConnectionStatus(status))
+            )
+            self._live_thread.statistics_updated.connect(self._update_statistics)
+            self._live_thread.startup_timeline.connect(self._on_startup_timeline)
+            self.prefetch_timer.stop()
+            self.startup_label.setText("首条消息: -")
+            
+            # 订阅消息面板
+            self._subscribe_message_panels(self._live_thread.event_bus)
+            
+            # 订阅聊天热词统计
+            if self._live_thread.event_bus is not None:
+                from core.chat_terms import ChatTermTracker
+                self._term_tracker = ChatTermTracker()
+                self._term_tracker.attach(self._live_thread.event_bus)
+            
+            # 导出消息到文件
+            if self._export_enabled:
+                self._start_export()
             
             # 启动线程
             self._live_thread.start()
+            self.message_drain_timer.start(100)
+            self.hot_terms_timer.start(2000)
             
             # 更新UI状态
             self._is_monitoring = True
@@ -567,10 +854,28 @@ class MainWindow(QMainWindow):
         停止监控
         """
         try:
-            # 停止线程
+            # 显示剩余消息和未结束的汇总
+            self.message_drain_timer.stop()
+            self._drain_messages()
+            for _, text_edit, renderer in self._message_subscriptions:
+                for line in renderer.flush():
+                    text_edit.append(line)
+            
+            # 停止热词统计，保留最后一次的热词表格
+            self.hot_terms_timer.stop()
+            if self._term_tracker is not None:
+                self._term_tracker.detach()
+                self._update_hot_terms()
+                self._term_tracker = None
+            
+            # 写完导出队列中的消息（需要在关闭事件总线之前）
+            export_result = self._stop_export()
+            
+            # 停止线程（同时关闭事件总线和全部订阅）
             if self._live_thread:
                 self._live_thread.stop_thread()
                 self._live_thread = None
+            self._message_subscriptions = []
             
             # 更新UI状态
             self._is_monitoring = False
@@ -579,38 +884,71 @@ class MainWindow(QMainWindow):
             self.url_input.setEnabled(True)
             
             self._update_connection_status(ConnectionStatus.DISCONNECTED)
-            self.status_bar.showMessage("监控已停止")
+            self.status_bar.showMessage(f"监控已停止，{export_result}" if export_result else "监控已停止")
             
         except Exception as e:
             QMessageBox.critical(self, "错误", f"停止监控失败: {str(e)}")
     
-    def _on_message_received(self, message_data: Dict[str, Any]):
+    def _subscribe_message_panels(self, event_bus):
         """
-        处理收到的消息
+        为每个消息面板注册事件总线订阅
+        
+        每个面板只订阅自己关心的消息类型，由事件总线完成过滤
         
         Args:
-            message_data: 消息数据
+            event_bus: 事件总线
+        """
+        self._message_subscriptions = []
+        self._received_counts = {}
+        if event_bus is None:
+            return
+        
+        panels = [
+            ("all_messages", ALL_MESSAGE_TYPES_MASK, self.all_messages_text, 1000),
+            ("chat_messages", message_type_mask(MessageType.CHAT), self.chat_messages_text, 500),
+            ("gift_messages", message_type_mask(MessageType.GIFT), self.gift_messages_text, 500),
+            ("system_messages", message_type_mask(MessageType.SYSTEM, MessageType.LIVE_STATUS),
+             self.system_messages_text, 500),
+        ]
+        
+        for name, mask, text_edit, maxsize in panels:
+            subscription = event_bus.subscribe(
+                mask, mode=DeliveryMode.POLL, maxsize=maxsize, name=name
+            )
+            if self._pixmap_cache is not None:
+                formatter = partial(self._format_rich_message, text_edit)
+            else:
+                formatter = self._format_message
+            renderer = AdaptiveRenderer(formatter, self._summary_threshold)
+            self._message_subscriptions.append((subscription, text_edit, renderer))
+    
+    def _drain_messages(self):
+        """
+        从事件总线取出消息并显示到对应面板
+        
+        消息速率过高时由自适应渲染器把低优先级消息合并为每秒一行，
+        没有新消息时也要调用渲染器，以便输出汇总和恢复逐条显示
         """
         try:
-            # 更新消息计数
-            self._message_count += 1
-            self.message_count_label.setText(f"消息数: {self._message_count}")
-            
-            # 格式化消息
-            formatted_message = self._format_message(message_data)
-            
-            # 添加到所有消息
-            self.all_messages_text.append(formatted_message)
-            
-            # 根据消息类型添加到对应标签页
-            message_type = message_data.get('type', MessageType.UNKNOWN)
-            
-            if message_type == MessageType.CHAT:
-                self.chat_messages_text.append(formatted_message)
-            elif message_type == MessageType.GIFT:
-                self.gift_messages_text.append(formatted_message)
-            elif message_type in [MessageType.SYSTEM, MessageType.LIVE_STATUS]:
-                self.system_messages_text.append(formatted_message)
+            for index, (subscription, text_edit, renderer) in enumerate(self._message_subscriptions):
+                messages = subscription.drain()
+                received = subscription.received - self._received_counts.get(subscription.name, 0)
+                self._received_counts[subscription.name] = subscription.received
+                
+                for line in renderer.process(messages, max(received, len(messages))):
+                    text_edit.append(line)
+                
+                if not messages:
+                    continue
+                
+                # 第一个订阅是所有消息面板，用于更新消息计数和延迟统计
+                if index == 0:
+                    self._message_count += len(messages)
+                    self.message_count_label.setText(f"消息数: {self._message_count}")
+                    
+                    render_time = time.time()
+                    for message_data in messages:
+                        self._latency_tracer.record(message_data, render_time)
             
         except Exception as e:
             self.status_bar.showMessage(f"处理消息错误: {str(e)}")
@@ -626,7 +964,9 @@ class MainWindow(QMainWindow):
             str: 格式化后的消息
         """
         try:
-            timestamp = time.strftime("%H:%M:%S", time.localtime())
+            # 优先显示服务器时间，而不是界面处理时间
+            message_time = message_data.get('timestamp') or time.time()
+            timestamp = time.strftime("%H:%M:%S", time.localtime(message_time))
             message_type = message_data.get('type', MessageType.UNKNOWN)
             type_name = get_message_display_name(message_type)
             
@@ -658,16 +998,97 @@ class MainWindow(QMainWindow):
                 user = message_data.get('user', '未知用户')
                 formatted += f"{user} 关注了主播"
             
+            elif message_type == MessageType.SOCIAL:
+                user = message_data.get('user', '未知用户')
+                formatted += f"{user} {message_data.get('content', '')}"
+            
             else:
                 # 其他类型消息
                 content = message_data.get('content', str(message_data))
                 formatted += content
             
+            formatted += self._repeat_suffix(message_data)
             return formatted
             
         except Exception as e:
             return f"[{time.strftime('%H:%M:%S')}] [错误] 消息格式化失败: {str(e)}"
     
+    def _format_rich_message(self, text_edit: QTextEdit, message_data: Dict[str, Any]) -> str:
+        """
+        格式化图文消息
+        
+        已加载的图片作为文档资源内嵌显示；未加载的图片在后台加载，本条消息先只显示文字，
+        之后同一头像、礼物或表情的消息再显示图片
+        
+        Args:
+            text_edit: 显示消息的文本框
+            message_data: 消息数据
+            
+        Returns:
+            str: 格式化后的HTML
+        """
+        message_type = message_data.get('type', MessageType.UNKNOWN)
+        if message_type not in (MessageType.CHAT, MessageType.GIFT, MessageType.EMOJI):
+            return self._format_message(message_data)
+        
+        try:
+            message_time = message_data.get('timestamp') or time.time()
+            timestamp = time.strftime("%H:%M:%S", time.localtime(message_time))
+            type_name = get_message_display_name(message_type)
+            user = html.escape(message_data.get('user', '未知用户'))
+            avatar = self._image_html(text_edit, message_data.get('avatar_url'))
+            formatted = f"[{timestamp}] [{type_name}] {avatar}"
+            
+            if message_type == MessageType.GIFT:
+                gift_name = html.escape(message_data.get('gift_name', '未知礼物'))
+                icon = self._image_html(text_edit, message_data.get('gift_icon_url'))
+                count = message_data.get('count', 1)
+                formatted += f"{user} 送出 {icon}{gift_name} x{count}"
+            else:
+                content = html.escape(message_data.get('content', ''))
+                emojis = ''.join(self._image_html(text_edit, url) for url in message_data.get('emoji_urls', ()))
+                formatted += f"{user}: {content}{emojis}{self._repeat_suffix(message_data)}"
+            
+            # 整行包在 <span> 中，没有图片时文本框也按HTML解析
+            return f"<span>{formatted}</span>"
+            
+        except Exception as e:
+            return f"[{time.strftime('%H:%M:%S')}] [错误] 消息格式化失败: {str(e)}"
+    
+    @staticmethod
+    def _repeat_suffix(message_data: Dict[str, Any]) -> str:
+        """
+        刷屏合并汇总消息的"×N"后缀
+        
+        Args:
+            message_data: 消息数据
+            
+        Returns:
+            str: 后缀，普通消息为空字符串
+        """
+        repeat_count = message_data.get('repeat_count')
+        if not repeat_count:
+            return ''
+        return f" ×{repeat_count}（{message_data.get('repeat_users', 1)} 位用户）"
+    
+    def _image_html(self, text_edit: QTextEdit, url: Optional[str]) -> str:
+        """
+        生成内嵌图片的HTML，图片未加载时发起加载并返回空字符串
+        
+        Args:
+            text_edit: 显示图片的文本框
+            url: 图片URL
+            
+        Returns:
+            str: <img> 标签或空字符串
+        """
+        pixmap = self._pixmap_cache.pixmap(url) if url else None
+        if pixmap is None:
+            return ''
+        # 以URL作为资源名放入文档，文档不再向外部加载
+        text_edit.document().addResource(QTextDocument.ImageResource, QUrl(url), pixmap)
+        return f'<img src="{html.escape(url)}" width="20" height="20"> '
+    
     def _on_error_occurred(self, error_message: str):
         """
         处理错误
@@ -704,7 +1125,7 @@ class MainWindow(QMainWindow):
         # 设置状态指示器颜色
         if status == ConnectionStatus.CONNECTED:
             color = "#4CAF50"  # 绿色
-        elif status == ConnectionStatus.CONNECTING:
+        elif status in (ConnectionStatus.CONNECTING, ConnectionStatus.RECONNECTING):
             color = "#FF9800"  # 橙色
         elif status == ConnectionStatus.ERROR:
             color = "#f44336"  # 红色
@@ -754,6 +1175,16 @@ class MainWindow(QMainWindow):
             else:
                 stats_mapping[7] = "无"
             
+            # 按礼物目录单价累计的营收
+            stats_mapping[8] = str(statistics.get('gift_diamonds', 0))
+            stats_mapping[9] = str(statistics.get('duplicate_messages', 0))
+            
+            # 独立用户数（HyperLogLog估计值）
+            for row, kind in ((10, 'viewers'), (11, 'chatters')):
+                stats_mapping[row] = " / ".join(
+                    str(statistics.get(f"unique_{kind}{suffix}", 0)) for suffix in ('_1m', '_10m', '')
+                )
+            
             # 更新表格
             for row, value in stats_mapping.items():
                 if row < self.stats_table.rowCount():
@@ -762,12 +1193,124 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.status_bar.showMessage(f"更新统计信息错误: {str(e)}")
     
+    def _prefetch_room(self):
+        """
+        在点击开始监控之前预取直播间信息并预热解码器
+        
+        独立采集进程模式下连接在子进程中建立，界面进程的预取用不上
+        """
+        if self._is_monitoring or self._ingest_process:
+            return
+        from core.cold_start import get_startup_prefetcher
+        get_startup_prefetcher().prefetch(self.url_input.text())
+    
+    def _on_startup_timeline(self, summary: Dict[str, Any]):
+        """
+        显示启动各步骤的耗时
+        
+        Args:
+            summary: 启动耗时（time_to_first_message 和各步骤）
+        """
+        from core.cold_start import format_startup_summary
+        text = format_startup_summary(summary)
+        self.startup_label.setText(f"首条消息: {summary['time_to_first_message']:.2f}s")
+        self.startup_label.setToolTip(text)
+        self.status_bar.showMessage(text)
+    
     def _update_ui(self):
         """
         定期更新UI
         """
-        # 这里可以添加定期更新的逻辑
-        pass
+        self._update_latency_label()
+        if self._export_sink is not None:
+            from core.export_sink import format_export_status
+            self.export_label.setText(format_export_status(self._export_sink.stats()))
+    
+    def _toggle_export(self, checked: bool):
+        """
+        开启或关闭消息导出，监控中时立即生效
+        
+        Args:
+            checked: 是否导出
+        """
+        self._export_enabled = checked
+        if not self._is_monitoring:
+            directory = self._export_options.get('directory') or "exports"
+            self.status_bar.showMessage(f"开始监控后导出消息到 {directory}" if checked else "已关闭消息导出")
+            return
+        if checked:
+            self._start_export()
+        else:
+            result = self._stop_export()
+            if result:
+                self.status_bar.showMessage(result)
+    
+    def _start_export(self):
+        """
+        在当前监控的事件总线上创建导出器，文件名以直播间号开头
+        """
+        if self._export_sink is not None or self._live_thread is None or self._live_thread.event_bus is None:
+            return
+        from core.export_sink import ExportSink
+        from core.polling_fetcher import parse_web_rid
+        
+        options = dict(self._export_options)
+        web_rid = parse_web_rid(self.url_input.text().strip())
+        options.setdefault('prefix', f"live-{web_rid}" if web_rid.isdigit() else "live")
+        try:
+            sink = ExportSink(**options)
+            sink.attach(self._live_thread.event_bus)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "警告", f"启动消息导出失败: {str(e)}")
+            self._export_enabled = False
+            self.export_action.setChecked(False)
+            return
+        self._export_sink = sink
+        self.export_label.setText("导出: -")
+        self.export_label.show()
+        self.status_bar.showMessage(f"正在导出消息到 {sink.directory}")
+    
+    def _stop_export(self) -> Optional[str]:
+        """
+        关闭导出器（写完队列中的消息并关闭文件）
+        
+        Returns:
+            Optional[str]: 导出结果说明，没有在导出时为 None
+        """
+        sink, self._export_sink = self._export_sink, None
+        if sink is None:
+            return None
+        sink.close()
+        self.export_label.hide()
+        stats = sink.stats()
+        return f"已导出 {stats['events_written']} 条消息到 {sink.directory}（{stats['files_completed']} 个文件）"
+    
+    def _update_hot_terms(self):
+        """
+        刷新聊天热词表格
+        """
+        if self._term_tracker is None:
+            return
+        
+        hot_terms = self._term_tracker.hot_terms(10)
+        self.hot_terms_table.setRowCount(len(hot_terms))
+        for row, (term, value) in enumerate(hot_terms):
+            self.hot_terms_table.setItem(row, 0, QTableWidgetItem(term))
+            self.hot_terms_table.setItem(row, 1, QTableWidgetItem(f"{value:.0f}"))
+    
+    def _update_latency_label(self):
+        """
+        更新状态栏中落后服务器的延迟
+        """
+        if self._latency_tracer.sample_count('server_lag') == 0:
+            self.latency_label.setText("延迟 p50/p99: -")
+            return
+        
+        p50, p99 = self._latency_tracer.percentiles('server_lag')
+        text = f"延迟 p50/p99: {p50 * 1000:.0f} / {p99 * 1000:.0f} ms"
+        if self._message_subscriptions and self._message_subscriptions[0][2].summary_mode:
+            text += " (汇总显示)"
+        self.latency_label.setText(text)
     
     def _clear_messages(self):
         """
@@ -790,6 +1333,72 @@ class MainWindow(QMainWindow):
             
             self.status_bar.showMessage("消息已清空")
     
+    def _toggle_cpu_profile(self):
+        """
+        开始/停止CPU采样分析
+        """
+        try:
+            paths = self._profiler.toggle_cpu_profile()
+            self.cpu_profile_action.setChecked(self._profiler.is_cpu_profiling)
+            if paths:
+                self._show_profiler_result(f"CPU采样已保存: {', '.join(paths)}")
+            else:
+                self.status_bar.showMessage("CPU采样已开始，再次点击停止并保存")
+        except Exception as e:
+            self.cpu_profile_action.setChecked(self._profiler.is_cpu_profiling)
+            self.status_bar.showMessage(f"CPU采样失败: {str(e)}")
+    
+    def _take_memory_snapshot(self):
+        """
+        获取内存快照并与上一次快照对比
+        """
+        try:
+            path = self._profiler.take_memory_snapshot()
+            if path:
+                self._show_profiler_result(f"内存快照差异已保存: {path}")
+            else:
+                self.status_bar.showMessage("内存追踪已开始，再次获取快照时输出差异")
+        except Exception as e:
+            self.status_bar.showMessage(f"内存快照失败: {str(e)}")
+    
+    def _stop_memory_tracing(self):
+        """
+        停止内存追踪
+        """
+        self._profiler.stop_memory_tracing()
+        self.status_bar.showMessage("内存追踪已停止")
+    
+    def _show_alert_rule_stats(self):
+        """
+        显示各告警规则的检查次数、触发次数和耗时
+        """
+        data_manager = getattr(self._live_thread, 'data_manager', None)
+        if data_manager is None:
+            if self._ingest_process and self._is_monitoring:
+                text = "告警规则在采集进程中运行，请通过指标端点查看 tvs_alert_rule_* 指标"
+            else:
+                text = "开始监控后才能查看告警规则统计"
+            QMessageBox.information(self, "告警规则统计", text)
+            return
+        
+        from core.alert_rules import format_rule_stats
+        alert_rules = data_manager.alert_rules
+        text = f"规则文件: {alert_rules.rules_path or '未设置'}\n\n{format_rule_stats(alert_rules.stats())}"
+        box = QMessageBox(QMessageBox.Information, "告警规则统计", text, QMessageBox.Ok, self)
+        box.setStyleSheet("QLabel { font-family: monospace; }")
+        box.exec_()
+    
+    def _show_profiler_result(self, text: str):
+        """
+        显示性能分析结果
+        
+        Args:
+            text: 结果描述
+        """
+        self.status_bar.showMessage(text)
+        timestamp = time.strftime("%H:%M:%S", time.localtime())
+        self.system_messages_text.append(f"[{timestamp}] [性能分析] {text}")
+    
     def _show_about(self):
         """
         显示关于对话框
@@ -828,8 +1437,20 @@ class MainWindow(QMainWindow):
             # 停止监控
             self._stop_monitoring()
         
+        # 停止性能分析
+        if self._profiler.is_cpu_profiling:
+            self._profiler.stop_cpu_profile()
+        
         # 清理资源
         if self.ui_update_timer:
             self.ui_update_timer.stop()
+        if self.message_drain_timer:
+            self.message_drain_timer.stop()
+        if self.hot_terms_timer:
+            self.hot_terms_timer.stop()
+        if self.prefetch_timer:
+            self.prefetch_timer.stop()
+        if self._pixmap_cache is not None:
+            self._pixmap_cache.close()
         
         event.accept()
\ No newline at end of file
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pixmap Cache
+图片内存缓存
+
+在 AssetLoader 之上提供界面使用的 QPixmap 缓存。
+下载、读磁盘、解码和缩放（QImage）都在加载线程中完成，结果经Qt信号排队回到界面线程，
+界面线程只做 QPixmap.fromImage 和LRU维护，不会因为加载图片而阻塞。
+"""
+
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+from core.asset_cache import AssetLoader, DiskAssetStore, DEFAULT_WORKERS
+
+# 默认内存缓存上限（字节，按 宽 × 高 × 4 计算）
+DEFAULT_MEMORY_LIMIT = 32 * 1024 * 1024
+
+# 图片缩放到的最大边长（像素），消息面板只显示小图标
+DEFAULT_MAX_DIMENSION = 64
+
+
+def decode_image(data: bytes, max_dimension: int = DEFAULT_MAX_DIMENSION) -> Optional[QImage]:
+    """
+    解码并缩放图片（在加载线程中调用）
+
+    Args:
+        data: 图片内容
+        max_dimension: 最大边长，0表示不缩放
+
+    Returns:
+        Optional[QImage]: 图片，无法解码时为 None
+    """
+    image = QImage.fromData(data)
+    if image.isNull():
+        return None
+    if max_dimension and (image.width() > max_dimension or image.height() > max_dimension):
+        image = image.scaled(max_dimension, max_dimension, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+class PixmapCache(QObject):
+    """
+    QPixmap LRU缓存
+
+    pixmap() 命中时立即返回，未命中时发起后台加载并返回 None；
+    加载完成后发出 pixmap_ready 信号
+    """
+
+    # 信号: (URL, 图片)
+    pixmap_ready = pyqtSignal(str, QPixmap)
+
+    # 内部信号: 加载线程 -> 界面线程
+    _image_loaded = pyqtSignal(str, object)
+
+    def __init__(self, loader: Optional[AssetLoader] = None,
+                 memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                 max_dimension: int = DEFAULT_MAX_DIMENSION,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._loader = loader if loader is not None else AssetLoader(
+            DiskAssetStore(), DEFAULT_WORKERS, lambda data: decode_image(data, max_dimension)
+        )
+        self._memory_limit = memory_limit
+        self._pixmaps: 'OrderedDict[str, QPixmap]' = OrderedDict()
+        self._memory_used = 0
+        self._requested = set()
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._image_loaded.connect(self._on_image_loaded, Qt.QueuedConnection)
+        self._loader.start()
+
+    @property
+    def loader(self) -> AssetLoader:
+        """后台加载器"""
+        return self._loader
+
+    @property
+    def memory_used(self) -> int:
+        """缓存占用的字节数"""
+        return self._memory_used
+
+    def pixmap(self, url: str) -> Optional[QPixmap]:
+        """
+        获取图片
+
+        Args:
+            url: 图片URL
+
+        Returns:
+            Optional[QPixmap]: 已加载的图片，未加载时为 None（同时发起加载）
+        """
+        if not url:
+            return None
+        pixmap = self._pixmaps.get(url)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(url)
+            self.hits += 1
+            return pixmap
+
+        self.misses += 1
+        self.prefetch(url)
+        return None
+
+    def prefetch(self, url: str):
+        """
+        后台加载图片，不返回结果
+
+        Args:
+            url: 图片URL
+        """
+        if not url or url in self._pixmaps or url in self._requested:
+            return
+        if self._loader.request(url, self._on_loaded):
+            self._requested.add(url)
+
+    def clear(self):
+        """
+        清空内存缓存
+        """
+        self._pixmaps.clear()
+        self._memory_used = 0
+
+    def close(self):
+        """
+        停止后台加载
+        """
+        self._loader.stop()
+        self._requested.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        stats = self._loader.stats()
+        stats.update({
+            'pixmaps': len(self._pixmaps),
+            'memory_used': self._memory_used,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        })
+        return stats
+
+    def _on_loaded(self, url: str, image, error: Optional[str]):
+        """
+        加载完成回调（加载线程），转发到界面线程
+
+        Args:
+            url: 图片URL
+            image: QImage，失败时为 None
+            error: 错误信息
+        """
+        self._image_loaded.emit(url, image)
+
+    def _on_image_loaded(self, url: str, image):
+        """
+        在界面线程中把图片放入缓存
+
+        Args:
+            url: 图片URL
+            image: QImage，失败时为 None
+        """
+        self._requested.discard(url)
+        if image is None:
+            return
+
+        pixmap = QPixmap.fromImage(image)
+        old = self._pixmaps.pop(url, None)
+        if old is not None:
+            self._memory_used -= self._cost(old)
+        self._pixmaps[url] = pixmap
+        self._memory_used += self._cost(pixmap)
+
+        # 超出上限时淘汰最久未使用的图片
+        while self._memory_used > self._memory_limit and len(self._pixmaps) > 1:
+            _, evicted = self._pixmaps.popitem(last=False)
+            self._memory_used -= self._cost(evicted)
+            self.evictions += 1
+
+        self.pixmap_ready.emit(url, pixmap)
+
+    @staticmethod
+    def _cost(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * 4